@@ -0,0 +1,148 @@
+"""
+資料庫批次寫入基準測試
+比較逐筆 INSERT（每筆偵測與車牌各一次往返）與 save_detections_batch（多列 INSERT）
+的每秒寫入列數與每批延遲
+
+需要可連線的 PostgreSQL（使用 config/config.yaml 的連線設定）。
+請指定專用的測試資料庫，測試會在其中建立表格並寫入大量資料:
+
+執行: python benchmarks/bench_db_batch.py [資料庫名稱，預設 surveillance_bench]
+"""
+
+import json
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import psycopg2
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.config_manager import ConfigManager
+from database.handler import DatabaseHandler
+from database.init_db import create_tables
+
+
+MIGRATION = Path(__file__).parent.parent / 'database' / 'migrations' / 'add_snapshot_to_plate_records.sql'
+
+
+def make_frame(objects: int, frame_index: int):
+    """產生一幀的辨識結果（一半為帶車牌的車輛）"""
+    timestamp = datetime.now().astimezone().isoformat()
+    results = []
+    for i in range(objects):
+        details = {}
+        if i % 2 == 0:
+            details['license_plate'] = {
+                'plate_number': f"BEN-{(frame_index * objects + i) % 500:04d}",
+                'confidence': 0.9,
+                'is_valid': True
+            }
+        results.append({
+            'timestamp': timestamp,
+            'base_detection': {'class': 'car', 'confidence': 0.8,
+                               'bbox': [10 * i, 20, 10 * i + 80, 120]},
+            'details': details
+        })
+    return results
+
+
+def save_per_row(handler: DatabaseHandler, camera_id: str, results):
+    """逐筆寫入（批次化之前的 save_detection 寫法）"""
+    conn = handler.get_connection()
+    try:
+        cursor = conn.cursor()
+        for result in results:
+            detection = result['base_detection']
+            details = result.get('details', {})
+            cursor.execute("""
+                INSERT INTO detections
+                (camera_id, timestamp, object_class, confidence, bbox, details)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                RETURNING id
+            """, (camera_id, datetime.fromisoformat(result['timestamp']), detection['class'],
+                  detection['confidence'], json.dumps(detection['bbox']), json.dumps(details)))
+            detection_id = cursor.fetchone()[0]
+
+            plate_info = details.get('license_plate', {})
+            if 'plate_number' in plate_info:
+                cursor.execute("""
+                    INSERT INTO plate_records
+                    (detection_id, plate_number, is_valid, confidence, first_seen_date, snapshot_base64)
+                    VALUES (%s, %s, %s, %s, CURRENT_DATE, %s)
+                    ON CONFLICT (plate_number, first_seen_date)
+                    DO UPDATE SET
+                        last_seen = CURRENT_TIMESTAMP,
+                        count = plate_records.count + 1,
+                        snapshot_base64 = COALESCE(EXCLUDED.snapshot_base64, plate_records.snapshot_base64)
+                """, (detection_id, plate_info['plate_number'], plate_info.get('is_valid', True),
+                      plate_info.get('confidence', 0), None))
+        conn.commit()
+    finally:
+        handler.return_connection(conn)
+
+
+def bench(label, write, batches):
+    """執行並列印每秒列數與每批延遲"""
+    latencies = []
+    rows = 0
+    start = time.perf_counter()
+    for batch in batches:
+        batch_start = time.perf_counter()
+        write(batch)
+        latencies.append((time.perf_counter() - batch_start) * 1000)
+        rows += sum(len(results) for _, results, _ in batch)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+    print(f"  {label:<28} {rows / elapsed:>10,.0f} 列/秒  "
+          f"每批 {statistics.median(latencies):7.2f} ms (p95 {p95:7.2f} ms)")
+    return rows / elapsed
+
+
+def main():
+    database = sys.argv[1] if len(sys.argv) > 1 else 'surveillance_bench'
+    config = ConfigManager('config/config.yaml')
+    db_config = {**config.get('database', {}), 'database': database, 'enabled': True,
+                 'write_behind': {'enabled': False}}  # 量測同步寫入
+
+    conn = psycopg2.connect(
+        host=db_config['host'], port=db_config['port'], database=database,
+        user=db_config['user'], password=db_config['password']
+    )
+    create_tables(conn)
+    with conn.cursor() as cursor:
+        cursor.execute(MIGRATION.read_text(encoding='utf-8'))
+    conn.commit()
+    conn.close()
+
+    handler = DatabaseHandler(db_config)
+    camera_id = 'bench_cam'
+
+    print("=" * 80)
+    print(f"批次寫入: 資料庫 {database}")
+    print("=" * 80)
+    for objects, frames_per_batch in ((10, 1), (30, 1), (30, 10)):
+        batches = [
+            [(camera_id, make_frame(objects, b * frames_per_batch + f), None)
+             for f in range(frames_per_batch)]
+            for b in range(50)
+        ]
+        print(f"\n每幀 {objects} 個物件，每批 {frames_per_batch} 幀:")
+
+        def per_row(batch):
+            for cam, results, _ in batch:
+                save_per_row(handler, cam, results)
+
+        baseline = bench("逐筆 INSERT", per_row, batches)
+        batched = bench("save_detections_batch", handler.save_detections_batch, batches)
+        print(f"  加速比: {batched / baseline:.1f}x")
+
+    handler.close()
+
+
+if __name__ == "__main__":
+    main()
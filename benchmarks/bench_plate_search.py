@@ -0,0 +1,66 @@
+"""
+車牌模糊搜尋基準測試
+比較逐一計算所有車牌的編輯距離與 PlateIndex（q-gram 反向索引）的查詢延遲
+
+執行: python benchmarks/bench_plate_search.py [車牌數，預設 200000]
+"""
+
+import random
+import statistics
+import string
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database.plate_search import PlateIndex, bounded_distance, plate_key
+
+
+def random_plate(rng: random.Random) -> str:
+    """產生 ABC-1234 格式的車牌"""
+    letters = ''.join(rng.choice(string.ascii_uppercase) for _ in range(3))
+    return f"{letters}-{rng.randint(0, 9999):04d}"
+
+
+def linear_search(keys, query: str, max_distance: int):
+    """逐一比對所有車牌"""
+    query_key = plate_key(query)
+    return [plate for plate, key in keys if bounded_distance(query_key, key, max_distance) is not None]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rng = random.Random(0)
+    plates = {random_plate(rng) for _ in range(count)}
+
+    start = time.perf_counter()
+    index = PlateIndex()
+    for plate in plates:
+        index.add(plate, date(2026, 10, 19))
+    print(f"建立索引: {len(plates):,} 個車牌，{time.perf_counter() - start:.1f} 秒")
+
+    keys = [(plate, plate_key(plate)) for plate in plates]
+    queries = rng.sample(sorted(plates), 20)
+
+    print("=" * 70)
+    print(f"{'距離上限':<8} {'方式':<16} {'中位數延遲':>12} {'平均結果數':>10}")
+    print("=" * 70)
+    for max_distance in (0, 1, 2):
+        for label, search in (
+            ("逐一比對", lambda q: linear_search(keys, q, max_distance)),
+            ("PlateIndex", lambda q: index.search(q, max_distance, limit=1000)),
+        ):
+            latencies, found = [], []
+            for query in queries:
+                begin = time.perf_counter()
+                found.append(len(search(query)))
+                latencies.append((time.perf_counter() - begin) * 1000)
+            print(f"{max_distance:<12} {label:<16} {statistics.median(latencies):>10.2f} ms "
+                  f"{statistics.mean(found):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+車牌預處理微基準測試
+比較每次建立 CLAHE / 配置新陣列 與 PlatePreprocessor 重複使用的差異
+
+執行: python benchmarks/bench_preprocess.py
+"""
+
+import re
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.plate_preprocess import PlatePreprocessor, normalize_plate_text, classify_plate
+
+
+def legacy_preprocess(image: np.ndarray) -> np.ndarray:
+    """舊版預處理 (每次建立 CLAHE 並配置新陣列)"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    enhanced = clahe.apply(gray)
+    _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+
+def legacy_validate(text: str):
+    """舊版車牌驗證 (每次重新建立規則列表)"""
+    text = text.replace(' ', '').replace('-', '').upper()
+    text = re.sub(r'[^A-Z0-9]', '', text)
+    if len(text) < 5:
+        return None
+    patterns = [
+        (r'^[A-Z]{2,3}\d{4}$', 'car'),
+        (r'^[A-Z]{2}\d{4}$', 'car'),
+        (r'^\d{4}[A-Z]{2}$', 'commercial'),
+        (r'^[A-Z]{3}\d{3}$', 'motorcycle'),
+    ]
+    for pattern, plate_type in patterns:
+        if re.match(pattern, text):
+            return plate_type
+    return None
+
+
+def new_validate(text: str):
+    """新版車牌驗證 (預先編譯的單一 alternation)"""
+    text = normalize_plate_text(text)
+    if len(text) < 5:
+        return None
+    return classify_plate(text)
+
+
+def make_zones(vehicles: int = 8, seed: int = 0):
+    """產生模擬的車輛搜尋區域 (每台車 4 個區域,尺寸略有差異)"""
+    rng = np.random.default_rng(seed)
+    zones = []
+    for _ in range(vehicles):
+        h = int(rng.integers(180, 260))
+        w = int(rng.integers(240, 360))
+        vehicle = rng.integers(0, 255, size=(h, w, 3), dtype=np.uint8)
+        zones.extend([
+            vehicle[int(h * 0.5):, :],
+            vehicle[int(h * 0.3):int(h * 0.7), :],
+            vehicle[:int(h * 0.4), :],
+            vehicle
+        ])
+    return zones
+
+
+def bench(label: str, func, iterations: int) -> float:
+    """執行並回傳每次呼叫的平均時間 (微秒)"""
+    func()  # 暖機
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    per_call = (time.perf_counter() - start) / iterations * 1e6
+    print(f"  {label:<32} {per_call:10.1f} µs")
+    return per_call
+
+
+def main():
+    zones = make_zones()
+    engine = PlatePreprocessor()
+    iterations = 200
+
+    print("=" * 60)
+    print(f"預處理: {len(zones)} 個區域 / 幀 ({iterations} 幀)")
+    print("=" * 60)
+    legacy = bench("舊版 (每次建立 CLAHE)", lambda: [legacy_preprocess(z) for z in zones], iterations)
+    reused = bench("PlatePreprocessor.process", lambda: [engine.process(z) for z in zones], iterations)
+    batch = bench("PlatePreprocessor.process_batch", lambda: engine.process_batch(zones), iterations)
+    print(f"  加速比: {legacy / reused:.2f}x (批次 {legacy / batch:.2f}x)")
+
+    # 結果一致性檢查
+    for zone in zones:
+        assert np.array_equal(legacy_preprocess(zone), engine.process(zone))
+    for zone, binary in zip(zones, engine.process_batch(zones)):
+        assert np.array_equal(legacy_preprocess(zone), binary)
+
+    texts = ['ABC-1234', 'ab 1234', '1234-AB', 'ABC123', 'XYZ', 'A8C-12E4', '車牌ABC1234'] * 50
+    print("\n" + "=" * 60)
+    print(f"車牌驗證: {len(texts)} 筆文字")
+    print("=" * 60)
+    legacy = bench("舊版 (逐一 re.match)", lambda: [legacy_validate(t) for t in texts], 200)
+    compiled = bench("預先編譯 alternation", lambda: [new_validate(t) for t in texts], 200)
+    print(f"  加速比: {legacy / compiled:.2f}x")
+
+    for text in texts:
+        assert legacy_validate(text) == new_validate(text)
+
+
+if __name__ == "__main__":
+    main()
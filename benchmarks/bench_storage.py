@@ -0,0 +1,139 @@
+"""
+儲存後端基準測試
+以相同的資料與查詢量測 SQLite / PostgreSQL 後端的批次寫入列數、分頁查詢與車牌搜尋延遲
+
+SQLite 使用暫存檔案，不需要任何外部服務；PostgreSQL 使用 config/config.yaml 的連線設定，
+請指定專用的測試資料庫（測試會在其中建立表格並寫入資料）:
+
+執行: python benchmarks/bench_storage.py [--backend sqlite|postgresql] [--database surveillance_bench]
+                                         [--batches 200]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database import create_storage
+
+
+def make_frame(objects: int, frame_index: int, moment: datetime):
+    """產生一幀的辨識結果（一半為帶車牌的車輛）"""
+    results = []
+    for i in range(objects):
+        details = {}
+        if i % 2 == 0:
+            details['license_plate'] = {
+                'plate_number': f"BEN-{(frame_index * objects + i) % 5000:04d}",
+                'confidence': 0.9,
+                'is_valid': True
+            }
+        results.append({
+            'timestamp': moment.isoformat(),
+            'base_detection': {'class': 'car' if details else 'person', 'confidence': 0.8,
+                               'bbox': [10 * i, 20, 10 * i + 80, 120]},
+            'details': details
+        })
+    return results
+
+
+def timed(label: str, calls, unit_rows: int = 0):
+    """執行並列印中位數與 p95 延遲（unit_rows > 0 時另外列印每秒列數）"""
+    latencies = []
+    start = time.perf_counter()
+    for call in calls:
+        call_start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0]
+    throughput = f"{unit_rows * len(latencies) / elapsed:>10,.0f} 列/秒  " if unit_rows else ' ' * 18
+    print(f"  {label:<26} {throughput}中位數 {statistics.median(latencies):7.2f} ms "
+          f"(p95 {p95:7.2f} ms)")
+
+
+def build_config(args, directory: str):
+    """依後端建立資料庫配置"""
+    if args.backend == 'sqlite':
+        return {'type': 'sqlite', 'sqlite': {'path': str(Path(directory) / 'bench.db')}}
+
+    import psycopg2
+    from utils.config_manager import ConfigManager
+    from database.init_db import create_tables
+
+    config = ConfigManager('config/config.yaml')
+    db_config = {**config.get('database', {}), 'type': 'postgresql', 'database': args.database,
+                 'enabled': True, 'write_behind': {'enabled': False},  # 量測同步寫入
+                 'plate_search': {'backend': 'memory'},
+                 'summary': {'enabled': True}}
+    conn = psycopg2.connect(
+        host=db_config['host'], port=db_config['port'], database=args.database,
+        user=db_config['user'], password=db_config['password']
+    )
+    create_tables(conn)
+    conn.close()
+    return db_config
+
+
+def main():
+    parser = argparse.ArgumentParser(description='儲存後端基準測試')
+    parser.add_argument('--backend', choices=['sqlite', 'postgresql'], default='sqlite')
+    parser.add_argument('--database', default='surveillance_bench', help='PostgreSQL 測試資料庫名稱')
+    parser.add_argument('--batches', type=int, default=200, help='每種批次大小寫入的批數')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        storage = create_storage(build_config(args, directory))
+        camera_id = 'bench_cam'
+        moment = datetime.now().astimezone() - timedelta(hours=1)
+
+        print("=" * 80)
+        print(f"儲存後端: {args.backend}")
+        print("=" * 80)
+
+        print("\n批次寫入:")
+        frame_index = 0
+        for objects, frames_per_batch in ((10, 1), (30, 1), (30, 10)):
+            batches = []
+            for _ in range(args.batches):
+                batch = []
+                for _ in range(frames_per_batch):
+                    moment += timedelta(milliseconds=100)
+                    batch.append((camera_id, make_frame(objects, frame_index, moment), None))
+                    frame_index += 1
+                batches.append(batch)
+            timed(f"{objects} 物件 x {frames_per_batch} 幀",
+                  [lambda batch=batch: storage.save_detections_batch(batch) for batch in batches],
+                  unit_rows=objects * frames_per_batch)
+
+        print("\n分頁查詢（每頁 100 筆）:")
+        cursors = [None]
+        for _ in range(20):
+            page = storage.query_detections(camera_id=camera_id, cursor=cursors[-1], limit=100)
+            cursors.append(page['next_cursor'])
+        timed("第一頁", [lambda: storage.query_detections(camera_id=camera_id, limit=100)] * 50)
+        timed("第 20 頁（游標）",
+              [lambda: storage.query_detections(camera_id=camera_id, cursor=cursors[19], limit=100)] * 50)
+        timed("第一頁（只取 3 欄）",
+              [lambda: storage.query_detections(camera_id=camera_id, limit=100,
+                                                columns=['object_class'])] * 50)
+
+        print("\n車牌搜尋與統計:")
+        timed("search_plates 距離 1",
+              [lambda i=i: storage.search_plates(f"8EN-{i:04d}", max_distance=1) for i in range(50)])
+        timed("get_summary_stats 24 小時",
+              [lambda: storage.get_summary_stats(datetime.now() - timedelta(hours=24))] * 50)
+
+        print(f"\n寫入統計: {storage.get_write_stats()}")
+        storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+絆線效能基準測試
+模擬大量追蹤物件 x 多條絆線，比較逐一判定與 numpy 一次判定的吞吐量
+
+執行: python benchmarks/bench_tripwire.py
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.tripwire import Tripwire, TripwireManager
+
+
+def make_tripwires(count: int = 20, seed: int = 0):
+    """產生分散在畫面上的水平/垂直絆線（模擬車道）"""
+    rng = np.random.default_rng(seed)
+    tripwires = []
+    for i in range(count):
+        x, y = int(rng.integers(100, 1700)), int(rng.integers(100, 900))
+        length = int(rng.integers(100, 300))
+        end = (x + length, y) if i % 2 else (x, y + length)
+        tripwires.append(Tripwire(f"line_{i:02d}", f"車道 {i}", (x, y), end,
+                                  lane=f"lane_{i % 4}", target_classes=['car']))
+    return tripwires
+
+
+def make_frames(tracks: int = 2000, frames: int = 50, seed: int = 1):
+    """產生隨機移動的追蹤物件序列"""
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform([0, 0], [1920, 1080], size=(tracks, 2))
+    vel = rng.uniform(-15, 15, size=(tracks, 2))
+    sequence = []
+    for _ in range(frames):
+        pos = pos + vel
+        sequence.append([
+            {
+                'class': 'car',
+                'confidence': 0.8,
+                'bbox': [pos[t, 0] - 20, pos[t, 1] - 40, pos[t, 0] + 20, pos[t, 1]],
+                'track_id': t
+            }
+            for t in range(tracks)
+        ])
+    return sequence
+
+
+def run_per_pair(tripwires, sequence):
+    """逐一判定（Python 迴圈，每個軌跡 x 每條絆線）"""
+    last = {}
+    counts = 0
+    for detections in sequence:
+        for detection in detections:
+            x1, _, x2, y2 = detection['bbox']
+            q = ((x1 + x2) / 2, y2)
+            p = last.get(detection['track_id'])
+            last[detection['track_id']] = q
+            if p is None:
+                continue
+            for tripwire in tripwires:
+                (ax, ay), (bx, by) = tripwire.points
+                side_p = (bx - ax) * (p[1] - ay) - (by - ay) * (p[0] - ax)
+                side_q = (bx - ax) * (q[1] - ay) - (by - ay) * (q[0] - ax)
+                if (side_p > 0) == (side_q > 0):
+                    continue
+                side_a = (q[0] - p[0]) * (ay - p[1]) - (q[1] - p[1]) * (ax - p[0])
+                side_b = (q[0] - p[0]) * (by - p[1]) - (q[1] - p[1]) * (bx - p[0])
+                if side_a * side_b <= 0:
+                    counts += 1
+    return counts
+
+
+def run_vectorized(tripwires, sequence):
+    """TripwireManager.update（numpy 一次判定）"""
+    manager = TripwireManager()
+    for tripwire in tripwires:
+        manager.add_tripwire(tripwire)
+    for i, detections in enumerate(sequence):
+        manager.update(detections, now=i * 0.1)
+    return manager.total_crossings
+
+
+def bench(label, runner, tripwires, sequence):
+    start = time.perf_counter()
+    crossings = runner(tripwires, sequence)
+    elapsed = time.perf_counter() - start
+    per_frame = elapsed / len(sequence) * 1000
+    tracks_per_sec = len(sequence[0]) * len(sequence) / elapsed
+    print(f"  {label:<24} {per_frame:8.2f} ms/幀  {tracks_per_sec:>10,.0f} 軌跡/秒  (跨越 {crossings})")
+    return per_frame
+
+
+def main():
+    tripwires = make_tripwires()
+    sequence = make_frames()
+    print("=" * 72)
+    print(f"絆線判定: {len(sequence[0])} 個追蹤物件 x {len(tripwires)} 條絆線, {len(sequence)} 幀")
+    print("=" * 72)
+    per_pair = bench("逐一判定 (Python)", run_per_pair, tripwires, sequence)
+    vectorized = bench("TripwireManager.update", run_vectorized, tripwires, sequence)
+    print(f"  加速比: {per_pair / vectorized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""
+電子圍籬效能基準測試
+模擬 200 個追蹤物件 x 50 個圍籬，比較逐一檢查與向量化檢查，
+逐一繪製與快取圖層的繪製成本，以及過期物件清理的成本
+
+執行: python benchmarks/bench_virtual_fence.py
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.virtual_fence import TrackedObjectState, VirtualFence, VirtualFenceManager
+
+FRAME_SHAPE = (1080, 1920, 3)
+
+
+def make_fences(count: int = 50, seed: int = 0, max_size: int = 220):
+    """產生分散在畫面上的小型圍籬（模擬停車格）"""
+    rng = np.random.default_rng(seed)
+    fences = []
+    for i in range(count):
+        x = int(rng.integers(0, 1700))
+        y = int(rng.integers(0, 900))
+        w = int(rng.integers(max_size // 3, max_size))
+        h = int(rng.integers(max_size // 4, max_size * 4 // 5))
+        fences.append(VirtualFence(
+            fence_id=f"bay_{i:03d}",
+            name=f"車格 {i}",
+            points=[(x, y), (x + w, y), (x + w, y + h), (x, y + h)],
+            target_classes=['car', 'person'] if i % 2 else ['car'],
+            min_confidence=0.5,
+            dwell_time_threshold=0.0  # 事件數與執行速度無關，方便比對兩種方法
+        ))
+    return fences
+
+
+def make_frames(tracks: int = 200, frames: int = 30, seed: int = 1):
+    """產生隨機移動的追蹤物件序列"""
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform([0, 0], [1800, 1000], size=(tracks, 2))
+    classes = rng.choice(['car', 'person', 'truck'], size=tracks)
+    sequence = []
+    for _ in range(frames):
+        pos += rng.normal(0, 8, size=pos.shape)
+        np.clip(pos, 0, [1800, 1000], out=pos)
+        sequence.append([
+            {
+                'class': str(classes[t]),
+                'confidence': 0.8,
+                'bbox': [int(pos[t, 0]), int(pos[t, 1]), int(pos[t, 0]) + 60, int(pos[t, 1]) + 80],
+                'track_id': t
+            }
+            for t in range(tracks)
+        ])
+    return sequence
+
+
+def run_per_pair(fences, sequence):
+    """逐一檢查（每個偵測 x 每個圍籬呼叫 check_detection）"""
+    frame_size = (FRAME_SHAPE[1], FRAME_SHAPE[0])
+    events = 0
+    for detections in sequence:
+        for detection in detections:
+            for fence in fences:
+                if fence.check_detection(detection, frame_size):
+                    events += 1
+        for fence in fences:
+            fence.cleanup_old_objects()
+    return events
+
+
+def run_vectorized(fences, sequence):
+    """向量化檢查（VirtualFenceManager.check_detections）"""
+    manager = VirtualFenceManager()
+    for fence in fences:
+        manager.add_fence(fence)
+    events = 0
+    for detections in sequence:
+        events += len(manager.check_detections(detections, FRAME_SHAPE))
+    stats = manager.get_index_stats()
+    print(f"  空間索引: 候選 {stats['candidate_pairs']} / {stats['total_pairs']} 組, "
+          f"裁剪 {stats['pruned_ratio']:.1%}")
+    return events
+
+
+def bench(label, runner, frames, **fence_kwargs):
+    fences = make_fences(**fence_kwargs)
+    # 預先建立遮罩，只量測判定本身
+    for fence in fences:
+        fence.contains_points(np.zeros((1, 2)), (FRAME_SHAPE[1], FRAME_SHAPE[0]))
+    start = time.perf_counter()
+    events = runner(fences, frames)
+    per_frame = (time.perf_counter() - start) / len(frames) * 1000
+    print(f"  {label:<28} {per_frame:8.2f} ms/幀  (事件 {events})")
+    return per_frame
+
+
+def bench_draw(label, draw, frame, repeat: int = 30):
+    canvas = frame.copy()
+    draw(canvas)  # 預熱（建立快取圖層）
+    start = time.perf_counter()
+    for _ in range(repeat):
+        np.copyto(canvas, frame)
+        draw(canvas)
+    per_frame = (time.perf_counter() - start) / repeat * 1000
+    print(f"  {label:<28} {per_frame:8.2f} ms/幀")
+    return per_frame
+
+
+def draw_per_fence(fences):
+    def draw(frame):
+        for fence in fences:
+            fence.draw_on_frame(frame)
+    return draw
+
+
+def populate(fence, objects: int, now: float):
+    """在圍籬中建立大量追蹤記錄"""
+    for track_id in range(objects):
+        detection = {'class': 'car', 'confidence': 0.9,
+                     'bbox': [10, 10, 50, 50], 'track_id': track_id}
+        fence.update_state(detection, True, now)
+
+
+def full_scan_cleanup(fence, current_time):
+    """原本的清理方式：每次掃描全部記錄"""
+    to_remove = [
+        track_id for track_id, state in fence.tracked_objects.items()
+        if current_time - state.last_seen > fence.object_timeout
+    ]
+    for track_id in to_remove:
+        del fence.tracked_objects[track_id]
+
+
+def bench_cleanup(objects: int = 2000, fences: int = 50, rounds: int = 100):
+    """每幀清理一次、沒有物件到期時的成本"""
+    results = {}
+    for label, cleanup in (("全表掃描", full_scan_cleanup),
+                           ("到期排程 (heap)", lambda f, t: f.cleanup_old_objects(t))):
+        zones = [VirtualFence(f"z{i}", f"區域 {i}", [(0, 0), (100, 0), (100, 100), (0, 100)])
+                 for i in range(fences)]
+        for zone in zones:
+            populate(zone, objects // fences, now=0.0)
+        start = time.perf_counter()
+        for r in range(rounds):
+            for zone in zones:
+                cleanup(zone, 1.0 + r * 0.001)
+        per_frame = (time.perf_counter() - start) / rounds * 1000
+        print(f"  {label:<28} {per_frame:8.3f} ms/幀")
+        results[label] = per_frame
+    return results
+
+
+def bench_memory(objects: int = 10000):
+    """比較 dict 記錄與 __slots__ 記錄的記憶體用量"""
+    tracemalloc.start()
+    base = tracemalloc.take_snapshot()
+    dicts = {
+        t: {'in_zone': True, 'first_seen': 0.0, 'last_seen': 0.0, 'dwell_time': 0.0,
+            'triggered': False, 'object_class': 'car', 'last_bbox': None}
+        for t in range(objects)
+    }
+    dict_bytes = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(base, 'filename'))
+    del dicts
+
+    base = tracemalloc.take_snapshot()
+    records = {t: TrackedObjectState('car', None, 0.0) for t in range(objects)}
+    slot_bytes = sum(s.size_diff for s in tracemalloc.take_snapshot().compare_to(base, 'filename'))
+    del records
+    tracemalloc.stop()
+
+    print(f"  {'dict 記錄':<28} {dict_bytes / objects:8.1f} bytes/物件")
+    print(f"  {'__slots__ 記錄':<28} {slot_bytes / objects:8.1f} bytes/物件")
+
+    fence = VirtualFence("z", "區域", [(0, 0), (100, 0), (100, 100), (0, 100)])
+    populate(fence, objects, now=0.0)
+    footprint = fence.memory_footprint()
+    print(f"  memory_footprint(): {footprint['objects']} 物件, "
+          f"{footprint['scheduled']} 排程, {footprint['bytes'] / 1024:.0f} KiB")
+
+
+def main():
+    frames = make_frames()
+    print("=" * 60)
+    print(f"電子圍籬判定: {len(frames[0])} 個追蹤物件 x 50 個圍籬, {len(frames)} 幀")
+    print("=" * 60)
+    per_pair = bench("逐一 check_detection", run_per_pair, frames)
+    vectorized = bench("向量化 check_detections", run_vectorized, frames)
+    print(f"  加速比: {per_pair / vectorized:.1f}x")
+
+    print("\n" + "=" * 60)
+    print(f"大量小型圍籬: {len(frames[0])} 個追蹤物件 x 500 個車格, {len(frames)} 幀")
+    print("=" * 60)
+    many = dict(count=500, max_size=90)
+    per_pair = bench("逐一 check_detection", run_per_pair, frames, **many)
+    vectorized = bench("向量化 + 空間索引", run_vectorized, frames, **many)
+    print(f"  加速比: {per_pair / vectorized:.1f}x")
+
+    print("\n" + "=" * 60)
+    print("圍籬繪製: 1920x1080, 50 個圍籬")
+    print("=" * 60)
+    frame = np.random.default_rng(2).integers(0, 255, FRAME_SHAPE, dtype=np.uint8)
+    fences = make_fences()
+    manager = VirtualFenceManager()
+    for fence in fences:
+        manager.add_fence(fence)
+    per_fence = bench_draw("逐一 draw_on_frame", draw_per_fence(fences), frame)
+    cached = bench_draw("快取圖層 draw_all_fences", manager.draw_all_fences, frame)
+    print(f"  加速比: {per_fence / cached:.1f}x")
+
+    print("\n" + "=" * 60)
+    print("過期物件清理: 2000 筆記錄 / 50 個圍籬, 無物件到期")
+    print("=" * 60)
+    results = bench_cleanup()
+    scan, heap = results.values()
+    print(f"  加速比: {scan / heap:.1f}x")
+
+    print("\n" + "=" * 60)
+    print("追蹤記錄記憶體: 10000 個物件")
+    print("=" * 60)
+    bench_memory()
+
+
+if __name__ == "__main__":
+    main()
@@ -63,6 +63,15 @@ class DetailRecognizer(ABC):
         """
         return detection['class'] in self.target_classes
     
+    def get_stats(self) -> Dict:
+        """
+        取得模組統計資訊 (快取命中率等)
+        
+        Returns:
+            Dict: 統計資訊,預設為空
+        """
+        return {}
+    
     def extract_region(self, image: np.ndarray, bbox: List[int], 
                        padding: float = 0.1) -> Optional[np.ndarray]:
         """
@@ -0,0 +1,344 @@
+"""結果匯流排 - 辨識結果只發布一次，由各輸出端在獨立執行緒消費"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Optional
+
+
+DROP_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+
+
+class BusMessage:
+    """匯流排訊息"""
+
+    __slots__ = ('topic', 'payload', 'published_at')
+
+    def __init__(self, topic: str, payload: Any):
+        self.topic = topic
+        self.payload = payload
+        self.published_at = time.monotonic()
+
+
+class ResultSink:
+    """
+    結果輸出端
+
+    每個輸出端擁有自己的有界佇列與消費執行緒，處理緩慢（資料庫、網路）
+    只會讓自己的佇列累積，不會拖慢辨識執行緒或其他輸出端。
+
+    佇列已滿時依 policy 處理:
+        drop_oldest: 捨棄最舊的訊息（即時推播適用，保留最新狀態）
+        drop_newest: 捨棄新訊息
+        block: 等待最多 block_timeout 秒，逾時仍滿則捨棄新訊息
+
+    指定 batch_size 時 handler 一次收到佇列中累積的訊息列表（最多 batch_size 則），
+    適合資料庫等可合併寫入的輸出端：積壓越多，每次寫入的批次越大。
+    """
+
+    def __init__(self, name: str, handler: Callable,
+                 topics: Iterable[str] = None, queue_size: int = 100,
+                 policy: str = 'drop_oldest', block_timeout: float = 1.0,
+                 batch_size: Optional[int] = None, logger: logging.Logger = None):
+        """
+        初始化輸出端
+
+        Args:
+            name: 輸出端名稱
+            handler: 處理函數 handler(message)，指定 batch_size 時為 handler(messages)
+            topics: 訂閱的主題（None 表示全部）
+            queue_size: 佇列容量
+            policy: 佇列已滿時的處理方式
+            block_timeout: policy 為 block 時的最長等待時間(秒)
+            batch_size: 每次交給 handler 的最大訊息數（None 表示逐則處理）
+            logger: 日誌記錄器
+        """
+        if policy not in DROP_POLICIES:
+            raise ValueError(f"不支援的捨棄策略: {policy}")
+
+        self.name = name
+        self.handler = handler
+        self.topics = set(topics) if topics is not None else None
+        self.queue_size = max(1, int(queue_size))
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.batch_size = max(1, int(batch_size)) if batch_size is not None else None
+        self.logger = logger
+
+        self._queue: deque = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        # 統計
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.last_lag = 0.0   # 最近一則訊息從發布到處理完成的時間(秒)
+        self.max_lag = 0.0
+        self._total_lag = 0.0
+
+    def accepts(self, topic: str) -> bool:
+        """是否訂閱此主題"""
+        return self.topics is None or topic in self.topics
+
+    def start(self):
+        """啟動消費執行緒"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name=f"ResultSink-{self.name}", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0, drain: bool = True):
+        """
+        停止消費執行緒
+
+        Args:
+            timeout: 等待執行緒結束的最長時間(秒)
+            drain: 是否先處理完佇列中剩餘的訊息
+        """
+        with self._cond:
+            self._running = False
+            if not drain:
+                self.dropped += len(self._queue)
+                self._queue.clear()
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def offer(self, message: BusMessage) -> bool:
+        """
+        放入訊息
+
+        Args:
+            message: 匯流排訊息
+
+        Returns:
+            bool: 是否已放入佇列（False 表示被捨棄）
+        """
+        with self._cond:
+            self.received += 1
+
+            if len(self._queue) >= self.queue_size:
+                if self.policy == 'drop_oldest':
+                    self._queue.popleft()
+                    self.dropped += 1
+                elif self.policy == 'block':
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._queue) >= self.queue_size and self._running:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    if len(self._queue) >= self.queue_size:
+                        self.dropped += 1
+                        return False
+                else:
+                    self.dropped += 1
+                    return False
+
+            self._queue.append(message)
+            self.max_depth = max(self.max_depth, len(self._queue))
+            self._cond.notify_all()
+            return True
+
+    def _run(self):
+        """消費迴圈"""
+        while True:
+            with self._cond:
+                while not self._queue and self._running:
+                    self._cond.wait()
+                if not self._queue:
+                    return  # 已停止且佇列清空
+                count = min(self.batch_size or 1, len(self._queue))
+                messages = [self._queue.popleft() for _ in range(count)]
+                self._cond.notify_all()  # 喚醒等待空位的發布者
+
+            try:
+                self.handler(messages if self.batch_size else messages[0])
+            except Exception as e:
+                self.errors += 1
+                if self.logger:
+                    self.logger.error(f"輸出端 {self.name} 處理錯誤: {e}")
+
+            now = time.monotonic()
+            with self._cond:
+                self.batches += 1
+                self.processed += len(messages)
+                for message in messages:
+                    lag = now - message.published_at
+                    self.max_lag = max(self.max_lag, lag)
+                    self._total_lag += lag
+                self.last_lag = now - messages[-1].published_at
+
+    def get_stats(self) -> Dict:
+        """取得輸出端統計"""
+        with self._cond:
+            return {
+                'policy': self.policy,
+                'queue_size': self.queue_size,
+                'depth': len(self._queue),
+                'max_depth': self.max_depth,
+                'received': self.received,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'batches': self.batches,
+                'last_lag_ms': round(self.last_lag * 1000, 2),
+                'avg_lag_ms': round(self._total_lag / self.processed * 1000, 2) if self.processed else 0.0,
+                'max_lag_ms': round(self.max_lag * 1000, 2)
+            }
+
+
+class ResultBus:
+    """
+    結果匯流排
+
+    辨識執行緒每幀呼叫一次 publish()，訊息依主題分送到訂閱的輸出端
+    （資料庫寫入、WebSocket 推播、圍籬警報、使用者回調）。
+    publish() 只做入列，實際處理都在各輸出端自己的執行緒中進行。
+    """
+
+    def __init__(self, config: Dict = None, logger: logging.Logger = None):
+        """
+        初始化匯流排
+
+        Args:
+            config: result_bus 配置（預設佇列容量、捨棄策略與各輸出端覆寫值）
+            logger: 日誌記錄器
+        """
+        config = config or {}
+        self.logger = logger
+        self.queue_size = config.get('queue_size', 100)
+        self.policy = config.get('policy', 'drop_oldest')
+        self.block_timeout = config.get('block_timeout', 1.0)
+        self.sink_config: Dict[str, Dict] = config.get('sinks', {}) or {}
+
+        self.sinks: Dict[str, ResultSink] = {}
+        self.published = 0
+        self._lock = threading.Lock()
+        self._started = False
+
+    def subscribe(self, name: str, handler: Callable,
+                  topics: Iterable[str] = None, queue_size: int = None,
+                  policy: str = None, block_timeout: float = None,
+                  batch_size: int = None) -> ResultSink:
+        """
+        註冊輸出端
+
+        參數為此輸出端的預設值，可由 sinks.<name> 配置覆寫；
+        未指定的佇列容量與捨棄策略使用匯流排預設值
+
+        Args:
+            name: 輸出端名稱（不可重複）
+            handler: 處理函數 handler(message)，指定 batch_size 時為 handler(messages)
+            topics: 訂閱的主題（None 表示全部）
+            queue_size: 佇列容量
+            policy: 佇列已滿時的處理方式
+            block_timeout: policy 為 block 時的最長等待時間(秒)
+            batch_size: 每次交給 handler 的最大訊息數（None 表示逐則處理）
+
+        Returns:
+            ResultSink: 建立的輸出端
+        """
+        overrides = self.sink_config.get(name, {})
+        sink = ResultSink(
+            name, handler, topics,
+            queue_size=overrides.get('queue_size', queue_size or self.queue_size),
+            policy=overrides.get('policy', policy or self.policy),
+            block_timeout=overrides.get('block_timeout', block_timeout or self.block_timeout),
+            # 逐則或批次由 handler 的寫法決定，配置只能調整批次大小
+            batch_size=overrides.get('batch_size', batch_size) if batch_size else None,
+            logger=self.logger
+        )
+
+        with self._lock:
+            if name in self.sinks:
+                raise ValueError(f"輸出端已存在: {name}")
+            self.sinks = {**self.sinks, name: sink}
+            started = self._started
+
+        if started:
+            sink.start()
+
+        if self.logger:
+            self.logger.info(
+                f"✓ 註冊輸出端: {name} (佇列 {sink.queue_size}, 策略 {sink.policy})"
+            )
+        return sink
+
+    def unsubscribe(self, name: str, drain: bool = True):
+        """
+        移除輸出端
+
+        Args:
+            name: 輸出端名稱
+            drain: 是否先處理完佇列中剩餘的訊息
+        """
+        with self._lock:
+            sink = self.sinks.get(name)
+            if sink is None:
+                return
+            self.sinks = {k: v for k, v in self.sinks.items() if k != name}
+        sink.stop(drain=drain)
+
+    def publish(self, topic: str, payload: Any) -> int:
+        """
+        發布訊息
+
+        Args:
+            topic: 主題（例如 'detections'、'fence_intrusion'）
+            payload: 訊息內容（輸出端之間共用，不應再修改）
+
+        Returns:
+            int: 成功放入的輸出端數量
+        """
+        message = BusMessage(topic, payload)
+        with self._lock:
+            self.published += 1
+            sinks = self.sinks
+        # sinks 只會整組替換，放入訊息時不需持有鎖
+        return sum(sink.offer(message) for sink in sinks.values() if sink.accepts(topic))
+
+    def start(self):
+        """啟動所有輸出端"""
+        with self._lock:
+            self._started = True
+            sinks = list(self.sinks.values())
+        for sink in sinks:
+            sink.start()
+
+    def stop(self, timeout: float = 5.0, drain: bool = True):
+        """
+        停止所有輸出端
+
+        Args:
+            timeout: 每個輸出端等待結束的最長時間(秒)
+            drain: 是否先處理完佇列中剩餘的訊息
+        """
+        with self._lock:
+            self._started = False
+            sinks = list(self.sinks.values())
+        for sink in sinks:
+            sink.stop(timeout, drain)
+
+    def get_stats(self) -> Dict:
+        """
+        取得匯流排統計
+
+        Returns:
+            Dict: {'published': 發布次數, 'sinks': {名稱: 輸出端統計}}
+        """
+        return {
+            'published': self.published,
+            'sinks': {name: sink.get_stats() for name, sink in self.sinks.items()}
+        }
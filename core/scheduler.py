@@ -0,0 +1,193 @@
+"""辨識排程器 - 每幀時間預算與偵測優先順序"""
+
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class CameraScheduleState:
+    """單一攝影機的排程狀態"""
+
+    __slots__ = ('read_tracks', 'deferred_tracks', 'carried_tracks', 'processed',
+                 'deferred', 'dropped', 'frames', 'over_budget_frames', 'avg_cost')
+
+    def __init__(self):
+        self.read_tracks: Dict[int, float] = {}  # {track_id: 最後成功辨識時間}
+        self.deferred_tracks: set = set()        # 本幀被延後的 track_id
+        self.carried_tracks: set = set()         # 上一幀被延後、本幀優先處理的 track_id
+        self.processed = 0
+        self.deferred = 0
+        self.dropped = 0
+        self.frames = 0
+        self.over_budget_frames = 0
+        self.avg_cost = 0.0                      # 此攝影機單一偵測的平均辨識耗時
+
+
+class RecognitionScheduler:
+    """
+    辨識排程器
+
+    在每幀的時間預算內依優先順序執行細部辨識:
+        1. 上一幀被延後的物件
+        2. 位於電子圍籬內的物件
+        3. 尚未被此追蹤 ID 成功辨識過的物件
+        4. 面積較大的物件
+    超出預算的偵測依 overflow 策略延後到下一幀 ('defer') 或直接捨棄 ('drop')。
+    """
+
+    def __init__(self, time_budget: float = 0.0, overflow: str = 'defer',
+                 read_track_ttl: float = 300.0, cost_smoothing: float = 0.2,
+                 camera_budgets: Dict[str, float] = None):
+        """
+        初始化排程器
+
+        Args:
+            time_budget: 每幀辨識時間預算(秒),0 表示不限制
+            overflow: 超出預算時的處理方式 ('defer' 或 'drop')
+            read_track_ttl: 追蹤 ID 成功辨識記錄保留時間(秒)
+            cost_smoothing: 單一偵測辨識耗時的指數平滑係數
+            camera_budgets: 個別攝影機的時間預算 {攝影機 ID: 秒},覆寫 time_budget
+        """
+        self.time_budget = time_budget
+        self.overflow = overflow if overflow in ('defer', 'drop') else 'defer'
+        self.read_track_ttl = read_track_ttl
+        self.cost_smoothing = cost_smoothing
+        self.camera_budgets = camera_budgets or {}
+
+        self.cameras: Dict[str, CameraScheduleState] = {}
+
+    def budget_for(self, camera_id: Optional[str]) -> float:
+        """取得攝影機的時間預算(秒),0 表示不限制"""
+        return self.camera_budgets.get(camera_id, self.time_budget) or 0.0
+
+    def is_enabled(self, camera_id: Optional[str]) -> bool:
+        """此攝影機是否啟用時間預算"""
+        return self.budget_for(camera_id) > 0
+
+    def _state(self, camera_id: Optional[str]) -> CameraScheduleState:
+        key = camera_id or 'default'
+        state = self.cameras.get(key)
+        if state is None:
+            state = CameraScheduleState()
+            self.cameras[key] = state
+        return state
+
+    def order(self, camera_id: Optional[str], detections: List[Dict],
+              zone_checker: Optional[Callable[[Dict], bool]] = None) -> List[int]:
+        """
+        依優先順序排列偵測
+
+        Args:
+            camera_id: 攝影機 ID
+            detections: 待辨識的 YOLO 偵測結果
+            zone_checker: 判斷偵測是否位於圍籬內的函數 (可選)
+
+        Returns:
+            List[int]: 偵測索引 (優先度由高到低)
+        """
+        state = self._state(camera_id)
+        now = time.time()
+
+        def priority(index: int):
+            detection = detections[index]
+            track_id = detection.get('track_id')
+            was_deferred = track_id is not None and track_id in state.carried_tracks
+            in_fence = bool(zone_checker(detection)) if zone_checker else False
+            read_at = state.read_tracks.get(track_id) if track_id is not None else None
+            unread = read_at is None or now - read_at > self.read_track_ttl
+            return (was_deferred, in_fence, unread, detection.get('area', 0))
+
+        return sorted(range(len(detections)), key=priority, reverse=True)
+
+    def begin_frame(self, camera_id: Optional[str]) -> float:
+        """
+        開始一幀的排程
+
+        Returns:
+            float: 本幀開始時間
+        """
+        state = self._state(camera_id)
+        state.frames += 1
+        state.carried_tracks = state.deferred_tracks
+        state.deferred_tracks = set()
+        return time.time()
+
+    def has_budget(self, camera_id: Optional[str], frame_start: float,
+                   processed_in_frame: int) -> bool:
+        """
+        是否還有時間處理下一個偵測 (每幀至少處理一個,避免飢餓)
+
+        Args:
+            camera_id: 攝影機 ID
+            frame_start: begin_frame() 回傳的開始時間
+            processed_in_frame: 本幀已處理數量
+        """
+        budget = self.budget_for(camera_id)
+        if budget <= 0 or processed_in_frame == 0:
+            return True
+        elapsed = time.time() - frame_start
+        return elapsed + self._state(camera_id).avg_cost <= budget
+
+    def record_processed(self, camera_id: Optional[str], detection: Dict,
+                         duration: float, details: Dict):
+        """記錄已辨識的偵測"""
+        state = self._state(camera_id)
+        state.processed += 1
+
+        if state.avg_cost == 0.0:
+            state.avg_cost = duration
+        else:
+            state.avg_cost += self.cost_smoothing * (duration - state.avg_cost)
+
+        track_id = detection.get('track_id')
+        if track_id is not None and any(
+            isinstance(v, dict) and 'error' not in v for v in details.values()
+        ):
+            state.read_tracks[track_id] = time.time()
+
+    def record_skipped(self, camera_id: Optional[str], detection: Dict) -> str:
+        """
+        記錄因預算不足而略過的偵測
+
+        Returns:
+            str: 'deferred' 或 'dropped'
+        """
+        state = self._state(camera_id)
+        track_id = detection.get('track_id')
+        if self.overflow == 'defer' and track_id is not None:
+            state.deferred_tracks.add(track_id)
+            state.deferred += 1
+            return 'deferred'
+        state.dropped += 1
+        return 'dropped'
+
+    def end_frame(self, camera_id: Optional[str], skipped: int):
+        """結束一幀的排程,並清理過期的辨識記錄"""
+        state = self._state(camera_id)
+        if skipped:
+            state.over_budget_frames += 1
+
+        if state.read_tracks and state.frames % 100 == 0:
+            now = time.time()
+            state.read_tracks = {
+                tid: t for tid, t in state.read_tracks.items()
+                if now - t <= self.read_track_ttl
+            }
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """
+        取得各攝影機的排程統計
+
+        Returns:
+            Dict[str, Dict]: {攝影機 ID: 統計資訊}
+        """
+        return {
+            camera_id: {
+                'frames': state.frames,
+                'processed': state.processed,
+                'deferred': state.deferred,
+                'dropped': state.dropped,
+                'over_budget_frames': state.over_budget_frames,
+                'avg_cost': round(state.avg_cost, 4)
+            }
+            for camera_id, state in self.cameras.items()
+        }
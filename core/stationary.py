@@ -0,0 +1,194 @@
+"""靜止物件登錄表 - 抑制停放車輛的重複辨識與寫入"""
+
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def bbox_iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    計算兩組邊界框的 IoU 矩陣
+
+    Args:
+        boxes_a: (N, 4) [x1, y1, x2, y2]
+        boxes_b: (M, 4) [x1, y1, x2, y2]
+
+    Returns:
+        np.ndarray: (N, M) IoU 矩陣
+    """
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return np.zeros((len(boxes_a), len(boxes_b)), dtype=np.float32)
+
+    a = boxes_a[:, None, :].astype(np.float32)
+    b = boxes_b[None, :, :].astype(np.float32)
+
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = inter_w * inter_h
+
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - inter
+
+    return np.where(union > 0, inter / np.maximum(union, 1e-6), 0.0)
+
+
+class StationaryEntry:
+    """靜止物件候選記錄"""
+
+    __slots__ = ('object_class', 'anchor_bbox', 'track_id', 'first_seen', 'last_seen',
+                 'last_checked', 'details')
+
+    def __init__(self, object_class: str, bbox: List[int], now: float,
+                 track_id: Optional[int] = None):
+        self.object_class = object_class
+        self.reset(bbox, now, track_id)
+
+    def reset(self, bbox: List[int], now: float, track_id: Optional[int] = None):
+        """視為新物件重新開始計算 (清除靜止時間與沿用的辨識結果)"""
+        self.anchor_bbox = list(bbox)  # 建立時的位置,物件緩慢漂移時 IoU 也會下降
+        self.track_id = track_id
+        self.first_seen = now
+        self.last_seen = now
+        self.last_checked = now
+        self.details = None  # 上次辨識結果
+
+
+class StationaryObjectRegistry:
+    """單一攝影機的靜止物件登錄表"""
+
+    def __init__(self, iou_threshold: float = 0.9,
+                 min_stationary_time: float = 10.0,
+                 recheck_interval: float = 60.0,
+                 expire_after: float = 30.0,
+                 max_gap: float = 10.0):
+        """
+        初始化登錄表
+
+        Args:
+            iou_threshold: 與既有記錄的 IoU 超過此值視為同一位置
+            min_stationary_time: 在同一位置持續多久(秒)後視為靜止
+            recheck_interval: 靜止物件每隔多久(秒)重新辨識一次
+            expire_after: 多久(秒)未出現則移除記錄
+            max_gap: 同一位置兩次出現間隔超過此秒數時視為另一個物件
+                (例如車輛離開後另一台停進同一格)，重新計算靜止時間且不沿用辨識結果
+        """
+        self.iou_threshold = iou_threshold
+        self.min_stationary_time = min_stationary_time
+        self.recheck_interval = recheck_interval
+        self.expire_after = expire_after
+        self.max_gap = max_gap
+
+        self.entries: List[StationaryEntry] = []
+
+        self.suppressed_count = 0
+        self.processed_count = 0
+        self.recheck_count = 0
+        self.reset_count = 0
+
+    def match(self, detections: List[Dict], now: float = None) -> List[Optional[StationaryEntry]]:
+        """
+        將偵測結果對應到登錄表記錄 (沒有對應時建立新記錄)
+
+        對應到的記錄若中斷超過 max_gap 秒，或追蹤 ID 與記錄不同，
+        表示同一位置換了物件，記錄重新開始計算。
+
+        Args:
+            detections: YOLO 偵測結果列表
+            now: 目前時間 (預設 time.time())
+
+        Returns:
+            List[StationaryEntry]: 與 detections 順序相同的記錄列表
+        """
+        now = time.time() if now is None else now
+        self._expire(now)
+
+        matched: List[Optional[StationaryEntry]] = [None] * len(detections)
+        if not detections:
+            return matched
+
+        det_boxes = np.array([d['bbox'] for d in detections], dtype=np.float32).reshape(-1, 4)
+        entry_boxes = np.array([e.anchor_bbox for e in self.entries], dtype=np.float32).reshape(-1, 4)
+        iou = bbox_iou_matrix(det_boxes, entry_boxes)
+
+        # 貪婪配對: 依 IoU 由高到低,每個記錄最多對應一個偵測
+        used_entries = set()
+        if iou.size:
+            order = np.argsort(-iou, axis=None)
+            for flat in order:
+                di, ei = divmod(int(flat), iou.shape[1])
+                if iou[di, ei] < self.iou_threshold:
+                    break
+                if matched[di] is not None or ei in used_entries:
+                    continue
+                entry = self.entries[ei]
+                detection = detections[di]
+                if entry.object_class != detection['class']:
+                    continue
+                track_id = detection.get('track_id')
+                if (now - entry.last_seen > self.max_gap or
+                        (track_id is not None and entry.track_id is not None
+                         and track_id != entry.track_id)):
+                    entry.reset(detection['bbox'], now, track_id)
+                    self.reset_count += 1
+                elif entry.track_id is None:
+                    entry.track_id = track_id
+                entry.last_seen = now
+                matched[di] = entry
+                used_entries.add(ei)
+
+        for di, detection in enumerate(detections):
+            if matched[di] is None:
+                entry = StationaryEntry(detection['class'], detection['bbox'], now,
+                                        detection.get('track_id'))
+                self.entries.append(entry)
+                matched[di] = entry
+
+        return matched
+
+    def should_suppress(self, entry: StationaryEntry, now: float = None) -> bool:
+        """
+        判斷此記錄是否應跳過辨識與寫入
+
+        靜止且距離上次辨識未超過 recheck_interval 時回傳 True;
+        需要重新辨識時回傳 False 並更新 last_checked。
+
+        Args:
+            entry: match() 回傳的記錄
+            now: 目前時間
+
+        Returns:
+            bool: 是否抑制
+        """
+        now = time.time() if now is None else now
+
+        is_stationary = now - entry.first_seen >= self.min_stationary_time
+        if is_stationary and now - entry.last_checked < self.recheck_interval:
+            self.suppressed_count += 1
+            return True
+
+        if is_stationary:
+            self.recheck_count += 1
+        entry.last_checked = now
+        self.processed_count += 1
+        return False
+
+    def _expire(self, now: float):
+        """移除過期記錄"""
+        if self.entries:
+            self.entries = [e for e in self.entries if now - e.last_seen <= self.expire_after]
+
+    def get_stats(self) -> Dict:
+        """取得抑制統計"""
+        stationary = sum(
+            1 for e in self.entries if e.last_seen - e.first_seen >= self.min_stationary_time
+        )
+        return {
+            'tracked': len(self.entries),
+            'stationary': stationary,
+            'suppressed': self.suppressed_count,
+            'processed': self.processed_count,
+            'rechecked': self.recheck_count,
+            'reset': self.reset_count
+        }
@@ -10,6 +10,10 @@ import logging
 
 from .base_detector import BaseDetector
 from .recognizer_base import DetailRecognizer
+from .stationary import StationaryObjectRegistry
+from .scheduler import RecognitionScheduler
+from .result_bus import ResultBus
+from utils.frame_artifacts import FrameArtifacts
 from utils.performance import PerformanceMonitor
 
 
@@ -49,9 +53,70 @@ class MultiModalRecognitionSystem:
             logger=self.logger
         )
         
+        # 靜止物件抑制（每個攝影機各自一個登錄表）
+        self.stationary_config = perf_config.get('stationary_suppression', {})
+        self.stationary_registries: Dict[str, StationaryObjectRegistry] = {}
+        
+        # 每幀辨識時間預算（攝影機可用 recognition_time_budget 個別覆寫）
+        budget_config = perf_config.get('recognition_budget', {})
+        self.scheduler = RecognitionScheduler(
+            time_budget=budget_config.get('time_budget', 0.0),
+            overflow=budget_config.get('overflow', 'defer'),
+            read_track_ttl=budget_config.get('read_track_ttl', 300.0),
+            camera_budgets={
+                cam['id']: cam['recognition_time_budget']
+                for cam in config.get('cameras', [])
+                if 'id' in cam and cam.get('recognition_time_budget') is not None
+            }
+        )
+        
+        # 結果匯流排（由 attach_result_bus 設定，未設定時 process_rtsp 的 callback 會自行建立）
+        self.result_bus: Optional[ResultBus] = None
+        self._bus_lock = threading.Lock()
+        
         if self.logger:
             self.logger.info("✓ 系統初始化完成")
     
+    def attach_result_bus(self, bus: ResultBus):
+        """
+        設定結果匯流排
+        
+        設定後 process_rtsp 每幀以 'detections' 主題發布一次結果，
+        資料庫寫入等輸出端在各自的執行緒處理，不會阻塞辨識執行緒。
+        
+        Args:
+            bus: 結果匯流排
+        """
+        self.result_bus = bus
+    
+    def subscribe_callback(self, camera_id: str, callback: Callable) -> str:
+        """
+        將結果回調註冊為結果匯流排的輸出端
+        
+        回調在輸出端自己的執行緒中執行，只收到此攝影機的 'detections'，
+        耗時的回調不會拖慢辨識執行緒。尚未設定匯流排時建立並啟動一個預設匯流排。
+        
+        Args:
+            camera_id: 攝影機 ID
+            callback: 結果回調 callback(camera_id, results)
+        
+        Returns:
+            str: 輸出端名稱（callback-<攝影機 ID>，可用 result_bus.unsubscribe 移除）
+        """
+        with self._bus_lock:
+            if self.result_bus is None:
+                bus = ResultBus(logger=self.logger)
+                bus.start()
+                self.attach_result_bus(bus)
+        
+        def on_detections(message):
+            if message.payload['camera_id'] == camera_id:
+                callback(camera_id, message.payload['results'])
+        
+        name = f"callback-{camera_id}"
+        self.result_bus.subscribe(name, on_detections, topics=['detections'])
+        return name
+    
     def register_recognizer(self, recognizer: DetailRecognizer):
         """
         註冊辨識模組
@@ -69,7 +134,97 @@ class MultiModalRecognitionSystem:
                 self.logger.error(f"模組註冊失敗 {recognizer.name}: {e}")
             raise
     
-    def process_image(self, image, conf_threshold: float = 0.5, track: bool = False) -> List[Dict]:
+    def get_camera_config(self, camera_id: str) -> Dict:
+        """
+        取得攝影機配置
+        
+        Args:
+            camera_id: 攝影機 ID
+        
+        Returns:
+            Dict: 攝影機配置,找不到時回傳空字典
+        """
+        for cam in self.config.get('cameras', []):
+            if cam.get('id') == camera_id:
+                return cam
+        return {}
+    
+    def resolve_recognizers(self, camera) -> List[DetailRecognizer]:
+        """
+        依攝影機配置的 modules 決定要執行的辨識模組
+        
+        於建立攝影機處理流程時呼叫一次,結果傳給 process_image()。
+        未設定 modules 時使用所有已註冊模組。
+        
+        Args:
+            camera: 攝影機配置字典或攝影機 ID
+        
+        Returns:
+            List[DetailRecognizer]: 此攝影機使用的辨識模組
+        """
+        cam = self.get_camera_config(camera) if isinstance(camera, str) else (camera or {})
+        module_names = cam.get('modules')
+        
+        if module_names is None:
+            return list(self.recognizers.values())
+        
+        recognizers = []
+        for name in module_names:
+            recognizer = self.recognizers.get(name)
+            if recognizer is None:
+                if self.logger:
+                    self.logger.warning(f"[{cam.get('id')}] 模組未註冊或未啟用: {name}")
+                continue
+            recognizers.append(recognizer)
+        
+        if self.logger:
+            names = ', '.join(r.name for r in recognizers) or '無'
+            self.logger.info(f"[{cam.get('id')}] 使用辨識模組: {names}")
+        
+        return recognizers
+    
+    def get_stationary_registry(self, camera_id: str) -> Optional[StationaryObjectRegistry]:
+        """
+        取得攝影機的靜止物件登錄表
+        
+        Args:
+            camera_id: 攝影機 ID
+        
+        Returns:
+            StationaryObjectRegistry: 登錄表,未啟用靜止物件抑制時回傳 None
+        """
+        if camera_id is None or not self.stationary_config.get('enabled', False):
+            return None
+        
+        registry = self.stationary_registries.get(camera_id)
+        if registry is None:
+            cfg = self.stationary_config
+            registry = StationaryObjectRegistry(
+                iou_threshold=cfg.get('iou_threshold', 0.9),
+                min_stationary_time=cfg.get('min_stationary_time', 10.0),
+                recheck_interval=cfg.get('recheck_interval', 60.0),
+                expire_after=cfg.get('expire_after', 30.0),
+                max_gap=cfg.get('max_gap', 10.0)
+            )
+            self.stationary_registries[camera_id] = registry
+        return registry
+    
+    def get_stationary_stats(self) -> Dict[str, Dict]:
+        """
+        取得各攝影機的靜止物件抑制統計
+        
+        Returns:
+            Dict[str, Dict]: {攝影機 ID: 統計資訊}
+        """
+        return {
+            camera_id: registry.get_stats()
+            for camera_id, registry in self.stationary_registries.items()
+        }
+    
+    def process_image(self, image, conf_threshold: float = 0.5, track: bool = False,
+                      camera_id: str = None,
+                      zone_checker: Optional[Callable[[Dict], bool]] = None,
+                      recognizers: Optional[List[DetailRecognizer]] = None) -> List[Dict]:
         """
         處理單張圖片
         
@@ -77,43 +232,97 @@ class MultiModalRecognitionSystem:
             image: 輸入影像
             conf_threshold: YOLO 信心度閾值
             track: 是否啟用物件追蹤（用於停留時間偵測）
+            camera_id: 攝影機 ID（用於靜止物件抑制與時間預算,None 表示不抑制）
+            zone_checker: 判斷偵測是否位於電子圍籬內的函數（時間預算排序用,可選）
+            recognizers: 要執行的辨識模組（由 resolve_recognizers() 預先決定,
+                None 表示所有已註冊模組）
         
         Returns:
-            List[Dict]: 辨識結果列表
+            List[Dict]: 辨識結果列表。被抑制的靜止物件帶有 'stationary': True,
+                其 details 沿用上次辨識結果,且不會寫入資料庫;
+                超出時間預算而未辨識的物件帶有 'skipped': 'deferred' 或 'dropped'
         """
         start_time = time.time()
         
         if image is None or image.size == 0:
             return []
         
+        if recognizers is None:
+            recognizers = list(self.recognizers.values())
+        
         try:
             # 1. YOLO 偵測（支援追蹤）
             detections = self.base_detector.detect(image, conf_threshold, track=track)
+            if camera_id is not None:
+                # 辨識模組依攝影機區分快取（例如車牌 OCR 快取）
+                for detection in detections:
+                    detection['camera_id'] = camera_id
             
             results = []
+            pending = []  # 需要執行辨識模組的結果索引
+            
+            # 靜止物件對應
+            registry = self.get_stationary_registry(camera_id)
+            entries = registry.match(detections) if registry else [None] * len(detections)
             
-            # 2. 細部辨識
-            for detection in detections:
+            for detection, entry in zip(detections, entries):
                 result = {
                     'timestamp': datetime.now(timezone.utc).astimezone().isoformat(),
                     'base_detection': detection,
                     'details': {}
                 }
                 
-                # 3. 執行適用的辨識模組
-                for name, recognizer in self.recognizers.items():
-                    if recognizer.should_process(detection):
-                        try:
-                            detail = recognizer.recognize(image, detection)
-                            if detail:
-                                result['details'][name] = detail
-                        except Exception as e:
-                            if self.logger:
-                                self.logger.error(f"{name} 辨識失敗: {e}")
-                            result['details'][name] = {'error': str(e)}
+                # 靜止物件: 沿用上次結果,跳過辨識模組
+                if entry is not None and registry.should_suppress(entry):
+                    result['details'] = dict(entry.details or {})
+                    result['stationary'] = True
+                elif any(r.should_process(detection) for r in recognizers):
+                    pending.append(len(results))
                 
                 results.append(result)
             
+            # 2. 細部辨識（啟用時間預算時依優先順序執行）
+            scheduler = self.scheduler
+            budgeted = scheduler.is_enabled(camera_id)
+            if budgeted:
+                frame_start = scheduler.begin_frame(camera_id)
+                order = scheduler.order(
+                    camera_id, [detections[i] for i in pending], zone_checker
+                )
+                pending = [pending[i] for i in order]
+            
+            processed = 0
+            skipped = 0
+            for index in pending:
+                detection = detections[index]
+                result = results[index]
+                entry = entries[index]
+                
+                if budgeted and not scheduler.has_budget(camera_id, frame_start, processed):
+                    result['skipped'] = scheduler.record_skipped(camera_id, detection)
+                    if entry is not None:
+                        entry.last_checked = 0.0  # 下一幀重新辨識
+                    skipped += 1
+                    continue
+                
+                recognize_start = time.time()
+                self._run_recognizers(image, detection, result, recognizers)
+                processed += 1
+                
+                if budgeted:
+                    scheduler.record_processed(
+                        camera_id, detection, time.time() - recognize_start, result['details']
+                    )
+                if entry is not None:
+                    entry.details = result['details']
+            
+            if budgeted:
+                scheduler.end_frame(camera_id, skipped)
+                if skipped and self.logger:
+                    self.logger.debug(
+                        f"[{camera_id}] 超出辨識時間預算,略過 {skipped}/{len(pending)} 個物件"
+                    )
+            
             # 記錄效能
             duration = time.time() - start_time
             self.monitor.record_processing(duration, len(results))
@@ -125,6 +334,29 @@ class MultiModalRecognitionSystem:
                 self.logger.error(f"處理影像時發生錯誤: {e}")
             return []
     
+    def _run_recognizers(self, image, detection: Dict, result: Dict,
+                         recognizers: List[DetailRecognizer]):
+        """
+        對單一偵測執行所有適用的辨識模組
+        
+        Args:
+            image: 完整影像
+            detection: YOLO 偵測結果
+            result: 辨識結果 (就地寫入 details)
+            recognizers: 要執行的辨識模組
+        """
+        for recognizer in recognizers:
+            name = recognizer.name
+            if recognizer.should_process(detection):
+                try:
+                    detail = recognizer.recognize(image, detection)
+                    if detail:
+                        result['details'][name] = detail
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error(f"{name} 辨識失敗: {e}")
+                    result['details'][name] = {'error': str(e)}
+    
     def process_rtsp(self, rtsp_url: str, camera_id: str, 
                      interval: float = 2.0, 
                      callback: Optional[Callable] = None):
@@ -135,7 +367,8 @@ class MultiModalRecognitionSystem:
             rtsp_url: RTSP URL
             camera_id: 攝影機 ID
             interval: 處理間隔(秒)
-            callback: 結果回調 callback(camera_id, results)
+            callback: 結果回調 callback(camera_id, results)，註冊為結果匯流排的輸出端，
+                      在自己的執行緒中執行（見 subscribe_callback）
         """
         if self.logger:
             self.logger.info(f"[{camera_id}] 連接 RTSP: {rtsp_url}")
@@ -153,6 +386,12 @@ class MultiModalRecognitionSystem:
         
         self.running = True
         
+        # 此攝影機使用的辨識模組（只決定一次）
+        recognizers = self.resolve_recognizers(camera_id)
+        
+        # 回調不在辨識執行緒中執行，改由匯流排輸出端消費
+        callback_sink = self.subscribe_callback(camera_id, callback) if callback else None
+        
         # 影像讀取執行緒
         def capture_frames():
             retry_count = 0
@@ -211,19 +450,22 @@ class MultiModalRecognitionSystem:
                         conf_threshold = self.config.get('yolo', {}).get(
                             'confidence_threshold', 0.5
                         )
-                        results = self.process_image(frame, conf_threshold)
+                        results = self.process_image(
+                            frame, conf_threshold, camera_id=camera_id,
+                            recognizers=recognizers
+                        )
                         
                         # 顯示結果
                         if results:
                             self._print_results(results, camera_id, frame_count)
                         
-                        # 回調
-                        if callback and results:
-                            try:
-                                callback(camera_id, results)
-                            except Exception as e:
-                                if self.logger:
-                                    self.logger.error(f"回調函數錯誤: {e}")
+                        # 發布到結果匯流排（payload: camera_id, results, artifacts）
+                        if self.result_bus and results:
+                            self.result_bus.publish('detections', {
+                                'camera_id': camera_id,
+                                'results': results,
+                                'artifacts': FrameArtifacts(frame)
+                            })
                         
                         last_process_time = timestamp
                         
@@ -253,6 +495,15 @@ class MultiModalRecognitionSystem:
                     report = self.monitor.get_report()
                     if report and self.logger:
                         self.logger.info(f"[{camera_id}] 效能報告: {report}")
+                        recognizer_stats = self.get_recognizer_stats()
+                        if recognizer_stats:
+                            self.logger.info(f"[{camera_id}] 模組統計: {recognizer_stats}")
+                        registry = self.stationary_registries.get(camera_id)
+                        if registry:
+                            self.logger.info(f"[{camera_id}] 靜止物件抑制: {registry.get_stats()}")
+                        schedule_stats = self.scheduler.get_stats().get(camera_id)
+                        if schedule_stats:
+                            self.logger.info(f"[{camera_id}] 辨識排程: {schedule_stats}")
                     last_report_time = time.time()
                 
         except KeyboardInterrupt:
@@ -263,9 +514,25 @@ class MultiModalRecognitionSystem:
             capture_thread.join(timeout=2)
             process_thread.join(timeout=2)
             cap.release()
+            if callback_sink:
+                self.result_bus.unsubscribe(callback_sink)  # 先處理完已發布的結果
             if self.logger:
                 self.logger.info(f"[{camera_id}] RTSP 處理已停止")
     
+    def get_recognizer_stats(self) -> Dict[str, Dict]:
+        """
+        取得各辨識模組的統計資訊
+        
+        Returns:
+            Dict[str, Dict]: {模組名稱: 統計資訊},僅包含有統計的模組
+        """
+        stats = {}
+        for name, recognizer in self.recognizers.items():
+            recognizer_stats = recognizer.get_stats()
+            if recognizer_stats:
+                stats[name] = recognizer_stats
+        return stats
+    
     def _print_results(self, results: List[Dict], camera_id: str, frame_count: int):
         """列印結果"""
         if not results or not self.logger:
@@ -12,13 +12,21 @@ import numpy as np
 from pathlib import Path
 import threading
 import time
+import json
+import urllib.request
+
+from modules.virtual_fence import normalize_points
 
 app = Flask(__name__)
 
 # 全域變數
 current_frame = None
+current_camera_id = None
 config = None
 
+# 執行中的 web_server.py 圍籬重載端點
+RELOAD_URL = "http://localhost:5000/api/reload_fences"
+
 HTML_TEMPLATE = """
 <!DOCTYPE html>
 <html lang="zh-TW">
@@ -518,7 +526,9 @@ HTML_TEMPLATE = """
             .then(response => response.json())
             .then(data => {
                 if (data.success) {
-                    showAlert('✓ 配置已儲存！請重新啟動 web_server.py', 'success');
+                    showAlert(data.applied
+                        ? '✓ 配置已儲存並已套用到執行中的 web_server.py'
+                        : '✓ 配置已儲存！web_server.py 未執行，下次啟動時套用', 'success');
                     setTimeout(() => {
                         resetPoints();
                     }, 3000);
@@ -603,6 +613,24 @@ def get_frame():
     return jsonify({'frame': frame_base64})
 
 
+def notify_fence_reload() -> bool:
+    """
+    通知 web_server.py 重新載入圍籬配置
+    
+    Returns:
+        bool: 是否已成功套用
+    """
+    try:
+        req = urllib.request.Request(RELOAD_URL, data=b'', method='POST')
+        with urllib.request.urlopen(req, timeout=3) as response:
+            applied = json.loads(response.read().decode('utf-8')).get('success', False)
+        print("✓ 已套用到執行中的 web_server.py")
+        return applied
+    except Exception as e:
+        print(f"⚠️  無法通知 web_server.py 重新載入 ({e})，將在下次啟動時套用")
+        return False
+
+
 @app.route('/save_fence', methods=['POST'])
 def save_fence():
     """儲存圍籬配置"""
@@ -619,15 +647,18 @@ def save_fence():
         if 'fences' not in config['virtual_fences']:
             config['virtual_fences']['fences'] = []
         
-        # 建立新圍籬
+        # 建立新圍籬（座標轉為正規化座標，與攝影機解析度無關）
+        height, width = current_frame.shape[:2]
         new_fence = {
             'id': fence_data['id'],
             'name': fence_data['name'],
-            'points': fence_data['points'],
+            'points': normalize_points(fence_data['points'], (width, height)),
             'target_classes': fence_data['target_classes'],
             'min_confidence': fence_data['min_confidence'],
             'enabled': True
         }
+        if current_camera_id:
+            new_fence['camera_ids'] = [current_camera_id]
         
         # 檢查是否已存在
         existing_index = None
@@ -650,7 +681,10 @@ def save_fence():
         
         print(f"✓ 配置已儲存至: {config_path}")
         
-        return jsonify({'success': True})
+        # 通知執行中的 web_server.py 重新載入圍籬（未執行時忽略）
+        applied = notify_fence_reload()
+        
+        return jsonify({'success': True, 'applied': applied})
     
     except Exception as e:
         print(f"❌ 儲存失敗: {e}")
@@ -659,7 +693,7 @@ def save_fence():
 
 def main():
     """主程式"""
-    global current_frame, config
+    global current_frame, current_camera_id, config
     
     # 載入配置
     config = load_config()
@@ -677,6 +711,7 @@ def main():
         for camera in config['cameras']:
             if camera.get('enabled', True):
                 rtsp_url = camera.get('rtsp_url')
+                current_camera_id = camera.get('id')
                 camera_name = camera.get('name', '未命名')
                 print(f"使用攝影機: {camera_name}")
                 break
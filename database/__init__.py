@@ -1,5 +1,8 @@
 """資料庫模組"""
 
+from .factory import create_storage
 from .handler import DatabaseHandler
+from .sqlite_handler import SQLiteHandler
+from .storage import StorageBackend
 
-__all__ = ['DatabaseHandler']
+__all__ = ['DatabaseHandler', 'SQLiteHandler', 'StorageBackend', 'create_storage']
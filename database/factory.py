@@ -0,0 +1,34 @@
+"""儲存後端選擇 - 依 database.type 建立 PostgreSQL 或 SQLite 處理器"""
+
+import logging
+from typing import Dict
+
+from .handler import DatabaseHandler
+from .sqlite_handler import SQLiteHandler
+from .storage import StorageBackend
+
+
+BACKENDS = {
+    'postgresql': DatabaseHandler,
+    'sqlite': SQLiteHandler,
+}
+
+
+def create_storage(config: Dict, logger: logging.Logger = None) -> StorageBackend:
+    """
+    依配置建立儲存後端
+
+    Args:
+        config: 資料庫配置（type 為 postgresql 或 sqlite，預設 postgresql）
+        logger: 日誌記錄器
+
+    Returns:
+        StorageBackend: 資料庫處理器
+
+    Raises:
+        ValueError: 不支援的資料庫類型
+    """
+    backend = str(config.get('type', 'postgresql')).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"不支援的資料庫類型: {backend}（可用: {', '.join(BACKENDS)}）")
+    return BACKENDS[backend](config, logger)
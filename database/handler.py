@@ -1,14 +1,28 @@
 """資料庫處理器"""
 
 import psycopg2
-from psycopg2 import pool
-from typing import Dict, List, Optional
-from datetime import datetime, timezone
+from psycopg2.extras import execute_values
+from typing import Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
 import json
 import logging
+import threading
+from concurrent.futures import Future
 
+from utils.frame_artifacts import FrameArtifacts
+from .history import (DETECTION_COLUMNS, FENCE_INTRUSION_COLUMNS, SNAPSHOT_REF_EXPRESSION,
+                      build_keyset_query, resolve_snapshot_urls, select_columns, to_page)
+from .partitions import PartitionManager
+from .plate_search import PlateIndex, plate_key, rank_matches
+from .pool import BlockingConnectionPool
+from .snapshot_encoder import SnapshotEncoder
+from .snapshot_store import SnapshotStore
+from .storage import PostCommitError, StorageBackend
+from .summary import SummaryAggregator, summarize
+from .write_behind import WriteBehindWriter
 
-class DatabaseHandler:
+
+class DatabaseHandler(StorageBackend):
     """PostgreSQL 資料庫處理器"""
     
     def __init__(self, config: Dict, logger: logging.Logger = None):
@@ -22,21 +36,65 @@ class DatabaseHandler:
         self.config = config
         self.logger = logger
         self.pool = None
+        self.batch_page_size = config.get('batch_page_size', 500)  # 每個多列 INSERT 的最大列數
+        self.writer = None  # write-behind 背景寫入器（啟用時寫入改為排入佇列）
+        self.snapshot_store = None  # 截圖儲存區（啟用時資料表只記錄 snapshot_ref）
+        self.snapshot_encoder = None  # 截圖編碼工作池（啟用時截圖在背景編碼後再連結）
+        self.partition_manager = None  # 分割表維護（啟用時定期建立與刪除分割）
+        self.summary = None  # 每小時統計彙總（啟用時寫入的偵測會累計到 detection_summary）
+        self.plate_search_config = config.get('plate_search', {})
+        self.plate_index = None  # 記憶體車牌索引（plate_search.backend 為 memory 時使用）
+        partition_config = config.get('partitioning', {})
+        # 分割表查詢的預設時間範圍（天），讓查詢只掃描最近的分割；0 表示不限制
+        self.query_window_days = (partition_config.get('query_window_days', 0)
+                                  if partition_config.get('enabled', False) else 0)
         
         if config.get('enabled', True):
             self._create_connection_pool()
+            
+            self._create_snapshot_store()
+            
+            encoder_config = config.get('snapshot_encoder', {})
+            if encoder_config.get('enabled', False):
+                if self.snapshot_store:
+                    self.snapshot_encoder = SnapshotEncoder(self.snapshot_store, encoder_config, logger)
+                elif self.logger:
+                    self.logger.warning("截圖編碼工作池需要啟用 snapshot_store，已停用")
+            
+            write_behind_config = config.get('write_behind', {})
+            if write_behind_config.get('enabled', False):
+                self.writer = WriteBehindWriter(self, write_behind_config, logger)
+                self.writer.start()
+            
+            if self.plate_search_config.get('backend', 'trigram') == 'memory':
+                self.plate_index = PlateIndex()
+                self._load_plate_index()
+            
+            summary_config = config.get('summary', {})
+            if summary_config.get('enabled', False):
+                self.summary = SummaryAggregator(self, summary_config, logger)
+                self.summary.start()
+            
+            if partition_config.get('enabled', False):
+                self.partition_manager = PartitionManager(self, partition_config, logger)
+                if self.partition_manager.maintenance_interval:
+                    self.partition_manager.start()
     
     def _create_connection_pool(self):
-        """建立連線池"""
+        """建立連線池（執行緒安全，多個攝影機執行緒與網頁請求共用）"""
         try:
-            self.pool = psycopg2.pool.SimpleConnectionPool(
-                1,
+            self.pool = BlockingConnectionPool(
+                self.config.get('pool_min', 1),
                 self.config.get('pool_size', 5),
+                timeout=self.config.get('pool_timeout', 10.0),
+                validate_after=self.config.get('pool_validate_after', 30.0),
+                logger=self.logger,
                 host=self.config['host'],
                 port=self.config['port'],
                 database=self.config['database'],
                 user=self.config['user'],
-                password=self.config['password']
+                password=self.config['password'],
+                connect_timeout=self.config.get('connect_timeout', 5)
             )
             if self.logger:
                 self.logger.info("✓ 資料庫連線池建立成功")
@@ -46,129 +104,216 @@ class DatabaseHandler:
             raise
     
     def get_connection(self):
-        """從連線池取得連線"""
+        """從連線池取得連線（連線用完時等待，逾時拋出 PoolError）"""
         if self.pool:
             return self.pool.getconn()
         return None
     
     def return_connection(self, conn):
-        """歸還連線到連線池"""
+        """歸還連線到連線池（已斷線的連線直接關閉，下次取用時重新建立）"""
         if self.pool and conn:
-            self.pool.putconn(conn)
+            self.pool.putconn(conn, close=bool(conn.closed))
     
-    def save_detection(self, camera_id: str, results: List[Dict], frame=None) -> bool:
+    def save_detections_batch(self, frames: List[Tuple[str, List[Dict], Optional[FrameArtifacts]]]
+                              ) -> Optional[List[int]]:
         """
-        儲存偵測結果到資料庫
+        以多列 INSERT 批次儲存一或多幀的偵測結果
+        
+        所有偵測以一個 INSERT ... VALUES ... RETURNING id 寫入並一次取回 ID，
+        車牌記錄依車牌號碼彙總後以一個 upsert 寫入（count 累加本批出現次數），
+        整批在同一個交易中完成。
         
         Args:
-            camera_id: 攝影機 ID
-            results: 辨識結果列表
-            frame: 原始影像幀（用於截取車輛局部畫面）
+            frames: [(攝影機 ID, 辨識結果列表, 原始影像幀的編碼快取或 None), ...]
         
         Returns:
-            bool: 是否成功
+            List[int]: 依寫入順序排列的偵測記錄 ID，失敗時回傳 None
+                       （write-behind 模式下交由背景寫入，回傳空列表）
         """
         if not self.config.get('enabled', True):
-            return False
+            return None
+        
+        if self.writer:
+            self.writer.submit_detections(frames)
+            return []
+        
+        try:
+            return self.write_detection_rows(self.prepare_detection_rows(frames))
+        except PostCommitError as e:
+            if self.logger:
+                self.logger.error(f"偵測記錄已儲存，{e}")
+            return e.result
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"儲存資料失敗: {e}")
+            return None
+    
+    def write_detection_rows(self, rows: List[Dict]) -> List[int]:
+        """
+        在同一個交易中寫入已準備好的資料列（錯誤會拋出，由呼叫端處理）
+        
+        Args:
+            rows: prepare_detection_rows 產生的資料列
+        
+        Returns:
+            List[int]: 依寫入順序排列的偵測記錄 ID
+        
+        Raises:
+            PostCommitError: 交易已提交但後續處理失敗（資料已寫入，不可重試）
+        """
+        if not rows:
+            return []
         
         conn = None
+        committed = False
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            for result in results:
-                detection = result['base_detection']
-                details = result.get('details', {})
-                
-                # 插入偵測記錄
-                cursor.execute("""
-                    INSERT INTO detections 
-                    (camera_id, timestamp, object_class, confidence, bbox, details)
-                    VALUES (%s, %s, %s, %s, %s, %s)
-                    RETURNING id
-                """, (
-                    camera_id,
-                    datetime.fromisoformat(result['timestamp']),
-                    detection['class'],
-                    detection['confidence'],
-                    json.dumps(detection['bbox']),
-                    json.dumps(details)
-                ))
-                
-                detection_id = cursor.fetchone()[0]
-                
-                # 如果有車牌辨識結果,額外記錄
-                if 'license_plate' in details:
-                    plate_info = details['license_plate']
-                    if 'plate_number' in plate_info:
-                        # 截取車輛局部畫面並轉為 base64
-                        vehicle_snapshot_base64 = None
-                        if frame is not None:
-                            import cv2
-                            import base64
-                            
-                            bbox = detection['bbox']
-                            x1, y1, x2, y2 = map(int, bbox)
-                            
-                            # 擴展邊界框以包含更多車輛細節（增加 10%）
-                            h, w = frame.shape[:2]
-                            margin_x = int((x2 - x1) * 0.1)
-                            margin_y = int((y2 - y1) * 0.1)
-                            
-                            x1 = max(0, x1 - margin_x)
-                            y1 = max(0, y1 - margin_y)
-                            x2 = min(w, x2 + margin_x)
-                            y2 = min(h, y2 + margin_y)
-                            
-                            # 截取車輛區域
-                            vehicle_crop = frame[y1:y2, x1:x2]
-                            
-                            # 轉為 JPEG 並編碼為 base64
-                            _, buffer = cv2.imencode('.jpg', vehicle_crop, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                            vehicle_snapshot_base64 = base64.b64encode(buffer).decode('utf-8')
-                        
-                        cursor.execute("""
-                            INSERT INTO plate_records 
-                            (detection_id, plate_number, is_valid, confidence, first_seen_date, snapshot_base64)
-                            VALUES (%s, %s, %s, %s, CURRENT_DATE, %s)
-                            ON CONFLICT (plate_number, first_seen_date)
-                            DO UPDATE SET
-                                last_seen = CURRENT_TIMESTAMP,
-                                count = plate_records.count + 1,
-                                snapshot_base64 = COALESCE(EXCLUDED.snapshot_base64, plate_records.snapshot_base64)
-                        """, (
-                            detection_id,
-                            plate_info['plate_number'],
-                            plate_info.get('is_valid', True),
-                            plate_info.get('confidence', 0),
-                            vehicle_snapshot_base64
-                        ))
+            # 插入偵測記錄（RETURNING 依 VALUES 順序回傳 ID）
+            detection_ids = [row[0] for row in execute_values(cursor, """
+                INSERT INTO detections 
+                (camera_id, timestamp, object_class, confidence, bbox, details)
+                VALUES %s
+                RETURNING id
+            """, [
+                (row['camera_id'], datetime.fromisoformat(row['timestamp']),
+                 row['object_class'], row['confidence'], row['bbox'], row['details'])
+                for row in rows
+            ], page_size=self.batch_page_size, fetch=True)]
+            
+            plates = [(i, row['plate'], row['snapshot'])
+                      for i, row in enumerate(rows) if row['plate']]
+            plate_dates = {}
+            if plates:
+                column = self.snapshot_column
+                plate_dates = dict(execute_values(cursor, f"""
+                    INSERT INTO plate_records 
+                    (detection_id, plate_number, is_valid, confidence, {column}, count, first_seen_date)
+                    VALUES %s
+                    ON CONFLICT (plate_number, first_seen_date)
+                    DO UPDATE SET
+                        last_seen = CURRENT_TIMESTAMP,
+                        count = plate_records.count + EXCLUDED.count,
+                        {column} = COALESCE(EXCLUDED.{column}, plate_records.{column})
+                    RETURNING plate_number, first_seen_date
+                """, self._aggregate_plates(plates, detection_ids),
+                    template="(%s, %s, %s, %s, %s, %s, CURRENT_DATE)",
+                    page_size=self.batch_page_size, fetch=True))
             
             conn.commit()
+            committed = True
+            
+            # 只累計已寫入的偵測（write-behind 重送時也經過這裡，不會重複或遺漏）
+            if self.summary:
+                self.summary.record_rows(rows)
+            if self.plate_index is not None:
+                today = datetime.now().date()
+                for row in rows:
+                    if row['plate']:
+                        self.plate_index.add(row['plate']['plate_number'], today)
+            
+            # 背景編碼的截圖（或重送時已完成的編碼結果）在寫入後連結
+            pending = [
+                (row['plate']['plate_number'], plate_dates[row['plate']['plate_number']],
+                 row.get('snapshot_job') or row.get('snapshot_tiers'))
+                for row in rows
+                if row['plate'] and (row.get('snapshot_job') or row.get('snapshot_tiers'))
+            ]
+            if pending and self.snapshot_encoder:
+                self._link_snapshot_tiers(pending)
             
             if self.logger:
-                self.logger.debug(f"已儲存 {len(results)} 筆偵測記錄")
+                self.logger.debug(f"已批次儲存 {len(rows)} 筆偵測記錄、{len(plates)} 筆車牌")
             
-            return True
+            return detection_ids
             
         except Exception as e:
+            if committed:
+                raise PostCommitError(detection_ids, e) from e
+            if conn and not conn.closed:
+                conn.rollback()
+            raise
+        finally:
             if conn:
+                self.return_connection(conn)
+    
+    def _link_snapshot_tiers(self, pending: List[Tuple]):
+        """
+        本批所有截圖編碼完成後，以一個 UPDATE 連結到車牌記錄
+        
+        由最後完成的編碼工作執行緒執行（全部已完成時在呼叫端直接執行），
+        寫入偵測資料的交易不等待編碼。
+        
+        Args:
+            pending: [(車牌號碼, first_seen_date, 編碼 Future 或 {等級: 雜湊})]
+        """
+        remaining = [len(pending)]
+        lock = threading.Lock()
+        
+        def on_done(_):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            self._write_snapshot_links(pending)
+        
+        for _, _, job in pending:
+            if isinstance(job, Future):
+                job.add_done_callback(on_done)
+            else:
+                on_done(None)
+    
+    def _write_snapshot_links(self, pending: List[Tuple]):
+        """更新車牌記錄的 snapshot_ref 與 snapshot_tiers（同一車牌取最後一張）"""
+        links = {}
+        for plate_number, day, job in pending:
+            try:
+                tiers = job.result() if isinstance(job, Future) else job
+            except Exception:
+                continue  # 編碼失敗已由工作池記錄
+            if tiers:
+                primary = tiers.get(self.snapshot_encoder.primary) or next(iter(tiers.values()))
+                links[(plate_number, day)] = (primary, json.dumps(tiers))
+        if not links:
+            return
+        
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            execute_values(cursor, """
+                UPDATE plate_records AS p
+                SET snapshot_ref = v.ref, snapshot_tiers = v.tiers::jsonb
+                FROM (VALUES %s) AS v(plate_number, first_seen_date, ref, tiers)
+                WHERE p.plate_number = v.plate_number
+                  AND p.first_seen_date = v.first_seen_date
+            """, [key + value for key, value in links.items()])
+            conn.commit()
+        except Exception as e:
+            if conn and not conn.closed:
                 conn.rollback()
             if self.logger:
-                self.logger.error(f"儲存資料失敗: {e}")
-            return False
+                self.logger.error(f"連結車牌截圖失敗: {e}")
         finally:
             if conn:
                 self.return_connection(conn)
     
+    def _query_since(self, since: Optional[datetime]) -> datetime:
+        """查詢的起始時間（未指定時套用 query_window_days，讓分割表只掃描範圍內的分割）"""
+        if since is None and self.query_window_days:
+            since = datetime.now().astimezone() - timedelta(days=self.query_window_days)
+        return since or datetime.min
+    
     def get_recent_detections(self, camera_id: str = None, 
-                             limit: int = 100) -> List[Dict]:
+                             limit: int = 100, since: datetime = None) -> List[Dict]:
         """
         取得最近的偵測記錄
         
         Args:
             camera_id: 攝影機 ID (None = 全部)
             limit: 最多回傳筆數
+            since: 只查詢此時間之後的記錄 (None = 依 query_window_days)
         
         Returns:
             List[Dict]: 偵測記錄列表
@@ -176,6 +321,8 @@ class DatabaseHandler:
         if not self.config.get('enabled', True):
             return []
         
+        since = self._query_since(since)
+        
         conn = None
         try:
             conn = self.get_connection()
@@ -186,18 +333,19 @@ class DatabaseHandler:
                     SELECT id, camera_id, timestamp, object_class, 
                            confidence, bbox, details
                     FROM detections
-                    WHERE camera_id = %s
+                    WHERE camera_id = %s AND timestamp >= %s
                     ORDER BY timestamp DESC
                     LIMIT %s
-                """, (camera_id, limit))
+                """, (camera_id, since, limit))
             else:
                 cursor.execute("""
                     SELECT id, camera_id, timestamp, object_class, 
                            confidence, bbox, details
                     FROM detections
+                    WHERE timestamp >= %s
                     ORDER BY timestamp DESC
                     LIMIT %s
-                """, (limit,))
+                """, (since, limit))
             
             rows = cursor.fetchall()
             
@@ -223,6 +371,141 @@ class DatabaseHandler:
             if conn:
                 self.return_connection(conn)
     
+    def query_detections(self, camera_id: str = None, object_class: str = None,
+                         start: datetime = None, end: datetime = None, cursor: str = None,
+                         limit: int = 100, columns: List[str] = None) -> Dict:
+        """
+        以 keyset 分頁查詢偵測記錄（由新到舊）
+        
+        Args:
+            camera_id: 攝影機 ID (None = 全部)
+            object_class: 物件類別 (None = 全部)
+            start: 起始時間（含，None = 依 query_window_days）
+            end: 結束時間（不含）
+            cursor: 上一頁回傳的 next_cursor
+            limit: 每頁筆數
+            columns: 要回傳的欄位 (None = 全部，見 DETECTION_COLUMNS)
+        
+        Returns:
+            Dict: {'items': [...], 'next_cursor': 下一頁游標，沒有下一頁時為 None}
+        
+        Raises:
+            ValueError: 欄位或游標不正確
+        """
+        names = select_columns(DETECTION_COLUMNS, columns)
+        if start is None and self.query_window_days:
+            start = self._query_since(None)
+        filters = []
+        if camera_id:
+            filters.append(("camera_id = %s", (camera_id,)))
+        if object_class:
+            filters.append(("object_class = %s", (object_class,)))
+        sql, params = build_keyset_query(
+            'detections', [DETECTION_COLUMNS[name] for name in names], filters,
+            start=start, end=end, cursor=cursor, limit=limit
+        )
+        return to_page(names, self._fetch_page(sql, params), limit)
+    
+    def query_fence_intrusions(self, fence_id: str = None, camera_id: str = None,
+                               start: datetime = None, end: datetime = None, cursor: str = None,
+                               limit: int = 100, columns: List[str] = None) -> Dict:
+        """
+        以 keyset 分頁查詢圍籬入侵記錄（由新到舊，不讀取截圖內容）
+        
+        截圖只以 snapshot_url 表示：已存入截圖儲存區的為 /snapshots/<ref>，
+        其餘為 /api/fence_intrusions/<id>/snapshot，由瀏覽器需要時再取得。
+        
+        Args:
+            fence_id: 圍籬 ID (None = 全部)
+            camera_id: 攝影機 ID (None = 全部)
+            start: 起始時間（含，None = 依 query_window_days）
+            end: 結束時間（不含）
+            cursor: 上一頁回傳的 next_cursor
+            limit: 每頁筆數
+            columns: 要回傳的欄位 (None = 全部，見 FENCE_INTRUSION_COLUMNS)
+        
+        Returns:
+            Dict: {'items': [...], 'next_cursor': 下一頁游標，沒有下一頁時為 None}
+        
+        Raises:
+            ValueError: 欄位或游標不正確
+        """
+        names = select_columns(FENCE_INTRUSION_COLUMNS, columns)
+        expressions = [FENCE_INTRUSION_COLUMNS[name] for name in names]
+        if 'snapshot_url' in names and self.snapshot_store:
+            # 有 snapshot_ref 時回傳雜湊，只有 Base64 時回傳空字串
+            expressions[names.index('snapshot_url')] = SNAPSHOT_REF_EXPRESSION
+        if start is None and self.query_window_days:
+            start = self._query_since(None)
+        filters = []
+        if fence_id:
+            filters.append(("fence_id = %s", (fence_id,)))
+        if camera_id:
+            filters.append(("camera_id = %s", (camera_id,)))
+        sql, params = build_keyset_query(
+            'fence_intrusions', expressions, filters,
+            start=start, end=end, cursor=cursor, limit=limit
+        )
+        
+        page = to_page(names, self._fetch_page(sql, params), limit)
+        if 'snapshot_url' in names:
+            resolve_snapshot_urls(page['items'])
+        return page
+    
+    def _fetch_page(self, sql: str, params: tuple) -> List[tuple]:
+        """執行分頁查詢（錯誤會拋出，由呼叫端處理）"""
+        if not self.config.get('enabled', True):
+            return []
+        
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            conn.rollback()  # 唯讀查詢，結束交易後再歸還
+            return rows
+        finally:
+            self.return_connection(conn)
+    
+    def get_fence_intrusion_snapshot(self, intrusion_id: int) -> Optional[Dict]:
+        """
+        取得單筆圍籬入侵記錄的截圖
+        
+        Args:
+            intrusion_id: 入侵記錄 ID
+        
+        Returns:
+            Dict: {'snapshot_ref': 雜湊或 None, 'snapshot_base64': Base64 或 None}，
+                  記錄不存在時回傳 None
+        """
+        if not self.config.get('enabled', True):
+            return None
+        
+        ref_column = 'snapshot_ref' if self.snapshot_store else 'NULL'
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {ref_column}, snapshot_base64
+                FROM fence_intrusions
+                WHERE id = %s
+                LIMIT 1
+            """, (intrusion_id,))
+            row = cursor.fetchone()
+            conn.rollback()
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"查詢入侵截圖失敗: {e}")
+            return None
+        finally:
+            if conn:
+                self.return_connection(conn)
+        
+        if row is None:
+            return None
+        return {'snapshot_ref': row[0], 'snapshot_base64': row[1]}
+    
     def get_plate_statistics(self, days: int = 7) -> List[Dict]:
         """
         取得車牌統計
@@ -273,6 +556,101 @@ class DatabaseHandler:
             if conn:
                 self.return_connection(conn)
     
+    def search_plates(self, query: str, max_distance: int = 1,
+                      time_range: Tuple[Optional[datetime], Optional[datetime]] = None,
+                      limit: int = 50) -> List[Dict]:
+        """
+        模糊搜尋車牌（例如 ABC-1234 也會找到 A8C1234、ABC-1284）
+        
+        比對的是 plate_key（去除分隔符號並折疊 O/0、I/1、B/8 等易混淆字元），
+        距離為 plate_key 的編輯距離。預設以 pg_trgm 索引找候選，
+        plate_search.backend 為 memory 時改用記憶體 q-gram 索引。
+        
+        Args:
+            query: 查詢車牌
+            max_distance: 編輯距離上限
+            time_range: (起始, 結束) 只統計此期間（以日計）的出現 (None = 全部)
+            limit: 最多回傳筆數
+        
+        Returns:
+            List[Dict]: 依距離排序的車牌（plate_number、distance、exact、count、days、
+                        first_seen、last_seen）
+        """
+        if not self.config.get('enabled', True) or not plate_key(query):
+            return []
+        
+        if self.plate_index is not None:
+            return self.plate_index.search(query, max_distance, time_range, limit)
+        
+        key = plate_key(query)
+        # trigram 相似度下限：長度 L 的鍵經 d 次編輯後至少保留 L + 1 - 3d 個 trigram
+        grams = len(key) + 1
+        threshold = max(0.05, (grams - 3 * max_distance) / (grams + 4 * max_distance) - 0.01)
+        start, end = time_range or (None, None)
+        
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("SELECT set_config('pg_trgm.similarity_threshold', %s, true)",
+                           (str(round(threshold, 3)),))
+            cursor.execute("""
+                SELECT plate_number, SUM(count), COUNT(*), MIN(first_seen), MAX(last_seen),
+                       MAX(similarity(plate_key, %s)) AS score
+                FROM plate_records
+                WHERE (plate_key = %s OR plate_key %% %s)
+                  AND (%s::date IS NULL OR first_seen_date >= %s::date)
+                  AND (%s::date IS NULL OR first_seen_date <= %s::date)
+                GROUP BY plate_number
+                ORDER BY score DESC
+                LIMIT %s
+            """, (key, key, key,
+                  start.date() if start else None, start.date() if start else None,
+                  end.date() if end else None, end.date() if end else None,
+                  self.plate_search_config.get('candidate_limit', 500)))
+            rows = cursor.fetchall()
+            conn.rollback()
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"搜尋車牌失敗: {e}")
+            return []
+        finally:
+            if conn:
+                self.return_connection(conn)
+        
+        candidates = [{
+            'plate_number': row[0],
+            'count': int(row[1] or 0),
+            'days': row[2],
+            'first_seen': row[3].isoformat() if row[3] else None,
+            'last_seen': row[4].isoformat() if row[4] else None
+        } for row in rows]
+        return rank_matches(query, candidates, max_distance)[:limit]
+    
+    def _load_plate_index(self):
+        """由 plate_records 載入記憶體車牌索引"""
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor(name='plate_index_load')  # 伺服器端游標，分批讀取
+            cursor.itersize = 10000
+            cursor.execute("""
+                SELECT plate_number, first_seen_date, count, first_seen, last_seen
+                FROM plate_records
+            """)
+            for plate_number, day, count, first_seen, last_seen in cursor:
+                self.plate_index.add(plate_number, day, count or 0, first_seen, last_seen)
+            cursor.close()
+            conn.rollback()
+            if self.logger:
+                self.logger.info(f"✓ 已載入 {len(self.plate_index)} 個車牌到記憶體搜尋索引")
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"載入車牌搜尋索引失敗: {e}")
+        finally:
+            if conn:
+                self.return_connection(conn)
+    
     def save_fence_intrusion(self, intrusion_data: Dict) -> bool:
         """
         儲存圍籬入侵事件到資料庫
@@ -286,15 +664,43 @@ class DatabaseHandler:
                 - bbox: 邊界框 [x1, y1, x2, y2]
                 - camera_id: 攝影機ID
                 - camera_name: 攝影機名稱
+                - snapshot_jpeg: 影像截圖 (JPEG 位元組)，或
                 - snapshot_base64: 影像截圖 (Base64)
                 - timestamp: 時間戳記
         
         Returns:
-            bool: 是否成功
+            bool: 是否成功（write-behind 模式下表示已排入背景寫入）
         """
         if not self.config.get('enabled', True):
             return False
         
+        intrusion_data = self._store_intrusion_snapshot(intrusion_data)
+        
+        if self.writer:
+            self.writer.submit_intrusion(intrusion_data)
+            return True
+        
+        try:
+            intrusion_id = self.write_fence_intrusion(intrusion_data)
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"儲存圍籬入侵事件失敗: {e}")
+            return False
+        
+        if self.logger:
+            self.logger.info(f"✓ 已儲存圍籬入侵事件 ID: {intrusion_id}")
+        return True
+    
+    def write_fence_intrusion(self, intrusion_data: Dict) -> int:
+        """
+        寫入一筆圍籬入侵事件（錯誤會拋出，由呼叫端處理）
+        
+        Args:
+            intrusion_data: 入侵事件資料（欄位同 save_fence_intrusion）
+        
+        Returns:
+            int: 入侵事件 ID
+        """
         conn = None
         try:
             conn = self.get_connection()
@@ -307,11 +713,11 @@ class DatabaseHandler:
             elif timestamp is None:
                 timestamp = datetime.now(timezone.utc).astimezone()
             
-            cursor.execute("""
+            cursor.execute(f"""
                 INSERT INTO fence_intrusions 
                 (fence_id, fence_name, object_class, confidence, 
                  bbox_x1, bbox_y1, bbox_x2, bbox_y2,
-                 camera_id, camera_name, snapshot_base64, timestamp)
+                 camera_id, camera_name, {self.snapshot_column}, timestamp)
                 VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 RETURNING id
             """, (
@@ -325,36 +731,31 @@ class DatabaseHandler:
                 bbox[3] if len(bbox) > 3 else None,
                 intrusion_data.get('camera_id'),
                 intrusion_data.get('camera_name'),
-                intrusion_data.get('snapshot_base64'),
+                intrusion_data.get(self.snapshot_column),
                 timestamp
             ))
             
             intrusion_id = cursor.fetchone()[0]
             conn.commit()
+            return intrusion_id
             
-            if self.logger:
-                self.logger.info(f"✓ 已儲存圍籬入侵事件 ID: {intrusion_id}")
-            
-            return True
-            
-        except Exception as e:
-            if conn:
+        except Exception:
+            if conn and not conn.closed:
                 conn.rollback()
-            if self.logger:
-                self.logger.error(f"儲存圍籬入侵事件失敗: {e}")
-            return False
+            raise
         finally:
             if conn:
                 self.return_connection(conn)
     
     def get_recent_fence_intrusions(self, fence_id: str = None, 
-                                   limit: int = 100) -> List[Dict]:
+                                   limit: int = 100, since: datetime = None) -> List[Dict]:
         """
         取得最近的圍籬入侵記錄
         
         Args:
             fence_id: 圍籬 ID (None = 全部)
             limit: 最多回傳筆數
+            since: 只查詢此時間之後的記錄 (None = 依 query_window_days)
         
         Returns:
             List[Dict]: 入侵記錄列表
@@ -362,30 +763,36 @@ class DatabaseHandler:
         if not self.config.get('enabled', True):
             return []
         
+        since = self._query_since(since)
+        
+        # 啟用截圖儲存區時另外讀取 snapshot_ref（尚未遷移的舊資料仍使用 Base64）
+        snapshot_columns = 'snapshot_base64, snapshot_ref' if self.snapshot_store else 'snapshot_base64'
+        
         conn = None
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
             if fence_id:
-                cursor.execute("""
+                cursor.execute(f"""
                     SELECT id, fence_id, fence_name, object_class, confidence,
                            bbox_x1, bbox_y1, bbox_x2, bbox_y2,
-                           camera_id, camera_name, snapshot_base64, timestamp
+                           camera_id, camera_name, timestamp, {snapshot_columns}
                     FROM fence_intrusions
-                    WHERE fence_id = %s
+                    WHERE fence_id = %s AND timestamp >= %s
                     ORDER BY timestamp DESC
                     LIMIT %s
-                """, (fence_id, limit))
+                """, (fence_id, since, limit))
             else:
-                cursor.execute("""
+                cursor.execute(f"""
                     SELECT id, fence_id, fence_name, object_class, confidence,
                            bbox_x1, bbox_y1, bbox_x2, bbox_y2,
-                           camera_id, camera_name, snapshot_base64, timestamp
+                           camera_id, camera_name, timestamp, {snapshot_columns}
                     FROM fence_intrusions
+                    WHERE timestamp >= %s
                     ORDER BY timestamp DESC
                     LIMIT %s
-                """, (limit,))
+                """, (since, limit))
             
             rows = cursor.fetchall()
             
@@ -400,8 +807,9 @@ class DatabaseHandler:
                     'bbox': [row[5], row[6], row[7], row[8]] if row[5] is not None else None,
                     'camera_id': row[9],
                     'camera_name': row[10],
-                    'snapshot_base64': row[11],
-                    'timestamp': row[12].isoformat() if row[12] else None
+                    'timestamp': row[11].isoformat() if row[11] else None,
+                    'snapshot_base64': row[12],
+                    'snapshot_url': SnapshotStore.url_for(row[13]) if len(row) > 13 else None
                 })
             
             return results
@@ -414,8 +822,76 @@ class DatabaseHandler:
             if conn:
                 self.return_connection(conn)
     
+    def get_summary_stats(self, since: datetime, camera_id: str = None) -> Dict:
+        """
+        由 detection_summary 取得統計（含尚未寫入的增量）
+        
+        Args:
+            since: 起始時間（本地時間，以整點計）
+            camera_id: 攝影機 ID (None = 全部)
+        
+        Returns:
+            Dict: summarize 的統計結果，未啟用或失敗時回傳 None
+        """
+        if not self.config.get('enabled', True) or not self.summary:
+            return None
+        
+        since = since.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+        
+        conn = None
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT camera_id, hour, object_class, count,
+                       confidence_sum, plate_count, valid_plate_count
+                FROM detection_summary
+                WHERE hour >= %s AND (%s IS NULL OR camera_id = %s)
+            """, (since, camera_id, camera_id))
+            rows = cursor.fetchall()
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"查詢統計彙總失敗: {e}")
+            return None
+        finally:
+            if conn:
+                self.return_connection(conn)
+        
+        rows.extend(
+            (*key, *delta) for key, delta in self.summary.pending_deltas().items()
+            if key[1] >= since and (camera_id is None or key[0] == camera_id)
+        )
+        return summarize(rows)
+    
+    def get_pool_stats(self) -> Dict:
+        """
+        取得連線池統計
+        
+        Returns:
+            Dict: 使用中連線數、飽和度、等待與逾時次數，未啟用時回傳空字典
+        """
+        return self.pool.get_stats() if self.pool else {}
+    
+    def get_write_stats(self) -> Dict:
+        """
+        取得 write-behind 寫入統計
+        
+        Returns:
+            Dict: 佇列深度、寫入延遲與落地暫存量，未啟用時回傳空字典
+        """
+        return self.writer.get_stats() if self.writer else {}
+    
     def close(self):
-        """關閉連線池"""
+        """關閉連線池（write-behind 模式會先寫完佇列）"""
+        if self.partition_manager:
+            self.partition_manager.stop()
+        if self.writer:
+            self.writer.stop()
+            self.writer = None
+        if self.snapshot_encoder:
+            self.snapshot_encoder.shutdown(wait=True)  # 等待編碼與連結完成
+        if self.summary:
+            self.summary.stop()  # 寫入剩餘的統計增量
         if self.pool:
             self.pool.closeall()
             if self.logger:
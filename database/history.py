@@ -0,0 +1,191 @@
+"""歷史記錄查詢 - keyset 分頁游標與可選欄位"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from .snapshot_store import SnapshotStore
+
+
+# 可查詢的欄位: 名稱 -> SQL 運算式（id 與 timestamp 固定包含，供分頁游標使用）
+DETECTION_COLUMNS = {
+    'id': 'id',
+    'camera_id': 'camera_id',
+    'timestamp': 'timestamp',
+    'object_class': 'object_class',
+    'confidence': 'confidence',
+    'bbox': 'bbox',
+    'details': 'details',
+}
+
+FENCE_INTRUSION_COLUMNS = {
+    'id': 'id',
+    'fence_id': 'fence_id',
+    'fence_name': 'fence_name',
+    'object_class': 'object_class',
+    'confidence': 'confidence',
+    'bbox': "CASE WHEN bbox_x1 IS NULL THEN NULL ELSE ARRAY[bbox_x1, bbox_y1, bbox_x2, bbox_y2] END",
+    'camera_id': 'camera_id',
+    'camera_name': 'camera_name',
+    'timestamp': 'timestamp',
+    # 只回傳是否有截圖，截圖本身由 snapshot_url 另外取得
+    'snapshot_url': 'snapshot_base64 IS NOT NULL',
+}
+
+# 啟用截圖儲存區時的 snapshot_url 運算式：有 snapshot_ref 時回傳雜湊，只有 Base64 時回傳空字串
+SNAPSHOT_REF_EXPRESSION = (
+    "CASE WHEN snapshot_ref IS NOT NULL THEN snapshot_ref "
+    "WHEN snapshot_base64 IS NOT NULL THEN '' END"
+)
+
+JSON_COLUMNS = ('bbox', 'details')
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    """
+    將最後一筆的 (timestamp, id) 編碼為分頁游標
+
+    Args:
+        timestamp: 最後一筆的時間
+        row_id: 最後一筆的 ID
+
+    Returns:
+        str: URL 安全的游標字串
+    """
+    raw = f"{timestamp.isoformat()}|{row_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    解析分頁游標
+
+    Args:
+        cursor: encode_cursor 產生的字串
+
+    Returns:
+        Tuple[datetime, int]: (timestamp, id)
+
+    Raises:
+        ValueError: 游標格式不正確
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        timestamp, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"不正確的分頁游標: {cursor}") from e
+
+
+def select_columns(available: Dict[str, str], columns: Optional[List[str]]) -> List[str]:
+    """
+    決定要查詢的欄位（未指定時為全部，id 與 timestamp 一定包含）
+
+    Args:
+        available: 可查詢的欄位
+        columns: 指定的欄位名稱
+
+    Returns:
+        List[str]: 欄位名稱
+
+    Raises:
+        ValueError: 指定了不存在的欄位
+    """
+    if not columns:
+        columns = list(available)
+    unknown = [name for name in columns if name not in available]
+    if unknown:
+        raise ValueError(f"不支援的欄位: {', '.join(unknown)}")
+    return ['id', 'timestamp'] + [name for name in columns if name not in ('id', 'timestamp')]
+
+
+def build_keyset_query(table: str, expressions: List[str], filters: List[Tuple[str, tuple]],
+                       start: datetime = None, end: datetime = None,
+                       cursor: str = None, limit: int = 100) -> Tuple[str, tuple]:
+    """
+    組合依 (timestamp, id) 由新到舊的 keyset 分頁查詢
+
+    游標條件以列比較 (timestamp, id) < (游標時間, 游標 ID) 表示，
+    配合 (..., timestamp DESC, id DESC) 索引，每一頁都只讀取需要的索引範圍，
+    不像 OFFSET 需要掃過前面所有頁。多取一筆用來判斷是否還有下一頁。
+
+    Args:
+        table: 表格名稱
+        expressions: SELECT 欄位的 SQL 運算式
+        filters: [(條件 SQL, 參數), ...]
+        start: 起始時間（含）
+        end: 結束時間（不含）
+        cursor: 上一頁的游標
+        limit: 每頁筆數
+
+    Returns:
+        Tuple[str, tuple]: (SQL, 參數)
+    """
+    conditions = list(filters)
+    if start is not None:
+        conditions.append(("timestamp >= %s", (start,)))
+    if end is not None:
+        conditions.append(("timestamp < %s", (end,)))
+    if cursor:
+        conditions.append(("(timestamp, id) < (%s, %s)", decode_cursor(cursor)))
+
+    where = ' AND '.join(condition for condition, _ in conditions) or 'TRUE'
+    params = tuple(value for _, values in conditions for value in values) + (limit + 1,)
+    sql = f"""
+        SELECT {', '.join(expressions)}
+        FROM {table}
+        WHERE {where}
+        ORDER BY timestamp DESC, id DESC
+        LIMIT %s
+    """
+    return sql, params
+
+
+def to_page(names: List[str], rows: List[tuple], limit: int) -> Dict:
+    """
+    將查詢結果轉為一頁資料
+
+    Args:
+        names: 欄位名稱（與每列順序一致，前兩個為 id、timestamp）
+        rows: 查詢結果（最多 limit + 1 筆）
+        limit: 每頁筆數
+
+    Returns:
+        Dict: {'items': [...], 'next_cursor': 下一頁游標或 None}
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = []
+    for row in rows:
+        item = dict(zip(names, row))
+        for name in JSON_COLUMNS:
+            if isinstance(item.get(name), str):
+                item[name] = json.loads(item[name])
+        items.append(item)
+
+    next_cursor = encode_cursor(rows[-1][1], rows[-1][0]) if has_more else None
+    for item in items:
+        if item.get('timestamp') is not None:
+            item['timestamp'] = item['timestamp'].isoformat()
+    return {'items': items, 'next_cursor': next_cursor}
+
+
+def resolve_snapshot_urls(items: List[Dict]):
+    """
+    將查詢到的 snapshot_url 欄位轉為網址
+
+    雜湊轉為 /snapshots/<ref>；只有 Base64（True 或空字串）時轉為
+    /api/fence_intrusions/<id>/snapshot；沒有截圖時為 None。
+
+    Args:
+        items: to_page 回傳的 items（直接修改）
+    """
+    for item in items:
+        value = item['snapshot_url']
+        if isinstance(value, str) and value:
+            item['snapshot_url'] = SnapshotStore.url_for(value)
+        elif value is True or value == 1 or value == '':  # SQLite 的布林運算結果為 1
+            item['snapshot_url'] = f"/api/fence_intrusions/{item['id']}/snapshot"
+        else:
+            item['snapshot_url'] = None
@@ -89,6 +89,21 @@ def create_tables(conn):
         );
     """)
     
+    # 6. 每小時統計彙總表（既有資料庫重新執行時會由 detections 回填）與分頁索引
+    for name in ('create_detection_summary.sql', 'add_history_indexes.sql'):
+        migration_file = Path(__file__).parent / 'migrations' / name
+        cursor.execute(migration_file.read_text(encoding='utf-8'))
+    
+    # 7. 車牌搜尋索引（需要 pg_trgm 擴充套件，無權限建立時改用記憶體索引）
+    migration_file = Path(__file__).parent / 'migrations' / 'add_plate_search.sql'
+    cursor.execute("SAVEPOINT plate_search")
+    try:
+        cursor.execute(migration_file.read_text(encoding='utf-8'))
+    except psycopg2.Error as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT plate_search")
+        print(f"⚠️  警告: 無法建立車牌搜尋索引 ({e.pgerror or e})")
+        print("   請在 config.yaml 設定 database.plate_search.backend: memory")
+    
     conn.commit()
     print("✓ 資料庫表格建立完成")
 
@@ -0,0 +1,193 @@
+"""執行資料庫遷移 - 將 detections / fence_intrusions 轉換為時間分割表，並提供定期維護"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+import psycopg2
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.config_manager import ConfigManager
+from database.handler import DatabaseHandler
+from database.partitions import PARTITION_INDEXES, PartitionManager, partition_bounds
+
+
+def convert_table(conn, manager: PartitionManager, table: str, drop_legacy: bool) -> int:
+    """
+    將一般表格轉換為分割表
+
+    原表格更名為 <table>_legacy，以相同欄位建立分割父表（沿用原本的 id 序列），
+    建立涵蓋既有資料到未來 premake 個分割的範圍，再逐個分割搬移資料（每個分割一個交易）。
+
+    Args:
+        conn: 資料庫連線
+        manager: 分割維護（提供分割單位與預先建立數）
+        table: 表格名稱
+        drop_legacy: 搬移完成後是否刪除舊表格
+
+    Returns:
+        int: 搬移筆數
+    """
+    cursor = conn.cursor()
+    legacy = f"{table}_legacy"
+
+    cursor.execute("SELECT to_regclass(%s)", (table,))
+    if cursor.fetchone()[0] is None:
+        print(f"  {table}: 表格不存在，略過")
+        return 0
+    if manager.is_partitioned(cursor, table):
+        print(f"  {table}: 已是分割表，略過")
+        return 0
+
+    # 1. 建立分割父表（同一交易內完成，失敗時整個還原）
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    cursor.execute(f"ALTER INDEX IF EXISTS {table}_pkey RENAME TO {legacy}_pkey")
+    cursor.execute(f"""
+        CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING COMMENTS)
+        PARTITION BY RANGE (timestamp)
+    """)
+    # 分割表的主鍵必須包含分割欄位
+    cursor.execute(f"ALTER TABLE {table} ALTER COLUMN timestamp SET NOT NULL")
+    cursor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, timestamp)")
+    cursor.execute("SELECT pg_get_serial_sequence(%s, 'id')", (legacy,))
+    sequence = cursor.fetchone()[0]
+    if sequence:
+        # 序列改由新表格擁有，刪除舊表格時才不會一併刪除
+        cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+    for index_name, columns in PARTITION_INDEXES.get(table, []):
+        # 舊表格上的同名索引（add_history_indexes.sql）會讓 IF NOT EXISTS 略過新索引
+        cursor.execute(f"DROP INDEX IF EXISTS {index_name}")
+        cursor.execute(f"CREATE INDEX {index_name} ON {table} {columns}")
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
+    if table == 'detections':
+        # 分割表的 id 不再唯一，無法作為外鍵參照目標
+        cursor.execute("ALTER TABLE plate_records DROP CONSTRAINT IF EXISTS plate_records_detection_id_fkey")
+
+    # 2. 建立涵蓋既有資料的分割
+    cursor.execute(f"SELECT MIN(timestamp)::date FROM {legacy}")
+    oldest = cursor.fetchone()[0] or date.today()
+    planned = manager.planned_partitions(date.today())
+    ranges = []
+    start, end = partition_bounds(oldest, manager.granularity)
+    while start < planned[0][0]:
+        ranges.append((start, end))
+        start, end = partition_bounds(end, manager.granularity)
+    ranges.extend(planned)
+    for start, end in ranges:
+        manager.create_partition(cursor, table, start, end)
+    conn.commit()
+    print(f"  {table}: 已建立 {len(ranges)} 個分割 ({ranges[0][0]} ~ {ranges[-1][1]})")
+
+    # 3. 逐個分割搬移資料（晚於最後一個分割的資料落入 default 分割）
+    moved = 0
+    copy_ranges = [(start.isoformat(), end.isoformat()) for start, end in ranges]
+    copy_ranges.append((ranges[-1][1].isoformat(), 'infinity'))
+    for start, end in copy_ranges:
+        cursor.execute(f"""
+            INSERT INTO {table}
+            SELECT * FROM {legacy}
+            WHERE timestamp >= %s AND timestamp < %s
+        """, (start, end))
+        conn.commit()
+        moved += cursor.rowcount
+        if cursor.rowcount:
+            print(f"  {table}: 已搬移 {moved} 筆 (< {end})")
+
+    cursor.execute(f"SELECT COUNT(*) FROM {legacy} WHERE timestamp IS NULL")
+    skipped = cursor.fetchone()[0]
+    if skipped:
+        print(f"  ⚠️  {table}: {skipped} 筆資料沒有 timestamp，保留在 {legacy}")
+
+    if drop_legacy and not skipped:
+        cursor.execute(f"DROP TABLE {legacy}")
+        conn.commit()
+        print(f"  {table}: 已刪除 {legacy}")
+
+    return moved
+
+
+def main():
+    """執行 migration 或分割維護"""
+    parser = argparse.ArgumentParser(description='將偵測與入侵記錄轉換為時間分割表')
+    parser.add_argument('--drop-legacy', action='store_true', help='搬移完成後刪除舊表格')
+    parser.add_argument('--maintain', action='store_true',
+                        help='只執行分割維護（建立未來分割、刪除過期分割），可由排程定期呼叫')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("資料庫遷移: 時間分割表" if not args.maintain else "分割維護")
+    print("=" * 60)
+
+    try:
+        # 載入配置
+        print("\n1. 載入配置...")
+        config = ConfigManager('config/config.yaml')
+        db_config = config.get_db_config()
+        partition_config = config.get('database', {}).get('partitioning', {})
+        handler = DatabaseHandler({**db_config, 'enabled': True,
+                                   'write_behind': {'enabled': False},
+                                   'partitioning': {**partition_config, 'maintenance_interval': 0}})
+        manager = PartitionManager(handler, partition_config)
+        print(f"✓ 分割單位: {manager.granularity}，預先建立 {manager.premake} 個，"
+              f"保留 {manager.retention_days or '不限'} 天")
+
+        if args.maintain:
+            print("\n2. 執行分割維護...")
+            report = manager.run_maintenance()
+            for table, result in report.items():
+                print(f"  {table}: 建立 {len(result['created'])} 個，刪除 {len(result['dropped'])} 個")
+            handler.close()
+            return
+
+        # 轉換表格
+        print("\n2. 轉換表格...")
+        conn = psycopg2.connect(
+            host=db_config['host'],
+            port=db_config['port'],
+            database=db_config['database'],
+            user=db_config['user'],
+            password=db_config['password']
+        )
+        total = 0
+        for table in manager.tables:
+            total += convert_table(conn, manager, table, args.drop_legacy)
+        conn.close()
+
+        # 套用保留期限
+        print("\n3. 執行分割維護...")
+        manager.run_maintenance()
+        handler.close()
+
+        print("\n" + "=" * 60)
+        print("✓ 分割表遷移完成!")
+        print("=" * 60)
+        print("\n說明:")
+        print(f"  - 共搬移 {total} 筆資料")
+        print("  - 請在 config.yaml 設定 database.partitioning.enabled: true")
+        print("  - plate_records.detection_id 不再有外鍵約束")
+        if not args.drop_legacy:
+            print("  - 確認資料無誤後可刪除 *_legacy 表格")
+
+    except FileNotFoundError as e:
+        print(f"\n❌ 錯誤: {e}")
+        print("\n請確認配置檔案是否正確")
+        sys.exit(1)
+    except psycopg2.Error as e:
+        print(f"\n❌ 資料庫錯誤: {e}")
+        print("\n請檢查:")
+        print("  1. PostgreSQL 是否正在執行（需要 11 以上版本）")
+        print("  2. 資料庫配置是否正確")
+        print("  3. 轉換期間請先停止寫入資料的程式")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ 未預期的錯誤: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
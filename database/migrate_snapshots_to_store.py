@@ -0,0 +1,162 @@
+"""執行資料庫遷移 - 將 Base64 截圖搬移到截圖儲存區"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+# 加入專案路徑
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.config_manager import ConfigManager
+from database.snapshot_store import SnapshotStore
+
+
+TABLES = ('plate_records', 'fence_intrusions')
+MIGRATIONS = ('add_snapshot_refs.sql', 'add_snapshot_tiers.sql')
+
+
+def migrate_table(conn, store: SnapshotStore, table: str,
+                  batch_size: int, keep_base64: bool) -> int:
+    """
+    分批搬移一個表格的截圖
+
+    每批在獨立交易中完成：先寫入截圖儲存區，再更新 snapshot_ref（並清除 Base64）。
+    中途中止後重新執行會從尚未遷移的資料繼續。
+
+    Args:
+        conn: 資料庫連線
+        store: 截圖儲存區
+        table: 表格名稱
+        batch_size: 每批筆數
+        keep_base64: 是否保留原本的 Base64 欄位內容
+
+    Returns:
+        int: 搬移筆數
+    """
+    cursor = conn.cursor()
+    clear = '' if keep_base64 else ', snapshot_base64 = NULL'
+    last_id = 0
+    moved = 0
+
+    while True:
+        cursor.execute(f"""
+            SELECT id, snapshot_base64
+            FROM {table}
+            WHERE id > %s
+              AND snapshot_base64 IS NOT NULL
+              AND snapshot_ref IS NULL
+            ORDER BY id
+            LIMIT %s
+        """, (last_id, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        updates = [(row_id, store.put_base64(data)) for row_id, data in rows]
+        execute_values(cursor, f"""
+            UPDATE {table} AS t
+            SET snapshot_ref = v.ref{clear}
+            FROM (VALUES %s) AS v(id, ref)
+            WHERE t.id = v.id
+        """, updates)
+        conn.commit()
+
+        last_id = rows[-1][0]
+        moved += len(rows)
+        print(f"  {table}: 已搬移 {moved} 筆 (id <= {last_id})")
+
+    return moved
+
+
+def main():
+    """執行 migration"""
+    parser = argparse.ArgumentParser(description='將 Base64 截圖搬移到截圖儲存區')
+    parser.add_argument('--batch-size', type=int, default=500, help='每批筆數')
+    parser.add_argument('--keep-base64', action='store_true', help='保留原本的 Base64 欄位內容')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("資料庫遷移: Base64 截圖 -> 截圖儲存區")
+    print("=" * 60)
+
+    try:
+        # 載入配置
+        print("\n1. 載入配置...")
+        config = ConfigManager('config/config.yaml')
+        db_config = config.get_db_config()
+        store_config = config.get('database', {}).get('snapshot_store', {})
+        store = SnapshotStore(
+            store_config.get('path', 'data/snapshots'),
+            shard_levels=store_config.get('shard_levels', 2),
+            fsync=store_config.get('fsync', False)
+        )
+        print(f"✓ 截圖儲存區: {store.root}")
+
+        # 連接資料庫
+        print("\n2. 連接資料庫...")
+        conn = psycopg2.connect(
+            host=db_config['host'],
+            port=db_config['port'],
+            database=db_config['database'],
+            user=db_config['user'],
+            password=db_config['password']
+        )
+        print(f"✓ 已連接到: {db_config['host']}:{db_config['port']}/{db_config['database']}")
+
+        # 新增 snapshot_ref / snapshot_tiers 欄位
+        print("\n3. 新增截圖欄位...")
+        cursor = conn.cursor()
+        for name in MIGRATIONS:
+            migration_file = Path(__file__).parent / 'migrations' / name
+            with open(migration_file, 'r', encoding='utf-8') as f:
+                cursor.execute(f.read())
+            conn.commit()
+            print(f"✓ 已執行: {migration_file.name}")
+
+        # 分批搬移
+        print("\n4. 搬移截圖...")
+        start = time.time()
+        total = 0
+        for table in TABLES:
+            total += migrate_table(conn, store, table, args.batch_size, args.keep_base64)
+
+        stats = store.get_stats()
+        conn.close()
+
+        print("\n" + "=" * 60)
+        print("✓ 截圖遷移完成!")
+        print("=" * 60)
+        print("\n說明:")
+        print(f"  - 共搬移 {total} 筆截圖，耗時 {time.time() - start:.1f} 秒")
+        print(f"  - 新寫入 {stats['writes']} 個檔案 ({stats['bytes_written'] / 1024 / 1024:.1f} MB)，"
+              f"重複內容 {stats['dedup_hits']} 筆")
+        if not args.keep_base64:
+            print("  - 已清除 Base64 欄位，可執行 VACUUM FULL 回收空間")
+        print("  - 請在 config.yaml 設定 database.snapshot_store.enabled: true")
+
+    except FileNotFoundError as e:
+        print(f"\n❌ 錯誤: {e}")
+        print("\n請確認:")
+        print("  1. migration 檔案是否存在")
+        print("  2. 配置檔案是否正確")
+        sys.exit(1)
+    except psycopg2.Error as e:
+        print(f"\n❌ 資料庫錯誤: {e}")
+        print("\n請檢查:")
+        print("  1. PostgreSQL 是否正在執行")
+        print("  2. 資料庫配置是否正確")
+        print("  3. 資料庫使用者權限")
+        sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ 未預期的錯誤: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+-- 新增歷史記錄分頁索引
+-- keyset 分頁依 (timestamp, id) 由新到舊排序，索引包含 id 後每一頁只讀取需要的索引範圍
+-- （大型資料表建立索引期間會鎖定寫入，請在離峰時間執行）
+
+CREATE INDEX IF NOT EXISTS idx_detections_camera_time_id
+ON detections(camera_id, timestamp DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_detections_time_id
+ON detections(timestamp DESC, id DESC);
+
+-- fence_intrusions 由 create_fence_intrusions_table.sql 建立，不存在時略過
+DO $$
+BEGIN
+    IF to_regclass('fence_intrusions') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_fence_intrusions_fence_time_id
+        ON fence_intrusions(fence_id, timestamp DESC, id DESC);
+
+        CREATE INDEX IF NOT EXISTS idx_fence_intrusions_camera_time_id
+        ON fence_intrusions(camera_id, timestamp DESC, id DESC);
+
+        CREATE INDEX IF NOT EXISTS idx_fence_intrusions_time_id
+        ON fence_intrusions(timestamp DESC, id DESC);
+    END IF;
+END
+$$;
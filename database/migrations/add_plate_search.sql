@@ -0,0 +1,19 @@
+-- 新增車牌模糊搜尋
+-- plate_key: 去除分隔符號、轉大寫並折疊 OCR 易混淆字元 (O/Q→0、I→1、B→8、S→5、Z→2)，
+-- 與 database/plate_search.py 的 plate_key() 相同；以 pg_trgm GIN 索引支援相似度搜尋
+-- （新增產生欄位會重寫 plate_records，大型資料表請在離峰時間執行，需要 PostgreSQL 12 以上）
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE plate_records
+ADD COLUMN IF NOT EXISTS plate_key VARCHAR(20)
+GENERATED ALWAYS AS (
+    translate(upper(regexp_replace(plate_number, '[^A-Za-z0-9]', '', 'g')), 'OQIBSZ', '001852')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_plate_key ON plate_records(plate_key);
+
+CREATE INDEX IF NOT EXISTS idx_plate_key_trgm ON plate_records USING gin (plate_key gin_trgm_ops);
+
+-- 新增註解
+COMMENT ON COLUMN plate_records.plate_key IS '車牌搜尋鍵 (正規化並折疊易混淆字元)';
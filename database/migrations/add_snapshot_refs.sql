@@ -0,0 +1,13 @@
+-- 新增截圖雜湊欄位
+-- 啟用截圖儲存區 (database.snapshot_store) 後，JPEG 存放在磁碟，
+-- 資料表只記錄 SHA-256 內容雜湊，取代 Base64 TEXT 欄位
+
+ALTER TABLE plate_records
+ADD COLUMN IF NOT EXISTS snapshot_ref CHAR(64);
+
+ALTER TABLE fence_intrusions
+ADD COLUMN IF NOT EXISTS snapshot_ref CHAR(64);
+
+-- 新增註解
+COMMENT ON COLUMN plate_records.snapshot_ref IS '車牌辨識截圖的 SHA-256 雜湊 (截圖儲存區)';
+COMMENT ON COLUMN fence_intrusions.snapshot_ref IS '入侵當下影像截圖的 SHA-256 雜湊 (截圖儲存區)';
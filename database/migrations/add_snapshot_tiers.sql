@@ -0,0 +1,9 @@
+-- 新增多尺寸截圖欄位
+-- 啟用截圖編碼工作池 (database.snapshot_encoder) 後，
+-- 各等級（縮圖、中尺寸、完整截圖）的內容雜湊以 JSON 記錄: {"thumbnail": "...", ...}
+
+ALTER TABLE plate_records
+ADD COLUMN IF NOT EXISTS snapshot_tiers JSONB;
+
+-- 新增註解
+COMMENT ON COLUMN plate_records.snapshot_tiers IS '各尺寸截圖的 SHA-256 雜湊 {等級: 雜湊}';
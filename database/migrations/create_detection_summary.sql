@@ -0,0 +1,39 @@
+-- 建立每小時統計彙總表
+-- 由 SummaryAggregator 定期以增量 upsert 維護，/api/stats 只讀取此表
+
+CREATE TABLE IF NOT EXISTS detection_summary (
+    camera_id VARCHAR(50) NOT NULL,
+    hour TIMESTAMP NOT NULL,
+    object_class VARCHAR(50) NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    confidence_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+    plate_count BIGINT NOT NULL DEFAULT 0,
+    valid_plate_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (camera_id, hour, object_class)
+);
+
+CREATE INDEX IF NOT EXISTS idx_detection_summary_hour ON detection_summary(hour DESC);
+
+-- 由既有偵測記錄回填（只在彙總表為空時執行，請在啟用 database.summary 之前執行）
+INSERT INTO detection_summary
+    (camera_id, hour, object_class, count, confidence_sum, plate_count, valid_plate_count)
+SELECT
+    camera_id,
+    date_trunc('hour', timestamp)::timestamp,
+    object_class,
+    COUNT(*),
+    COALESCE(SUM(confidence), 0),
+    COUNT(*) FILTER (WHERE details->'license_plate' ? 'plate_number'),
+    COUNT(*) FILTER (WHERE details->'license_plate' ? 'plate_number'
+                     AND COALESCE((details->'license_plate'->>'is_valid')::boolean, TRUE))
+FROM detections
+WHERE timestamp IS NOT NULL
+  AND NOT EXISTS (SELECT 1 FROM detection_summary)
+GROUP BY 1, 2, 3;
+
+-- 新增註解
+COMMENT ON TABLE detection_summary IS '每小時偵測統計彙總 (攝影機, 小時, 物件類別)';
+COMMENT ON COLUMN detection_summary.hour IS '整點時間 (本地時間)';
+COMMENT ON COLUMN detection_summary.confidence_sum IS '信心度總和 (除以 count 為平均信心度)';
+COMMENT ON COLUMN detection_summary.plate_count IS '辨識出車牌的偵測數';
+COMMENT ON COLUMN detection_summary.valid_plate_count IS '車牌格式有效的偵測數';
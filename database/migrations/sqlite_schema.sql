@@ -0,0 +1,80 @@
+-- SQLite 嵌入式資料庫結構（database.type: sqlite，由 SQLiteHandler 啟動時建立）
+-- 時間欄位為本地時間文字 'YYYY-MM-DD HH:MM:SS.ffffff'，字串排序即時間排序
+
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY,
+    camera_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    object_class TEXT NOT NULL,
+    confidence REAL,
+    bbox TEXT,
+    details TEXT
+);
+
+-- keyset 分頁索引（與 add_history_indexes.sql 相同的排序）
+CREATE INDEX IF NOT EXISTS idx_detections_camera_time_id
+    ON detections(camera_id, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_detections_class_time_id
+    ON detections(object_class, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_detections_time_id
+    ON detections(timestamp DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS plate_records (
+    id INTEGER PRIMARY KEY,
+    detection_id INTEGER,
+    plate_number TEXT NOT NULL,
+    plate_key TEXT NOT NULL,
+    is_valid INTEGER DEFAULT 1,
+    confidence REAL,
+    first_seen TEXT NOT NULL,
+    last_seen TEXT NOT NULL,
+    count INTEGER DEFAULT 1,
+    first_seen_date TEXT NOT NULL,
+    snapshot_base64 TEXT,
+    snapshot_ref TEXT,
+    snapshot_tiers TEXT
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_plate_unique_per_day
+    ON plate_records(plate_number, first_seen_date);
+CREATE INDEX IF NOT EXISTS idx_plate_records_plate_key ON plate_records(plate_key);
+CREATE INDEX IF NOT EXISTS idx_plate_time ON plate_records(first_seen_date DESC);
+
+CREATE TABLE IF NOT EXISTS fence_intrusions (
+    id INTEGER PRIMARY KEY,
+    fence_id TEXT NOT NULL,
+    fence_name TEXT NOT NULL,
+    object_class TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    bbox_x1 INTEGER,
+    bbox_y1 INTEGER,
+    bbox_x2 INTEGER,
+    bbox_y2 INTEGER,
+    camera_id TEXT,
+    camera_name TEXT,
+    snapshot_base64 TEXT,
+    snapshot_ref TEXT,
+    timestamp TEXT NOT NULL,
+    created_at TEXT DEFAULT (datetime('now', 'localtime'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_fence_intrusions_fence_time_id
+    ON fence_intrusions(fence_id, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_fence_intrusions_camera_time_id
+    ON fence_intrusions(camera_id, timestamp DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_fence_intrusions_time_id
+    ON fence_intrusions(timestamp DESC, id DESC);
+
+-- 每小時統計彙總（與偵測記錄在同一個交易中更新）
+CREATE TABLE IF NOT EXISTS detection_summary (
+    camera_id TEXT NOT NULL,
+    hour TEXT NOT NULL,
+    object_class TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    confidence_sum REAL NOT NULL DEFAULT 0,
+    plate_count INTEGER NOT NULL DEFAULT 0,
+    valid_plate_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (camera_id, hour, object_class)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_detection_summary_hour ON detection_summary(hour DESC);
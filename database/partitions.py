@@ -0,0 +1,265 @@
+"""資料表時間分割 - 依日或月建立範圍分割、預先建立與依保留期限刪除"""
+
+import logging
+import re
+import threading
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+GRANULARITIES = ('day', 'month')
+PARTITIONED_TABLES = ('detections', 'fence_intrusions')
+
+# 分割表父表上的索引（PostgreSQL 11+ 會自動建立到每個分割；名稱與 add_history_indexes.sql 相同）
+PARTITION_INDEXES = {
+    'detections': [
+        ('idx_detections_camera_time_id', '(camera_id, timestamp DESC, id DESC)'),
+        ('idx_detections_class', '(object_class)'),
+        ('idx_detections_time_id', '(timestamp DESC, id DESC)'),
+    ],
+    'fence_intrusions': [
+        ('idx_fence_intrusions_fence_time_id', '(fence_id, timestamp DESC, id DESC)'),
+        ('idx_fence_intrusions_time_id', '(timestamp DESC, id DESC)'),
+        ('idx_fence_intrusions_p_object_class', '(object_class)'),
+        ('idx_fence_intrusions_camera_time_id', '(camera_id, timestamp DESC, id DESC)'),
+    ],
+}
+
+
+def partition_bounds(day: date, granularity: str = 'month') -> Tuple[date, date]:
+    """
+    取得包含指定日期的分割範圍
+
+    Args:
+        day: 日期
+        granularity: 'day' 或 'month'
+
+    Returns:
+        Tuple[date, date]: [起始, 結束)
+    """
+    if granularity == 'day':
+        return day, day + timedelta(days=1)
+    start = day.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1)
+    return start, end
+
+
+def partition_name(table: str, start: date, granularity: str = 'month') -> str:
+    """
+    分割表名稱，例如 detections_p20261019（日）或 detections_p202610（月）
+
+    Args:
+        table: 父表名稱
+        start: 分割起始日期
+        granularity: 'day' 或 'month'
+
+    Returns:
+        str: 分割表名稱
+    """
+    suffix = start.strftime('%Y%m%d' if granularity == 'day' else '%Y%m')
+    return f"{table}_p{suffix}"
+
+
+def parse_partition_name(table: str, name: str) -> Optional[Tuple[date, date]]:
+    """
+    由分割表名稱解析範圍（名稱不符合格式時回傳 None，例如 default 分割）
+
+    Args:
+        table: 父表名稱
+        name: 分割表名稱
+
+    Returns:
+        Tuple[date, date]: [起始, 結束)
+    """
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})(\d{{2}})?", name)
+    if not match:
+        return None
+    year, month, day = match.groups()
+    if day is None:
+        return partition_bounds(date(int(year), int(month), 1), 'month')
+    return partition_bounds(date(int(year), int(month), int(day)), 'day')
+
+
+class PartitionManager:
+    """
+    分割表維護
+
+    定期為每個分割表預先建立未來的分割（避免寫入落入 default 分割），
+    並以 DROP TABLE 刪除整個超過保留期限的分割，取代大量 DELETE。
+    """
+
+    def __init__(self, handler, config: Dict, logger: logging.Logger = None):
+        """
+        初始化分割維護
+
+        Args:
+            handler: DatabaseHandler（提供連線）
+            config: partitioning 配置
+            logger: 日誌記錄器
+        """
+        self.handler = handler
+        self.logger = logger
+        self.granularity = config.get('granularity', 'month')
+        if self.granularity not in GRANULARITIES:
+            raise ValueError(f"不支援的分割單位: {self.granularity}")
+        self.premake = config.get('premake', 2)  # 預先建立的未來分割數
+        self.retention_days = config.get('retention_days', 0)  # 0 表示不刪除
+        self.tables = config.get('tables', list(PARTITIONED_TABLES))
+        self.maintenance_interval = config.get('maintenance_interval', 3600)
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def planned_partitions(self, today: date) -> List[Tuple[date, date]]:
+        """
+        目前分割與之後 premake 個分割的範圍
+
+        Args:
+            today: 今天日期
+
+        Returns:
+            List[Tuple[date, date]]: 分割範圍列表
+        """
+        bounds = [partition_bounds(today, self.granularity)]
+        for _ in range(self.premake):
+            bounds.append(partition_bounds(bounds[-1][1], self.granularity))
+        return bounds
+
+    def expired_partitions(self, table: str, names: List[str], today: date) -> List[str]:
+        """
+        篩選整個分割都早於保留期限的分割
+
+        Args:
+            table: 父表名稱
+            names: 現有分割名稱
+            today: 今天日期
+
+        Returns:
+            List[str]: 應刪除的分割名稱
+        """
+        if not self.retention_days:
+            return []
+        cutoff = today - timedelta(days=self.retention_days)
+        expired = []
+        for name in names:
+            bounds = parse_partition_name(table, name)
+            if bounds and bounds[1] <= cutoff:
+                expired.append(name)
+        return sorted(expired)
+
+    @staticmethod
+    def is_partitioned(cursor, table: str) -> bool:
+        """資料表是否為分割表"""
+        cursor.execute("""
+            SELECT 1 FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = %s AND pg_table_is_visible(c.oid)
+        """, (table,))
+        return cursor.fetchone() is not None
+
+    @staticmethod
+    def list_partitions(cursor, table: str) -> List[str]:
+        """列出分割表的所有分割"""
+        cursor.execute("""
+            SELECT child.relname
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)
+            ORDER BY child.relname
+        """, (table,))
+        return [row[0] for row in cursor.fetchall()]
+
+    def create_partition(self, cursor, table: str, start: date, end: date) -> str:
+        """
+        建立單一分割（已存在時不做任何事）
+
+        Args:
+            cursor: 資料庫游標
+            table: 父表名稱
+            start: 起始日期（含）
+            end: 結束日期（不含）
+
+        Returns:
+            str: 分割名稱
+        """
+        name = partition_name(table, start, self.granularity)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {name}
+            PARTITION OF {table}
+            FOR VALUES FROM (%s) TO (%s)
+        """, (start.isoformat(), end.isoformat()))
+        return name
+
+    def run_maintenance(self, today: date = None) -> Dict[str, Dict[str, List[str]]]:
+        """
+        執行一次維護：建立未來分割、刪除過期分割
+
+        Args:
+            today: 今天日期（預設為系統日期）
+
+        Returns:
+            Dict: {表格: {'created': [...], 'dropped': [...]}}
+        """
+        today = today or date.today()
+        report = {}
+
+        conn = self.handler.get_connection()
+        try:
+            cursor = conn.cursor()
+            for table in self.tables:
+                if not self.is_partitioned(cursor, table):
+                    continue
+
+                existing = set(self.list_partitions(cursor, table))
+                created = []
+                for start, end in self.planned_partitions(today):
+                    name = partition_name(table, start, self.granularity)
+                    if name not in existing:
+                        self.create_partition(cursor, table, start, end)
+                        created.append(name)
+
+                dropped = self.expired_partitions(table, list(existing), today)
+                for name in dropped:
+                    # 先卸離再刪除，父表只短暫鎖定
+                    cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+                    cursor.execute(f"DROP TABLE {name}")
+
+                conn.commit()
+                report[table] = {'created': created, 'dropped': dropped}
+
+                if self.logger and (created or dropped):
+                    self.logger.info(f"分割維護 {table}: 建立 {created}，刪除 {dropped}")
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.handler.return_connection(conn)
+
+        return report
+
+    def start(self):
+        """啟動背景維護執行緒（啟動時執行一次，之後每 maintenance_interval 秒執行）"""
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='PartitionMaintenance', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止背景維護執行緒"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        """背景維護迴圈"""
+        while not self._stop.is_set():
+            try:
+                self.run_maintenance()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"分割維護失敗: {e}")
+            self._stop.wait(self.maintenance_interval)
@@ -0,0 +1,199 @@
+"""車牌模糊搜尋 - 正規化車牌鍵、有上限的編輯距離與記憶體 q-gram 索引"""
+
+import re
+import threading
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# OCR 容易混淆的字元折疊為同一個（與 add_plate_search.sql 的 translate() 一致）
+FOLD_FROM = 'OQIBSZ'
+FOLD_TO = '001852'
+_FOLD_TABLE = str.maketrans(FOLD_FROM, FOLD_TO)
+_NON_ALNUM = re.compile(r'[^A-Za-z0-9]')
+
+QGRAM = 3
+
+
+def plate_key(plate_number: str) -> str:
+    """
+    車牌搜尋鍵：去除分隔符號、轉大寫，並折疊易混淆字元（O/Q→0、I→1、B→8、S→5、Z→2）
+
+    Args:
+        plate_number: 車牌號碼
+
+    Returns:
+        str: 搜尋鍵
+    """
+    return _NON_ALNUM.sub('', plate_number or '').upper().translate(_FOLD_TABLE)
+
+
+def bounded_distance(a: str, b: str, max_distance: int) -> Optional[int]:
+    """
+    編輯距離（超過 max_distance 時提早結束）
+
+    Args:
+        a: 字串
+        b: 字串
+        max_distance: 距離上限
+
+    Returns:
+        int: 編輯距離，超過上限時回傳 None
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (char_a != char_b))
+        if min(current) > max_distance:
+            return None
+        previous = current
+    return previous[-1] if previous[-1] <= max_distance else None
+
+
+def qgrams(key: str) -> Dict[str, int]:
+    """前後補齊後的 q-gram 與出現次數（重複字元的鍵需以多重集合計算）"""
+    padded = '#' * (QGRAM - 1) + key + '$' * (QGRAM - 1)
+    grams: Dict[str, int] = {}
+    for i in range(len(padded) - QGRAM + 1):
+        gram = padded[i:i + QGRAM]
+        grams[gram] = grams.get(gram, 0) + 1
+    return grams
+
+
+def rank_matches(query: str, candidates: Iterable[Dict], max_distance: int) -> List[Dict]:
+    """
+    計算候選車牌與查詢的距離並排序
+
+    依搜尋鍵的編輯距離排序；距離相同時未折疊的原字元也相同者優先，再依出現次數。
+
+    Args:
+        query: 查詢車牌
+        candidates: 含 plate_number 與 count 的候選記錄
+        max_distance: 距離上限
+
+    Returns:
+        List[Dict]: 加上 distance 的符合記錄
+    """
+    query_key = plate_key(query)
+    query_raw = _NON_ALNUM.sub('', query).upper()
+    matches = []
+    for candidate in candidates:
+        distance = bounded_distance(query_key, plate_key(candidate['plate_number']), max_distance)
+        if distance is None:
+            continue
+        raw = _NON_ALNUM.sub('', candidate['plate_number']).upper()
+        matches.append({**candidate, 'distance': distance, 'exact': raw == query_raw})
+    matches.sort(key=lambda item: (item['distance'], not item['exact'], -item.get('count', 0)))
+    return matches
+
+
+def _local_naive(moment: Optional[datetime]) -> Optional[datetime]:
+    """帶時區的時間轉為本地時間（不含時區），與資料庫的 TIMESTAMP / TIMESTAMPTZ 都能比較"""
+    if moment is not None and moment.tzinfo is not None:
+        return moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+class PlateIndex:
+    """
+    記憶體車牌索引（未安裝 pg_trgm 時的替代方案）
+
+    每個車牌號碼記錄每日出現次數與首末次出現時間；以搜尋鍵的 q-gram 反向索引找候選，
+    依 q-gram 引理（一次編輯最多破壞 q 個 q-gram）只比對共同 q-gram 足夠的車牌。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._plates: Dict[str, Dict] = {}
+        self._by_key: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._by_length: Dict[int, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._plates)
+
+    def add(self, plate_number: str, day: date, count: int = 1,
+            first_seen: datetime = None, last_seen: datetime = None):
+        """
+        記錄車牌出現
+
+        Args:
+            plate_number: 車牌號碼
+            day: 日期
+            count: 出現次數
+            first_seen: 當日首次出現時間
+            last_seen: 當日最後出現時間
+        """
+        first_seen = _local_naive(first_seen) or datetime.now()
+        last_seen = _local_naive(last_seen) or first_seen
+        with self._lock:
+            entry = self._plates.get(plate_number)
+            if entry is None:
+                key = plate_key(plate_number)
+                entry = self._plates[plate_number] = {
+                    'key': key, 'days': {}, 'first_seen': first_seen, 'last_seen': last_seen
+                }
+                if key not in self._by_key:
+                    self._by_key[key] = set()
+                    self._by_length.setdefault(len(key), set()).add(key)
+                    for gram, multiplicity in qgrams(key).items():
+                        self._postings.setdefault(gram, {})[key] = multiplicity
+                self._by_key[key].add(plate_number)
+            entry['days'][day] = entry['days'].get(day, 0) + count
+            entry['first_seen'] = min(entry['first_seen'], first_seen)
+            entry['last_seen'] = max(entry['last_seen'], last_seen)
+
+    def _candidate_keys(self, query_key: str, max_distance: int) -> Set[str]:
+        """找出可能在距離上限內的搜尋鍵"""
+        grams = qgrams(query_key)
+        # 長度相差 max_distance 內的鍵，共同 q-gram 至少 len + q - 1 - max_distance * q 個
+        required = len(query_key) + QGRAM - 1 - max_distance * QGRAM
+        if required <= 0:
+            return set().union(*(self._by_length.get(length, set())
+                                 for length in range(len(query_key) - max_distance,
+                                                     len(query_key) + max_distance + 1)))
+        shared: Dict[str, int] = {}
+        for gram, query_count in grams.items():
+            for key, key_count in self._postings.get(gram, {}).items():
+                shared[key] = shared.get(key, 0) + min(query_count, key_count)
+        return {key for key, count in shared.items() if count >= required}
+
+    def search(self, query: str, max_distance: int = 1,
+               time_range: Tuple[Optional[datetime], Optional[datetime]] = None,
+               limit: int = 50) -> List[Dict]:
+        """
+        模糊搜尋車牌
+
+        Args:
+            query: 查詢車牌
+            max_distance: 搜尋鍵的編輯距離上限
+            time_range: (起始, 結束) 只統計此期間的出現（None = 全部）
+            limit: 最多回傳筆數
+
+        Returns:
+            List[Dict]: 依距離排序的車牌（plate_number、distance、count、days、first_seen、last_seen）
+        """
+        start, end = (_local_naive(moment) for moment in (time_range or (None, None)))
+        candidates = []
+        with self._lock:
+            for key in self._candidate_keys(plate_key(query), max_distance):
+                for plate_number in self._by_key[key]:
+                    entry = self._plates[plate_number]
+                    if (start and entry['last_seen'] < start) or (end and entry['first_seen'] >= end):
+                        continue
+                    days = {day: count for day, count in entry['days'].items()
+                            if (not start or day >= start.date()) and (not end or day <= end.date())}
+                    if not days:
+                        continue
+                    candidates.append({
+                        'plate_number': plate_number,
+                        'count': sum(days.values()),
+                        'days': len(days),
+                        'first_seen': entry['first_seen'].isoformat(),
+                        'last_seen': entry['last_seen'].isoformat()
+                    })
+        return rank_matches(query, candidates, max_distance)[:limit]
@@ -0,0 +1,241 @@
+"""執行緒安全連線池 - 阻塞式取用、逾時、連線驗證與重新連線"""
+
+import logging
+import threading
+import time
+from typing import Dict, List
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+
+class BlockingConnectionPool:
+    """
+    執行緒安全連線池
+
+    上限為 maxconn 的號誌限制同時使用的連線數：連線用完時取用端等待而不是
+    立即拋出 PoolError，超過 timeout 才拋出。
+    歸還的連線保持開啟、放回閒置堆疊（後進先出，最多 maxconn 條），
+    不像 ThreadedConnectionPool 在超過 minconn 時關閉，多攝影機負載下
+    不必每次取用都重新建立 TCP 連線與認證。
+    取出的連線會先檢查狀態：已斷線的直接丟棄重建，留有未結束交易的先 rollback，
+    閒置超過 validate_after 秒的先執行 SELECT 1 確認可用（剛建立的連線不驗證）。
+    """
+
+    def __init__(self, minconn: int, maxconn: int, timeout: float = 10.0,
+                 validate_after: float = 30.0, logger: logging.Logger = None, **kwargs):
+        """
+        初始化連線池
+
+        Args:
+            minconn: 預先建立的連線數
+            maxconn: 最大連線數（歸還的連線最多保留這麼多條閒置）
+            timeout: 取用連線的最長等待秒數
+            validate_after: 閒置超過此秒數的連線取用前先驗證（0 = 每次驗證，剛建立的連線除外）
+            logger: 日誌記錄器
+            **kwargs: psycopg2.connect 參數
+        """
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.validate_after = validate_after
+        self.logger = logger
+        self._connect_kwargs = kwargs
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._closed = False
+        # 閒置連線（後進先出：常用的連線保持活躍，多餘的連線累積閒置時間後才驗證）
+        self._idle: List = []
+        self._used: Dict[int, object] = {}
+        # {id(連線): 最後歸還時間}，預先建立的連線從建立時開始計算
+        self._last_used: Dict[int, float] = {}
+
+        self.in_use = 0
+        self.max_in_use = 0
+        self.acquired = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.timeouts = 0
+        self.reconnects = 0
+        self.opens = 0    # 建立的連線數
+        self.closes = 0   # 關閉的連線數
+
+        for _ in range(min(minconn, maxconn)):
+            conn = self._open()
+            with self._lock:
+                self._idle.append(conn)
+                self._last_used[id(conn)] = time.monotonic()
+
+    @property
+    def closed(self) -> bool:
+        """連線池是否已關閉"""
+        return self._closed
+
+    def getconn(self, timeout: float = None):
+        """
+        取得連線（連線用完時等待）
+
+        Args:
+            timeout: 最長等待秒數（None = 使用連線池設定）
+
+        Returns:
+            psycopg2 連線
+
+        Raises:
+            pool.PoolError: 等待逾時或連線池已關閉
+            psycopg2.OperationalError: 需要建立新連線但資料庫無法連線
+        """
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.waits += 1
+            if not self._slots.acquire(timeout=timeout):
+                with self._lock:
+                    self.timeouts += 1
+                raise pool.PoolError(f"等待資料庫連線逾時 ({timeout} 秒，上限 {self.maxconn} 條)")
+        waited = time.perf_counter() - start
+
+        try:
+            conn = self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._used[id(conn)] = conn
+            self.acquired += 1
+            self.in_use += 1
+            self.max_in_use = max(self.max_in_use, self.in_use)
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        return conn
+
+    def _checkout(self):
+        """取出閒置連線並驗證（沒有閒置連線時建立新連線），不可用的連線丟棄後重建一次"""
+        with self._lock:
+            if self._closed:
+                raise pool.PoolError("連線池已關閉")
+            conn = self._idle.pop() if self._idle else None
+
+        if conn is None:
+            return self._open()
+        if self._is_usable(conn):
+            return conn
+
+        self._discard(conn)
+        with self._lock:
+            self.reconnects += 1
+        if self.logger:
+            self.logger.warning("資料庫連線已失效，重新連線")
+        # 重建失敗（資料庫無法連線）時拋出 OperationalError
+        return self._open()
+
+    def _open(self):
+        """建立新連線"""
+        conn = psycopg2.connect(**self._connect_kwargs)
+        with self._lock:
+            self.opens += 1
+        return conn
+
+    def _discard(self, conn):
+        """關閉並丟棄連線"""
+        with self._lock:
+            self._last_used.pop(id(conn), None)
+            self.closes += 1
+        if not conn.closed:
+            try:
+                conn.close()
+            except psycopg2.Error:
+                pass
+
+    def _is_usable(self, conn) -> bool:
+        """檢查連線是否可用（必要時 rollback 殘留交易或執行 SELECT 1）"""
+        if conn.closed:
+            return False
+
+        status = conn.get_transaction_status()
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            # 前一個使用者未結束交易就歸還
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+
+        with self._lock:
+            last_used = self._last_used.get(id(conn))
+        if last_used is None:
+            return True  # 剛建立的連線，不需要再以 SELECT 1 往返確認
+        if time.monotonic() - last_used < self.validate_after:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def putconn(self, conn, close: bool = False):
+        """
+        歸還連線（保持開啟放回閒置堆疊）
+
+        Args:
+            conn: psycopg2 連線
+            close: 是否關閉連線（已斷線的連線應關閉，下次取用時重新建立）
+        """
+        try:
+            keep = not (close or conn.closed or self._closed)
+            if keep:
+                status = conn.get_transaction_status()
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    keep = False
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    # 未結束的交易不留在閒置連線上（避免持有鎖），無法 rollback 的連線丟棄
+                    try:
+                        conn.rollback()
+                    except psycopg2.Error:
+                        keep = False
+
+            with self._lock:
+                checked_out = self._used.pop(id(conn), None) is not None
+                if keep:
+                    self._last_used[id(conn)] = time.monotonic()
+                    self._idle.append(conn)
+            if not keep and checked_out:  # closeall 已關閉的連線不重複計算
+                self._discard(conn)
+        finally:
+            with self._lock:
+                self.in_use -= 1
+            self._slots.release()
+
+    def closeall(self):
+        """關閉所有連線（使用中的連線一併關閉）"""
+        with self._lock:
+            self._closed = True
+            conns = self._idle + list(self._used.values())
+            self._idle = []
+            self._used.clear()
+        for conn in conns:
+            self._discard(conn)
+
+    def get_stats(self) -> Dict:
+        """取得連線池統計（使用中與閒置連線數、等待次數與時間、逾時、建立與關閉次數）"""
+        with self._lock:
+            return {
+                'maxconn': self.maxconn,
+                'in_use': self.in_use,
+                'idle': len(self._idle),
+                'max_in_use': self.max_in_use,
+                'saturation': round(self.in_use / self.maxconn, 2) if self.maxconn else 0.0,
+                'acquired': self.acquired,
+                'waits': self.waits,
+                'avg_wait_ms': round(self.total_wait / self.acquired * 1000, 2) if self.acquired else 0.0,
+                'max_wait_ms': round(self.max_wait * 1000, 2),
+                'timeouts': self.timeouts,
+                'reconnects': self.reconnects,
+                'opens': self.opens,
+                'closes': self.closes
+            }
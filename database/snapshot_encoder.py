@@ -0,0 +1,175 @@
+"""截圖編碼工作池 - 在背景執行緒裁切、縮放並編碼多種尺寸的截圖"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from utils.frame_artifacts import FrameArtifacts
+from .snapshot_store import SnapshotStore
+
+
+DEFAULT_TIERS = {
+    'thumbnail': {'max_size': 160, 'quality': 70},
+    'medium': {'max_size': 480, 'quality': 80},
+    'full': {'max_size': 0, 'quality': 90},
+}
+
+
+class SnapshotEncoder:
+    """
+    截圖編碼工作池
+
+    每個截圖依 tiers 設定產生多種尺寸（最長邊不超過 max_size，0 表示原尺寸），
+    各自以指定品質編碼後存入截圖儲存區。呼叫端只取得 Future，不等待編碼；
+    完成後結果為 {等級名稱: 截圖雜湊}。
+
+    每個排隊中的工作都持有一張完整解析度的影像幀，因此同時排隊的工作數以 max_pending 限制；
+    超過時依 overflow 策略捨棄截圖 ('drop'，預設，呼叫端從不等待編碼) 或在呼叫端直接編碼
+    ('inline'，不丟截圖，但呼叫端要等編碼完成，只適合在寫入執行緒呼叫 submit 時使用)。
+    """
+
+    def __init__(self, store: SnapshotStore, config: Dict = None,
+                 logger: logging.Logger = None):
+        """
+        初始化工作池
+
+        Args:
+            store: 截圖儲存區
+            config: snapshot_encoder 配置（workers、max_pending、overflow、margin、primary、tiers）
+            logger: 日誌記錄器
+        """
+        config = config or {}
+        self.store = store
+        self.logger = logger
+        self.margin = config.get('margin', 0.1)
+        self.tiers: Dict[str, Dict] = config.get('tiers') or DEFAULT_TIERS
+        # snapshot_ref 欄位指向的等級
+        self.primary = config.get('primary', 'medium')
+        if self.primary not in self.tiers:
+            self.primary = next(iter(self.tiers))
+
+        workers = config.get('workers', 2)
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='SnapshotEncoder'
+        )
+        # 排隊與編碼中的工作數上限（含執行中的工作）
+        self.max_pending = max(1, config.get('max_pending', workers * 4))
+        self.overflow = config.get('overflow', 'drop')
+        if self.overflow not in ('inline', 'drop'):
+            self.overflow = 'drop'
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.encoded = 0
+        self.failed = 0
+        self.inline = 0   # 工作池已滿、在呼叫端編碼的數量
+        self.dropped = 0  # 工作池已滿而捨棄的截圖數
+        self._total_encode_time = 0.0
+
+    def submit(self, artifacts: FrameArtifacts, bbox: List[float]) -> Future:
+        """
+        排入一個截圖的編碼工作
+
+        Args:
+            artifacts: 原始影像幀的編碼快取（只讀取影像，不修改）
+            bbox: [x1, y1, x2, y2]
+
+        Returns:
+            Future: 結果為 {等級名稱: 截圖雜湊}，截圖範圍為空或截圖被捨棄時為空字典
+                    （工作池已滿且 overflow 為 'inline' 時，回傳前已在呼叫端編碼完成）
+        """
+        with self._lock:
+            self.submitted += 1
+
+        if self._slots.acquire(blocking=False):
+            try:
+                return self._executor.submit(self._encode_queued, artifacts.frame, list(bbox))
+            except Exception:
+                self._slots.release()
+                raise
+
+        # 工作池已滿：不再排入新的影像幀
+        job = Future()
+        if self.overflow == 'drop':
+            with self._lock:
+                self.dropped += 1
+            job.set_result({})
+            return job
+
+        with self._lock:
+            self.inline += 1
+        try:
+            job.set_result(self._encode(artifacts.frame, list(bbox)))
+        except Exception as e:
+            job.set_exception(e)
+        return job
+
+    def _encode_queued(self, frame: np.ndarray, bbox: List[float]) -> Dict[str, str]:
+        """編碼排隊的工作，完成後（結果回傳前）釋放名額"""
+        try:
+            return self._encode(frame, bbox)
+        finally:
+            self._slots.release()
+
+    def _encode(self, frame: np.ndarray, bbox: List[float]) -> Dict[str, str]:
+        """裁切並編碼所有等級（在工作執行緒執行）"""
+        start = time.perf_counter()
+        try:
+            x1, y1, x2, y2 = FrameArtifacts.expand_bbox(bbox, frame.shape, self.margin)
+            if x2 <= x1 or y2 <= y1:
+                return {}
+            crop = frame[y1:y2, x1:x2]
+
+            refs = {}
+            for name, tier in self.tiers.items():
+                image = crop
+                max_size = tier.get('max_size', 0)
+                longest = max(crop.shape[:2])
+                if max_size and longest > max_size:
+                    scale = max_size / longest
+                    size = (max(1, round(crop.shape[1] * scale)), max(1, round(crop.shape[0] * scale)))
+                    image = cv2.resize(crop, size, interpolation=cv2.INTER_AREA)
+                _, buffer = cv2.imencode('.jpg', image,
+                                         [cv2.IMWRITE_JPEG_QUALITY, tier.get('quality', 85)])
+                refs[name] = self.store.put(buffer.tobytes())
+
+            with self._lock:
+                self.encoded += 1
+                self._total_encode_time += time.perf_counter() - start
+            return refs
+        except Exception as e:
+            with self._lock:
+                self.failed += 1
+            if self.logger:
+                self.logger.error(f"截圖編碼失敗: {e}")
+            raise
+
+    def shutdown(self, wait: bool = True):
+        """
+        關閉工作池
+
+        Args:
+            wait: 是否等待已排入的工作完成
+        """
+        self._executor.shutdown(wait=wait)
+
+    def get_stats(self) -> Dict:
+        """取得編碼統計"""
+        with self._lock:
+            return {
+                'tiers': list(self.tiers),
+                'submitted': self.submitted,
+                'encoded': self.encoded,
+                'failed': self.failed,
+                'inline': self.inline,
+                'dropped': self.dropped,
+                'max_pending': self.max_pending,
+                'pending': self.submitted - self.encoded - self.failed - self.dropped,
+                'avg_encode_ms': round(self._total_encode_time / self.encoded * 1000, 2) if self.encoded else 0.0
+            }
@@ -0,0 +1,143 @@
+"""截圖儲存區 - 以內容雜湊為鍵的分層目錄，取代資料表中的 Base64 欄位"""
+
+import base64
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+
+_REF_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+
+class SnapshotStore:
+    """
+    截圖儲存區
+
+    JPEG 以 SHA-256 內容雜湊命名，存放在 <root>/<ab>/<cd>/<雜湊>.jpg，
+    資料表只記錄 64 字元的雜湊（snapshot_ref）。
+    相同內容只寫入一次；寫入先寫到同目錄的暫存檔再 rename，不會留下不完整的檔案。
+    """
+
+    def __init__(self, root: str, shard_levels: int = 2, fsync: bool = False):
+        """
+        初始化儲存區
+
+        Args:
+            root: 根目錄
+            shard_levels: 分層目錄層數（每層取雜湊的 2 個字元）
+            fsync: 寫入後是否 fsync（斷電時也不遺失，寫入較慢）
+        """
+        self.root = Path(root)
+        self.shard_levels = shard_levels
+        self.fsync = fsync
+        self.root.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.writes = 0
+        self.dedup_hits = 0
+        self.bytes_written = 0
+
+    @staticmethod
+    def is_ref(ref: str) -> bool:
+        """是否為合法的截圖雜湊（同時避免路徑穿越）"""
+        return isinstance(ref, str) and bool(_REF_PATTERN.match(ref))
+
+    def path_for(self, ref: str) -> Path:
+        """
+        取得截圖檔案路徑
+
+        Args:
+            ref: 截圖雜湊
+
+        Returns:
+            Path: 檔案路徑
+        """
+        if not self.is_ref(ref):
+            raise ValueError(f"不合法的截圖雜湊: {ref}")
+        shards = [ref[i * 2:i * 2 + 2] for i in range(self.shard_levels)]
+        return self.root.joinpath(*shards, f"{ref}.jpg")
+
+    def put(self, data: bytes) -> str:
+        """
+        寫入 JPEG
+
+        Args:
+            data: JPEG 位元組
+
+        Returns:
+            str: 截圖雜湊
+        """
+        ref = hashlib.sha256(data).hexdigest()
+        path = self.path_for(ref)
+        if path.exists():
+            with self._lock:
+                self.dedup_hits += 1
+            return ref
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            # 同內容同名，並行寫入時後者覆蓋前者也不影響結果
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            self.writes += 1
+            self.bytes_written += len(data)
+        return ref
+
+    def put_base64(self, data: str) -> str:
+        """
+        寫入 Base64 編碼的 JPEG（遷移舊資料用）
+
+        Args:
+            data: Base64 字串
+
+        Returns:
+            str: 截圖雜湊
+        """
+        return self.put(base64.b64decode(data))
+
+    def get(self, ref: str) -> Optional[bytes]:
+        """
+        讀取 JPEG
+
+        Args:
+            ref: 截圖雜湊
+
+        Returns:
+            bytes: JPEG 位元組，不存在時回傳 None
+        """
+        try:
+            return self.path_for(ref).read_bytes()
+        except (ValueError, FileNotFoundError):
+            return None
+
+    def exists(self, ref: str) -> bool:
+        """截圖是否存在"""
+        return self.is_ref(ref) and self.path_for(ref).exists()
+
+    @staticmethod
+    def url_for(ref: Optional[str]) -> Optional[str]:
+        """取得截圖的網址（由 web_server 的 /snapshots/<ref> 提供）"""
+        return f"/snapshots/{ref}" if ref else None
+
+    def get_stats(self) -> Dict[str, int]:
+        """取得寫入統計"""
+        with self._lock:
+            return {
+                'writes': self.writes,
+                'dedup_hits': self.dedup_hits,
+                'bytes_written': self.bytes_written
+            }
@@ -0,0 +1,620 @@
+"""SQLite 儲存後端 - 不需要資料庫伺服器的嵌入式資料庫（WAL 模式、單一寫入連線、唯讀連線池）"""
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from utils.frame_artifacts import FrameArtifacts
+from .history import (DETECTION_COLUMNS, FENCE_INTRUSION_COLUMNS, SNAPSHOT_REF_EXPRESSION,
+                      build_keyset_query, resolve_snapshot_urls, select_columns, to_page)
+from .plate_search import PlateIndex, plate_key
+from .snapshot_store import SnapshotStore
+from .storage import StorageBackend
+from .summary import summarize, summary_deltas
+
+
+SCHEMA_FILE = Path(__file__).parent / 'migrations' / 'sqlite_schema.sql'
+
+# SQLite 沒有陣列型別，bbox 以 JSON 陣列回傳（to_page 會解析）
+SQLITE_FENCE_INTRUSION_COLUMNS = {
+    **FENCE_INTRUSION_COLUMNS,
+    'bbox': "CASE WHEN bbox_x1 IS NULL THEN NULL "
+            "ELSE json_array(bbox_x1, bbox_y1, bbox_x2, bbox_y2) END",
+}
+
+SYNCHRONOUS_MODES = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+
+
+def db_time(moment) -> Optional[str]:
+    """
+    時間轉為資料表的文字格式（本地時間、不含時區、固定到微秒，字串排序即時間排序）
+
+    Args:
+        moment: datetime 或 ISO 格式字串
+
+    Returns:
+        str: 'YYYY-MM-DD HH:MM:SS.ffffff'，None 時回傳 None
+    """
+    if moment is None:
+        return None
+    if isinstance(moment, str):
+        moment = datetime.fromisoformat(moment)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment.isoformat(sep=' ', timespec='microseconds')
+
+
+class SQLiteHandler(StorageBackend):
+    """
+    SQLite 資料庫處理器
+
+    以 WAL 模式開啟同一個資料庫檔案：寫入集中在一條連線（寫入鎖序列化，
+    每批以 BEGIN IMMEDIATE 一個交易寫入偵測、車牌與每小時彙總），
+    查詢使用唯讀連線池，讀取不會被寫入阻擋。
+    車牌搜尋使用記憶體索引（啟動時由 plate_records 載入）。
+    """
+
+    def __init__(self, config: Dict, logger: logging.Logger = None):
+        """
+        初始化 SQLite 處理器（資料庫檔案與表格不存在時自動建立）
+
+        Args:
+            config: 資料庫配置（讀取 sqlite 區段與 snapshot_store）
+            logger: 日誌記錄器
+        """
+        self.config = config
+        self.logger = logger
+        sqlite_config = config.get('sqlite', {})
+        self.path = sqlite_config.get('path', 'data/surveillance.db')
+        self.busy_timeout = sqlite_config.get('busy_timeout', 5.0)
+        self.synchronous = str(sqlite_config.get('synchronous', 'NORMAL')).upper()
+        if self.synchronous not in SYNCHRONOUS_MODES:
+            raise ValueError(f"不支援的 synchronous 設定: {self.synchronous}")
+        self.read_connections = max(1, sqlite_config.get('read_connections', 4))
+        self.snapshot_store = None
+        self.plate_index = None
+
+        self._write_conn = None
+        self._write_lock = threading.Lock()
+        self._readers: queue.Queue = queue.Queue()
+        self._reader_count = 0
+        self._reader_lock = threading.Lock()
+
+        self.transactions = 0
+        self.rows_written = 0
+        self.failures = 0
+        self.total_write_time = 0.0
+        self.max_write_time = 0.0
+
+        if config.get('enabled', True):
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._write_conn = self._connect()
+            self._write_conn.executescript(SCHEMA_FILE.read_text(encoding='utf-8'))
+            if self.logger:
+                self.logger.info(f"✓ SQLite 資料庫: {self.path}")
+
+            self._create_snapshot_store()
+
+            self.plate_index = PlateIndex()
+            self._load_plate_index()
+
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """建立連線（自動提交模式，交易由呼叫端明確開始）"""
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout,
+                               isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """寫入交易（同一時間只有一個寫入者，失敗時 rollback 後拋出）"""
+        with self._write_lock:
+            start = time.perf_counter()
+            cursor = self._write_conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                yield cursor
+                cursor.execute("COMMIT")
+            except BaseException:
+                cursor.execute("ROLLBACK")
+                self.failures += 1
+                raise
+            elapsed = time.perf_counter() - start
+            self.transactions += 1
+            self.total_write_time += elapsed
+            self.max_write_time = max(self.max_write_time, elapsed)
+
+    @contextmanager
+    def _reading(self):
+        """取用唯讀連線（連線數達上限時等待 busy_timeout 秒）"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            with self._reader_lock:
+                create = self._reader_count < self.read_connections
+                if create:
+                    self._reader_count += 1
+            if create:
+                try:
+                    conn = self._connect(read_only=True)
+                except Exception:
+                    with self._reader_lock:
+                        self._reader_count -= 1
+                    raise
+            else:
+                try:
+                    conn = self._readers.get(timeout=self.busy_timeout)
+                except queue.Empty:
+                    raise sqlite3.OperationalError(
+                        f"等待 SQLite 讀取連線逾時 ({self.busy_timeout} 秒)") from None
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    def _fetch(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """以唯讀連線執行查詢（錯誤會拋出，由呼叫端處理）"""
+        with self._reading() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def save_detections_batch(self, frames: List[Tuple[str, List[Dict], Optional[FrameArtifacts]]]
+                              ) -> Optional[List[int]]:
+        """
+        在同一個交易中儲存一或多幀的偵測結果
+
+        偵測、車牌 upsert 與每小時彙總一起提交，彙總不需要背景寫入執行緒。
+
+        Args:
+            frames: [(攝影機 ID, 辨識結果列表, 原始影像幀的編碼快取或 None), ...]
+
+        Returns:
+            List[int]: 依寫入順序排列的偵測記錄 ID，失敗時回傳 None
+        """
+        if not self.config.get('enabled', True):
+            return None
+
+        try:
+            return self.write_detection_rows(self.prepare_detection_rows(frames))
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"儲存資料失敗: {e}")
+            return None
+
+    def write_detection_rows(self, rows: List[Dict]) -> List[int]:
+        """
+        在同一個交易中寫入已準備好的資料列（錯誤會拋出，由呼叫端處理）
+
+        Args:
+            rows: prepare_detection_rows 產生的資料列
+
+        Returns:
+            List[int]: 依寫入順序排列的偵測記錄 ID
+        """
+        if not rows:
+            return []
+
+        now = datetime.now()
+        plates = [(i, row['plate'], row['snapshot'])
+                  for i, row in enumerate(rows) if row['plate']]
+
+        with self._transaction() as cursor:
+            # 預先編譯的 INSERT 逐列執行，以 lastrowid 取得 ID（RETURNING 的順序不保證）
+            detection_ids = []
+            for row in rows:
+                cursor.execute("""
+                    INSERT INTO detections
+                    (camera_id, timestamp, object_class, confidence, bbox, details)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (row['camera_id'], db_time(row['timestamp']), row['object_class'],
+                      row['confidence'], row['bbox'], row['details']))
+                detection_ids.append(cursor.lastrowid)
+
+            if plates:
+                column = self.snapshot_column
+                cursor.executemany(f"""
+                    INSERT INTO plate_records
+                    (detection_id, plate_number, is_valid, confidence, {column}, count,
+                     plate_key, first_seen, last_seen, first_seen_date)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (plate_number, first_seen_date)
+                    DO UPDATE SET
+                        last_seen = excluded.last_seen,
+                        count = plate_records.count + excluded.count,
+                        {column} = COALESCE(excluded.{column}, plate_records.{column})
+                """, [
+                    plate + (plate_key(plate[1]), db_time(now), db_time(now), now.date().isoformat())
+                    for plate in self._aggregate_plates(plates, detection_ids)
+                ])
+
+            cursor.executemany("""
+                INSERT INTO detection_summary
+                (camera_id, hour, object_class, count, confidence_sum, plate_count, valid_plate_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (camera_id, hour, object_class)
+                DO UPDATE SET
+                    count = detection_summary.count + excluded.count,
+                    confidence_sum = detection_summary.confidence_sum + excluded.confidence_sum,
+                    plate_count = detection_summary.plate_count + excluded.plate_count,
+                    valid_plate_count = detection_summary.valid_plate_count + excluded.valid_plate_count
+            """, [(camera_id, db_time(hour), object_class, *delta)
+                  for (camera_id, hour, object_class), delta in summary_deltas(rows).items()])
+
+        self.rows_written += len(rows)
+        for row in rows:
+            if row['plate']:
+                self.plate_index.add(row['plate']['plate_number'], now.date(), 1, now, now)
+
+        if self.logger:
+            self.logger.debug(f"已批次儲存 {len(rows)} 筆偵測記錄、{len(plates)} 筆車牌")
+
+        return detection_ids
+
+    def get_recent_detections(self, camera_id: str = None,
+                              limit: int = 100, since: datetime = None) -> List[Dict]:
+        """
+        取得最近的偵測記錄
+
+        Args:
+            camera_id: 攝影機 ID (None = 全部)
+            limit: 最多回傳筆數
+            since: 只查詢此時間之後的記錄 (None = 不限)
+
+        Returns:
+            List[Dict]: 偵測記錄列表
+        """
+        if not self.config.get('enabled', True):
+            return []
+
+        try:
+            rows = self._fetch("""
+                SELECT id, camera_id, timestamp, object_class, confidence, bbox, details
+                FROM detections
+                WHERE (? IS NULL OR camera_id = ?) AND timestamp >= ?
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+            """, (camera_id, camera_id, db_time(since) or '', limit))
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"查詢資料失敗: {e}")
+            return []
+
+        return [{
+            'id': row[0],
+            'camera_id': row[1],
+            'timestamp': datetime.fromisoformat(row[2]).isoformat(),
+            'object_class': row[3],
+            'confidence': row[4],
+            'bbox': json.loads(row[5]) if row[5] else None,
+            'details': json.loads(row[6]) if row[6] else {}
+        } for row in rows]
+
+    def query_detections(self, camera_id: str = None, object_class: str = None,
+                         start: datetime = None, end: datetime = None, cursor: str = None,
+                         limit: int = 100, columns: List[str] = None) -> Dict:
+        """
+        以 keyset 分頁查詢偵測記錄（由新到舊，參數與回傳同 DatabaseHandler.query_detections）
+
+        Raises:
+            ValueError: 欄位或游標不正確
+        """
+        names = select_columns(DETECTION_COLUMNS, columns)
+        filters = []
+        if camera_id:
+            filters.append(("camera_id = %s", (camera_id,)))
+        if object_class:
+            filters.append(("object_class = %s", (object_class,)))
+        sql, params = build_keyset_query(
+            'detections', [DETECTION_COLUMNS[name] for name in names], filters,
+            start=start, end=end, cursor=cursor, limit=limit
+        )
+        return to_page(names, self._fetch_page(sql, params), limit)
+
+    def query_fence_intrusions(self, fence_id: str = None, camera_id: str = None,
+                               start: datetime = None, end: datetime = None, cursor: str = None,
+                               limit: int = 100, columns: List[str] = None) -> Dict:
+        """
+        以 keyset 分頁查詢圍籬入侵記錄（不讀取截圖內容，參數與回傳同
+        DatabaseHandler.query_fence_intrusions）
+
+        Raises:
+            ValueError: 欄位或游標不正確
+        """
+        names = select_columns(SQLITE_FENCE_INTRUSION_COLUMNS, columns)
+        expressions = [SQLITE_FENCE_INTRUSION_COLUMNS[name] for name in names]
+        if 'snapshot_url' in names and self.snapshot_store:
+            expressions[names.index('snapshot_url')] = SNAPSHOT_REF_EXPRESSION
+        filters = []
+        if fence_id:
+            filters.append(("fence_id = %s", (fence_id,)))
+        if camera_id:
+            filters.append(("camera_id = %s", (camera_id,)))
+        sql, params = build_keyset_query(
+            'fence_intrusions', expressions, filters,
+            start=start, end=end, cursor=cursor, limit=limit
+        )
+
+        page = to_page(names, self._fetch_page(sql, params), limit)
+        if 'snapshot_url' in names:
+            resolve_snapshot_urls(page['items'])
+        return page
+
+    def _fetch_page(self, sql: str, params: tuple) -> List[tuple]:
+        """執行 build_keyset_query 產生的查詢（改為 SQLite 參數格式，timestamp 轉回 datetime）"""
+        if not self.config.get('enabled', True):
+            return []
+
+        params = tuple(db_time(value) if isinstance(value, datetime) else value for value in params)
+        rows = self._fetch(sql.replace('%s', '?'), params)
+        return [(row[0], datetime.fromisoformat(row[1])) + tuple(row[2:]) for row in rows]
+
+    def get_fence_intrusion_snapshot(self, intrusion_id: int) -> Optional[Dict]:
+        """
+        取得單筆圍籬入侵記錄的截圖
+
+        Args:
+            intrusion_id: 入侵記錄 ID
+
+        Returns:
+            Dict: {'snapshot_ref': 雜湊或 None, 'snapshot_base64': Base64 或 None}，
+                  記錄不存在時回傳 None
+        """
+        if not self.config.get('enabled', True):
+            return None
+
+        try:
+            rows = self._fetch("""
+                SELECT snapshot_ref, snapshot_base64
+                FROM fence_intrusions
+                WHERE id = ?
+            """, (intrusion_id,))
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"查詢入侵截圖失敗: {e}")
+            return None
+
+        if not rows:
+            return None
+        return {'snapshot_ref': rows[0][0], 'snapshot_base64': rows[0][1]}
+
+    def get_plate_statistics(self, days: int = 7) -> List[Dict]:
+        """
+        取得車牌統計
+
+        Args:
+            days: 統計天數
+
+        Returns:
+            List[Dict]: 統計結果
+        """
+        if not self.config.get('enabled', True):
+            return []
+
+        try:
+            rows = self._fetch("""
+                SELECT plate_number, COUNT(*) AS total_count,
+                       MIN(first_seen), MAX(last_seen)
+                FROM plate_records
+                WHERE first_seen_date >= ?
+                GROUP BY plate_number
+                ORDER BY total_count DESC
+            """, ((date.today() - timedelta(days=days)).isoformat(),))
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"查詢統計失敗: {e}")
+            return []
+
+        return [{
+            'plate_number': row[0],
+            'count': row[1],
+            'first_seen': datetime.fromisoformat(row[2]).isoformat() if row[2] else None,
+            'last_seen': datetime.fromisoformat(row[3]).isoformat() if row[3] else None
+        } for row in rows]
+
+    def search_plates(self, query: str, max_distance: int = 1,
+                      time_range: Tuple[Optional[datetime], Optional[datetime]] = None,
+                      limit: int = 50) -> List[Dict]:
+        """
+        模糊搜尋車牌（記憶體 q-gram 索引，參數與回傳同 DatabaseHandler.search_plates）
+        """
+        if not self.config.get('enabled', True) or not plate_key(query):
+            return []
+        return self.plate_index.search(query, max_distance, time_range, limit)
+
+    def _load_plate_index(self):
+        """由 plate_records 載入記憶體車牌索引"""
+        try:
+            with self._reading() as conn:
+                cursor = conn.execute("""
+                    SELECT plate_number, first_seen_date, count, first_seen, last_seen
+                    FROM plate_records
+                """)
+                for plate_number, day, count, first_seen, last_seen in cursor:
+                    self.plate_index.add(plate_number, date.fromisoformat(day), count or 0,
+                                         datetime.fromisoformat(first_seen),
+                                         datetime.fromisoformat(last_seen))
+            if self.logger:
+                self.logger.info(f"✓ 已載入 {len(self.plate_index)} 個車牌到記憶體搜尋索引")
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"載入車牌搜尋索引失敗: {e}")
+
+    def save_fence_intrusion(self, intrusion_data: Dict) -> bool:
+        """
+        儲存圍籬入侵事件（欄位同 DatabaseHandler.save_fence_intrusion）
+
+        Args:
+            intrusion_data: 入侵事件資料
+
+        Returns:
+            bool: 是否成功
+        """
+        if not self.config.get('enabled', True):
+            return False
+
+        intrusion_data = self._store_intrusion_snapshot(intrusion_data)
+        bbox = intrusion_data.get('bbox') or []
+        bbox = list(bbox) + [None] * (4 - len(bbox))
+        timestamp = intrusion_data.get('timestamp') or datetime.now(timezone.utc)
+
+        try:
+            with self._transaction() as cursor:
+                cursor.execute("""
+                    INSERT INTO fence_intrusions
+                    (fence_id, fence_name, object_class, confidence,
+                     bbox_x1, bbox_y1, bbox_x2, bbox_y2,
+                     camera_id, camera_name, snapshot_base64, snapshot_ref, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    intrusion_data['fence_id'],
+                    intrusion_data['fence_name'],
+                    intrusion_data['object_class'],
+                    intrusion_data['confidence'],
+                    *bbox[:4],
+                    intrusion_data.get('camera_id'),
+                    intrusion_data.get('camera_name'),
+                    intrusion_data.get('snapshot_base64'),
+                    intrusion_data.get('snapshot_ref'),
+                    db_time(timestamp)
+                ))
+                intrusion_id = cursor.lastrowid
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"儲存圍籬入侵事件失敗: {e}")
+            return False
+
+        self.rows_written += 1
+        if self.logger:
+            self.logger.info(f"✓ 已儲存圍籬入侵事件 ID: {intrusion_id}")
+        return True
+
+    def get_recent_fence_intrusions(self, fence_id: str = None,
+                                    limit: int = 100, since: datetime = None) -> List[Dict]:
+        """
+        取得最近的圍籬入侵記錄
+
+        Args:
+            fence_id: 圍籬 ID (None = 全部)
+            limit: 最多回傳筆數
+            since: 只查詢此時間之後的記錄 (None = 不限)
+
+        Returns:
+            List[Dict]: 入侵記錄列表
+        """
+        if not self.config.get('enabled', True):
+            return []
+
+        try:
+            rows = self._fetch("""
+                SELECT id, fence_id, fence_name, object_class, confidence,
+                       bbox_x1, bbox_y1, bbox_x2, bbox_y2,
+                       camera_id, camera_name, timestamp, snapshot_base64, snapshot_ref
+                FROM fence_intrusions
+                WHERE (? IS NULL OR fence_id = ?) AND timestamp >= ?
+                ORDER BY timestamp DESC, id DESC
+                LIMIT ?
+            """, (fence_id, fence_id, db_time(since) or '', limit))
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"查詢圍籬入侵記錄失敗: {e}")
+            return []
+
+        return [{
+            'id': row[0],
+            'fence_id': row[1],
+            'fence_name': row[2],
+            'object_class': row[3],
+            'confidence': row[4],
+            'bbox': [row[5], row[6], row[7], row[8]] if row[5] is not None else None,
+            'camera_id': row[9],
+            'camera_name': row[10],
+            'timestamp': datetime.fromisoformat(row[11]).isoformat(),
+            'snapshot_base64': row[12],
+            'snapshot_url': SnapshotStore.url_for(row[13]) if self.snapshot_store else None
+        } for row in rows]
+
+    def get_summary_stats(self, since: datetime, camera_id: str = None) -> Optional[Dict]:
+        """
+        由 detection_summary 取得統計（彙總與偵測在同一個交易寫入，一定是最新的）
+
+        Args:
+            since: 起始時間（本地時間，以整點計）
+            camera_id: 攝影機 ID (None = 全部)
+
+        Returns:
+            Dict: summarize 的統計結果，失敗時回傳 None
+        """
+        if not self.config.get('enabled', True):
+            return None
+
+        since = datetime.fromisoformat(db_time(since)).replace(minute=0, second=0, microsecond=0)
+        try:
+            rows = self._fetch("""
+                SELECT camera_id, hour, object_class, count,
+                       confidence_sum, plate_count, valid_plate_count
+                FROM detection_summary
+                WHERE hour >= ? AND (? IS NULL OR camera_id = ?)
+            """, (db_time(since), camera_id, camera_id))
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"查詢統計彙總失敗: {e}")
+            return None
+
+        return summarize([(row[0], datetime.fromisoformat(row[1])) + tuple(row[2:]) for row in rows])
+
+    def get_pool_stats(self) -> Dict:
+        """
+        取得唯讀連線池統計
+
+        Returns:
+            Dict: 連線上限、已建立與閒置的連線數
+        """
+        return {
+            'backend': 'sqlite',
+            'maxconn': self.read_connections,
+            'connections': self._reader_count,
+            'idle': self._readers.qsize()
+        }
+
+    def get_write_stats(self) -> Dict:
+        """
+        取得寫入統計
+
+        Returns:
+            Dict: 交易數、寫入筆數、失敗次數與交易時間
+        """
+        with self._write_lock:
+            return {
+                'backend': 'sqlite',
+                'transactions': self.transactions,
+                'rows': self.rows_written,
+                'failures': self.failures,
+                'avg_transaction_ms': (round(self.total_write_time / self.transactions * 1000, 2)
+                                       if self.transactions else 0.0),
+                'max_transaction_ms': round(self.max_write_time * 1000, 2)
+            }
+
+    def close(self):
+        """關閉所有連線（WAL 內容於最後一條連線關閉時寫回資料庫檔案）"""
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        if self._write_conn:
+            with self._write_lock:
+                self._write_conn.execute("PRAGMA optimize")
+                self._write_conn.close()
+                self._write_conn = None
+            if self.logger:
+                self.logger.info("SQLite 資料庫已關閉")
@@ -0,0 +1,255 @@
+"""儲存後端介面 - PostgreSQL 與 SQLite 後端共用的寫入、查詢方法與資料列準備"""
+
+import base64
+import json
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from utils.frame_artifacts import FrameArtifacts
+from .snapshot_store import SnapshotStore
+
+
+class PostCommitError(Exception):
+    """
+    交易已提交後的後續處理失敗（統計、索引、截圖連結等）
+
+    資料已經寫入，呼叫端不可重試或落地暫存（重送會重複寫入）。
+    result 為原本應回傳的結果（例如偵測記錄 ID）。
+    """
+
+    def __init__(self, result, error: Exception):
+        super().__init__(f"交易已提交，後續處理失敗: {error}")
+        self.result = result
+        self.error = error
+
+
+class StorageBackend(ABC):
+    """
+    儲存後端介面
+    
+    子類別實作寫入與查詢；辨識結果轉為資料列、截圖存放與車牌彙總由此共用，
+    兩種後端寫入的內容與查詢回傳的格式相同。
+    """
+    
+    config: Dict
+    logger: Optional[logging.Logger]
+    snapshot_store: Optional[SnapshotStore] = None  # 截圖儲存區（啟用時資料表只記錄 snapshot_ref）
+    snapshot_encoder = None  # 截圖編碼工作池（只有 PostgreSQL 後端支援）
+    summary = None  # 統計彙總器（只有 PostgreSQL 後端需要背景寫入）
+    writer = None  # write-behind 背景寫入器（只有 PostgreSQL 後端支援）
+    
+    def _create_snapshot_store(self):
+        """依 snapshot_store 配置建立截圖儲存區"""
+        store_config = self.config.get('snapshot_store', {})
+        if store_config.get('enabled', False):
+            self.snapshot_store = SnapshotStore(
+                store_config.get('path', 'data/snapshots'),
+                shard_levels=store_config.get('shard_levels', 2),
+                fsync=store_config.get('fsync', False)
+            )
+            if self.logger:
+                self.logger.info(f"✓ 截圖儲存區: {self.snapshot_store.root}")
+    
+    @abstractmethod
+    def save_detections_batch(self, frames: List[Tuple[str, List[Dict], Optional[FrameArtifacts]]]
+                              ) -> Optional[List[int]]:
+        """
+        在同一個交易中儲存一或多幀的偵測結果
+        
+        Args:
+            frames: [(攝影機 ID, 辨識結果列表, 原始影像幀的編碼快取或 None), ...]
+        
+        Returns:
+            List[int]: 依寫入順序排列的偵測記錄 ID，失敗時回傳 None
+        """
+    
+    @abstractmethod
+    def save_fence_intrusion(self, intrusion_data: Dict) -> bool:
+        """儲存圍籬入侵事件（欄位見 DatabaseHandler.save_fence_intrusion），回傳是否成功"""
+    
+    @abstractmethod
+    def get_recent_detections(self, camera_id: str = None, limit: int = 100,
+                              since: datetime = None) -> List[Dict]:
+        """取得最近的偵測記錄"""
+    
+    @abstractmethod
+    def get_recent_fence_intrusions(self, fence_id: str = None, limit: int = 100,
+                                    since: datetime = None) -> List[Dict]:
+        """取得最近的圍籬入侵記錄（含截圖）"""
+    
+    @abstractmethod
+    def query_detections(self, camera_id: str = None, object_class: str = None,
+                         start: datetime = None, end: datetime = None, cursor: str = None,
+                         limit: int = 100, columns: List[str] = None) -> Dict:
+        """以 keyset 分頁查詢偵測記錄，回傳 {'items', 'next_cursor'}"""
+    
+    @abstractmethod
+    def query_fence_intrusions(self, fence_id: str = None, camera_id: str = None,
+                               start: datetime = None, end: datetime = None, cursor: str = None,
+                               limit: int = 100, columns: List[str] = None) -> Dict:
+        """以 keyset 分頁查詢圍籬入侵記錄（不含截圖內容），回傳 {'items', 'next_cursor'}"""
+    
+    @abstractmethod
+    def get_fence_intrusion_snapshot(self, intrusion_id: int) -> Optional[Dict]:
+        """取得入侵截圖 {'snapshot_ref', 'snapshot_base64'}，記錄不存在時回傳 None"""
+    
+    @abstractmethod
+    def get_plate_statistics(self, days: int = 7) -> List[Dict]:
+        """取得最近 days 天的車牌統計"""
+    
+    @abstractmethod
+    def search_plates(self, query: str, max_distance: int = 1,
+                      time_range: Tuple[Optional[datetime], Optional[datetime]] = None,
+                      limit: int = 50) -> List[Dict]:
+        """模糊搜尋車牌，依距離排序"""
+    
+    @abstractmethod
+    def get_summary_stats(self, since: datetime, camera_id: str = None) -> Optional[Dict]:
+        """由每小時彙總取得統計，未啟用時回傳 None"""
+    
+    @abstractmethod
+    def close(self):
+        """寫完待處理的資料並關閉連線"""
+    
+    def get_pool_stats(self) -> Dict:
+        """取得連線池統計（沒有連線池的後端回傳空字典）"""
+        return {}
+    
+    def get_write_stats(self) -> Dict:
+        """取得背景寫入統計（沒有背景寫入的後端回傳空字典）"""
+        return {}
+    
+    def save_detection(self, camera_id: str, results: List[Dict], frame=None,
+                       artifacts: FrameArtifacts = None) -> bool:
+        """
+        儲存偵測結果到資料庫
+        
+        Args:
+            camera_id: 攝影機 ID
+            results: 辨識結果列表
+            frame: 原始影像幀（用於截取車輛局部畫面）
+            artifacts: 原始影像幀的編碼快取（與其他使用者共用截圖編碼，優先於 frame）
+        
+        Returns:
+            bool: 是否成功
+        """
+        if artifacts is None and frame is not None:
+            artifacts = FrameArtifacts(frame, quality=85)
+        
+        return self.save_detections_batch([(camera_id, results, artifacts)]) is not None
+    
+    @property
+    def snapshot_column(self) -> str:
+        """截圖寫入的欄位（啟用截圖儲存區時為 snapshot_ref，否則為 snapshot_base64）"""
+        return 'snapshot_ref' if self.snapshot_store else 'snapshot_base64'
+    
+    def prepare_detection_rows(self, frames: List[Tuple[str, List[Dict], Optional[FrameArtifacts]]]
+                               ) -> List[Dict]:
+        """
+        將辨識結果轉為待寫入的資料列（可序列化為 JSON，供 write-behind 落地暫存）
+        
+        Args:
+            frames: [(攝影機 ID, 辨識結果列表, 原始影像幀的編碼快取或 None), ...]
+        
+        Returns:
+            List[Dict]: 資料列（plate 為車牌資訊，snapshot 為車輛截圖的雜湊或 Base64，
+                        snapshot_job 為編碼工作池的 Future）
+        """
+        rows = []
+        for camera_id, results, artifacts in frames:
+            for result in results:
+                # 靜止物件已在先前寫入,不重複儲存
+                if result.get('stationary'):
+                    continue
+                
+                detection = result['base_detection']
+                details = result.get('details', {})
+                row = {
+                    'camera_id': camera_id,
+                    'timestamp': result['timestamp'],
+                    'object_class': detection['class'],
+                    'confidence': float(detection['confidence']),
+                    'bbox': json.dumps(detection['bbox']),
+                    'details': json.dumps(details),
+                    'plate': None,
+                    'snapshot': None
+                }
+                
+                # 如果有車牌辨識結果,額外記錄
+                plate_info = details.get('license_plate', {})
+                if 'plate_number' in plate_info:
+                    row['plate'] = plate_info
+                    # 截取車輛局部畫面，交給編碼工作池、存入截圖儲存區或轉為 base64
+                    # （擴展邊界框 10% 以包含更多車輛細節，同一幀同一框只編碼一次）
+                    if artifacts is not None and self.snapshot_encoder:
+                        # 資料列先寫入，編碼完成後再連結 snapshot_ref / snapshot_tiers
+                        row['snapshot_job'] = self.snapshot_encoder.submit(artifacts, detection['bbox'])
+                    elif artifacts is not None and self.snapshot_store:
+                        jpeg = artifacts.crop_jpeg(detection['bbox'], margin=0.1, quality=85)
+                        row['snapshot'] = self.snapshot_store.put(jpeg) if jpeg else None
+                    elif artifacts is not None:
+                        row['snapshot'] = artifacts.crop_base64(
+                            detection['bbox'], margin=0.1, quality=85
+                        )
+                rows.append(row)
+        return rows
+    
+    def _store_intrusion_snapshot(self, intrusion_data: Dict) -> Dict:
+        """
+        將入侵截圖轉為寫入欄位的格式（存入截圖儲存區，或轉為 Base64）
+        
+        Args:
+            intrusion_data: 入侵事件資料
+        
+        Returns:
+            Dict: 不含 snapshot_jpeg、截圖放在 snapshot_column 欄位的資料
+        """
+        data = dict(intrusion_data)
+        jpeg = data.pop('snapshot_jpeg', None)
+        
+        if self.snapshot_store:
+            encoded = data.pop('snapshot_base64', None)
+            if jpeg is None and encoded:
+                jpeg = base64.b64decode(encoded)
+            data['snapshot_ref'] = self.snapshot_store.put(jpeg) if jpeg else None
+        elif jpeg is not None and not data.get('snapshot_base64'):
+            data['snapshot_base64'] = base64.b64encode(jpeg).decode('utf-8')
+        
+        return data
+    
+    @staticmethod
+    def _aggregate_plates(plates: List[Tuple[int, Dict, Optional[str]]],
+                          detection_ids: List[int]) -> List[Tuple]:
+        """
+        依車牌號碼彙總同一批的車牌記錄
+        
+        同一個 upsert 不能更新同一列兩次，因此重複的車牌先合併:
+        新增時使用第一次出現的偵測 ID 與辨識資訊，count 為本批出現次數，
+        截圖使用最後一張（與逐筆 upsert 的結果相同）。
+        
+        Args:
+            plates: [(偵測索引, 車牌資訊, 車輛截圖)]
+            detection_ids: 偵測記錄 ID
+        
+        Returns:
+            List[Tuple]: (detection_id, plate_number, is_valid, confidence, 截圖, count)
+        """
+        aggregated: Dict[str, list] = {}
+        for index, plate_info, snapshot in plates:
+            entry = aggregated.get(plate_info['plate_number'])
+            if entry is None:
+                aggregated[plate_info['plate_number']] = [
+                    detection_ids[index],
+                    plate_info['plate_number'],
+                    plate_info.get('is_valid', True),
+                    plate_info.get('confidence', 0),
+                    snapshot,
+                    1
+                ]
+            else:
+                entry[5] += 1
+                if snapshot is not None:
+                    entry[4] = snapshot
+        return [tuple(entry) for entry in aggregated.values()]
@@ -0,0 +1,258 @@
+"""統計彙總 - 在記憶體累計每小時偵測數，定期以增量 upsert 寫入 detection_summary"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from psycopg2.extras import execute_values
+
+
+SummaryKey = Tuple[str, datetime, str]  # (攝影機 ID, 小時, 物件類別)
+
+
+def hour_bucket(timestamp: str) -> datetime:
+    """
+    取得時間所屬的小時（本地時間、不含時區，與 detection_summary.hour 一致）
+
+    Args:
+        timestamp: ISO 格式時間
+
+    Returns:
+        datetime: 整點時間
+    """
+    moment = datetime.fromisoformat(timestamp)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def summary_deltas(rows: List[Dict]) -> Dict[SummaryKey, List]:
+    """
+    依 (攝影機, 小時, 物件類別) 累計資料列的增量
+
+    Args:
+        rows: prepare_detection_rows 產生的資料列
+
+    Returns:
+        Dict: 彙總鍵 -> [偵測數, 信心度總和, 車牌數, 有效車牌數]
+    """
+    deltas: Dict[SummaryKey, List] = {}
+    for row in rows:
+        key = (row['camera_id'], hour_bucket(row['timestamp']), row['object_class'])
+        delta = deltas.get(key)
+        if delta is None:
+            delta = deltas[key] = [0, 0.0, 0, 0]
+        delta[0] += 1
+        delta[1] += row['confidence']
+        plate = row.get('plate')
+        if plate:
+            delta[2] += 1
+            delta[3] += 1 if plate.get('is_valid', True) else 0
+    return deltas
+
+
+class SummaryAggregator:
+    """
+    每小時統計彙總
+
+    已寫入的偵測記錄依 (攝影機, 小時, 物件類別) 在記憶體累計增量
+    （偵測數、信心度總和、車牌辨識數、格式有效車牌數），
+    每 flush_interval 秒以一個 upsert 將增量加到 detection_summary。
+    統計查詢只讀彙總表，資料量與小時數成正比，不再掃描 detections。
+    """
+
+    def __init__(self, handler, config: Dict, logger: logging.Logger = None):
+        """
+        初始化彙總器
+
+        Args:
+            handler: DatabaseHandler（提供連線）
+            config: summary 配置
+            logger: 日誌記錄器
+        """
+        self.handler = handler
+        self.logger = logger
+        self.flush_interval = config.get('flush_interval', 10.0)
+        # 寫入失敗時保留的增量上限（超過時捨棄，避免資料庫長時間無法連線時記憶體無限成長）
+        self.max_pending = config.get('max_pending', 100000)
+
+        self._lock = threading.Lock()
+        self._deltas: Dict[SummaryKey, List] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.recorded = 0
+        self.flushes = 0
+        self.upserted = 0
+        self.failures = 0
+        self.post_commit_errors = 0  # 已提交但之後失敗的寫入次數（增量已寫入，不放回）
+        self.dropped = 0
+        self.last_flush_ms = 0.0
+
+    def record_rows(self, rows: List[Dict]):
+        """
+        累計已寫入的偵測資料列
+
+        Args:
+            rows: prepare_detection_rows 產生的資料列
+        """
+        deltas = summary_deltas(rows)
+        with self._lock:
+            for key, delta in deltas.items():
+                current = self._deltas.get(key)
+                if current is None:
+                    self._deltas[key] = delta
+                else:
+                    for i, value in enumerate(delta):
+                        current[i] += value
+            self.recorded += len(rows)
+
+    def pending_deltas(self) -> Dict[SummaryKey, List]:
+        """取得尚未寫入的增量（複本）"""
+        with self._lock:
+            return {key: list(delta) for key, delta in self._deltas.items()}
+
+    def flush(self) -> int:
+        """
+        將累計的增量寫入 detection_summary
+
+        Returns:
+            int: 寫入的彙總列數（提交前失敗時增量放回，回傳 0）
+        """
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+        if not deltas:
+            return 0
+
+        start = time.perf_counter()
+        conn = None
+        committed = False
+        try:
+            conn = self.handler.get_connection()
+            cursor = conn.cursor()
+            execute_values(cursor, """
+                INSERT INTO detection_summary
+                (camera_id, hour, object_class, count, confidence_sum, plate_count, valid_plate_count)
+                VALUES %s
+                ON CONFLICT (camera_id, hour, object_class)
+                DO UPDATE SET
+                    count = detection_summary.count + EXCLUDED.count,
+                    confidence_sum = detection_summary.confidence_sum + EXCLUDED.confidence_sum,
+                    plate_count = detection_summary.plate_count + EXCLUDED.plate_count,
+                    valid_plate_count = detection_summary.valid_plate_count + EXCLUDED.valid_plate_count
+            """, [(*key, *delta) for key, delta in deltas.items()],
+                page_size=self.handler.batch_page_size)
+            conn.commit()
+            committed = True
+            self.handler.return_connection(conn)
+            conn = None
+        except Exception as e:
+            if committed:
+                # 增量已寫入：放回會在下次寫入時重複累加
+                conn = None
+                self.post_commit_errors += 1
+                if self.logger:
+                    self.logger.error(f"統計彙總已寫入，歸還連線失敗: {e}")
+            else:
+                if conn and not conn.closed:
+                    conn.rollback()
+                self._restore(deltas)
+                self.failures += 1
+                if self.logger:
+                    self.logger.error(f"寫入統計彙總失敗: {e}")
+                return 0
+        finally:
+            if conn:
+                self.handler.return_connection(conn)
+
+        self.flushes += 1
+        self.upserted += len(deltas)
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+        return len(deltas)
+
+    def _restore(self, deltas: Dict[SummaryKey, List]):
+        """寫入失敗時將增量合併回去，下次再寫入"""
+        with self._lock:
+            for key, delta in deltas.items():
+                current = self._deltas.get(key)
+                if current is None:
+                    if len(self._deltas) >= self.max_pending:
+                        self.dropped += delta[0]
+                        continue
+                    self._deltas[key] = delta
+                else:
+                    for i, value in enumerate(delta):
+                        current[i] += value
+
+    def start(self):
+        """啟動背景寫入執行緒"""
+        if self._thread:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='SummaryAggregator', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止背景寫入執行緒（停止前寫入剩餘增量）"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=10)
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        """背景寫入迴圈"""
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def get_stats(self) -> Dict:
+        """取得彙總器統計"""
+        with self._lock:
+            pending = len(self._deltas)
+        return {
+            'flush_interval': self.flush_interval,
+            'recorded': self.recorded,
+            'pending_keys': pending,
+            'flushes': self.flushes,
+            'upserted': self.upserted,
+            'failures': self.failures,
+            'post_commit_errors': self.post_commit_errors,
+            'dropped': self.dropped,
+            'last_flush_ms': round(self.last_flush_ms, 2)
+        }
+
+
+def summarize(rows: List[Tuple]) -> Dict:
+    """
+    合併彙總列為統計結果
+
+    Args:
+        rows: [(攝影機 ID, 小時, 物件類別, 偵測數, 信心度總和, 車牌數, 有效車牌數), ...]
+
+    Returns:
+        Dict: 總數、車牌辨識成功率、平均信心度，以及依類別、攝影機、小時的偵測數
+    """
+    totals = [0, 0.0, 0, 0]
+    by_class: Dict[str, int] = {}
+    by_camera: Dict[str, int] = {}
+    by_hour: Dict[datetime, int] = {}
+    for camera_id, hour, object_class, count, confidence_sum, plates, valid_plates in rows:
+        for i, value in enumerate((count, confidence_sum, plates, valid_plates)):
+            totals[i] += value
+        by_class[object_class] = by_class.get(object_class, 0) + count
+        by_camera[camera_id] = by_camera.get(camera_id, 0) + count
+        by_hour[hour] = by_hour.get(hour, 0) + count
+
+    count, confidence_sum, plates, valid_plates = totals
+    return {
+        'total_detections': count,
+        'total_plates': plates,
+        'valid_plates': valid_plates,
+        'success_rate': round(valid_plates / plates, 4) if plates else 0.0,
+        'avg_confidence': round(confidence_sum / count, 4) if count else 0.0,
+        'by_class': dict(sorted(by_class.items(), key=lambda item: -item[1])),
+        'by_camera': by_camera,
+        'by_hour': [{'hour': hour.isoformat(), 'count': by_hour[hour]} for hour in sorted(by_hour)]
+    }
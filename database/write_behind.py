@@ -0,0 +1,469 @@
+"""Write-behind 資料庫寫入 - 有界佇列、背景批次寫入與落地暫存"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import psycopg2
+from psycopg2 import pool
+
+from .storage import PostCommitError
+
+# 連線層級的錯誤（資料庫停機、重新啟動、連線池耗盡）：資料落地暫存，恢復後重送
+TRANSIENT_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError, pool.PoolError)
+
+
+class SpillJournal:
+    """
+    落地暫存檔（JSON Lines，只附加寫入）
+
+    重送時先將暫存檔改名為 .replay 再逐批寫入，期間新的落地資料寫入新的暫存檔；
+    重送中途失敗時，未送出的部分會放回暫存檔最前面，保持寫入順序。
+    """
+
+    def __init__(self, path: str):
+        """
+        初始化暫存檔
+
+        Args:
+            path: 暫存檔路徑
+        """
+        self.path = Path(path)
+        self.replay_path = self.path.with_name(self.path.name + '.replay')
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 上次重送中途結束（程式中止），放回暫存檔
+        if self.replay_path.exists():
+            self._restore(self.replay_path.read_text(encoding='utf-8').splitlines())
+
+    def append(self, records: List[Dict]) -> int:
+        """
+        附加記錄
+
+        Args:
+            records: 待暫存的記錄
+
+        Returns:
+            int: 寫入的位元組數
+        """
+        data = ''.join(json.dumps(record, ensure_ascii=False, default=str) + '\n'
+                       for record in records)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        return len(data.encode('utf-8'))
+
+    def pending(self) -> bool:
+        """是否有待重送的記錄"""
+        return self.path.exists() and self.path.stat().st_size > 0
+
+    def take(self) -> List[str]:
+        """
+        取出所有待重送的記錄（暫存檔改名為 .replay）
+
+        Returns:
+            List[str]: JSON 字串列表
+        """
+        with self._lock:
+            if not self.pending():
+                return []
+            os.replace(self.path, self.replay_path)
+        return self.replay_path.read_text(encoding='utf-8').splitlines()
+
+    def commit(self):
+        """重送完成，刪除 .replay"""
+        self.replay_path.unlink(missing_ok=True)
+
+    def _restore(self, lines: List[str]):
+        """將未送出的記錄放回暫存檔最前面"""
+        with self._lock:
+            existing = self.path.read_text(encoding='utf-8') if self.path.exists() else ''
+            data = ''.join(line + '\n' for line in lines if line) + existing
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            tmp_path.write_text(data, encoding='utf-8')
+            os.replace(tmp_path, self.path)
+            self.replay_path.unlink(missing_ok=True)
+
+    def rollback(self, lines: List[str]):
+        """
+        重送失敗，放回未送出的記錄
+
+        Args:
+            lines: 未送出的 JSON 字串
+        """
+        self._restore(lines)
+
+
+class WriteBehindWriter:
+    """
+    Write-behind 背景寫入器
+
+    save_detection / save_fence_intrusion 只將資料排入有界佇列，
+    背景執行緒在累積到 batch_size 或超過 flush_interval 時批次寫入。
+    資料庫無法連線時整批寫入落地暫存檔，恢復後依序重送；
+    批次因資料錯誤失敗時逐筆重寫，只有出錯的記錄移到無法寫入檔（dead letter）；
+    佇列已滿時呼叫端最多等待 block_timeout 秒（背壓），逾時則交給背景執行緒落地暫存
+    （資料列準備與等待截圖編碼都在背景執行緒，不佔用呼叫端）。
+    交易已提交後的錯誤只記錄，不落地暫存也不重送，避免重複寫入。
+    """
+
+    def __init__(self, handler, config: Dict, logger: logging.Logger = None):
+        """
+        初始化寫入器
+
+        Args:
+            handler: DatabaseHandler
+            config: write_behind 配置
+            logger: 日誌記錄器
+        """
+        self.handler = handler
+        self.logger = logger
+        self.queue_size = config.get('queue_size', 1000)
+        self.batch_size = config.get('batch_size', 100)
+        self.flush_interval = config.get('flush_interval', 1.0)
+        self.block_timeout = config.get('block_timeout', 0.5)
+        self.retry_interval = config.get('retry_interval', 5.0)
+        self.journal = SpillJournal(config.get('journal_path', 'data/db_spill.jsonl'))
+        # 資料錯誤而無法寫入的記錄（只附加，不重送，供人工檢查）
+        self.dead_letter = SpillJournal(config.get('dead_letter_path', 'data/db_dead_letter.jsonl'))
+
+        self._queue: deque = deque()
+        self._overflow: deque = deque()  # 背壓逾時、等待背景執行緒落地暫存的項目
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.healthy = True
+        self._last_retry = 0.0
+
+        # 統計
+        self.submitted = 0
+        self.written = 0          # 已寫入的記錄數（偵測列 + 入侵事件）
+        self.flushes = 0
+        self.failed = 0           # 資料錯誤而未寫入資料庫的記錄數
+        self.dead_lettered = 0    # 其中已移到無法寫入檔的記錄數
+        self.post_commit_errors = 0  # 已寫入但後續處理失敗的批次數（不重送）
+        self.overflowed = 0       # 背壓逾時轉為落地暫存的項目數
+        self.frames_dropped = 0   # 溢出項目過多時捨棄影像幀的項目數（記錄仍會暫存，但沒有截圖）
+        self.spilled = 0          # 落地暫存的記錄數
+        self.spilled_bytes = 0
+        self.replayed = 0
+        self.max_depth = 0
+        self.last_flush_latency = 0.0
+        self.max_flush_latency = 0.0
+        self._total_flush_latency = 0.0
+
+    def start(self):
+        """啟動背景寫入執行緒"""
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name='WriteBehindWriter', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """
+        停止背景寫入（先寫完佇列，無法寫入的部分落地暫存）
+
+        Args:
+            timeout: 等待執行緒結束的最長時間(秒)
+        """
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit_detections(self, frames: List[Tuple]):
+        """
+        排入偵測結果
+
+        Args:
+            frames: [(攝影機 ID, 辨識結果列表, 原始影像幀的編碼快取或 None), ...]
+        """
+        self._submit(('detections', frames))
+
+    def submit_intrusion(self, intrusion_data: Dict):
+        """
+        排入圍籬入侵事件
+
+        Args:
+            intrusion_data: 入侵事件資料
+        """
+        self._submit(('intrusion', intrusion_data))
+
+    def _submit(self, item: Tuple):
+        """放入佇列；佇列已滿且等待逾時時交給背景執行緒落地暫存"""
+        with self._cond:
+            self.submitted += 1
+            deadline = time.monotonic() + self.block_timeout
+            while len(self._queue) >= self.queue_size and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            if len(self._queue) < self.queue_size:
+                self._queue.append(item)
+                self.max_depth = max(self.max_depth, len(self._queue))
+                if len(self._queue) >= self.batch_size:
+                    self._cond.notify_all()
+                return
+
+            # 背壓逾時：不丟資料，由背景執行緒準備資料列並落地暫存。
+            # 溢出項目也達到 queue_size 時不再保留影像幀，記憶體用量維持有界
+            kind, data = item
+            if kind == 'detections' and len(self._overflow) >= self.queue_size:
+                item = (kind, [(camera_id, results, None) for camera_id, results, _ in data])
+                self.frames_dropped += 1
+            self._overflow.append(item)
+            self.overflowed += 1
+            self._cond.notify_all()
+
+    def _to_records(self, items: List[Tuple]) -> List[Dict]:
+        """將佇列項目轉為可寫入、可序列化的記錄"""
+        records = []
+        for kind, data in items:
+            if kind == 'detections':
+                records.extend({'type': 'detection', **row}
+                               for row in self.handler.prepare_detection_rows(data))
+            else:
+                records.append({'type': 'intrusion', 'data': data})
+        return records
+
+    def _run(self):
+        """背景寫入迴圈"""
+        while True:
+            with self._cond:
+                if self._running and len(self._queue) < self.batch_size and not self._overflow:
+                    self._cond.wait(self.flush_interval)
+                overflow = list(self._overflow)
+                self._overflow.clear()
+                count = min(self.batch_size, len(self._queue))
+                items = [self._queue.popleft() for _ in range(count)]
+                running = self._running
+                self._cond.notify_all()  # 喚醒等待空位的呼叫端
+
+            # 背壓逾時的項目先落地暫存（與佇列中尚未寫入的項目一起在資料庫可寫入時依序重送）
+            if overflow:
+                self._spill(self._to_records(overflow))
+
+            # 停止前最後一次嘗試重送（不受 retry_interval 限制）
+            self._replay_if_due(force=not running and not items)
+            if items:
+                self.flush(self._to_records(items))
+
+            if not running and not items:
+                return
+
+    def flush(self, records: List[Dict]):
+        """
+        寫入一批記錄；資料庫無法連線或仍有待重送資料時落地暫存
+
+        Args:
+            records: 記錄列表
+        """
+        if not self.healthy or self.journal.pending():
+            # 保持順序：暫存檔尚未重送完之前，新資料接在後面
+            self._spill(records)
+            return
+
+        remaining = self._write(records)
+        if remaining:
+            self._spill(remaining)
+
+    def _write(self, records: List[Dict]) -> List[Dict]:
+        """
+        寫入記錄
+
+        Returns:
+            List[Dict]: 因連線錯誤未寫入的記錄
+        """
+        start = time.perf_counter()
+        detections = [r for r in records if r['type'] == 'detection']
+        intrusions = [r for r in records if r['type'] == 'intrusion']
+
+        try:
+            if detections:
+                self.handler.write_detection_rows(detections)
+                self.written += len(detections)
+        except PostCommitError as e:
+            # 資料已提交：計入已寫入，不落地暫存（重送會重複寫入）
+            self.written += len(detections)
+            self.post_commit_errors += 1
+            if self.logger:
+                self.logger.error(f"背景寫入 {len(detections)} 筆偵測記錄已提交，{e}")
+        except TRANSIENT_ERRORS as e:
+            self._mark_unhealthy(e)
+            return records
+        except Exception as e:
+            remaining = self._write_rows_individually(detections, e)
+            if remaining:
+                return remaining + intrusions
+
+        for i, record in enumerate(intrusions):
+            try:
+                self.handler.write_fence_intrusion(record['data'])
+                self.written += 1
+            except TRANSIENT_ERRORS as e:
+                self._mark_unhealthy(e)
+                return intrusions[i:]
+            except Exception as e:
+                self._dead_letter([record], e)
+
+        latency = time.perf_counter() - start
+        self.flushes += 1
+        self.last_flush_latency = latency
+        self.max_flush_latency = max(self.max_flush_latency, latency)
+        self._total_flush_latency += latency
+        return []
+
+    def _write_rows_individually(self, detections: List[Dict], error: Exception) -> List[Dict]:
+        """
+        批次因資料錯誤失敗（整個交易已 rollback）時逐筆重寫，
+        只有本身有問題的記錄移到無法寫入檔
+
+        Args:
+            detections: 本批偵測記錄
+            error: 批次寫入的錯誤
+
+        Returns:
+            List[Dict]: 因連線錯誤未寫入的記錄
+        """
+        if len(detections) == 1:
+            self._dead_letter(detections, error)
+            return []
+
+        if self.logger:
+            self.logger.warning(f"批次寫入 {len(detections)} 筆偵測記錄失敗，改為逐筆寫入: {error}")
+        for i, row in enumerate(detections):
+            try:
+                self.handler.write_detection_rows([row])
+                self.written += 1
+            except PostCommitError as e:
+                self.written += 1
+                self.post_commit_errors += 1
+                if self.logger:
+                    self.logger.error(f"背景寫入偵測記錄已提交，{e}")
+            except TRANSIENT_ERRORS as e:
+                self._mark_unhealthy(e)
+                return detections[i:]
+            except Exception as e:
+                self._dead_letter([row], e)
+        return []
+
+    def _dead_letter(self, records: List[Dict], error: Exception):
+        """將資料錯誤而無法寫入的記錄附加到無法寫入檔（附上錯誤訊息）"""
+        self.failed += len(records)
+        self._resolve_snapshot_jobs(records)
+        try:
+            self.dead_letter.append([{**record, 'error': str(error)} for record in records])
+            self.dead_lettered += len(records)
+            if self.logger:
+                self.logger.error(
+                    f"{len(records)} 筆記錄無法寫入，已移到 {self.dead_letter.path}: {error}"
+                )
+        except OSError as e:
+            if self.logger:
+                self.logger.error(f"{len(records)} 筆記錄無法寫入且無法保存，捨棄: {error} / {e}")
+
+    def _mark_unhealthy(self, error: Exception):
+        """標記資料庫無法連線，之後的資料改為落地暫存"""
+        if self.healthy and self.logger:
+            self.logger.warning(f"資料庫無法寫入，改為落地暫存: {error}")
+        self.healthy = False
+        self._last_retry = time.monotonic()
+
+    def _spill(self, records: List[Dict]):
+        """寫入落地暫存檔"""
+        if not records:
+            return
+        
+        self._resolve_snapshot_jobs(records)
+        try:
+            size = self.journal.append(records)
+            with self._cond:
+                self.spilled_bytes += size
+                self.spilled += len(records)
+        except OSError as e:
+            self.failed += len(records)
+            if self.logger:
+                self.logger.error(f"落地暫存失敗，捨棄 {len(records)} 筆記錄: {e}")
+
+    @staticmethod
+    def _resolve_snapshot_jobs(records: List[Dict]):
+        """背景編碼中的截圖先等待完成，改存編碼結果（之後寫入時再連結）"""
+        for record in records:
+            job = record.pop('snapshot_job', None)
+            if job is not None:
+                try:
+                    record['snapshot_tiers'] = job.result()
+                except Exception:
+                    record['snapshot_tiers'] = None
+
+    def _replay_if_due(self, force: bool = False):
+        """
+        重送落地暫存的記錄
+
+        Args:
+            force: 忽略 retry_interval（停止前最後一次嘗試）
+        """
+        if not self.journal.pending():
+            return
+        if not self.healthy and not force and \
+                time.monotonic() - self._last_retry < self.retry_interval:
+            return
+        self._last_retry = time.monotonic()
+
+        lines = self.journal.take()
+        for start in range(0, len(lines), self.batch_size):
+            chunk = lines[start:start + self.batch_size]
+            remaining = self._write([json.loads(line) for line in chunk])
+            if remaining:
+                # 連線錯誤：本批未送出的記錄與之後的記錄放回暫存檔
+                self.replayed += len(chunk) - len(remaining)
+                self.journal.rollback(
+                    [json.dumps(record, ensure_ascii=False, default=str) for record in remaining]
+                    + lines[start + len(chunk):]
+                )
+                return
+            self.replayed += len(chunk)
+
+        self.journal.commit()
+        if not self.healthy and self.logger:
+            self.logger.info(f"✓ 資料庫恢復，已重送 {len(lines)} 筆暫存記錄")
+        self.healthy = True
+
+    def get_stats(self) -> Dict:
+        """取得寫入統計"""
+        return {
+            'healthy': self.healthy,
+            'depth': len(self._queue),
+            'max_depth': self.max_depth,
+            'queue_size': self.queue_size,
+            'submitted': self.submitted,
+            'written': self.written,
+            'flushes': self.flushes,
+            'failed': self.failed,
+            'dead_lettered': self.dead_lettered,
+            'post_commit_errors': self.post_commit_errors,
+            'overflow': len(self._overflow),
+            'overflowed': self.overflowed,
+            'frames_dropped': self.frames_dropped,
+            'spilled': self.spilled,
+            'spilled_bytes': self.spilled_bytes,
+            'replayed': self.replayed,
+            'journal_pending': self.journal.pending(),
+            'last_flush_ms': round(self.last_flush_latency * 1000, 2),
+            'avg_flush_ms': round(self._total_flush_latency / self.flushes * 1000, 2) if self.flushes else 0.0,
+            'max_flush_ms': round(self.max_flush_latency * 1000, 2)
+        }
@@ -159,7 +159,7 @@ def main():
         info_y += 25
         active_objects = sum(1 for f in fence_manager.fences.values() 
                            for obj in f.tracked_objects.values() 
-                           if obj['in_zone'])
+                           if obj.in_zone)
         cv2.putText(frame, f"Active Objects: {active_objects}", (10, info_y),
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
         
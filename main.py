@@ -11,8 +11,9 @@ sys.path.insert(0, str(Path(__file__).parent))
 from utils.config_manager import ConfigManager
 from utils.logger import setup_logger
 from core.system import MultiModalRecognitionSystem
+from core.result_bus import ResultBus
 from modules.license_plate import LicensePlateRecognizer
-from database.handler import DatabaseHandler
+from database import create_storage
 
 
 def main():
@@ -39,7 +40,7 @@ def main():
     db_config = config.get('database', {})
     if db_config.get('enabled', True):
         try:
-            db_handler = DatabaseHandler(db_config, logger)
+            db_handler = create_storage(db_config, logger)
             logger.info("✓ 資料庫連接成功")
         except Exception as e:
             logger.error(f"資料庫連接失敗: {e}")
@@ -56,7 +57,9 @@ def main():
     plate_config = config.get_module_config('license_plate')
     if plate_config.get('enabled', True):
         try:
-            plate_recognizer = LicensePlateRecognizer(plate_config, logger)
+            plate_recognizer = LicensePlateRecognizer(
+                plate_config, logger, config.get_performance_config()
+            )
             system.register_recognizer(plate_recognizer)
         except Exception as e:
             logger.error(f"車牌辨識模組載入失敗: {e}")
@@ -73,12 +76,23 @@ def main():
     
     logger.info(f"找到 {len(cameras)} 個啟用的攝影機")
     
-    # 定義回調函數
-    def on_detection(camera_id: str, results):
-        """偵測結果回調"""
-        # 儲存到資料庫
-        if db_handler:
-            db_handler.save_detection(camera_id, results)
+    # 結果匯流排：辨識執行緒只發布結果，資料庫寫入在獨立執行緒進行
+    result_bus = ResultBus(config.get('result_bus', {}), logger)
+    
+    def on_detection(messages):
+        """偵測結果寫入資料庫（佇列中累積的多幀合併為一次批次寫入）"""
+        db_handler.save_detections_batch([
+            (m.payload['camera_id'], m.payload['results'], m.payload['artifacts'])
+            for m in messages
+        ])
+    
+    if db_handler:
+        # 資料庫寫入不可捨棄結果：佇列滿時阻塞發布端，而不是沿用匯流排預設的 drop_oldest
+        result_bus.subscribe('database', on_detection, topics=['detections'],
+                             queue_size=500, policy='block', block_timeout=5.0, batch_size=50)
+    
+    result_bus.start()
+    system.attach_result_bus(result_bus)
     
     # 為每個攝影機建立執行緒
     threads = []
@@ -90,6 +104,7 @@ def main():
         logger.info("\n接收到中斷信號,正在停止...")
         stop_event.set()
         system.stop()
+        result_bus.stop()  # 先寫完佇列中的結果再關閉資料庫
         if db_handler:
             db_handler.close()
         sys.exit(0)
@@ -107,7 +122,7 @@ def main():
         # 建立執行緒 (不使用 daemon，這樣可以正確處理中斷)
         thread = threading.Thread(
             target=system.process_rtsp,
-            args=(rtsp_url, camera_id, interval, on_detection),
+            args=(rtsp_url, camera_id, interval),
             daemon=False
         )
         thread.start()
@@ -129,6 +144,7 @@ def main():
     except KeyboardInterrupt:
         logger.info("\n使用者中斷")
         system.stop()
+        result_bus.stop()
         if db_handler:
             db_handler.close()
         # 等待執行緒結束
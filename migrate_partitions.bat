@@ -0,0 +1,38 @@
+@echo off
+REM 執行資料庫遷移 - 偵測與入侵記錄轉換為時間分割表
+echo ========================================
+echo 資料庫遷移: 時間分割表
+echo ========================================
+echo.
+
+REM 檢查虛擬環境
+if exist venv\Scripts\activate.bat (
+    echo [+] 啟動虛擬環境...
+    call venv\Scripts\activate.bat
+) else (
+    echo [!] 警告: 未找到虛擬環境
+)
+
+echo.
+echo [+] 執行遷移腳本...
+echo.
+python database\migrate_partitions.py %*
+
+if %ERRORLEVEL% EQU 0 (
+    echo.
+    echo ========================================
+    echo 遷移成功完成！
+    echo ========================================
+    echo.
+    echo 請在 config.yaml 啟用 database.partitioning
+    echo 再重新啟動 web_server.py
+) else (
+    echo.
+    echo ========================================
+    echo 遷移失敗！
+    echo ========================================
+    echo 請檢查錯誤訊息
+)
+
+echo.
+pause
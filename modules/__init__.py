@@ -1,5 +1,6 @@
 """辨識模組"""
 
 from .license_plate import LicensePlateRecognizer
+from .plate_preprocess import PlatePreprocessor
 
-__all__ = ['LicensePlateRecognizer']
+__all__ = ['LicensePlateRecognizer', 'PlatePreprocessor']
@@ -2,25 +2,30 @@
 
 import cv2
 import numpy as np
-import re
 from typing import Optional, Dict, List, Tuple
 import logging
+import threading
 
 from core.recognizer_base import DetailRecognizer
+from utils.perceptual_cache import PerceptualHashCache
+from .plate_preprocess import PlatePreprocessor, normalize_plate_text, classify_plate
 
 
 class LicensePlateRecognizer(DetailRecognizer):
     """車牌辨識模組 - 支援台灣車牌格式"""
     
-    def __init__(self, config: Dict = None, logger: logging.Logger = None):
+    def __init__(self, config: Dict = None, logger: logging.Logger = None,
+                 performance_config: Dict = None):
         """
         初始化車牌辨識模組
         
         Args:
             config: 模組配置
             logger: 日誌記錄器
+            performance_config: 效能配置 (performance 區段,用於 OCR 結果快取)
         """
         super().__init__(config, logger)
+        config = self.config
         self.ocr_reader = None
         
         # 從配置讀取參數
@@ -32,6 +37,19 @@ class LicensePlateRecognizer(DetailRecognizer):
         # 車輛區域最小尺寸要求（可配置）
         self.min_vehicle_width = config.get('min_vehicle_width', 150)
         self.min_vehicle_height = config.get('min_vehicle_height', 100)
+        
+        # 預處理引擎（重複使用 CLAHE 與輸出緩衝區）
+        self.preprocessor = PlatePreprocessor()
+        
+        # OCR 結果快取（以搜尋區域的感知雜湊為鍵，每個攝影機各自一個，
+        # 不同攝影機的相似車輛不會互相沿用車牌）
+        perf_config = performance_config or {}
+        self.cache_enabled = perf_config.get('enable_caching', False)
+        self.cache_size = perf_config.get('cache_size', 100)
+        self.cache_hash_size = perf_config.get('cache_hash_size', 16)
+        self.cache_tolerance = perf_config.get('cache_hash_tolerance', 0)
+        self.ocr_caches: Dict[Optional[str], PerceptualHashCache] = {}
+        self._cache_lock = threading.Lock()
     
     @property
     def name(self) -> str:
@@ -72,23 +90,8 @@ class LicensePlateRecognizer(DetailRecognizer):
             np.ndarray: 預處理後的影像
         """
         try:
-            # 轉灰階
-            if len(image.shape) == 3:
-                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = image
-            
-            # CLAHE 增強對比
-            clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-            enhanced = clahe.apply(gray)
-            
-            # Otsu 二值化
-            _, binary = cv2.threshold(
-                enhanced, 0, 255, 
-                cv2.THRESH_BINARY + cv2.THRESH_OTSU
-            )
-            
-            return binary
+            # 灰階 -> CLAHE 增強對比 -> Otsu 二值化
+            return self.preprocessor.process(image)
         except Exception as e:
             if self.logger:
                 self.logger.error(f"預處理失敗: {e}")
@@ -111,24 +114,16 @@ class LicensePlateRecognizer(DetailRecognizer):
             Tuple[bool, str]: (是否有效, 格式化後的車牌)
         """
         # 清理文字
-        text = text.replace(' ', '').replace('-', '').upper()
-        text = re.sub(r'[^A-Z0-9]', '', text)
+        text = normalize_plate_text(text)
         
         if len(text) < 5:
             return False, text
         
         # 台灣車牌格式
-        patterns = [
-            (r'^[A-Z]{2,3}\d{4}$', 'car'),       # ABC-1234
-            (r'^[A-Z]{2}\d{4}$', 'car'),         # AB-1234
-            (r'^\d{4}[A-Z]{2}$', 'commercial'),  # 1234-AB
-            (r'^[A-Z]{3}\d{3}$', 'motorcycle'),  # ABC-123
-        ]
-        
-        for pattern, plate_type in patterns:
-            if re.match(pattern, text):
-                formatted = self.format_plate(text, plate_type)
-                return True, formatted
+        plate_type = classify_plate(text)
+        if plate_type:
+            formatted = self.format_plate(text, plate_type)
+            return True, formatted
         
         return False, text
     
@@ -208,6 +203,67 @@ class LicensePlateRecognizer(DetailRecognizer):
         
         return None
     
+    def _cache_for(self, camera_id: Optional[str]) -> Optional[PerceptualHashCache]:
+        """取得攝影機的 OCR 快取（未啟用快取時回傳 None）"""
+        if not self.cache_enabled:
+            return None
+        with self._cache_lock:
+            cache = self.ocr_caches.get(camera_id)
+            if cache is None:
+                cache = self.ocr_caches[camera_id] = PerceptualHashCache(
+                    max_size=self.cache_size,
+                    tolerance=self.cache_tolerance,
+                    hash_size=self.cache_hash_size
+                )
+            return cache
+    
+    def _search_zone_cached(self, zone: np.ndarray, camera_id: str = None) -> Optional[Dict]:
+        """
+        在單一區域搜尋車牌 (經由該攝影機的感知雜湊快取)
+        
+        近似的區域影像（固定攝影機下的靜止車輛）直接回傳快取結果,
+        不重新執行 OCR。「無結果」不快取,下一幀仍會重新辨識。
+        
+        Args:
+            zone: 搜尋區域影像
+            camera_id: 攝影機 ID
+        
+        Returns:
+            Dict: 辨識結果,或 None
+        """
+        cache = self._cache_for(camera_id)
+        if cache is None or zone.size == 0:
+            return self._search_single_zone(zone)
+        
+        key = cache.make_key(zone)
+        hit, cached = cache.get(key)
+        if hit:
+            if self.logger:
+                self.logger.debug("OCR 快取命中")
+            return dict(cached)
+        
+        result = self._search_single_zone(zone)
+        if result:
+            cache.put(key, dict(result))
+        return result
+    
+    def get_stats(self) -> Dict:
+        """取得模組統計資訊（OCR 快取為所有攝影機的合計）"""
+        if not self.cache_enabled:
+            return {}
+        with self._cache_lock:
+            caches = list(self.ocr_caches.values())
+        hits = sum(cache.hits for cache in caches)
+        misses = sum(cache.misses for cache in caches)
+        return {'ocr_cache': {
+            'cameras': len(caches),
+            'size': sum(len(cache) for cache in caches),
+            'max_size': self.cache_size,
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else 0.0
+        }}
+    
     def recognize(self, image: np.ndarray, detection: Dict) -> Optional[Dict]:
         """
         辨識車牌 - 多區域搜尋策略
@@ -266,7 +322,7 @@ class LicensePlateRecognizer(DetailRecognizer):
             if self.logger:
                 self.logger.debug(f"搜尋區域: {zone_name} ({zone.shape[1]}x{zone.shape[0]})")
             
-            result = self._search_single_zone(zone)
+            result = self._search_zone_cached(zone, detection.get('camera_id'))
             
             if result and result['confidence'] > best_confidence:
                 best_result = result
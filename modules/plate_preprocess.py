@@ -0,0 +1,157 @@
+"""車牌預處理引擎 - 重複使用 CLAHE 與輸出緩衝區"""
+
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+# 台灣車牌格式 (合併為單一 alternation,以具名群組區分類型)
+#   ABC-1234 / AB-1234 (一般自用車) -> car
+#   1234-AB (營業車)                -> commercial
+#   ABC-123 (機車)                  -> motorcycle
+PLATE_PATTERN = re.compile(
+    r'^(?:(?P<car>[A-Z]{2,3}\d{4})'
+    r'|(?P<commercial>\d{4}[A-Z]{2})'
+    r'|(?P<motorcycle>[A-Z]{3}\d{3}))$'
+)
+
+_NON_PLATE_CHARS = re.compile(r'[^A-Z0-9]')
+
+
+def normalize_plate_text(text: str) -> str:
+    """
+    清理 OCR 文字 (移除空白、連字號與非英數字元,轉大寫)
+
+    Args:
+        text: OCR 辨識的文字
+
+    Returns:
+        str: 清理後的文字
+    """
+    return _NON_PLATE_CHARS.sub('', text.upper())
+
+
+def classify_plate(text: str) -> Optional[str]:
+    """
+    判斷已清理文字的車牌類型
+
+    Args:
+        text: normalize_plate_text() 清理後的文字
+
+    Returns:
+        str: 'car' / 'commercial' / 'motorcycle',不符合任何格式時回傳 None
+    """
+    match = PLATE_PATTERN.match(text)
+    return match.lastgroup if match else None
+
+
+class PlatePreprocessor:
+    """
+    車牌預處理引擎
+
+    - CLAHE 物件每個執行緒建立一次 (cv2.CLAHE 不保證執行緒安全)
+    - 灰階/增強/二值化輸出寫入依尺寸分級的預配置緩衝區,避免每次配置新陣列
+
+    注意: process() 回傳的是緩衝區的視圖,同一執行緒下一次呼叫會覆寫內容,
+    使用者需在下一次呼叫前用完 (例如直接交給 OCR)。
+    需要同時保留多張結果時使用 process_batch()。
+    """
+
+    def __init__(self, clip_limit: float = 2.0,
+                 tile_grid_size: Tuple[int, int] = (8, 8),
+                 bucket_size: int = 64,
+                 max_buffers: int = 32):
+        """
+        初始化預處理引擎
+
+        Args:
+            clip_limit: CLAHE 對比限制
+            tile_grid_size: CLAHE 區塊格數
+            bucket_size: 緩衝區尺寸級距 (像素),影像尺寸向上取整到此倍數
+            max_buffers: 每個執行緒最多保留的緩衝區組數
+        """
+        self.clip_limit = clip_limit
+        self.tile_grid_size = tile_grid_size
+        self.bucket_size = bucket_size
+        self.max_buffers = max_buffers
+        self._local = threading.local()
+
+    def _state(self):
+        """取得目前執行緒的 CLAHE 與緩衝區"""
+        state = self._local
+        if not hasattr(state, 'clahe'):
+            state.clahe = cv2.createCLAHE(
+                clipLimit=self.clip_limit, tileGridSize=self.tile_grid_size
+            )
+            state.buffers = OrderedDict()
+        return state
+
+    def _bucket(self, value: int) -> int:
+        """尺寸向上取整到級距"""
+        return -(-value // self.bucket_size) * self.bucket_size
+
+    def _get_buffers(self, state, height: int, width: int, slot: int = 0):
+        """
+        取得符合尺寸的緩衝區視圖
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: (灰階, 增強, 二值化)
+        """
+        key = (self._bucket(height), self._bucket(width), slot)
+        buffers = state.buffers.get(key)
+        if buffers is None:
+            buffers = tuple(np.empty(key[:2], dtype=np.uint8) for _ in range(3))
+            state.buffers[key] = buffers
+            while len(state.buffers) > self.max_buffers:
+                state.buffers.popitem(last=False)
+        else:
+            state.buffers.move_to_end(key)
+
+        return tuple(buf[:height, :width] for buf in buffers)
+
+    def process(self, image: np.ndarray, slot: int = 0) -> np.ndarray:
+        """
+        灰階 -> CLAHE 增強對比 -> Otsu 二值化
+
+        Args:
+            image: 輸入影像 (BGR 或灰階)
+            slot: 緩衝區槽位 (同時保留多張結果時使用不同槽位)
+
+        Returns:
+            np.ndarray: 二值化影像 (緩衝區視圖)
+        """
+        state = self._state()
+        height, width = image.shape[:2]
+        gray_buf, enhanced_buf, binary_buf = self._get_buffers(state, height, width, slot)
+
+        if image.ndim == 3:
+            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=gray_buf)
+        else:
+            gray = image
+
+        enhanced = state.clahe.apply(gray, dst=enhanced_buf)
+        _, binary = cv2.threshold(
+            enhanced, 0, 255,
+            cv2.THRESH_BINARY + cv2.THRESH_OTSU,
+            dst=binary_buf
+        )
+        return binary
+
+    def process_batch(self, images: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        一次處理多張影像 (每張使用獨立槽位,回傳結果互不覆寫)
+
+        超過 max_buffers 張時較早的緩衝區會移出快取,但回傳的視圖仍持有原陣列,
+        內容不受影響。同一執行緒下一次呼叫 process_batch() 會覆寫這批結果。
+
+        Args:
+            images: 輸入影像列表
+
+        Returns:
+            List[np.ndarray]: 與 images 順序相同的二值化影像列表 (緩衝區視圖)
+        """
+        return [self.process(image, slot=i) for i, image in enumerate(images)]
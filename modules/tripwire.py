@@ -0,0 +1,468 @@
+"""絆線模組 - 偵測物件跨越虛擬線段的方向並計數"""
+
+import time
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .virtual_fence import normalize_points
+
+
+def segment_crossings(prev_points: np.ndarray, curr_points: np.ndarray,
+                      line_starts: np.ndarray, line_ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    一次計算所有移動軌跡 x 所有線段的跨越判定
+
+    移動軌跡 P->Q 跨越線段 A->B 的條件:
+        1. P、Q 位於直線 AB 的不同側（cross(AB, AP) > 0 與 cross(AB, AQ) > 0 不同）
+        2. A、B 位於直線 PQ 的兩側或線上（線段範圍內相交）
+    落在線上的點視為負側，因此點停在線上再離開時只會計數一次。
+
+    Args:
+        prev_points: (K, 2) 上一個位置
+        curr_points: (K, 2) 目前位置
+        line_starts: (L, 2) 線段起點 A
+        line_ends: (L, 2) 線段終點 B
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (crossed (K, L), forward (K, L))
+            forward 表示由 cross(AB, AP) > 0 的一側出發，
+            即畫面座標（y 向下）中沿 A->B 方向的右手邊
+    """
+    p = prev_points[:, None, :]
+    q = curr_points[:, None, :]
+    a = line_starts[None, :, :]
+    ab = (line_ends - line_starts)[None, :, :]
+
+    side_p = ab[..., 0] * (p[..., 1] - a[..., 1]) - ab[..., 1] * (p[..., 0] - a[..., 0])
+    side_q = ab[..., 0] * (q[..., 1] - a[..., 1]) - ab[..., 1] * (q[..., 0] - a[..., 0])
+
+    pq = q - p
+    b = a + ab
+    side_a = pq[..., 0] * (a[..., 1] - p[..., 1]) - pq[..., 1] * (a[..., 0] - p[..., 0])
+    side_b = pq[..., 0] * (b[..., 1] - p[..., 1]) - pq[..., 1] * (b[..., 0] - p[..., 0])
+
+    forward = side_p > 0
+    crossed = (forward != (side_q > 0)) & (side_a * side_b <= 0)
+    return crossed, forward
+
+
+class Tripwire:
+    """絆線（有方向的線段）"""
+
+    def __init__(self, tripwire_id: str, name: str, start: Tuple[float, float],
+                 end: Tuple[float, float], lane: str = None,
+                 target_classes: List[str] = None, min_confidence: float = 0.5,
+                 direction_names: Tuple[str, str] = ('in', 'out'),
+                 camera_ids: List[str] = None, normalized: bool = False):
+        """
+        初始化絆線
+
+        Args:
+            tripwire_id: 絆線 ID
+            name: 絆線名稱
+            start: 線段起點
+            end: 線段終點
+            lane: 車道名稱（計數依車道彙總），None 表示使用絆線 ID
+            target_classes: 要計數的物件類型，None 表示所有類型
+            min_confidence: 最小信心度閾值
+            direction_names: (由起點->終點方向的右手邊跨到左手邊, 反方向) 的方向名稱
+            camera_ids: 套用此絆線的攝影機 ID，None 表示所有攝影機
+            normalized: 座標是否為 [0, 1] 正規化座標
+        """
+        self.tripwire_id = tripwire_id
+        self.name = name
+        self.lane = lane or tripwire_id
+        self.target_classes = target_classes or []
+        self.min_confidence = min_confidence
+        self.direction_names = tuple(direction_names)
+        self.camera_ids = list(camera_ids) if camera_ids else []
+        self.color = (255, 128, 0)
+        self.thickness = 2
+
+        line = np.array([start, end], dtype=np.float64).reshape(2, 2)
+        self.normalized_points = line if normalized else None
+        self.points = line.copy()
+        self.frame_size: Optional[Tuple[int, int]] = None
+
+    def applies_to(self, camera_id: Optional[str]) -> bool:
+        """此絆線是否套用於指定攝影機"""
+        return not self.camera_ids or camera_id is None or camera_id in self.camera_ids
+
+    def compile(self, frame_size: Tuple[int, int]) -> bool:
+        """
+        將正規化座標轉換為指定解析度的像素座標
+
+        Args:
+            frame_size: 影像解析度 (width, height)
+
+        Returns:
+            bool: 像素座標是否有變更
+        """
+        if self.normalized_points is None or frame_size == self.frame_size:
+            return False
+        self.points = np.rint(self.normalized_points * [frame_size[0], frame_size[1]])
+        self.frame_size = frame_size
+        return True
+
+
+class TripwireManager:
+    """
+    絆線管理器
+
+    每個追蹤 ID 的最後位置（偵測框底部中心）保存在陣列中，
+    每幀以一次 numpy 運算判定所有軌跡 x 所有絆線的跨越與方向。
+    """
+
+    def __init__(self, logger=None, camera_id: str = None, track_timeout: float = 5.0,
+                 initial_capacity: int = 256):
+        """
+        初始化管理器
+
+        Args:
+            logger: 日誌記錄器
+            camera_id: 所屬攝影機 ID（只載入套用於此攝影機的絆線），None 表示全部
+            track_timeout: 追蹤 ID 消失超過此秒數後清除最後位置
+            initial_capacity: 追蹤位置陣列的初始容量
+        """
+        self.logger = logger
+        self.camera_id = camera_id
+        self.track_timeout = track_timeout
+        self.frame_size: Optional[Tuple[int, int]] = None
+        self.crossing_callbacks = []
+
+        self.tripwires: List[Tripwire] = []
+        self.counts = np.zeros((0, 2), dtype=np.int64)  # (絆線, 方向) 計數
+        self._lock = threading.Lock()
+        self._rebuild_lines()
+
+        # 追蹤位置表: track_id -> 列索引
+        self._rows: Dict[Any, int] = {}
+        self._free_rows: List[int] = []
+        self._positions = np.zeros((initial_capacity, 2), dtype=np.float64)
+        self._last_seen = np.full(initial_capacity, -np.inf)
+        self._row_tracks = np.empty(initial_capacity, dtype=object)
+        self._next_row = 0
+
+        self.frames = 0
+        self.total_crossings = 0
+
+    def _rebuild_lines(self):
+        """重建絆線陣列與計數表（絆線或解析度變更時）"""
+        lines = np.array([t.points for t in self.tripwires], dtype=np.float64).reshape(-1, 2, 2)
+        self._starts = lines[:, 0, :]
+        self._ends = lines[:, 1, :]
+        self._min_confidence = np.array(
+            [t.min_confidence for t in self.tripwires], dtype=np.float64
+        )
+        if len(self.counts) != len(self.tripwires):
+            counts = np.zeros((len(self.tripwires), 2), dtype=np.int64)
+            counts[:len(self.counts)] = self.counts[:len(counts)]
+            self.counts = counts
+
+    def add_tripwire(self, tripwire: Tripwire):
+        """
+        新增絆線
+
+        Args:
+            tripwire: Tripwire 實例
+        """
+        with self._lock:
+            if self.frame_size is not None:
+                tripwire.compile(self.frame_size)
+            self.tripwires.append(tripwire)
+            self._rebuild_lines()
+        if self.logger:
+            self.logger.info(f"已新增絆線: {tripwire.name} (ID: {tripwire.tripwire_id})")
+
+    def set_frame_size(self, frame_size: Tuple[int, int]):
+        """
+        依影像解析度編譯正規化絆線（解析度未變更時不做任何事）
+
+        Args:
+            frame_size: 影像解析度 (width, height)
+        """
+        if frame_size == self.frame_size:
+            return
+        with self._lock:
+            self.frame_size = frame_size
+            if any([t.compile(frame_size) for t in self.tripwires]):
+                self._rebuild_lines()
+
+    def register_crossing_callback(self, callback):
+        """
+        註冊跨越事件回調函數
+
+        Args:
+            callback: 回調函數 callback(crossing_event)
+        """
+        self.crossing_callbacks.append(callback)
+
+    def _allocate_row(self, track_id) -> int:
+        """配置追蹤位置列，容量不足時加倍（需持有鎖）"""
+        if self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = self._next_row
+            self._next_row += 1
+            if row >= len(self._positions):
+                capacity = len(self._positions) * 2
+                self._positions = np.resize(self._positions, (capacity, 2))
+                last_seen = np.full(capacity, -np.inf)
+                last_seen[:row] = self._last_seen
+                self._last_seen = last_seen
+                row_tracks = np.empty(capacity, dtype=object)
+                row_tracks[:row] = self._row_tracks
+                self._row_tracks = row_tracks
+        self._rows[track_id] = row
+        self._row_tracks[row] = track_id
+        return row
+
+    def _expire_tracks(self, now: float):
+        """清除超過 track_timeout 未出現的追蹤位置（需持有鎖）"""
+        used = self._last_seen[:self._next_row]
+        stale = np.flatnonzero((used < now - self.track_timeout) & np.isfinite(used))
+        for row in stale:
+            del self._rows[self._row_tracks[row]]
+            self._row_tracks[row] = None
+            self._last_seen[row] = -np.inf
+            self._free_rows.append(int(row))
+
+    def update(self, detections: List[Dict[str, Any]], frame_shape: Tuple[int, ...] = None,
+               now: float = None) -> List[Dict[str, Any]]:
+        """
+        以本幀偵測結果更新軌跡並回傳跨越事件
+
+        Args:
+            detections: 物件偵測結果列表（需包含 'track_id'）
+            frame_shape: 影像形狀 (frame.shape)，用於編譯正規化絆線
+            now: 目前時間（預設 time.time()）
+
+        Returns:
+            List[Dict]: 跨越事件列表
+        """
+        now = time.time() if now is None else now
+        if frame_shape is not None:
+            self.set_frame_size((frame_shape[1], frame_shape[0]))
+        self.frames += 1
+
+        tracked = [d for d in detections if d.get('track_id') is not None]
+        events = []
+        with self._lock:
+            if tracked:
+                events = self._update_tracks(tracked, now)
+            self._expire_tracks(now)
+
+        for event in events:
+            for callback in self.crossing_callbacks:
+                try:
+                    callback(event)
+                except Exception as e:
+                    if self.logger:
+                        self.logger.error(f"絆線回調函數執行錯誤: {e}")
+
+        return events
+
+    def _update_tracks(self, tracked: List[Dict[str, Any]], now: float) -> List[Dict[str, Any]]:
+        """更新追蹤位置並判定跨越（需持有鎖）"""
+        boxes = np.array([d['bbox'] for d in tracked], dtype=np.float64).reshape(-1, 4)
+        points = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, boxes[:, 3]], axis=1)
+
+        rows = np.empty(len(tracked), dtype=np.int64)
+        known = np.zeros(len(tracked), dtype=bool)
+        for i, detection in enumerate(tracked):
+            row = self._rows.get(detection['track_id'])
+            if row is None:
+                row = self._allocate_row(detection['track_id'])
+            else:
+                known[i] = True
+            rows[i] = row
+
+        events = []
+        moving = np.flatnonzero(known)
+        if len(moving) and self.tripwires:
+            crossed, forward = segment_crossings(
+                self._positions[rows[moving]], points[moving], self._starts, self._ends
+            )
+            hits = np.argwhere(crossed)
+            if len(hits):
+                events = self._build_events(tracked, moving, hits, forward)
+
+        self._positions[rows] = points
+        self._last_seen[rows] = now
+        return events
+
+    def _build_events(self, tracked: List[Dict[str, Any]], moving: np.ndarray,
+                      hits: np.ndarray, forward: np.ndarray) -> List[Dict[str, Any]]:
+        """依類型與信心度篩選跨越組合並產生事件（需持有鎖）"""
+        ks, ls = hits[:, 0], hits[:, 1]
+        det_index = moving[ks]
+        confidences = np.array([tracked[i]['confidence'] for i in det_index], dtype=np.float64)
+        eligible = confidences >= self._min_confidence[ls]
+
+        timestamp = datetime.now(timezone.utc).astimezone().isoformat()
+        events = []
+        for k, l, i, ok in zip(ks, ls, det_index, eligible):
+            tripwire = self.tripwires[l]
+            detection = tracked[i]
+            if not ok or (tripwire.target_classes and
+                          detection['class'] not in tripwire.target_classes):
+                continue
+
+            direction = 0 if forward[k, l] else 1
+            self.counts[l, direction] += 1
+            self.total_crossings += 1
+            events.append({
+                'tripwire_id': tripwire.tripwire_id,
+                'tripwire_name': tripwire.name,
+                'lane': tripwire.lane,
+                'direction': tripwire.direction_names[direction],
+                'object_class': detection['class'],
+                'confidence': detection['confidence'],
+                'bbox': detection['bbox'],
+                'track_id': detection['track_id'],
+                'timestamp': timestamp,
+                'event_type': 'line_crossing'
+            })
+        return events
+
+    def get_counts(self) -> Dict[str, Dict[str, Any]]:
+        """
+        取得各絆線的方向計數
+
+        Returns:
+            Dict: {絆線 ID: {'name', 'lane', 方向名稱: 次數, ...}}
+        """
+        with self._lock:
+            return {
+                t.tripwire_id: {
+                    'name': t.name,
+                    'lane': t.lane,
+                    t.direction_names[0]: int(self.counts[l, 0]),
+                    t.direction_names[1]: int(self.counts[l, 1])
+                }
+                for l, t in enumerate(self.tripwires)
+            }
+
+    def get_lane_counts(self) -> Dict[str, Dict[str, int]]:
+        """
+        取得依車道彙總的方向計數
+
+        Returns:
+            Dict: {車道: {方向名稱: 次數}}
+        """
+        lanes: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            for l, t in enumerate(self.tripwires):
+                lane = lanes.setdefault(t.lane, {})
+                for direction in (0, 1):
+                    name = t.direction_names[direction]
+                    lane[name] = lane.get(name, 0) + int(self.counts[l, direction])
+        return lanes
+
+    def reset_counts(self):
+        """將所有計數歸零"""
+        with self._lock:
+            self.counts[:] = 0
+
+    def get_stats(self) -> Dict:
+        """取得絆線統計"""
+        return {
+            'tripwires': len(self.tripwires),
+            'tracked': len(self._rows),
+            'frames': self.frames,
+            'crossings': self.total_crossings,
+            'lanes': self.get_lane_counts()
+        }
+
+    def draw_all(self, frame: np.ndarray):
+        """
+        在影像上繪製所有絆線與計數
+
+        Args:
+            frame: 影像幀
+        """
+        self.set_frame_size((frame.shape[1], frame.shape[0]))
+        for l, tripwire in enumerate(self.tripwires):
+            (x1, y1), (x2, y2) = tripwire.points.astype(int)
+            cv2.arrowedLine(frame, (x1, y1), (x2, y2), tripwire.color,
+                            tripwire.thickness, tipLength=0.03)
+
+            label = (f"{tripwire.name} {tripwire.direction_names[0]}:{self.counts[l, 0]} "
+                     f"{tripwire.direction_names[1]}:{self.counts[l, 1]}")
+            cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
+            (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+            cv2.rectangle(frame, (cx - w // 2 - 4, cy - h - 8), (cx + w // 2 + 4, cy - 2),
+                          tripwire.color, -1)
+            cv2.putText(frame, label, (cx - w // 2, cy - 6),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+    def load_from_config(self, config: Dict[str, Any]):
+        """
+        從配置載入絆線（只載入套用於此管理器攝影機的絆線）
+
+        座標格式與電子圍籬相同: 介於 [0, 1] 或 normalized: true 時為正規化座標，
+        提供 reference_size 時像素座標依該解析度轉為正規化座標。
+
+        Args:
+            config: 絆線配置字典
+
+        Example config:
+        {
+            "reference_size": [1920, 1080],
+            "lines": [
+                {
+                    "id": "gate_in",
+                    "name": "入口",
+                    "points": [[0.2, 0.6], [0.5, 0.6]],
+                    "lane": "入口車道",
+                    "directions": ["in", "out"],
+                    "target_classes": ["car", "truck"],
+                    "camera_ids": ["cam_001"]
+                }
+            ]
+        }
+        """
+        default_reference = config.get('reference_size')
+        loaded = 0
+
+        for line_cfg in config.get('lines', []):
+            if not line_cfg.get('enabled', True):
+                continue
+
+            camera_ids = line_cfg.get('camera_ids') or line_cfg.get('camera_id')
+            if isinstance(camera_ids, str):
+                camera_ids = [camera_ids]
+
+            points = [tuple(p) for p in line_cfg['points']]
+            reference_size = line_cfg.get('reference_size', default_reference)
+            normalized = line_cfg.get('normalized')
+            if normalized is None:
+                normalized = all(0.0 <= v <= 1.0 for p in points for v in p)
+            if not normalized and reference_size:
+                points = normalize_points(points, reference_size)
+                normalized = True
+
+            tripwire = Tripwire(
+                tripwire_id=line_cfg['id'],
+                name=line_cfg.get('name', line_cfg['id']),
+                start=points[0],
+                end=points[1],
+                lane=line_cfg.get('lane'),
+                target_classes=line_cfg.get('target_classes'),
+                min_confidence=line_cfg.get('min_confidence', 0.5),
+                direction_names=line_cfg.get('directions', ('in', 'out')),
+                camera_ids=camera_ids,
+                normalized=normalized
+            )
+            if not tripwire.applies_to(self.camera_id):
+                continue
+            self.add_tripwire(tripwire)
+            loaded += 1
+
+        if self.logger:
+            scope = f" (攝影機 {self.camera_id})" if self.camera_id else ""
+            self.logger.info(f"已載入 {loaded} 條絆線{scope}")
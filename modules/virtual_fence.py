@@ -1,18 +1,55 @@
 """電子圍籬模組 - 偵測物件是否進入特定區域"""
 
 import cv2
+import heapq
+import itertools
+import sys
+import threading
 import numpy as np
 from datetime import datetime, timezone
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 import time
 
 
+class TrackedObjectState:
+    """圍籬內追蹤物件的狀態記錄"""
+    
+    __slots__ = ('in_zone', 'first_seen', 'last_seen', 'dwell_time', 'triggered',
+                 'object_class', 'last_bbox', 'expiry_seq')
+    
+    def __init__(self, object_class: str, bbox: List[int], now: float):
+        self.in_zone = True
+        self.first_seen = now
+        self.last_seen = now
+        self.dwell_time = 0.0
+        self.triggered = False
+        self.object_class = object_class
+        self.last_bbox = bbox
+        self.expiry_seq = 0  # 目前有效的到期排程序號（舊排程以此判斷失效）
+
+
+def normalize_points(points, frame_size: Tuple[int, int]) -> List[List[float]]:
+    """
+    將像素座標轉換為相對於影像尺寸的 [0, 1] 座標
+    
+    Args:
+        points: 像素座標 [(x1,y1), (x2,y2), ...]
+        frame_size: 座標所屬的影像解析度 (width, height)
+        
+    Returns:
+        List[List[float]]: 正規化座標
+    """
+    width, height = frame_size
+    return [[round(float(x) / width, 6), round(float(y) / height, 6)] for x, y in points]
+
+
 class VirtualFence:
     """電子圍籬類別"""
     
     def __init__(self, fence_id: str, name: str, points: List[Tuple[int, int]], 
                  target_classes: List[str] = None, min_confidence: float = 0.5,
-                 dwell_time_threshold: float = 0.0):
+                 dwell_time_threshold: float = 0.0, mask_downsample: int = 1,
+                 camera_ids: List[str] = None, normalized: bool = False):
         """
         初始化電子圍籬
         
@@ -23,10 +60,26 @@ class VirtualFence:
             target_classes: 要偵測的物件類型，None 表示所有類型
             min_confidence: 最小信心度閾值
             dwell_time_threshold: 停留時間閾值（秒），0 表示立即觸發
+            mask_downsample: 區域遮罩的縮小倍率（1 = 逐像素，2 = 每 2x2 像素一格）
+            camera_ids: 套用此圍籬的攝影機 ID，None 表示所有攝影機
+            normalized: points 是否為 [0, 1] 正規化座標（需呼叫 compile() 轉為像素座標）
         """
         self.fence_id = fence_id
         self.name = name
-        self.points = np.array(points, dtype=np.int32)
+        self.mask_downsample = max(1, int(mask_downsample))
+        self.camera_ids = list(camera_ids) if camera_ids else []
+        
+        # 正規化座標（None 表示 points 為固定的像素座標）
+        self.normalized_points = (
+            np.array(points, dtype=np.float64).reshape(-1, 2) if normalized else None
+        )
+        self.frame_size: Optional[Tuple[int, int]] = None  # 目前像素座標對應的解析度
+        
+        # 區域遮罩快取（依影像解析度延遲建立，頂點變更時清除）
+        # 結構: {(width, height) 或 None: (mask, x0, y0)}
+        self._masks = {}
+        # 正規化圍籬在 compile() 之前沒有像素頂點，不會判定任何物件在區域內
+        self.points = np.empty((0, 2)) if normalized else points
         self.target_classes = target_classes or []
         self.min_confidence = min_confidence
         self.dwell_time_threshold = dwell_time_threshold  # 新增：停留時間閾值
@@ -34,69 +87,200 @@ class VirtualFence:
         self.thickness = 2
         
         # 追蹤物件狀態
-        # 結構: {object_id: {
-        #   'in_zone': bool,
-        #   'first_seen': timestamp,
-        #   'last_seen': timestamp,
-        #   'dwell_time': float,
-        #   'triggered': bool
-        # }}
-        self.tracked_objects = {}
+        # 結構: {object_id: TrackedObjectState}
+        self.tracked_objects: Dict[Any, TrackedObjectState] = {}
         self.object_timeout = 2.0  # 物件消失超過 2 秒後清除記錄
         
-    def is_point_in_polygon(self, point: Tuple[int, int]) -> bool:
+        # 到期排程 (最小堆積): [(到期時間, 序號, object_id)]
+        # 物件更新時不重新排程，到期時才檢查 last_seen，未過期就延後
+        self._expiry_heap: List[Tuple[float, int, Any]] = []
+        self._expiry_counter = itertools.count(1)
+        
+    @property
+    def points(self) -> np.ndarray:
+        """多邊形頂點座標 (N, 2) int32（正規化圍籬編譯前為空陣列）"""
+        return self._points
+    
+    @property
+    def is_compiled(self) -> bool:
+        """是否已有像素頂點（固定像素座標，或正規化座標已呼叫 compile()）"""
+        return len(self._points) > 0
+    
+    @points.setter
+    def points(self, points):
+        self._points = np.array(points, dtype=np.int32).reshape(-1, 2)
+        self._masks = {}
+        self.version = getattr(self, 'version', 0) + 1  # 供圖層快取判斷是否需要重建
+    
+    def applies_to(self, camera_id: Optional[str]) -> bool:
+        """
+        此圍籬是否套用於指定攝影機
+        
+        Args:
+            camera_id: 攝影機 ID，None 表示不限定
+        """
+        return not self.camera_ids or camera_id is None or camera_id in self.camera_ids
+    
+    def compile(self, frame_size: Tuple[int, int]) -> bool:
+        """
+        將正規化座標轉換為指定解析度的像素座標
+        
+        Args:
+            frame_size: 影像解析度 (width, height)
+            
+        Returns:
+            bool: 像素座標是否有變更（固定像素座標的圍籬永遠回傳 False）
+        """
+        if self.normalized_points is None or frame_size == self.frame_size:
+            return False
+        
+        width, height = frame_size
+        self.points = np.rint(self.normalized_points * [width, height])
+        self.frame_size = frame_size
+        return True
+    
+    def _get_mask(self, frame_size: Optional[Tuple[int, int]] = None) -> Tuple[np.ndarray, int, int]:
+        """
+        取得區域遮罩（第一次遇到此解析度時建立）
+        
+        遮罩只涵蓋多邊形的外接矩形（與影像範圍的交集），
+        以 mask_downsample 倍率縮小。
+        
+        Args:
+            frame_size: 影像解析度 (width, height)，None 表示不裁切
+            
+        Returns:
+            Tuple[np.ndarray, int, int]: (布林遮罩, 左上角 x, 左上角 y)
+        """
+        cached = self._masks.get(frame_size)
+        if cached is not None:
+            return cached
+        if not self.is_compiled:
+            return np.zeros((0, 0), dtype=bool), 0, 0
+        
+        scale = self.mask_downsample
+        x0, y0 = self._points.min(axis=0)
+        x1, y1 = self._points.max(axis=0)
+        if frame_size is not None:
+            # 偵測框座標可能等於影像寬高，因此包含邊界值
+            x0, y0 = max(int(x0), 0), max(int(y0), 0)
+            x1, y1 = min(int(x1), frame_size[0]), min(int(y1), frame_size[1])
+        x0, y0, x1, y1 = int(x0), int(y0), int(x1), int(y1)
+        
+        if x1 < x0 or y1 < y0:
+            mask = np.zeros((0, 0), dtype=bool)
+        else:
+            height = (y1 - y0) // scale + 1
+            width = (x1 - x0) // scale + 1
+            canvas = np.zeros((height, width), dtype=np.uint8)
+            shifted = ((self._points - [x0, y0]) // scale).astype(np.int32)
+            cv2.fillPoly(canvas, [shifted], 1)
+            cv2.polylines(canvas, [shifted], True, 1, 1)  # 邊界上的點視為在區域內
+            mask = canvas.astype(bool)
+        
+        cached = (mask, x0, y0)
+        if len(self._masks) >= 4:
+            self._masks.pop(next(iter(self._masks)))
+        self._masks[frame_size] = cached
+        return cached
+    
+    def contains_points(self, points: np.ndarray,
+                        frame_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """
+        批次判斷點是否在多邊形內（遮罩查表）
+        
+        Args:
+            points: (N, 2) 點座標陣列
+            frame_size: 影像解析度 (width, height)
+            
+        Returns:
+            np.ndarray: (N,) 布林陣列
+        """
+        points = np.asarray(points).reshape(-1, 2)
+        mask, x0, y0 = self._get_mask(frame_size)
+        
+        if mask.size == 0 or len(points) == 0:
+            return np.zeros(len(points), dtype=bool)
+        
+        scale = self.mask_downsample
+        xs = (np.floor(points[:, 0]).astype(np.int64) - x0) // scale
+        ys = (np.floor(points[:, 1]).astype(np.int64) - y0) // scale
+        valid = (xs >= 0) & (ys >= 0) & (xs < mask.shape[1]) & (ys < mask.shape[0])
+        
+        inside = np.zeros(len(points), dtype=bool)
+        inside[valid] = mask[ys[valid], xs[valid]]
+        return inside
+    
+    def is_point_in_polygon(self, point: Tuple[int, int],
+                            frame_size: Optional[Tuple[int, int]] = None) -> bool:
         """
         判斷點是否在多邊形內
         
         Args:
             point: (x, y) 座標
+            frame_size: 影像解析度 (width, height)
             
         Returns:
             bool: True 如果點在多邊形內
         """
-        result = cv2.pointPolygonTest(self.points, point, False)
-        return result >= 0
+        return bool(self.contains_points(np.array([point]), frame_size)[0])
     
-    def is_bbox_in_zone(self, bbox: List[float], threshold: float = 0.5) -> bool:
+    def bboxes_in_zone(self, bboxes: np.ndarray, threshold: float = 0.5,
+                       frame_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
         """
-        判斷邊界框是否在區域內
+        批次判斷邊界框是否在區域內
         
         Args:
-            bbox: [x1, y1, x2, y2] 邊界框座標
+            bboxes: (N, 4) [x1, y1, x2, y2] 邊界框陣列
             threshold: 重疊比例閾值（0-1）
+            frame_size: 影像解析度 (width, height)
             
         Returns:
-            bool: True 如果物件在區域內
+            np.ndarray: (N,) 布林陣列
         """
-        x1, y1, x2, y2 = map(int, bbox)
+        boxes = np.asarray(bboxes, dtype=np.float64).reshape(-1, 4).astype(np.int64)
+        x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+        cx = (x1 + x2) // 2
         
-        # 計算物件的中心點和四個角點
-        center = ((x1 + x2) // 2, (y1 + y2) // 2)
-        bottom_center = ((x1 + x2) // 2, y2)  # 底部中心點（更適合追蹤）
+        # 底部中心點（更適合追蹤）
+        inside = self.contains_points(np.stack([cx, y2], axis=1), frame_size)
         
-        # 檢查底部中心點是否在區域內
-        if self.is_point_in_polygon(bottom_center):
-            return True
-            
         # 如果需要更精確，可以檢查邊界框的多個點
-        if threshold < 0.5:
-            corners = [
-                (x1, y1), (x2, y1),  # 上方兩角
-                (x1, y2), (x2, y2),  # 下方兩角
-                center                # 中心點
-            ]
-            
-            points_inside = sum(1 for p in corners if self.is_point_in_polygon(p))
-            return (points_inside / len(corners)) >= threshold
+        if threshold < 0.5 and not inside.all():
+            cy = (y1 + y2) // 2
+            samples = np.stack([
+                np.stack([x1, y1], axis=1), np.stack([x2, y1], axis=1),  # 上方兩角
+                np.stack([x1, y2], axis=1), np.stack([x2, y2], axis=1),  # 下方兩角
+                np.stack([cx, cy], axis=1)                                # 中心點
+            ], axis=1)
+            hits = self.contains_points(samples.reshape(-1, 2), frame_size).reshape(-1, 5)
+            inside |= (hits.sum(axis=1) / 5) >= threshold
         
-        return False
+        return inside
+    
+    def is_bbox_in_zone(self, bbox: List[float], threshold: float = 0.5,
+                        frame_size: Optional[Tuple[int, int]] = None) -> bool:
+        """
+        判斷邊界框是否在區域內
+        
+        Args:
+            bbox: [x1, y1, x2, y2] 邊界框座標
+            threshold: 重疊比例閾值（0-1）
+            frame_size: 影像解析度 (width, height)
+            
+        Returns:
+            bool: True 如果物件在區域內
+        """
+        return bool(self.bboxes_in_zone(np.array([bbox]), threshold, frame_size)[0])
     
-    def check_detection(self, detection: Dict[str, Any]) -> Dict[str, Any]:
+    def check_detection(self, detection: Dict[str, Any],
+                        frame_size: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
         """
         檢查偵測結果是否違反圍籬規則（支援停留時間判定）
         
         Args:
             detection: 物件偵測結果，需包含 'track_id' 用於追蹤
+            frame_size: 影像解析度 (width, height)，用於區域遮罩
             
         Returns:
             Dict: 包含入侵資訊的字典，None 表示沒有入侵
@@ -106,6 +290,10 @@ class VirtualFence:
         bbox = detection['bbox']
         track_id = detection.get('track_id', None)  # 物件追蹤 ID
         
+        # 正規化圍籬依影像解析度編譯（解析度未變更時不做任何事）
+        if frame_size is not None:
+            self.compile(frame_size)
+        
         # 檢查是否為目標類型
         if self.target_classes and obj_class not in self.target_classes:
             return None
@@ -115,8 +303,28 @@ class VirtualFence:
             return None
         
         # 檢查是否在區域內
-        in_zone = self.is_bbox_in_zone(bbox)
-        current_time = time.time()
+        in_zone = self.is_bbox_in_zone(bbox, frame_size=frame_size)
+        
+        return self.update_state(detection, in_zone, time.time())
+    
+    def update_state(self, detection: Dict[str, Any], in_zone: bool,
+                     current_time: float, timestamp: str = None) -> Optional[Dict[str, Any]]:
+        """
+        依區域判定結果更新物件狀態（停留時間邏輯，已通過類型與信心度篩選）
+        
+        Args:
+            detection: 物件偵測結果
+            in_zone: 物件是否在區域內
+            current_time: 目前時間 (time.time())
+            timestamp: 事件時間字串 (ISO 格式)，None 表示需要時才產生
+            
+        Returns:
+            Dict: 入侵事件，None 表示沒有入侵
+        """
+        obj_class = detection['class']
+        confidence = detection['confidence']
+        bbox = detection['bbox']
+        track_id = detection.get('track_id', None)  # 物件追蹤 ID
         
         # 如果沒有 track_id，使用舊的立即觸發邏輯
         if track_id is None:
@@ -127,45 +335,39 @@ class VirtualFence:
                     'object_class': obj_class,
                     'confidence': confidence,
                     'bbox': bbox,
-                    'timestamp': datetime.now(timezone.utc).astimezone().isoformat(),
+                    'timestamp': timestamp or datetime.now(timezone.utc).astimezone().isoformat(),
                     'event_type': 'intrusion',
                     'dwell_time': 0.0
                 }
             return None
         
         # 使用 track_id 進行時間追蹤
+        obj_state = self.tracked_objects.get(track_id)
         if in_zone:
-            if track_id not in self.tracked_objects:
+            if obj_state is None:
                 # 新物件進入區域
-                self.tracked_objects[track_id] = {
-                    'in_zone': True,
-                    'first_seen': current_time,
-                    'last_seen': current_time,
-                    'dwell_time': 0.0,
-                    'triggered': False,
-                    'object_class': obj_class,
-                    'last_bbox': bbox
-                }
+                obj_state = TrackedObjectState(obj_class, bbox, current_time)
+                self.tracked_objects[track_id] = obj_state
+                self._schedule_expiry(track_id, obj_state)
             else:
                 # 物件持續在區域內
-                obj_state = self.tracked_objects[track_id]
-                obj_state['last_seen'] = current_time
-                obj_state['last_bbox'] = bbox
+                obj_state.last_seen = current_time
+                obj_state.last_bbox = bbox
                 
-                if obj_state['in_zone']:
+                if obj_state.in_zone:
                     # 累計停留時間
-                    obj_state['dwell_time'] = current_time - obj_state['first_seen']
+                    obj_state.dwell_time = current_time - obj_state.first_seen
                 else:
                     # 物件重新進入區域，重置計時
-                    obj_state['in_zone'] = True
-                    obj_state['first_seen'] = current_time
-                    obj_state['dwell_time'] = 0.0
-                    obj_state['triggered'] = False
+                    obj_state.in_zone = True
+                    obj_state.first_seen = current_time
+                    obj_state.dwell_time = 0.0
+                    obj_state.triggered = False
                 
                 # 檢查是否達到觸發閾值
-                if (not obj_state['triggered'] and 
-                    obj_state['dwell_time'] >= self.dwell_time_threshold):
-                    obj_state['triggered'] = True
+                if (not obj_state.triggered and 
+                    obj_state.dwell_time >= self.dwell_time_threshold):
+                    obj_state.triggered = True
                     
                     return {
                         'fence_id': self.fence_id,
@@ -174,30 +376,85 @@ class VirtualFence:
                         'confidence': confidence,
                         'bbox': bbox,
                         'track_id': track_id,
-                        'timestamp': datetime.now(timezone.utc).astimezone().isoformat(),
+                        'timestamp': timestamp or datetime.now(timezone.utc).astimezone().isoformat(),
                         'event_type': 'intrusion',
-                        'dwell_time': obj_state['dwell_time'],
+                        'dwell_time': obj_state.dwell_time,
                         'dwell_time_threshold': self.dwell_time_threshold
                     }
         else:
             # 物件離開區域
-            if track_id in self.tracked_objects:
-                self.tracked_objects[track_id]['in_zone'] = False
-                self.tracked_objects[track_id]['last_seen'] = current_time
+            if obj_state is not None:
+                obj_state.in_zone = False
+                obj_state.last_seen = current_time
         
         return None
     
-    def cleanup_old_objects(self):
-        """清理長時間未出現的物件記錄"""
-        current_time = time.time()
-        to_remove = []
+    def _schedule_expiry(self, track_id, obj_state: TrackedObjectState):
+        """排入到期檢查（取代該物件先前的排程）"""
+        obj_state.expiry_seq = next(self._expiry_counter)
+        heapq.heappush(
+            self._expiry_heap,
+            (obj_state.last_seen + self.object_timeout, obj_state.expiry_seq, track_id)
+        )
+    
+    def cleanup_old_objects(self, current_time: float = None):
+        """
+        清理長時間未出現的物件記錄
         
-        for track_id, obj_state in self.tracked_objects.items():
-            if current_time - obj_state['last_seen'] > self.object_timeout:
-                to_remove.append(track_id)
+        只處理排程已到期的物件，成本與到期數量成正比，
+        沒有物件到期時為 O(1)。
+        
+        Args:
+            current_time: 目前時間（預設 time.time()）
+        """
+        current_time = time.time() if current_time is None else current_time
+        heap = self._expiry_heap
         
-        for track_id in to_remove:
-            del self.tracked_objects[track_id]
+        while heap and heap[0][0] < current_time:
+            _, seq, track_id = heapq.heappop(heap)
+            obj_state = self.tracked_objects.get(track_id)
+            if obj_state is None or obj_state.expiry_seq != seq:
+                continue  # 記錄已移除或已重新排程
+            
+            if current_time - obj_state.last_seen > self.object_timeout:
+                del self.tracked_objects[track_id]
+            else:
+                # 期間內有更新，依最新的 last_seen 延後
+                self._schedule_expiry(track_id, obj_state)
+        
+        # 記錄被外部清空時（例如 tracked_objects.clear()），丟棄殘留排程
+        if not self.tracked_objects and heap:
+            heap.clear()
+    
+    def adopt_state(self, other: 'VirtualFence'):
+        """
+        沿用另一個圍籬實例的追蹤狀態（熱重載時保留停留時間）
+        
+        共用同一份狀態物件，重載期間舊實例上的更新也會保留。
+        
+        Args:
+            other: 舊的圍籬實例
+        """
+        self.tracked_objects = other.tracked_objects
+        self._expiry_heap = other._expiry_heap
+        self._expiry_counter = other._expiry_counter
+    
+    def memory_footprint(self) -> Dict[str, int]:
+        """
+        估算追蹤狀態的記憶體用量
+        
+        Returns:
+            Dict: 物件數、排程數與估算位元組數
+        """
+        records = sum(sys.getsizeof(state) for state in self.tracked_objects.values())
+        heap = sys.getsizeof(self._expiry_heap) + sum(
+            sys.getsizeof(entry) for entry in self._expiry_heap
+        )
+        return {
+            'objects': len(self.tracked_objects),
+            'scheduled': len(self._expiry_heap),
+            'bytes': sys.getsizeof(self.tracked_objects) + records + heap
+        }
     
     def get_object_dwell_time(self, track_id) -> float:
         """
@@ -209,10 +466,9 @@ class VirtualFence:
         Returns:
             float: 停留時間（秒）
         """
-        if track_id in self.tracked_objects:
-            obj_state = self.tracked_objects[track_id]
-            if obj_state['in_zone']:
-                return obj_state['dwell_time']
+        obj_state = self.tracked_objects.get(track_id)
+        if obj_state is not None and obj_state.in_zone:
+            return obj_state.dwell_time
         return 0.0
     
     def draw_on_frame(self, frame: np.ndarray, show_label: bool = True, show_dwell_time: bool = True):
@@ -224,6 +480,9 @@ class VirtualFence:
             show_label: 是否顯示標籤
             show_dwell_time: 是否顯示物件停留時間
         """
+        if not self.is_compiled:
+            return
+        
         # 繪製多邊形
         cv2.polylines(frame, [self.points], True, self.color, self.thickness)
         
@@ -234,66 +493,298 @@ class VirtualFence:
         
         # 顯示標籤
         if show_label:
-            # 計算多邊形的中心點
-            M = cv2.moments(self.points)
-            if M["m00"] != 0:
-                cx = int(M["m10"] / M["m00"])
-                cy = int(M["m01"] / M["m00"])
-                
-                # 繪製標籤背景
-                label = self.name
-                if self.dwell_time_threshold > 0:
-                    label += f" ({self.dwell_time_threshold}s)"
-                (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-                cv2.rectangle(frame, (cx - w//2 - 5, cy - h - 5), 
-                            (cx + w//2 + 5, cy + 5), self.color, -1)
-                cv2.putText(frame, label, (cx - w//2, cy), 
-                          cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            self.draw_label(frame)
         
         # 顯示物件停留時間
-        if show_dwell_time and self.dwell_time_threshold > 0:
-            for track_id, obj_state in self.tracked_objects.items():
-                if obj_state['in_zone'] and obj_state['dwell_time'] > 0:
-                    bbox = obj_state['last_bbox']
-                    x1, y1, x2, y2 = map(int, bbox)
-                    
-                    # 計算進度條
-                    progress = min(obj_state['dwell_time'] / self.dwell_time_threshold, 1.0)
-                    
-                    # 顯示停留時間和進度
-                    time_text = f"{obj_state['dwell_time']:.1f}s"
-                    
-                    # 根據是否觸發使用不同顏色
-                    if obj_state['triggered']:
-                        color = (0, 0, 255)  # 紅色：已觸發
-                    else:
-                        color = (0, 165, 255)  # 橙色：未觸發
-                    
-                    # 繪製時間文字
-                    cv2.putText(frame, time_text, (x1, y1 - 10),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                    
-                    # 繪製進度條
-                    bar_width = x2 - x1
-                    bar_height = 5
-                    cv2.rectangle(frame, (x1, y1 - 5), (x2, y1), (255, 255, 255), -1)
-                    cv2.rectangle(frame, (x1, y1 - 5), 
-                                (x1 + int(bar_width * progress), y1), color, -1)
+        if show_dwell_time:
+            self.draw_dwell_times(frame)
+    
+    def draw_label(self, frame: np.ndarray, color: Tuple[int, int, int] = None):
+        """
+        在多邊形中心繪製圍籬名稱標籤
+        
+        Args:
+            frame: 影像幀
+            color: 標籤背景顏色（None 表示使用圍籬顏色）
+        """
+        # 計算多邊形的中心點
+        M = cv2.moments(self.points)
+        if M["m00"] != 0:
+            cx = int(M["m10"] / M["m00"])
+            cy = int(M["m01"] / M["m00"])
+            
+            # 繪製標籤背景
+            label = self.name
+            if self.dwell_time_threshold > 0:
+                label += f" ({self.dwell_time_threshold}s)"
+            (w, h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+            cv2.rectangle(frame, (cx - w//2 - 5, cy - h - 5), 
+                        (cx + w//2 + 5, cy + 5), color or self.color, -1)
+            cv2.putText(frame, label, (cx - w//2, cy), 
+                      cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+    
+    def draw_dwell_times(self, frame: np.ndarray):
+        """
+        繪製區域內物件的停留時間與進度條
+        
+        Args:
+            frame: 影像幀
+        """
+        if self.dwell_time_threshold <= 0:
+            return
+        
+        for track_id, obj_state in self.tracked_objects.items():
+            if obj_state.in_zone and obj_state.dwell_time > 0:
+                bbox = obj_state.last_bbox
+                x1, y1, x2, y2 = map(int, bbox)
+                
+                # 計算進度條
+                progress = min(obj_state.dwell_time / self.dwell_time_threshold, 1.0)
+                
+                # 顯示停留時間和進度
+                time_text = f"{obj_state.dwell_time:.1f}s"
+                
+                # 根據是否觸發使用不同顏色
+                if obj_state.triggered:
+                    color = (0, 0, 255)  # 紅色：已觸發
+                else:
+                    color = (0, 165, 255)  # 橙色：未觸發
+                
+                # 繪製時間文字
+                cv2.putText(frame, time_text, (x1, y1 - 10),
+                          cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+                
+                # 繪製進度條
+                bar_width = x2 - x1
+                cv2.rectangle(frame, (x1, y1 - 5), (x2, y1), (255, 255, 255), -1)
+                cv2.rectangle(frame, (x1, y1 - 5), 
+                            (x1 + int(bar_width * progress), y1), color, -1)
+
+
+class FenceOverlay:
+    """
+    預先合成的圍籬圖層
+    
+    將所有圍籬的半透明填色、外框與名稱標籤預先繪製成圖層與遮罩，
+    只保留有內容的區塊。每幀只需在這些區塊內混合一次，
+    不必像 draw_on_frame() 一樣每個圍籬都複製並混合整張影像。
+    """
+    
+    FILL_ALPHA = 0.2
+    
+    def __init__(self, fences: List[VirtualFence], frame_shape: Tuple[int, ...]):
+        """
+        建立圖層
+        
+        Args:
+            fences: 圍籬列表
+            frame_shape: 影像形狀 (height, width, ...)
+        """
+        fences = [fence for fence in fences if fence.is_compiled]
+        height, width = frame_shape[:2]
+        color = np.zeros((height, width, 3), dtype=np.uint8)
+        fill = np.zeros((height, width), dtype=np.uint8)
+        solid = np.zeros((height, width), dtype=np.uint8)
+        
+        # 半透明填色
+        for fence in fences:
+            cv2.fillPoly(color, [fence.points], fence.color)
+            cv2.fillPoly(fill, [fence.points], 1)
+        
+        # 不透明的外框與標籤
+        for fence in fences:
+            cv2.polylines(color, [fence.points], True, fence.color, fence.thickness)
+            cv2.polylines(solid, [fence.points], True, 1, fence.thickness)
+        for fence in fences:
+            fence.draw_label(color)
+            fence.draw_label(solid, color=(1, 1, 1))
+        
+        # 只保留有內容的區塊（重疊的外接矩形合併為互不重疊的區塊）
+        self.tiles = []
+        for x0, y0, x1, y1 in self._merge_boxes(fill | solid):
+            self.tiles.append((
+                (x0, y0, x1, y1),
+                color[y0:y1, x0:x1].copy(),
+                fill[y0:y1, x0:x1].copy(),
+                solid[y0:y1, x0:x1].copy()
+            ))
+    
+    @staticmethod
+    def _merge_boxes(mask: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """
+        取得遮罩中各連通區域的外接矩形，並合併重疊者
+        
+        Args:
+            mask: 單通道遮罩
+            
+        Returns:
+            List[Tuple]: 互不重疊的矩形 [(x0, y0, x1, y1), ...]
+        """
+        count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+        boxes = [
+            [x, y, x + w, y + h]
+            for x, y, w, h, _ in stats[1:count]
+        ]
+        
+        merged = True
+        while merged:
+            merged = False
+            result = []
+            for box in boxes:
+                for other in result:
+                    if (box[0] < other[2] and other[0] < box[2] and
+                            box[1] < other[3] and other[1] < box[3]):
+                        other[0] = min(other[0], box[0])
+                        other[1] = min(other[1], box[1])
+                        other[2] = max(other[2], box[2])
+                        other[3] = max(other[3], box[3])
+                        merged = True
+                        break
+                else:
+                    result.append(box)
+            boxes = result
+        
+        return [tuple(int(v) for v in box) for box in boxes]
+    
+    def apply(self, frame: np.ndarray):
+        """
+        將圖層混合到影像上（就地修改）
+        
+        Args:
+            frame: 影像幀
+        """
+        for (x0, y0, x1, y1), color, fill, solid in self.tiles:
+            region = frame[y0:y1, x0:x1]
+            blended = cv2.addWeighted(color, self.FILL_ALPHA, region, 1 - self.FILL_ALPHA, 0)
+            cv2.copyTo(blended, fill, region)
+            cv2.copyTo(color, solid, region)
+
+
+class FenceGridIndex:
+    """圍籬空間索引 - 以均勻網格索引圍籬外接矩形"""
+    
+    def __init__(self, cell_size: int = 128):
+        """
+        初始化索引
+        
+        Args:
+            cell_size: 網格邊長（像素）
+        """
+        self.cell_size = max(1, int(cell_size))
+        self.cells: Dict[Tuple[int, int], set] = {}     # {(cx, cy): {fence_id}}
+        self.fence_cells: Dict[str, List[Tuple[int, int]]] = {}
+        
+        # 候選裁剪統計
+        self.queries = 0
+        self.total_pairs = 0
+        self.candidate_pairs = 0
+    
+    def insert(self, fence: VirtualFence):
+        """
+        加入（或重新加入）圍籬
+        
+        Args:
+            fence: VirtualFence 實例
+        """
+        self.remove(fence.fence_id)
+        if not fence.is_compiled:
+            return  # 尚未編譯的正規化圍籬，編譯後由管理器重新加入
+        
+        x0, y0 = fence.points.min(axis=0) // self.cell_size
+        x1, y1 = fence.points.max(axis=0) // self.cell_size
+        cells = [(cx, cy) for cx in range(int(x0), int(x1) + 1)
+                 for cy in range(int(y0), int(y1) + 1)]
+        
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(fence.fence_id)
+        self.fence_cells[fence.fence_id] = cells
+    
+    def remove(self, fence_id: str):
+        """
+        移除圍籬
+        
+        Args:
+            fence_id: 圍籬 ID
+        """
+        for cell in self.fence_cells.pop(fence_id, []):
+            members = self.cells.get(cell)
+            if members is not None:
+                members.discard(fence_id)
+                if not members:
+                    del self.cells[cell]
+    
+    def query_points(self, points: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        查詢每個點可能落入的圍籬
+        
+        Args:
+            points: (N, 2) 點座標陣列
+            
+        Returns:
+            Dict[str, np.ndarray]: {fence_id: 候選點索引陣列}
+        """
+        points = np.asarray(points).reshape(-1, 2)
+        candidates: Dict[str, List[np.ndarray]] = {}
+        
+        if len(points) and self.cells:
+            cell_coords = np.floor(points / self.cell_size).astype(np.int64)
+            unique_cells, inverse = np.unique(cell_coords, axis=0, return_inverse=True)
+            inverse = inverse.reshape(-1)
+            order = np.argsort(inverse, kind='stable')
+            bounds = np.searchsorted(inverse[order], np.arange(len(unique_cells) + 1))
+            
+            for k, (cx, cy) in enumerate(unique_cells):
+                members = self.cells.get((int(cx), int(cy)))
+                if not members:
+                    continue
+                rows = order[bounds[k]:bounds[k + 1]]
+                for fence_id in members:
+                    candidates.setdefault(fence_id, []).append(rows)
+        
+        result = {
+            fence_id: np.sort(np.concatenate(rows)) for fence_id, rows in candidates.items()
+        }
+        
+        self.queries += 1
+        self.total_pairs += len(points) * len(self.fence_cells)
+        self.candidate_pairs += sum(len(rows) for rows in result.values())
+        return result
+    
+    def get_stats(self) -> Dict:
+        """取得候選裁剪統計"""
+        pruned = 1.0 - self.candidate_pairs / self.total_pairs if self.total_pairs else 0.0
+        return {
+            'fences': len(self.fence_cells),
+            'cells': len(self.cells),
+            'queries': self.queries,
+            'total_pairs': self.total_pairs,
+            'candidate_pairs': self.candidate_pairs,
+            'pruned_ratio': round(pruned, 3)
+        }
 
 
 class VirtualFenceManager:
     """電子圍籬管理器"""
     
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, grid_cell_size: int = 128, camera_id: str = None):
         """
         初始化管理器
         
         Args:
             logger: 日誌記錄器
+            grid_cell_size: 圍籬空間索引的網格邊長（像素）
+            camera_id: 所屬攝影機 ID（只載入套用於此攝影機的圍籬），None 表示全部
         """
         self.fences = {}  # {fence_id: VirtualFence}
         self.logger = logger
+        self.camera_id = camera_id
+        self.frame_size: Optional[Tuple[int, int]] = None  # 正規化圍籬目前編譯的解析度
         self.intrusion_callbacks = []  # 入侵事件回調函數列表
+        self.index = FenceGridIndex(grid_cell_size)
+        self._overlays = {}  # 預先合成的圍籬圖層 {(解析度, 圍籬版本): FenceOverlay}
+        
+        # 保護 fences / index / _overlays 的整組替換（熱重載時以新快照整組替換）
+        self._lock = threading.RLock()
         
     def add_fence(self, fence: VirtualFence):
         """
@@ -302,17 +793,51 @@ class VirtualFenceManager:
         Args:
             fence: VirtualFence 實例
         """
-        self.fences[fence.fence_id] = fence
+        with self._lock:
+            if self.frame_size is not None:
+                fence.compile(self.frame_size)
+            self.fences[fence.fence_id] = fence
+            self.index.insert(fence)
+            self._overlays.clear()
         if self.logger:
             self.logger.info(f"已新增電子圍籬: {fence.name} (ID: {fence.fence_id})")
     
     def remove_fence(self, fence_id: str):
         """移除圍籬"""
-        if fence_id in self.fences:
-            fence_name = self.fences[fence_id].name
-            del self.fences[fence_id]
-            if self.logger:
-                self.logger.info(f"已移除電子圍籬: {fence_name}")
+        with self._lock:
+            fence = self.fences.pop(fence_id, None)
+            if fence is None:
+                return
+            self.index.remove(fence_id)
+            self._overlays.clear()
+        if self.logger:
+            self.logger.info(f"已移除電子圍籬: {fence.name}")
+    
+    def set_frame_size(self, frame_size: Tuple[int, int]):
+        """
+        依影像解析度編譯正規化圍籬（解析度未變更時不做任何事）
+        
+        Args:
+            frame_size: 影像解析度 (width, height)
+        """
+        if frame_size == self.frame_size:
+            return
+        
+        with self._lock:
+            self.frame_size = frame_size
+            changed = [fence for fence in self.fences.values() if fence.compile(frame_size)]
+            for fence in changed:
+                self.index.insert(fence)
+            if changed:
+                self._overlays.clear()
+        if changed and self.logger:
+            self.logger.info(
+                f"已依解析度 {frame_size[0]}x{frame_size[1]} 編譯 {len(changed)} 個電子圍籬"
+            )
+    
+    def get_index_stats(self) -> Dict:
+        """取得空間索引的候選裁剪統計"""
+        return self.index.get_stats()
     
     def register_intrusion_callback(self, callback):
         """
@@ -323,21 +848,61 @@ class VirtualFenceManager:
         """
         self.intrusion_callbacks.append(callback)
     
-    def check_detections(self, detections: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def contains_detection(self, detection: Dict[str, Any]) -> bool:
+        """
+        判斷偵測結果是否位於任一圍籬內（不更新停留時間狀態）
+        
+        Args:
+            detection: 物件偵測結果
+            
+        Returns:
+            bool: True 如果位於任一圍籬內
+        """
+        with self._lock:
+            fences, index = self.fences, self.index
+        
+        x1, y1, x2, y2 = map(int, detection['bbox'])
+        candidates = index.query_points(np.array([[(x1 + x2) // 2, y2]]))
+        return any(
+            fences[fence_id].is_bbox_in_zone(detection['bbox'])
+            for fence_id in candidates if fence_id in fences
+        )
+    
+    def check_detections(self, detections: List[Dict[str, Any]],
+                         frame_shape: Tuple[int, ...] = None) -> List[Dict[str, Any]]:
         """
         檢查所有偵測結果是否違反圍籬規則
         
+        先以 numpy 一次算出「偵測 x 圍籬」的判定矩陣（類型、信心度、區域），
+        只對狀態可能改變的 (物件, 圍籬) 組合執行停留時間邏輯:
+        區域內的組合，以及已有追蹤記錄但離開區域的組合。
+        
         Args:
             detections: 物件偵測結果列表
+            frame_shape: 影像形狀 (frame.shape)，用於依解析度建立區域遮罩
             
         Returns:
-            List[Dict]: 入侵事件列表
+            List[Dict]: 入侵事件列表（依偵測、圍籬順序）
         """
         intrusions = []
+        frame_size = (frame_shape[1], frame_shape[0]) if frame_shape else None
         
-        for detection in detections:
-            for fence in self.fences.values():
-                intrusion = fence.check_detection(detection)
+        # 取得目前的圍籬快照（熱重載只會整組替換，不會修改快照內容）
+        with self._lock:
+            if frame_size is not None:
+                self.set_frame_size(frame_size)
+            fences, index = list(self.fences.values()), self.index
+        
+        if detections and fences:
+            in_zone, active = self._evaluate_matrix(detections, fences, frame_size, index)
+            
+            current_time = time.time()
+            timestamp = datetime.now(timezone.utc).astimezone().isoformat()
+            
+            for i, j in np.argwhere(active):
+                intrusion = fences[j].update_state(
+                    detections[i], bool(in_zone[i, j]), current_time, timestamp
+                )
                 if intrusion:
                     intrusions.append(intrusion)
                     
@@ -349,36 +914,141 @@ class VirtualFenceManager:
                             if self.logger:
                                 self.logger.error(f"入侵回調函數執行錯誤: {e}")
         
-        # 清理所有圍籬中的過期物件記錄
-        for fence in self.fences.values():
-            fence.cleanup_old_objects()
+        # 清理所有圍籬中的過期物件記錄（只處理已到期的排程）
+        current_time = time.time()
+        for fence in fences:
+            fence.cleanup_old_objects(current_time)
         
         return intrusions
     
+    def _evaluate_matrix(self, detections: List[Dict[str, Any]], fences: List[VirtualFence],
+                         frame_size: Optional[Tuple[int, int]],
+                         index: 'FenceGridIndex' = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        計算偵測 x 圍籬的判定矩陣
+        
+        Args:
+            detections: 物件偵測結果列表 (N)
+            fences: 圍籬列表 (M)
+            frame_size: 影像解析度 (width, height)
+            index: 與 fences 同一快照的空間索引（預設 self.index）
+            
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (in_zone (N, M), active (N, M))
+                active 表示需要執行停留時間邏輯的組合
+        """
+        n, m = len(detections), len(fences)
+        
+        # 類別編碼為整數以便向量化比對
+        class_codes = {}
+        classes = np.array(
+            [class_codes.setdefault(d['class'], len(class_codes)) for d in detections],
+            dtype=np.int32
+        )
+        confidences = np.array([d['confidence'] for d in detections], dtype=np.float64)
+        bboxes = np.array([d['bbox'] for d in detections], dtype=np.float64).reshape(-1, 4)
+        
+        # 追蹤 ID -> 偵測索引
+        track_rows = {}
+        for i, detection in enumerate(detections):
+            track_id = detection.get('track_id')
+            if track_id is not None:
+                track_rows.setdefault(track_id, []).append(i)
+        
+        # 以底部中心點查詢空間索引，只檢查候選圍籬
+        boxes = bboxes.astype(np.int64)
+        bottom_centers = np.stack([(boxes[:, 0] + boxes[:, 2]) // 2, boxes[:, 3]], axis=1)
+        candidates = (index or self.index).query_points(bottom_centers)
+        
+        in_zone = np.zeros((n, m), dtype=bool)
+        active = np.zeros((n, m), dtype=bool)
+        
+        for j, fence in enumerate(fences):
+            rows = candidates.get(fence.fence_id)
+            if rows is None and not fence.tracked_objects:
+                continue  # 沒有候選物件也沒有追蹤中的物件
+            
+            # 類別查表（只對候選與追蹤中的物件計算資格）
+            if fence.target_classes:
+                allowed = np.zeros(len(class_codes), dtype=bool)
+                allowed[[class_codes[c] for c in fence.target_classes if c in class_codes]] = True
+            else:
+                allowed = np.ones(len(class_codes), dtype=bool)
+            
+            def is_eligible(index):
+                return (confidences[index] >= fence.min_confidence) & allowed[classes[index]]
+            
+            if rows is not None:
+                rows = rows[is_eligible(rows)]
+                if len(rows):
+                    in_zone[rows, j] = fence.bboxes_in_zone(bboxes[rows], frame_size=frame_size)
+                    active[rows, j] = in_zone[rows, j]
+            
+            # 已有追蹤記錄的物件即使離開區域也需更新狀態
+            for track_id in fence.tracked_objects.keys() & track_rows.keys():
+                for i in track_rows[track_id]:
+                    if is_eligible(i):
+                        active[i, j] = True
+        
+        return in_zone, active
+    
     def draw_all_fences(self, frame: np.ndarray):
         """
-        在影像上繪製所有圍籬
+        在影像上繪製所有圍籬（使用快取的合成圖層，每幀只混合一次）
         
         Args:
             frame: 影像幀
         """
-        for fence in self.fences.values():
-            fence.draw_on_frame(frame)
+        with self._lock:
+            self.set_frame_size((frame.shape[1], frame.shape[0]))
+            fences, overlays = list(self.fences.values()), self._overlays
+        if not fences:
+            return
+        
+        # 圖層只在圍籬或解析度變更時重建
+        key = self._overlay_key(frame.shape, fences)
+        overlay = overlays.get(key)
+        if overlay is None:
+            overlay = FenceOverlay(fences, frame.shape)
+            if len(overlays) >= 4:
+                overlays.pop(next(iter(overlays)), None)
+            overlays[key] = overlay
+        
+        overlay.apply(frame)
+        
+        # 停留時間每幀變動，繪製在圖層之上
+        for fence in fences:
+            fence.draw_dwell_times(frame)
+    
+    @staticmethod
+    def _overlay_key(frame_shape: Tuple[int, ...], fences: List[VirtualFence]) -> Tuple:
+        """圖層快取鍵（解析度與各圍籬的繪製屬性）"""
+        return (tuple(frame_shape[:2]), tuple(
+            (id(f), f.version, f.name, f.color, f.thickness, f.dwell_time_threshold)
+            for f in fences
+        ))
     
     def load_fences_from_config(self, config: Dict[str, Any]):
         """
-        從配置載入圍籬
+        從配置載入圍籬（只載入套用於此管理器攝影機的圍籬）
+        
+        座標格式:
+            - 所有座標介於 [0, 1] 或 normalized: true 時視為正規化座標
+            - 提供 reference_size 時，像素座標依該解析度轉為正規化座標
+            - 其餘視為固定的像素座標（相容舊配置）
         
         Args:
             config: 圍籬配置字典
             
         Example config:
         {
+            "reference_size": [1920, 1080],
             "fences": [
                 {
                     "id": "fence_001",
                     "name": "禁止進入區域",
-                    "points": [[100, 100], [500, 100], [500, 400], [100, 400]],
+                    "points": [[0.1, 0.1], [0.5, 0.1], [0.5, 0.4], [0.1, 0.4]],
+                    "camera_ids": ["cam_001"],
                     "target_classes": ["person"],
                     "min_confidence": 0.6,
                     "dwell_time_threshold": 3.0
@@ -386,21 +1056,119 @@ class VirtualFenceManager:
             ]
         }
         """
-        fences_config = config.get('fences', [])
+        fences = self._build_fences(config)
+        for fence in fences:
+            self.add_fence(fence)
+        
+        if self.logger:
+            scope = f" (攝影機 {self.camera_id})" if self.camera_id else ""
+            self.logger.info(f"已載入 {len(fences)} 個電子圍籬{scope}")
+    
+    def _build_fences(self, config: Dict[str, Any]) -> List[VirtualFence]:
+        """
+        依配置建立套用於此攝影機的圍籬（不加入管理器）
         
-        for fence_cfg in fences_config:
+        Args:
+            config: 圍籬配置字典（格式見 load_fences_from_config）
+            
+        Returns:
+            List[VirtualFence]: 圍籬列表
+        """
+        fences = []
+        default_reference = config.get('reference_size')
+        
+        for fence_cfg in config.get('fences', []):
+            if not fence_cfg.get('enabled', True):
+                continue
+            
+            camera_ids = fence_cfg.get('camera_ids') or fence_cfg.get('camera_id')
+            if isinstance(camera_ids, str):
+                camera_ids = [camera_ids]
+            
+            points = [tuple(p) for p in fence_cfg['points']]
+            reference_size = fence_cfg.get('reference_size', default_reference)
+            normalized = fence_cfg.get('normalized')
+            if normalized is None:
+                normalized = all(0.0 <= v <= 1.0 for p in points for v in p)
+            if not normalized and reference_size:
+                points = normalize_points(points, reference_size)
+                normalized = True
+            
             fence = VirtualFence(
                 fence_id=fence_cfg['id'],
                 name=fence_cfg['name'],
-                points=[tuple(p) for p in fence_cfg['points']],
+                points=points,
                 target_classes=fence_cfg.get('target_classes'),
                 min_confidence=fence_cfg.get('min_confidence', 0.5),
-                dwell_time_threshold=fence_cfg.get('dwell_time_threshold', 0.0)
+                dwell_time_threshold=fence_cfg.get('dwell_time_threshold', 0.0),
+                mask_downsample=fence_cfg.get('mask_downsample', 1),
+                camera_ids=camera_ids,
+                normalized=normalized
             )
-            self.add_fence(fence)
+            if fence.applies_to(self.camera_id):
+                fences.append(fence)
+        
+        return fences
+    
+    def reload_fences(self, config: Dict[str, Any]) -> Dict[str, int]:
+        """
+        熱重載圍籬配置（不中斷偵測）
+        
+        新的圍籬、遮罩、空間索引與繪製圖層都在呼叫端執行緒建立，
+        完成後在鎖內整組替換；仍存在的圍籬 ID 沿用原本的停留時間狀態。
         
+        Args:
+            config: 圍籬配置字典（格式見 load_fences_from_config）
+            
+        Returns:
+            Dict[str, int]: {'added': 新增數, 'updated': 沿用狀態數, 'removed': 移除數}
+        """
+        frame_size = self.frame_size
+        new_fences = self._build_fences(config)
+        
+        # 在熱路徑之外預先建立遮罩、索引與圖層
+        fences = {}
+        index = FenceGridIndex(self.index.cell_size)
+        for fence in new_fences:
+            if frame_size is not None:
+                fence.compile(frame_size)
+                fence._get_mask(frame_size)
+            fence._get_mask(None)
+            fences[fence.fence_id] = fence
+            index.insert(fence)
+        
+        overlays = {}
+        if frame_size is not None and new_fences:
+            shape = (frame_size[1], frame_size[0])
+            overlays[self._overlay_key(shape, new_fences)] = FenceOverlay(new_fences, shape)
+        
+        with self._lock:
+            old_fences = self.fences
+            for fence_id, fence in fences.items():
+                if fence_id in old_fences:
+                    fence.adopt_state(old_fences[fence_id])
+            
+            # 建立期間解析度已變更時，依新解析度重新編譯
+            if self.frame_size != frame_size and self.frame_size is not None:
+                for fence in fences.values():
+                    if fence.compile(self.frame_size):
+                        index.insert(fence)
+                overlays = {}
+            
+            self.fences, self.index, self._overlays = fences, index, overlays
+        
+        stats = {
+            'added': len(fences.keys() - old_fences.keys()),
+            'updated': len(fences.keys() & old_fences.keys()),
+            'removed': len(old_fences.keys() - fences.keys())
+        }
         if self.logger:
-            self.logger.info(f"已載入 {len(fences_config)} 個電子圍籬")
+            scope = f" (攝影機 {self.camera_id})" if self.camera_id else ""
+            self.logger.info(
+                f"已重新載入電子圍籬{scope}: 新增 {stats['added']}、"
+                f"更新 {stats['updated']}、移除 {stats['removed']}"
+            )
+        return stats
 
 
 def create_fence_from_roi(frame: np.ndarray, window_name: str = "選擇圍籬區域") -> List[Tuple[int, int]]:
@@ -0,0 +1,186 @@
+"""
+連線池測試
+確認連線用完時阻塞等待、逾時拋出 PoolError、失效連線重建、剛建立的連線不驗證、
+歸還的連線保持開啟重複使用（不因超過 minconn 而關閉），以及統計
+"""
+
+import threading
+import time
+
+import psycopg2
+import pytest
+from psycopg2 import extensions, pool
+
+import database.pool as pool_module
+from database.pool import BlockingConnectionPool
+
+
+class FakeConnection:
+    """只提供連線池會用到的屬性的連線替身"""
+
+    def __init__(self):
+        self.closed = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+        self.validations = 0
+        self.server_gone = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeCursor:
+    """SELECT 1 在伺服器端斷線時失敗"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query):
+        self.conn.validations += 1
+        if self.conn.server_gone:
+            raise psycopg2.OperationalError("server closed the connection unexpectedly")
+
+
+def fake_connect(**kwargs):
+    """以 FakeConnection 取代 psycopg2.connect"""
+    return FakeConnection()
+
+
+@pytest.fixture
+def make_pool(monkeypatch):
+    monkeypatch.setattr(pool_module.psycopg2, 'connect', fake_connect)
+    return lambda **kwargs: BlockingConnectionPool(1, 2, validate_after=60, **kwargs)
+
+
+def test_blocks_until_released_and_times_out(make_pool):
+    """連線用完時等待其他執行緒歸還；無人歸還則逾時"""
+    conn_pool = make_pool(timeout=0.05)
+    first, second = conn_pool.getconn(), conn_pool.getconn()
+    assert conn_pool.get_stats()['saturation'] == 1.0
+
+    with pytest.raises(pool.PoolError):
+        conn_pool.getconn()
+
+    threading.Timer(0.05, conn_pool.putconn, args=(first,)).start()
+    assert conn_pool.getconn(timeout=2) is first
+
+    stats = conn_pool.get_stats()
+    assert stats['timeouts'] == 1
+    assert stats['waits'] == 2
+    assert stats['max_in_use'] == 2
+    assert stats['max_wait_ms'] > 0
+    conn_pool.putconn(first)
+    conn_pool.putconn(second)
+    assert conn_pool.get_stats()['in_use'] == 0
+
+
+def test_broken_connections_are_replaced(make_pool):
+    """斷線的連線丟棄重建；殘留交易先 rollback 再交出"""
+    conn_pool = make_pool()
+    conn = conn_pool.getconn()
+    rollbacks = conn.rollbacks
+    conn.status = extensions.TRANSACTION_STATUS_INTRANS
+    conn_pool.putconn(conn)
+
+    again = conn_pool.getconn()
+    assert again is conn and conn.rollbacks == rollbacks + 1 and conn.validations == 0
+
+    conn_pool.putconn(conn)
+    conn.status = extensions.TRANSACTION_STATUS_UNKNOWN  # 閒置期間斷線
+    replacement = conn_pool.getconn()
+    assert replacement is not conn and conn.closed
+    assert conn_pool.get_stats()['reconnects'] == 1
+    conn_pool.putconn(replacement)
+
+    # 閒置過久的連線以 SELECT 1 驗證，伺服器已斷線時重建
+    conn_pool.validate_after = 0
+    replacement.server_gone = True
+    fresh = conn_pool.getconn()
+    assert fresh is not replacement and replacement.validations == 1
+    assert conn_pool.get_stats()['reconnects'] == 2
+    conn_pool.putconn(fresh)
+
+    # 歸還時已斷線的連線直接關閉，不放回閒置堆疊
+    broken = conn_pool.getconn()
+    broken.status = extensions.TRANSACTION_STATUS_UNKNOWN
+    conn_pool.putconn(broken)
+    assert broken.closed and conn_pool.get_stats()['idle'] == 0
+
+
+def test_returned_connections_stay_open(make_pool):
+    """超過 minconn 的連線歸還後保持開啟，之後的取用不再建立新連線；closeall 全部關閉"""
+    conn_pool = BlockingConnectionPool(1, 3, validate_after=60)
+    assert conn_pool.get_stats()['opens'] == 1
+
+    connections = set()
+    for _ in range(10):
+        batch = [conn_pool.getconn() for _ in range(3)]
+        connections.update(id(conn) for conn in batch)
+        for conn in batch:
+            conn_pool.putconn(conn)
+
+    stats = conn_pool.get_stats()
+    assert len(connections) == 3
+    assert (stats['opens'], stats['closes'], stats['idle']) == (3, 0, 3)
+
+    # 只需要一條連線時一直重複使用最近歸還的連線
+    first = conn_pool.getconn()
+    conn_pool.putconn(first)
+    assert conn_pool.getconn() is first
+
+    conn_pool.closeall()
+    assert first.closed and conn_pool.closed
+    conn_pool.putconn(first)  # 關閉後歸還不重複計算
+    stats = conn_pool.get_stats()
+    assert (stats['opens'], stats['closes'], stats['in_use']) == (3, 3, 0)
+    with pytest.raises(pool.PoolError):
+        conn_pool.getconn()
+
+
+def test_new_connections_skip_validation(make_pool):
+    """取用時才建立的連線不執行 SELECT 1；預先建立與歸還過的連線依閒置時間驗證"""
+    conn_pool = make_pool()
+    conn_pool.validate_after = 0
+    prebuilt = conn_pool.getconn()
+    assert prebuilt.validations == 1  # 建立連線池時預先建立，已閒置
+
+    created = conn_pool.getconn()
+    assert created is not prebuilt and created.validations == 0
+
+    conn_pool.putconn(created)
+    assert conn_pool.getconn() is created and created.validations == 1
+
+    conn_pool.validate_after = 60
+    conn_pool.putconn(created)
+    assert conn_pool.getconn() is created and created.validations == 1
+    conn_pool.putconn(created)
+    conn_pool.putconn(prebuilt)
+
+
+if __name__ == "__main__":
+    pool_module.psycopg2.connect = fake_connect
+
+    def factory(**kwargs):
+        return BlockingConnectionPool(1, 2, validate_after=60, **kwargs)
+
+    test_blocks_until_released_and_times_out(factory)
+    test_broken_connections_are_replaced(factory)
+    test_new_connections_skip_validation(factory)
+    test_returned_connections_stay_open(factory)
+    print("✅ 連線池測試通過")
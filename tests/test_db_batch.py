@@ -0,0 +1,35 @@
+"""
+資料庫批次寫入測試
+確認同一批中重複的車牌會先彙總，避免同一個 upsert 更新同一列兩次
+"""
+
+from database.handler import DatabaseHandler
+
+
+def test_duplicate_plates_are_aggregated():
+    """重複車牌合併為一列: 使用第一次的偵測 ID，count 為出現次數，截圖取最後一張"""
+    plates = [
+        (0, {'plate_number': 'ABC-1234', 'confidence': 0.9}, 'snap_a'),
+        (1, {'plate_number': 'XYZ-0001', 'confidence': 0.8, 'is_valid': False}, None),
+        (2, {'plate_number': 'ABC-1234', 'confidence': 0.7}, 'snap_c'),
+        (3, {'plate_number': 'ABC-1234', 'confidence': 0.6}, None),
+    ]
+    rows = DatabaseHandler._aggregate_plates(plates, [101, 102, 103, 104])
+
+    assert rows == [
+        (101, 'ABC-1234', True, 0.9, 'snap_c', 3),
+        (102, 'XYZ-0001', False, 0.8, None, 1),
+    ]
+
+
+def test_disabled_handler_skips_batch():
+    """資料庫停用時不建立連線，批次寫入回傳 None"""
+    handler = DatabaseHandler({'enabled': False})
+    assert handler.save_detections_batch([('cam', [], None)]) is None
+    assert handler.save_detection('cam', []) is False
+
+
+if __name__ == "__main__":
+    test_duplicate_plates_are_aggregated()
+    test_disabled_handler_skips_batch()
+    print("✅ 資料庫批次寫入測試通過")
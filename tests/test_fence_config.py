@@ -0,0 +1,120 @@
+"""
+電子圍籬配置測試
+確認圍籬依攝影機分組、依各攝影機解析度編譯正規化座標，
+正規化圍籬編譯前不判定任何物件在區域內，以及熱重載時保留仍存在圍籬的停留時間狀態
+"""
+
+import numpy as np
+
+from modules.virtual_fence import VirtualFence, VirtualFenceManager
+
+
+FENCE_CONFIG = {
+    'reference_size': [1920, 1080],
+    'fences': [
+        {   # 舊配置：reference_size 解析度下的像素座標，套用所有攝影機
+            'id': 'gate',
+            'name': '大門',
+            'points': [[480, 270], [1440, 270], [1440, 810], [480, 810]]
+        },
+        {   # 正規化座標，只套用 cam_b
+            'id': 'parking',
+            'name': '停車區',
+            'points': [[0.0, 0.0], [0.25, 0.0], [0.25, 0.25], [0.0, 0.25]],
+            'camera_ids': ['cam_b']
+        }
+    ]
+}
+
+
+def test_fences_are_scoped_per_camera():
+    """每個攝影機只載入套用於自己的圍籬"""
+    cam_a = VirtualFenceManager(camera_id='cam_a')
+    cam_a.load_fences_from_config(FENCE_CONFIG)
+    cam_b = VirtualFenceManager(camera_id='cam_b')
+    cam_b.load_fences_from_config(FENCE_CONFIG)
+
+    assert list(cam_a.fences) == ['gate']
+    assert list(cam_b.fences) == ['gate', 'parking']
+
+
+def test_normalized_fences_follow_frame_resolution():
+    """同一圍籬在不同解析度下涵蓋相同的相對區域"""
+    manager = VirtualFenceManager(camera_id='cam_a')
+    manager.load_fences_from_config(FENCE_CONFIG)
+    gate = manager.fences['gate']
+
+    manager.set_frame_size((1920, 1080))
+    assert gate.points.tolist() == [[480, 270], [1440, 270], [1440, 810], [480, 810]]
+    assert manager.contains_detection({'bbox': [900, 400, 1000, 600]})
+
+    # 以 1/2 解析度偵測，座標同步縮小
+    manager.set_frame_size((960, 540))
+    assert gate.points.tolist() == [[240, 135], [720, 135], [720, 405], [240, 405]]
+    assert manager.contains_detection({'bbox': [450, 200, 500, 300]})
+    assert not manager.contains_detection({'bbox': [900, 400, 1000, 600]})
+
+
+def test_normalized_fence_waits_for_compile():
+    """正規化座標不會被當成像素座標 (頂點變成 0/1)；編譯前不判定入侵，check_detection 依解析度延遲編譯"""
+    corner = {'class': 'person', 'confidence': 0.9, 'bbox': [0, 0, 1, 1]}
+    inside = {'class': 'person', 'confidence': 0.9, 'bbox': [900, 400, 1000, 600]}
+    points = [[0.25, 0.25], [0.75, 0.25], [0.75, 0.75], [0.25, 0.75]]
+
+    fence = VirtualFence('zone', '區域', points, normalized=True)
+    assert not fence.is_compiled and fence.points.shape == (0, 2)
+    assert not fence.contains_points(np.array([[0, 0], [1, 1]])).any()
+    assert fence.check_detection(corner) is None
+    fence.draw_on_frame(np.zeros((10, 10, 3), dtype=np.uint8))  # 未編譯時不繪製
+
+    assert fence.check_detection(inside, frame_size=(1920, 1080)) is not None
+    assert fence.points.tolist() == [[480, 270], [1440, 270], [1440, 810], [480, 810]]
+
+    manager = VirtualFenceManager()
+    manager.add_fence(VirtualFence('zone', '區域', points, normalized=True))
+    assert manager.get_index_stats()['cells'] == 0
+    assert manager.check_detections([corner, inside]) == []
+    assert not manager.contains_detection(corner)
+
+    events = manager.check_detections([corner, inside], (1080, 1920, 3))
+    assert [event['bbox'] for event in events] == [inside['bbox']]
+    assert manager.get_index_stats()['cells'] > 0
+
+
+def test_reload_keeps_state_for_existing_fences():
+    """熱重載整組替換圍籬，仍存在的圍籬 ID 沿用停留時間狀態"""
+    manager = VirtualFenceManager(camera_id='cam_b')
+    manager.load_fences_from_config(FENCE_CONFIG)
+    detection = {'class': 'person', 'confidence': 0.9,
+                 'bbox': [900, 400, 1000, 600], 'track_id': 7}
+    manager.check_detections([detection], (1080, 1920, 3))
+    assert 7 in manager.fences['gate'].tracked_objects
+
+    new_config = {
+        'reference_size': [1920, 1080],
+        'fences': [
+            {'id': 'gate', 'name': '大門（放大）',
+             'points': [[0.2, 0.2], [0.8, 0.2], [0.8, 0.8], [0.2, 0.8]]},
+            {'id': 'dock', 'name': '卸貨區',
+             'points': [[0.9, 0.9], [1.0, 0.9], [1.0, 1.0], [0.9, 1.0]]}
+        ]
+    }
+    old_gate = manager.fences['gate']
+    stats = manager.reload_fences(new_config)
+
+    assert stats == {'added': 1, 'updated': 1, 'removed': 1}
+    assert list(manager.fences) == ['gate', 'dock']
+    gate = manager.fences['gate']
+    assert gate is not old_gate
+    assert gate.name == '大門（放大）'
+    assert gate.points.tolist()[0] == [384, 216]  # 已依目前解析度編譯
+    assert 7 in gate.tracked_objects
+    assert manager.contains_detection({'bbox': [400, 300, 450, 400]})
+
+
+if __name__ == "__main__":
+    test_fences_are_scoped_per_camera()
+    test_normalized_fences_follow_frame_resolution()
+    test_normalized_fence_waits_for_compile()
+    test_reload_keeps_state_for_existing_fences()
+    print("✅ 電子圍籬配置測試通過")
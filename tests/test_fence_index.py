@@ -0,0 +1,115 @@
+"""
+電子圍籬空間索引測試
+確認 FenceGridIndex 的候選查詢與逐一比對外接矩形的暴力法相同、不遺漏區域內的點，
+加入/移除/重新加入圍籬後索引正確，以及管理器使用索引的判定與不使用索引時一致
+"""
+
+import numpy as np
+import pytest
+
+from modules.virtual_fence import FenceGridIndex, VirtualFence, VirtualFenceManager
+
+
+def random_fences(count=30, seed=11):
+    """產生隨機三角形與矩形圍籬 (部分超出影像左上方)"""
+    rng = np.random.default_rng(seed)
+    fences = []
+    for k in range(count):
+        center = rng.uniform([-50, -50], [1280, 720])
+        size = rng.uniform(20, 300, size=2)
+        if k % 2:
+            offsets = [(-1, -1), (1, -1), (1, 1), (-1, 1)]
+        else:
+            offsets = [(0, -1), (1, 1), (-1, 1)]
+        points = [(center + size * offset).astype(int) for offset in offsets]
+        fences.append(VirtualFence(f"f{k}", f"圍籬 {k}", points))
+    return fences
+
+
+def brute_force(fences, points, cell_size):
+    """逐一比對點所在網格是否落在圍籬外接矩形涵蓋的網格範圍"""
+    cells = np.floor(points / cell_size).astype(np.int64)
+    result = {}
+    for fence in fences:
+        low = fence.points.min(axis=0) // cell_size
+        high = fence.points.max(axis=0) // cell_size
+        rows = np.flatnonzero(((cells >= low) & (cells <= high)).all(axis=1))
+        if len(rows):
+            result[fence.fence_id] = rows
+    return result
+
+
+@pytest.mark.parametrize('cell_size', [8, 37, 128, 2000])
+def test_query_matches_brute_force(cell_size):
+    """候選點與暴力法完全相同 (含負座標)，區域內的點一定是候選"""
+    fences = random_fences()
+    index = FenceGridIndex(cell_size)
+    for fence in fences:
+        index.insert(fence)
+    points = np.random.default_rng(5).integers([-100, -100], [1380, 820], size=(2000, 2))
+
+    candidates = index.query_points(points)
+    expected = brute_force(fences, points, cell_size)
+    assert candidates.keys() == expected.keys()
+    for fence_id, rows in expected.items():
+        assert np.array_equal(candidates[fence_id], rows)
+
+    for fence in fences:
+        inside = np.flatnonzero(fence.contains_points(points))
+        assert np.isin(inside, candidates.get(fence.fence_id, [])).all()
+
+    stats = index.get_stats()
+    assert stats['total_pairs'] == len(points) * len(fences)
+    assert stats['candidate_pairs'] == sum(len(rows) for rows in expected.values())
+
+
+def test_insert_remove_and_reinsert():
+    """移除圍籬後不再回傳且不留下空網格；重新加入時依新頂點建立網格"""
+    fences = random_fences(count=10)
+    index = FenceGridIndex(64)
+    for fence in fences:
+        index.insert(fence)
+    points = np.random.default_rng(9).integers(0, 1280, size=(500, 2))
+
+    index.remove('f3')
+    index.remove('missing')
+    remaining = [fence for fence in fences if fence.fence_id != 'f3']
+    candidates = index.query_points(points)
+    assert 'f3' not in candidates
+    assert candidates.keys() == brute_force(remaining, points, 64).keys()
+    assert all(index.cells.values())
+
+    moved = fences[0]
+    moved.points = [(0, 0), (10, 0), (10, 10)]
+    index.insert(moved)  # 重新加入取代舊網格
+    assert index.fence_cells['f0'] == [(0, 0)]
+    assert index.query_points(np.array([[5, 5]])).get('f0').tolist() == [0]
+    assert index.get_stats()['fences'] == 9
+
+    assert FenceGridIndex(64).query_points(points) == {}
+    assert index.query_points(np.zeros((0, 2))) == {}
+
+
+def test_manager_matches_unindexed_check():
+    """管理器經索引判定的結果與逐一圍籬 is_bbox_in_zone 相同"""
+    fences = random_fences(count=20, seed=4)
+    manager = VirtualFenceManager(grid_cell_size=96)
+    for fence in fences:
+        manager.add_fence(fence)
+
+    rng = np.random.default_rng(2)
+    for x, y in rng.integers(0, [1230, 650], size=(300, 2)):
+        detection = {'class': 'person', 'confidence': 0.9,
+                     'bbox': [int(x), int(y), int(x) + 50, int(y) + 70]}
+        expected = any(fence.is_bbox_in_zone(detection['bbox']) for fence in fences)
+        assert manager.contains_detection(detection) == expected
+
+    assert manager.get_index_stats()['pruned_ratio'] > 0.5
+
+
+if __name__ == "__main__":
+    for cell_size in (8, 37, 128, 2000):
+        test_query_matches_brute_force(cell_size)
+    test_insert_remove_and_reinsert()
+    test_manager_matches_unindexed_check()
+    print("✅ 電子圍籬空間索引測試通過")
@@ -0,0 +1,97 @@
+"""
+電子圍籬區域遮罩測試
+確認遮罩查表與 cv2.pointPolygonTest 一致 (含 mask_downsample > 1 的縮小遮罩)、
+邊界點視為在區域內、依影像解析度裁切，以及頂點變更時重建遮罩
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from modules.virtual_fence import VirtualFence
+
+
+POLYGON = [(300, 200), (900, 150), (1000, 600), (620, 420), (250, 650)]  # 含凹角
+FRAME_SIZE = (1280, 720)
+
+
+def random_points(count=5000, seed=3):
+    """涵蓋多邊形外接矩形與外圍的隨機點 (含小數座標)"""
+    return np.random.default_rng(seed).uniform([0, 0], FRAME_SIZE, size=(count, 2))
+
+
+def reference_inside(fence, points):
+    """以 cv2.pointPolygonTest 逐點判定 (回傳 (是否在內, 與邊界距離))"""
+    results = [cv2.pointPolygonTest(fence.points, (float(np.floor(x)), float(np.floor(y))), True)
+               for x, y in points]
+    distances = np.array(results)
+    return distances >= 0, np.abs(distances)
+
+
+@pytest.mark.parametrize('downsample', [1, 2, 4, 8])
+def test_mask_matches_point_polygon_test(downsample):
+    """遠離邊界的點與 pointPolygonTest 一致；縮小遮罩的誤差不超過一格對角線"""
+    fence = VirtualFence("f", "圍籬", POLYGON, mask_downsample=downsample)
+    points = random_points()
+    expected, distances = reference_inside(fence, points)
+    inside = fence.contains_points(points, FRAME_SIZE)
+
+    margin = 0.5 if downsample == 1 else downsample * np.sqrt(2)
+    far = distances > margin
+    assert far.mean() > 0.9
+    assert np.array_equal(inside[far], expected[far])
+
+    mask, x0, y0 = fence._get_mask(FRAME_SIZE)
+    assert (x0, y0) == (250, 150)
+    assert mask.shape == ((650 - 150) // downsample + 1, (1000 - 250) // downsample + 1)
+
+
+@pytest.mark.parametrize('downsample', [1, 3])
+def test_boundary_points_inside(downsample):
+    """頂點與邊上的點視為在區域內，單點與批次判定一致"""
+    fence = VirtualFence("f", "圍籬", POLYGON, mask_downsample=downsample)
+    vertices = np.array(POLYGON)
+    midpoints = (vertices + np.roll(vertices, -1, axis=0)) // 2
+    assert fence.contains_points(vertices, FRAME_SIZE).all()
+    assert fence.contains_points(midpoints, FRAME_SIZE).all()
+    assert fence.is_point_in_polygon((620, 420), FRAME_SIZE)
+    assert not fence.is_point_in_polygon((620, 600), FRAME_SIZE)  # 凹角下方
+
+
+def test_mask_clipped_to_frame():
+    """超出影像的圍籬只建立影像範圍內的遮罩，偵測框座標等於影像寬高時仍可查表"""
+    fence = VirtualFence("edge", "邊緣", [(-200, -100), (700, -100), (700, 480), (-200, 480)],
+                         mask_downsample=2)
+    mask, x0, y0 = fence._get_mask((640, 480))
+    assert (x0, y0) == (0, 0)
+    assert mask.shape == (480 // 2 + 1, 640 // 2 + 1)
+
+    points = np.array([[0, 0], [640, 480], [320, 240], [-5, 10], [643, 10]])
+    assert fence.contains_points(points, (640, 480)).tolist() == [True, True, True, False, False]
+    assert fence.is_bbox_in_zone([600, 400, 640, 480], frame_size=(640, 480))
+
+    # 完全在影像外的圍籬
+    outside = VirtualFence("out", "外側", [(700, 0), (800, 0), (800, 100)])
+    assert not outside.contains_points(np.array([[750, 10]]), (640, 480)).any()
+
+
+def test_mask_rebuilt_when_points_change():
+    """指定新頂點後清除遮罩快取，判定依新區域"""
+    fence = VirtualFence("f", "圍籬", [(0, 0), (100, 0), (100, 100), (0, 100)], mask_downsample=4)
+    assert fence.is_point_in_polygon((50, 50), FRAME_SIZE)
+    version = fence.version
+
+    fence.points = [(200, 200), (300, 200), (300, 300), (200, 300)]
+    assert fence.version == version + 1
+    assert not fence.is_point_in_polygon((50, 50), FRAME_SIZE)
+    assert fence.is_point_in_polygon((250, 250), FRAME_SIZE)
+
+
+if __name__ == "__main__":
+    for downsample in (1, 2, 4, 8):
+        test_mask_matches_point_polygon_test(downsample)
+    for downsample in (1, 3):
+        test_boundary_points_inside(downsample)
+    test_mask_clipped_to_frame()
+    test_mask_rebuilt_when_points_change()
+    print("✅ 電子圍籬區域遮罩測試通過")
@@ -0,0 +1,53 @@
+"""
+影像幀編碼快取測試
+確認同一幀的各種表示只編碼一次，且結果與直接編碼相同
+"""
+
+import base64
+
+import cv2
+import numpy as np
+
+from utils.frame_artifacts import ArtifactStats, FrameArtifacts
+
+
+def _frame():
+    return np.random.default_rng(0).integers(0, 255, (360, 640, 3), dtype=np.uint8)
+
+
+def test_each_representation_encoded_once():
+    """多個使用者取用同一表示時只編碼一次"""
+    frame = _frame()
+    artifacts = FrameArtifacts(frame, quality=85)
+
+    snapshots = [artifacts.base64() for _ in range(5)]  # 例如同一幀的 5 個入侵事件
+    crops = [artifacts.crop_base64([100, 100, 200, 180]) for _ in range(3)]
+    artifacts.jpeg(max_width=160)
+
+    assert len(set(snapshots)) == 1 and len(set(crops)) == 1
+    assert artifacts.encodes == 3
+    assert artifacts.requests == 9
+
+    _, expected = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+    assert base64.b64decode(snapshots[0]) == expected.tobytes()
+
+    stats = ArtifactStats()
+    stats.record(artifacts)
+    assert stats.get_stats()['saved_encodes'] == 6
+
+
+def test_crop_is_expanded_and_clipped():
+    """截圖依比例擴展並限制在影像範圍內，空範圍回傳 None"""
+    frame = _frame()
+    artifacts = FrameArtifacts(frame)
+
+    assert FrameArtifacts.expand_bbox([0, 0, 100, 50], frame.shape, 0.1) == (0, 0, 110, 55)
+    decoded = cv2.imdecode(np.frombuffer(artifacts.crop_jpeg([0, 0, 100, 50]), np.uint8), 1)
+    assert decoded.shape[:2] == (55, 110)
+    assert artifacts.crop_base64([10, 10, 10, 10]) is None
+
+
+if __name__ == "__main__":
+    test_each_representation_encoded_once()
+    test_crop_is_expanded_and_clipped()
+    print("✅ 影像幀編碼快取測試通過")
@@ -0,0 +1,74 @@
+"""
+歷史記錄分頁測試
+確認游標可還原、欄位選擇驗證，以及 keyset 查詢條件與下一頁判斷
+"""
+
+from datetime import datetime
+
+import pytest
+
+from database.history import (DETECTION_COLUMNS, FENCE_INTRUSION_COLUMNS, build_keyset_query,
+                              decode_cursor, encode_cursor, select_columns, to_page)
+
+
+def test_cursor_round_trip_and_columns():
+    """游標還原為 (timestamp, id)；欄位一定包含 id 與 timestamp，不接受未知欄位"""
+    moment = datetime(2026, 10, 19, 8, 30, 15, 123456).astimezone()
+    cursor = encode_cursor(moment, 42)
+    assert '=' not in cursor and '/' not in cursor
+    assert decode_cursor(cursor) == (moment, 42)
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor')
+
+    assert select_columns(FENCE_INTRUSION_COLUMNS, ['fence_name', 'id']) == ['id', 'timestamp', 'fence_name']
+    assert 'snapshot_base64' not in select_columns(FENCE_INTRUSION_COLUMNS, None)
+    with pytest.raises(ValueError):
+        select_columns(FENCE_INTRUSION_COLUMNS, ['snapshot_base64'])
+
+
+def test_keyset_query_and_pages():
+    """游標與時間範圍轉為條件；多取一筆判斷下一頁，游標指向本頁最後一筆"""
+    start = datetime(2026, 10, 1)
+    cursor = encode_cursor(datetime(2026, 10, 19, 8), 7)
+    sql, params = build_keyset_query('detections', ['id', 'timestamp'],
+                                     [("camera_id = %s", ('cam1',))],
+                                     start=start, cursor=cursor, limit=2)
+    assert "camera_id = %s AND timestamp >= %s AND (timestamp, id) < (%s, %s)" in sql
+    assert "ORDER BY timestamp DESC, id DESC" in sql
+    assert params == ('cam1', start, datetime(2026, 10, 19, 8), 7, 3)
+
+    rows = [(9, datetime(2026, 10, 19, 7), '{"a": 1}'),
+            (8, datetime(2026, 10, 19, 6), None),
+            (5, datetime(2026, 10, 19, 5), None)]
+    page = to_page(['id', 'timestamp', 'details'], rows, limit=2)
+    assert [item['id'] for item in page['items']] == [9, 8]
+    assert page['items'][0] == {'id': 9, 'timestamp': '2026-10-19T07:00:00', 'details': {'a': 1}}
+    assert decode_cursor(page['next_cursor']) == (datetime(2026, 10, 19, 6), 8)
+
+    assert to_page(['id', 'timestamp'], rows[:2], limit=2)['next_cursor'] is None
+
+
+def test_pages_without_fields():
+    """未指定欄位時 id 與 timestamp 仍在最前面，下一頁游標可正常產生"""
+    for available in (DETECTION_COLUMNS, FENCE_INTRUSION_COLUMNS):
+        names = select_columns(available, None)
+        assert names[:2] == ['id', 'timestamp']
+        assert sorted(names) == sorted(available)
+
+    names = select_columns(DETECTION_COLUMNS, None)
+    values = {'camera_id': 'cam1', 'object_class': 'car', 'confidence': 0.9,
+              'bbox': '[1, 2, 3, 4]', 'details': '{}'}
+    rows = [tuple({'id': row_id, 'timestamp': datetime(2026, 10, 19, hour), **values}[name]
+                  for name in names)
+            for row_id, hour in ((3, 9), (2, 8), (1, 7))]
+    page = to_page(names, rows, limit=2)
+    assert page['items'][1]['camera_id'] == 'cam1'
+    assert page['items'][1]['bbox'] == [1, 2, 3, 4]
+    assert decode_cursor(page['next_cursor']) == (datetime(2026, 10, 19, 8), 2)
+
+
+if __name__ == "__main__":
+    test_cursor_round_trip_and_columns()
+    test_keyset_query_and_pages()
+    test_pages_without_fields()
+    print("✅ 歷史記錄分頁測試通過")
@@ -0,0 +1,135 @@
+"""
+OCR 結果快取測試
+測試感知雜湊快取的命中、容忍距離與 LRU 淘汰，以及相似車牌不互相命中、快取依攝影機分開
+"""
+
+import cv2
+import numpy as np
+
+from utils.perceptual_cache import PerceptualHashCache, dhash, hamming_distance
+from modules.license_plate import LicensePlateRecognizer
+
+
+def _make_image(seed: int, shape=(120, 240, 3)) -> np.ndarray:
+    """產生具有明顯紋理的測試影像"""
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 255, size=(8, 16, 3), dtype=np.uint8)
+    return np.kron(small, np.ones((shape[0] // 8, shape[1] // 16, 1), dtype=np.uint8))
+
+
+def _make_plate(text: str) -> np.ndarray:
+    """產生版面相同、只有字元不同的車牌影像"""
+    image = np.full((60, 220, 3), 235, dtype=np.uint8)
+    cv2.rectangle(image, (4, 4), (215, 55), (40, 40, 40), 2)
+    cv2.putText(image, text, (14, 44), cv2.FONT_HERSHEY_SIMPLEX, 1.3, (20, 20, 20), 3)
+    return image
+
+
+def test_near_identical_images_hit():
+    """近似影像應命中快取"""
+    cache = PerceptualHashCache(max_size=10, tolerance=4)
+    image = _make_image(1)
+
+    noisy = image.astype(np.int16) + np.random.default_rng(2).integers(-3, 4, image.shape)
+    noisy = np.clip(noisy, 0, 255).astype(np.uint8)
+
+    assert hamming_distance(dhash(image), dhash(noisy)) == 0
+
+    cache.put(cache.make_key(image), {'plate_number': 'ABC-1234'})
+    hit, value = cache.get(cache.make_key(noisy))
+
+    assert hit
+    assert value['plate_number'] == 'ABC-1234'
+    assert cache.get_stats()['hit_ratio'] == 1.0
+
+
+def test_different_images_miss_and_lru_eviction():
+    """不同影像不命中,超過容量淘汰最舊項目"""
+    cache = PerceptualHashCache(max_size=2, tolerance=0)
+    images = [_make_image(seed) for seed in (10, 11, 12)]
+
+    for i, image in enumerate(images):
+        cache.put(cache.make_key(image), i)
+
+    assert len(cache) == 2
+    assert cache.get(cache.make_key(images[0]))[0] is False
+    assert cache.get(cache.make_key(images[2])) == (True, 2)
+
+
+def test_similar_plates_do_not_collide():
+    """版面相同、只差一個字元的車牌不可共用快取結果"""
+    cache = PerceptualHashCache(max_size=10)
+    cache.put(cache.make_key(_make_plate('ABC-1234')), {'plate_number': 'ABC-1234'})
+
+    for other in ('ABC-1284', 'ABD-1234', 'A8C-1234'):
+        assert cache.get(cache.make_key(_make_plate(other))) == (False, None)
+    assert cache.get(cache.make_key(_make_plate('ABC-1234')))[0] is True
+
+
+def test_cache_is_per_camera_and_skips_misses():
+    """其他攝影機的相同影像不命中；辨識失敗不快取，下一次仍執行 OCR"""
+
+    class ScriptedReader:
+        texts = ['', 'ABC1234', 'XYZ5678']
+        calls = 0
+
+        def readtext(self, image):
+            text = ScriptedReader.texts[ScriptedReader.calls]
+            ScriptedReader.calls += 1
+            return [(None, text, 0.9)] if text else []
+
+    recognizer = LicensePlateRecognizer(
+        {'multi_zone_search': False},
+        performance_config={'enable_caching': True, 'cache_size': 10}
+    )
+    recognizer.ocr_reader = ScriptedReader()
+    image = _make_image(4, shape=(480, 640, 3))
+
+    def detect(camera_id):
+        return {'class': 'car', 'confidence': 0.9, 'bbox': [100, 100, 400, 300], 'camera_id': camera_id}
+
+    assert recognizer.recognize(image, detect('cam1')) is None
+    assert recognizer.recognize(image, detect('cam1'))['plate_number'] == 'ABC-1234'
+    assert recognizer.recognize(image, detect('cam2'))['plate_number'] == 'XYZ-5678'
+    assert recognizer.recognize(image, detect('cam1'))['plate_number'] == 'ABC-1234'
+    assert ScriptedReader.calls == 3
+
+    stats = recognizer.get_stats()['ocr_cache']
+    assert stats['cameras'] == 2 and stats['size'] == 2 and stats['hits'] == 1
+
+
+def test_recognizer_skips_ocr_on_cache_hit():
+    """快取命中時不應重新執行 OCR"""
+
+    class CountingReader:
+        calls = 0
+
+        def readtext(self, image):
+            CountingReader.calls += 1
+            return [(None, 'ABC1234', 0.9)]
+
+    recognizer = LicensePlateRecognizer(
+        {'multi_zone_search': False},
+        performance_config={'enable_caching': True, 'cache_size': 10}
+    )
+    recognizer.ocr_reader = CountingReader()
+
+    image = _make_image(3, shape=(480, 640, 3))
+    detection = {'class': 'car', 'confidence': 0.9, 'bbox': [100, 100, 400, 300]}
+
+    first = recognizer.recognize(image, detection)
+    second = recognizer.recognize(image, detection)
+
+    assert first['plate_number'] == 'ABC-1234'
+    assert second['plate_number'] == 'ABC-1234'
+    assert CountingReader.calls == 1
+    assert recognizer.get_stats()['ocr_cache']['hits'] == 1
+
+
+if __name__ == "__main__":
+    test_near_identical_images_hit()
+    test_different_images_miss_and_lru_eviction()
+    test_similar_plates_do_not_collide()
+    test_cache_is_per_camera_and_skips_misses()
+    test_recognizer_skips_ocr_on_cache_hit()
+    print("✅ OCR 快取測試通過")
@@ -0,0 +1,49 @@
+"""
+時間分割測試
+確認分割範圍與名稱可互相轉換、預先建立的分割連續，以及只刪除整個超過保留期限的分割
+"""
+
+from datetime import date
+
+from database.partitions import PartitionManager, parse_partition_name, partition_bounds, partition_name
+
+
+def test_bounds_and_names_round_trip():
+    """月與日分割的範圍、名稱互相轉換，跨年正確"""
+    start, end = partition_bounds(date(2026, 12, 19), 'month')
+    assert (start, end) == (date(2026, 12, 1), date(2027, 1, 1))
+    assert partition_name('detections', start) == 'detections_p202612'
+    assert parse_partition_name('detections', 'detections_p202612') == (start, end)
+
+    start, end = partition_bounds(date(2026, 2, 28), 'day')
+    assert (start, end) == (date(2026, 2, 28), date(2026, 3, 1))
+    assert partition_name('fence_intrusions', start, 'day') == 'fence_intrusions_p20260228'
+    assert parse_partition_name('fence_intrusions', 'fence_intrusions_p20260228') == (start, end)
+
+    # default 分割與其他表格的分割不會被誤判
+    assert parse_partition_name('detections', 'detections_default') is None
+    assert parse_partition_name('detections', 'fence_intrusions_p202612') is None
+
+
+def test_planned_and_expired_partitions():
+    """預先建立的分割首尾相接；保留期限只刪除結束日早於期限的分割"""
+    manager = PartitionManager(None, {'granularity': 'month', 'premake': 2, 'retention_days': 60})
+    today = date(2026, 10, 19)
+
+    planned = manager.planned_partitions(today)
+    assert [start for start, _ in planned] == [date(2026, 10, 1), date(2026, 11, 1), date(2026, 12, 1)]
+    assert all(planned[i][1] == planned[i + 1][0] for i in range(len(planned) - 1))
+
+    # 期限為 2026-08-20：七月分割整個過期，八月分割仍有未過期資料
+    existing = ['detections_p202608', 'detections_p202607', 'detections_default', 'detections_p202610']
+    assert manager.expired_partitions('detections', existing, today) == ['detections_p202607']
+
+    # 未設定保留期限時不刪除
+    keep_all = PartitionManager(None, {'granularity': 'day'})
+    assert keep_all.expired_partitions('detections', ['detections_p20200101'], today) == []
+
+
+if __name__ == "__main__":
+    test_bounds_and_names_round_trip()
+    test_planned_and_expired_partitions()
+    print("✅ 時間分割測試通過")
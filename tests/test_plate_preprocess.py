@@ -0,0 +1,113 @@
+"""
+車牌預處理測試
+確認重複使用 CLAHE 與緩衝區的 PlatePreprocessor 與舊版逐次建立 CLAHE 的結果逐像素相同
+(含不同尺寸、灰階輸入、跨執行緒)，批次處理的結果互不覆寫，以及車牌格式分類
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+from modules.plate_preprocess import PlatePreprocessor, classify_plate, normalize_plate_text
+
+
+def legacy_preprocess(image):
+    """舊版預處理 (每次建立 CLAHE 並配置新陣列)"""
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    enhanced = clahe.apply(gray)
+    _, binary = cv2.threshold(enhanced, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return binary
+
+
+def make_zones(seed=0):
+    """產生不同尺寸的搜尋區域 (含非連續的切片視圖與灰階影像)"""
+    rng = np.random.default_rng(seed)
+    vehicle = rng.integers(0, 255, size=(230, 310, 3), dtype=np.uint8)
+    return [
+        vehicle,
+        vehicle[115:, :],
+        vehicle[60:170, 20:290],
+        rng.integers(0, 255, size=(37, 129, 3), dtype=np.uint8),
+        cv2.cvtColor(vehicle, cv2.COLOR_BGR2GRAY),
+    ]
+
+
+def test_matches_legacy_path():
+    """重複使用的緩衝區不影響結果：各尺寸與重複呼叫都與舊版相同"""
+    engine = PlatePreprocessor()
+    zones = make_zones()
+    for _ in range(2):
+        for zone in zones:
+            result = engine.process(zone)
+            assert result.shape == zone.shape[:2]
+            assert np.array_equal(result, legacy_preprocess(zone))
+
+
+def test_threads_use_own_state():
+    """每個執行緒使用自己的 CLAHE 與緩衝區，並行處理結果仍與舊版相同"""
+    engine = PlatePreprocessor()
+    expected = [legacy_preprocess(zone) for zone in make_zones()]
+    failures = []
+
+    def worker(seed):
+        zones = make_zones()
+        for i in range(20):
+            index = (seed + i) % len(zones)
+            if not np.array_equal(engine.process(zones[index]), expected[index]):
+                failures.append(index)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert failures == []
+
+
+def test_slots_keep_results():
+    """不同槽位的結果互不覆寫"""
+    engine = PlatePreprocessor()
+    first, second = make_zones()[:2]
+    a = engine.process(first[:100, :100], slot=0)
+    b = engine.process(second[:100, :100], slot=1)
+    assert np.array_equal(a, legacy_preprocess(first[:100, :100]))
+    assert np.array_equal(b, legacy_preprocess(second[:100, :100]))
+
+
+def test_batch_matches_per_crop():
+    """同一尺寸級距的多張影像各自使用緩衝區，批次結果與逐張處理相同 (含超過 max_buffers 張)"""
+    engine = PlatePreprocessor(max_buffers=4)
+    rng = np.random.default_rng(1)
+    zones = make_zones() + [rng.integers(0, 255, size=(40, 60, 3), dtype=np.uint8)
+                            for _ in range(6)]  # 同一級距
+    expected = [legacy_preprocess(zone) for zone in zones]
+
+    results = engine.process_batch(zones)
+    assert len({id(result.base) for result in results}) == len(zones)
+    for result, reference in zip(results, expected):
+        assert np.array_equal(result, reference)
+
+    per_crop = [engine.process(zone).copy() for zone in zones]
+    for result, single in zip(results, per_crop):
+        assert np.array_equal(result, single)
+    assert engine.process_batch([]) == []
+
+
+def test_classify_plate():
+    """清理後的文字依格式分類"""
+    assert classify_plate(normalize_plate_text('abc-1234')) == 'car'
+    assert classify_plate(normalize_plate_text('AB 1234')) == 'car'
+    assert classify_plate(normalize_plate_text('1234-AB')) == 'commercial'
+    assert classify_plate(normalize_plate_text('ABC-123')) == 'motorcycle'
+    assert classify_plate(normalize_plate_text('A8C-12E4')) is None
+
+
+if __name__ == "__main__":
+    test_matches_legacy_path()
+    test_threads_use_own_state()
+    test_slots_keep_results()
+    test_batch_matches_per_crop()
+    test_classify_plate()
+    print("✅ 車牌預處理測試通過")
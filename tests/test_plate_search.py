@@ -0,0 +1,51 @@
+"""
+車牌模糊搜尋測試
+確認搜尋鍵折疊易混淆字元、編輯距離上限，以及記憶體索引的排序與時間範圍
+"""
+
+from datetime import date, datetime
+
+from database.plate_search import PlateIndex, bounded_distance, plate_key
+
+
+def test_plate_key_and_distance():
+    """分隔符號與大小寫不影響，O/0、I/1、B/8 視為相同；距離超過上限回傳 None"""
+    assert plate_key('abc-1234') == plate_key('A8C 1234') == 'A8C1234'
+    assert plate_key('OI-1B') == plate_key('01-18')
+
+    assert bounded_distance('A8C1234', 'A8C1234', 0) == 0
+    assert bounded_distance('A8C1234', 'A8C1284', 1) == 1
+    assert bounded_distance('A8C1234', 'A8C124', 1) == 1
+    assert bounded_distance('A8C1234', 'XYZ9999', 2) is None
+    assert bounded_distance('A8C1234', 'A8C12345678', 2) is None
+
+
+def test_index_ranks_and_filters_by_time():
+    """完全相同優先，其次折疊後相同，再依距離；只統計時間範圍內的出現"""
+    index = PlateIndex()
+    index.add('ABC-1234', date(2026, 10, 18), 3, datetime(2026, 10, 18, 9), datetime(2026, 10, 18, 17))
+    index.add('ABC-1234', date(2026, 10, 19), 2, datetime(2026, 10, 19, 8), datetime(2026, 10, 19, 9))
+    index.add('A8C-1234', date(2026, 10, 19), 1, datetime(2026, 10, 19, 10))
+    index.add('ABC-1284', date(2026, 10, 17), 5, datetime(2026, 10, 17, 10))
+    index.add('XYZ-9999', date(2026, 10, 19), 9, datetime(2026, 10, 19, 10))
+    # 重複字元的車牌也能以距離 0 找到
+    index.add('111-1111', date(2026, 10, 19), 1, datetime(2026, 10, 19, 10))
+
+    results = index.search('abc1234', max_distance=1)
+    assert [(r['plate_number'], r['distance'], r['exact']) for r in results] == [
+        ('ABC-1234', 0, True), ('A8C-1234', 0, False), ('ABC-1284', 1, False)
+    ]
+    assert results[0]['count'] == 5 and results[0]['days'] == 2
+
+    recent = index.search('ABC-1234', max_distance=1,
+                          time_range=(datetime(2026, 10, 19), None))
+    assert [r['plate_number'] for r in recent] == ['ABC-1234', 'A8C-1234']
+    assert recent[0]['count'] == 2
+
+    assert [r['plate_number'] for r in index.search('1111111', 0)] == ['111-1111']
+
+
+if __name__ == "__main__":
+    test_plate_key_and_distance()
+    test_index_ranks_and_filters_by_time()
+    print("✅ 車牌模糊搜尋測試通過")
@@ -0,0 +1,131 @@
+"""
+攝影機辨識模組選擇測試
+確認未設定 modules 時沿用所有已註冊模組 (與原本行為相同)、只執行列出的模組、
+空列表只做 YOLO 偵測，以及未註冊的模組名稱被拒絕並記錄警告
+"""
+
+import numpy as np
+
+import core.system as system_module
+from core.recognizer_base import DetailRecognizer
+
+
+class FakeDetector:
+    """回傳一台車與一個人的偵測器替身"""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def detect(self, image, conf_threshold=0.5, track=False):
+        return [{'class': 'car', 'confidence': 0.9, 'bbox': [0, 0, 50, 30]},
+                {'class': 'person', 'confidence': 0.8, 'bbox': [60, 0, 80, 60]}]
+
+
+class FakeRecognizer(DetailRecognizer):
+    """回傳模組名稱的辨識模組替身"""
+
+    def __init__(self, name, classes):
+        super().__init__()
+        self._name = name
+        self._classes = classes
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def target_classes(self):
+        return self._classes
+
+    def initialize(self):
+        pass
+
+    def recognize(self, image, detection):
+        return {'by': self._name}
+
+
+class RecordingLogger:
+    """記錄警告訊息的日誌替身"""
+
+    def __init__(self):
+        self.warnings = []
+
+    def warning(self, message):
+        self.warnings.append(message)
+
+    def info(self, message):
+        pass
+
+    def debug(self, message):
+        pass
+
+    def error(self, message):
+        pass
+
+
+def make_system(monkeypatch, cameras):
+    """建立註冊車牌與人臉模組的系統"""
+    monkeypatch.setattr(system_module, 'BaseDetector', FakeDetector)
+    logger = RecordingLogger()
+    system = system_module.MultiModalRecognitionSystem({'cameras': cameras}, logger)
+    system.register_recognizer(FakeRecognizer('license_plate', ['car']))
+    system.register_recognizer(FakeRecognizer('face', ['person']))
+    return system, logger
+
+
+def test_default_selection_unchanged(monkeypatch):
+    """未設定 modules (或找不到攝影機) 時使用所有已註冊模組，依註冊順序；不指定 recognizers 的結果相同"""
+    system, logger = make_system(monkeypatch, [{'id': 'cam1'}])
+    everything = list(system.recognizers.values())
+    assert system.resolve_recognizers('cam1') == everything
+    assert system.resolve_recognizers('missing') == everything
+    assert system.resolve_recognizers({'id': 'inline'}) == everything
+
+    image = np.zeros((100, 100, 3), dtype=np.uint8)
+    default = system.process_image(image)
+    resolved = system.process_image(image, recognizers=system.resolve_recognizers('cam1'))
+    assert [r['details'] for r in default] == [r['details'] for r in resolved] == [
+        {'license_plate': {'by': 'license_plate'}}, {'face': {'by': 'face'}}
+    ]
+    assert logger.warnings == []
+
+
+def test_listed_modules_only(monkeypatch):
+    """只執行攝影機列出的模組 (依列出順序)；空列表只做 YOLO 偵測"""
+    system, _ = make_system(monkeypatch, [{'id': 'gate', 'modules': ['license_plate']},
+                                          {'id': 'yolo', 'modules': []}])
+    image = np.zeros((100, 100, 3), dtype=np.uint8)
+
+    gate = system.resolve_recognizers('gate')
+    assert [r.name for r in gate] == ['license_plate']
+    car, person = system.process_image(image, recognizers=gate)
+    assert car['details'] == {'license_plate': {'by': 'license_plate'}}
+    assert person['details'] == {}
+
+    assert system.resolve_recognizers('yolo') == []
+    results = system.process_image(image, recognizers=[])
+    assert len(results) == 2 and all(r['details'] == {} for r in results)
+
+
+def test_unknown_modules_rejected(monkeypatch):
+    """未註冊的模組名稱不會被選入，並記錄警告"""
+    system, logger = make_system(monkeypatch, [
+        {'id': 'cam1', 'modules': ['face', 'vehicle_color', 'license_plate']},
+        {'id': 'cam2', 'modules': ['unknown']}
+    ])
+    assert [r.name for r in system.resolve_recognizers('cam1')] == ['face', 'license_plate']
+    assert system.resolve_recognizers('cam2') == []
+    assert len(logger.warnings) == 2
+    assert 'vehicle_color' in logger.warnings[0] and 'unknown' in logger.warnings[1]
+
+
+if __name__ == "__main__":
+    import pytest
+
+    with pytest.MonkeyPatch.context() as patch:
+        test_default_selection_unchanged(patch)
+    with pytest.MonkeyPatch.context() as patch:
+        test_listed_modules_only(patch)
+    with pytest.MonkeyPatch.context() as patch:
+        test_unknown_modules_rejected(patch)
+    print("✅ 辨識模組選擇測試通過")
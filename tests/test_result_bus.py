@@ -0,0 +1,148 @@
+"""
+結果匯流排測試
+確認訊息依主題分送、緩慢的輸出端不會阻塞發布者、各捨棄策略的行為，
+以及 process_rtsp 的回調註冊為輸出端而不在辨識執行緒中執行
+"""
+
+import threading
+import time
+
+import pytest
+
+import core.system as system_module
+from core.result_bus import ResultBus
+
+
+def test_topics_are_routed_to_subscribed_sinks():
+    """每個輸出端只收到訂閱的主題，停止時會處理完佇列"""
+    bus = ResultBus()
+    received = {'database': [], 'alerts': []}
+    bus.subscribe('database', lambda m: received['database'].append(m.payload),
+                  topics=['detections'])
+    bus.subscribe('alerts', lambda m: received['alerts'].append(m.payload),
+                  topics=['fence_alert'])
+    bus.start()
+
+    assert bus.publish('detections', 1) == 1
+    assert bus.publish('fence_alert', 2) == 1
+    assert bus.publish('line_crossing', 3) == 0
+    bus.stop()
+
+    assert received == {'database': [1], 'alerts': [2]}
+    stats = bus.get_stats()
+    assert stats['published'] == 3
+    assert stats['sinks']['database']['processed'] == 1
+
+
+def test_slow_sink_does_not_block_publisher():
+    """輸出端處理中時發布者不等待；佇列滿時依 drop_oldest 保留最新訊息"""
+    release = threading.Event()
+    processed = []
+
+    def slow_handler(message):
+        release.wait(2)
+        processed.append(message.payload)
+
+    bus = ResultBus({'queue_size': 2, 'policy': 'drop_oldest'})
+    sink = bus.subscribe('websocket', slow_handler)
+    bus.start()
+
+    bus.publish('detections', 0)
+    time.sleep(0.05)  # 等待第一則訊息被取出並卡在處理中
+    start = time.perf_counter()
+    for i in range(1, 6):
+        bus.publish('detections', i)
+    assert time.perf_counter() - start < 0.1
+
+    release.set()
+    bus.stop()
+    assert processed == [0, 4, 5]
+    assert sink.get_stats()['dropped'] == 3
+
+
+def test_drop_newest_and_block_policies():
+    """drop_newest 捨棄新訊息；block 逾時後才捨棄"""
+    bus = ResultBus({'queue_size': 1, 'block_timeout': 0.05,
+                     'sinks': {'blocking': {'policy': 'block'}}})
+    newest = bus.subscribe('newest', lambda m: None, policy='drop_newest')
+    blocking = bus.subscribe('blocking', lambda m: None)
+    assert blocking.policy == 'block'
+
+    # 尚未啟動，佇列不會被消費
+    assert bus.publish('detections', 1) == 2
+    assert bus.publish('detections', 2) == 0
+    assert newest.get_stats()['dropped'] == 1
+    assert blocking.get_stats()['dropped'] == 1
+
+    bus.start()
+    bus.stop()
+    assert newest.get_stats()['processed'] == 1
+
+
+def test_subscribe_block_timeout():
+    """輸出端可指定自己的 block_timeout，配置仍可覆寫"""
+    bus = ResultBus({'policy': 'drop_oldest', 'sinks': {'tuned': {'block_timeout': 0.5}}})
+    database = bus.subscribe('database', lambda ms: None, queue_size=500, policy='block',
+                             block_timeout=5.0, batch_size=50)
+    assert (database.queue_size, database.policy, database.block_timeout) == (500, 'block', 5.0)
+    assert bus.subscribe('tuned', lambda m: None, block_timeout=5.0).block_timeout == 0.5
+    assert bus.subscribe('default', lambda m: None).block_timeout == 1.0
+
+
+class FakeDetector:
+    """不載入模型的偵測器替身"""
+
+    def __init__(self, **kwargs):
+        pass
+
+
+def test_callback_runs_on_sink_thread(monkeypatch):
+    """回調在輸出端執行緒中執行，只收到自己攝影機的結果，緩慢的回調不阻塞發布"""
+    monkeypatch.setattr(system_module, 'BaseDetector', FakeDetector)
+    system = system_module.MultiModalRecognitionSystem({})
+    calls = []
+    release = threading.Event()
+
+    def callback(camera_id, results):
+        release.wait(2)
+        calls.append((camera_id, results, threading.current_thread().name))
+
+    name = system.subscribe_callback('cam_a', callback)
+    assert name == 'callback-cam_a' and system.result_bus is not None
+
+    start = time.monotonic()
+    system.result_bus.publish('detections', {'camera_id': 'cam_a', 'results': [1]})
+    system.result_bus.publish('detections', {'camera_id': 'cam_b', 'results': [2]})
+    assert time.monotonic() - start < 0.5
+    assert calls == []
+
+    release.set()
+    system.result_bus.unsubscribe(name)
+    assert calls == [('cam_a', [1], 'ResultSink-callback-cam_a')]
+    system.result_bus.stop()
+
+
+def test_batch_sink_receives_backlog_together():
+    """批次輸出端一次收到積壓的多則訊息，配置可調整批次大小"""
+    batches = []
+    bus = ResultBus({'sinks': {'database': {'batch_size': 3}}})
+    sink = bus.subscribe('database', lambda ms: batches.append([m.payload for m in ms]),
+                         batch_size=50)
+    for i in range(7):
+        bus.publish('detections', i)  # 啟動前先累積
+    bus.start()
+    bus.stop()
+
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+    assert sink.get_stats()['batches'] == 3
+
+
+if __name__ == "__main__":
+    test_topics_are_routed_to_subscribed_sinks()
+    test_slow_sink_does_not_block_publisher()
+    test_drop_newest_and_block_policies()
+    test_subscribe_block_timeout()
+    with pytest.MonkeyPatch.context() as patch:
+        test_callback_runs_on_sink_thread(patch)
+    test_batch_sink_receives_backlog_together()
+    print("✅ 結果匯流排測試通過")
@@ -0,0 +1,179 @@
+"""
+辨識排程器測試
+確認優先順序 (延後 > 圍籬內 > 未辨識 > 面積)、時間預算的執行、每台攝影機各自的平均耗時、
+超出預算的延後/捨棄策略，以及系統在預算內只辨識部分物件並於下一幀優先處理被延後的物件
+"""
+
+import numpy as np
+
+import core.system as system_module
+from core.recognizer_base import DetailRecognizer
+from core.scheduler import RecognitionScheduler
+
+
+def detection(track_id, area, x=0):
+    """建立帶追蹤 ID 與面積的偵測"""
+    return {'class': 'car', 'confidence': 0.9, 'bbox': [x, 0, x + 10, 10],
+            'track_id': track_id, 'area': area}
+
+
+def test_priority_order(monkeypatch):
+    """延後的物件最優先，其次為圍籬內、尚未辨識，最後依面積由大到小"""
+    clock = [1000.0]
+    monkeypatch.setattr('core.scheduler.time.time', lambda: clock[0])
+    scheduler = RecognitionScheduler(time_budget=0.1, read_track_ttl=300)
+
+    detections = [detection(1, 100), detection(2, 900), detection(3, 50, x=500), detection(4, 400)]
+    in_fence = lambda d: d['bbox'][0] >= 500
+
+    scheduler.begin_frame('cam1')
+    assert scheduler.order('cam1', detections) == [1, 3, 0, 2]
+    assert scheduler.order('cam1', detections, in_fence) == [2, 1, 3, 0]
+
+    # 追蹤 2 已成功辨識、追蹤 1 被延後
+    scheduler.record_processed('cam1', detections[1], 0.01, {'license_plate': {'plate_number': 'X'}})
+    scheduler.record_skipped('cam1', detections[0])
+    scheduler.end_frame('cam1', skipped=1)
+    scheduler.begin_frame('cam1')
+    assert scheduler.order('cam1', detections, in_fence) == [0, 2, 3, 1]
+
+    # 辨識失敗不算已辨識；超過 read_track_ttl 後重新視為未辨識
+    scheduler.record_processed('cam1', detections[3], 0.01, {'license_plate': {'error': 'ocr'}})
+    assert scheduler.order('cam1', detections) == [0, 3, 2, 1]
+    clock[0] += 301
+    assert scheduler.order('cam1', detections)[-1] == 2
+
+
+def test_budget_enforcement(monkeypatch):
+    """每幀至少處理一個；之後已用時間加上平均耗時超過預算即停止，預算 0 表示不限制"""
+    clock = [1000.0]
+    monkeypatch.setattr('core.scheduler.time.time', lambda: clock[0])
+    scheduler = RecognitionScheduler(time_budget=0.1, camera_budgets={'free': 0})
+    assert scheduler.is_enabled('cam1') and not scheduler.is_enabled('free')
+
+    start = scheduler.begin_frame('cam1')
+    clock[0] += 0.5
+    assert scheduler.has_budget('cam1', start, processed_in_frame=0) is True
+    assert scheduler.has_budget('cam1', start, processed_in_frame=1) is False
+    assert scheduler.has_budget('free', start, processed_in_frame=5) is True
+
+    scheduler.record_processed('cam1', detection(1, 100), 0.04, {})
+    start = scheduler.begin_frame('cam1')
+    clock[0] += 0.05
+    assert scheduler.has_budget('cam1', start, 1) is True   # 0.05 + 0.04 <= 0.1
+    clock[0] += 0.02
+    assert scheduler.has_budget('cam1', start, 2) is False  # 0.07 + 0.04 > 0.1
+
+
+def test_avg_cost_is_per_camera(monkeypatch):
+    """慢速攝影機的辨識耗時不影響其他攝影機的預算判斷"""
+    clock = [1000.0]
+    monkeypatch.setattr('core.scheduler.time.time', lambda: clock[0])
+    scheduler = RecognitionScheduler(time_budget=0.1, cost_smoothing=0.5)
+
+    scheduler.record_processed('slow', detection(1, 100), 0.08, {})
+    scheduler.record_processed('slow', detection(1, 100), 0.04, {})
+    scheduler.record_processed('fast', detection(2, 100), 0.01, {})
+
+    stats = scheduler.get_stats()
+    assert stats['slow']['avg_cost'] == 0.06
+    assert stats['fast']['avg_cost'] == 0.01
+
+    slow_start = scheduler.begin_frame('slow')
+    fast_start = scheduler.begin_frame('fast')
+    clock[0] += 0.05
+    assert scheduler.has_budget('slow', slow_start, 1) is False
+    assert scheduler.has_budget('fast', fast_start, 1) is True
+
+
+def test_overflow_policy():
+    """defer 策略延後有追蹤 ID 的偵測，沒有追蹤 ID 或 drop 策略時捨棄"""
+    scheduler = RecognitionScheduler(time_budget=0.1, overflow='defer')
+    assert scheduler.record_skipped('cam1', detection(1, 100)) == 'deferred'
+    assert scheduler.record_skipped('cam1', detection(None, 100)) == 'dropped'
+    scheduler.end_frame('cam1', skipped=2)
+    stats = scheduler.get_stats()['cam1']
+    assert (stats['deferred'], stats['dropped'], stats['over_budget_frames']) == (1, 1, 1)
+
+    dropping = RecognitionScheduler(time_budget=0.1, overflow='drop')
+    assert dropping.record_skipped('cam1', detection(1, 100)) == 'dropped'
+    assert RecognitionScheduler(overflow='unknown').overflow == 'defer'
+
+
+class FakeDetector:
+    """每幀回傳三台車的偵測器替身 (面積由小到大)"""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def detect(self, image, conf_threshold=0.5, track=False):
+        return [detection(track_id, area, x=track_id * 20)
+                for track_id, area in ((1, 100), (2, 200), (3, 300))]
+
+
+class SlowPlateRecognizer(DetailRecognizer):
+    """每次辨識推進時鐘 40ms 的車牌模組替身"""
+
+    def __init__(self, clock):
+        super().__init__()
+        self.clock = clock
+        self.calls = []
+
+    @property
+    def name(self):
+        return 'license_plate'
+
+    @property
+    def target_classes(self):
+        return ['car']
+
+    def initialize(self):
+        pass
+
+    def recognize(self, image, detection):
+        self.calls.append(detection['track_id'])
+        self.clock[0] += 0.04
+        return {'plate_number': f"ABC-{detection['track_id']:04d}"}
+
+
+def test_system_respects_budget(monkeypatch):
+    """系統在 100ms 預算內辨識兩台車，被延後的車在下一幀最先辨識；未設預算的攝影機全部辨識"""
+    monkeypatch.setattr(system_module, 'BaseDetector', FakeDetector)
+    clock = [1000.0]
+    monkeypatch.setattr('core.scheduler.time.time', lambda: clock[0])
+
+    system = system_module.MultiModalRecognitionSystem({
+        'performance': {'recognition_budget': {'time_budget': 0.1, 'overflow': 'defer'}},
+        'cameras': [{'id': 'unlimited', 'recognition_time_budget': 0}]
+    })
+    recognizer = SlowPlateRecognizer(clock)
+    system.register_recognizer(recognizer)
+    image = np.zeros((120, 160, 3), dtype=np.uint8)
+
+    results = system.process_image(image, track=True, camera_id='cam1')
+    assert recognizer.calls == [3, 2]
+    assert results[0]['skipped'] == 'deferred'
+    assert 'skipped' not in results[1] and 'skipped' not in results[2]
+
+    recognizer.calls.clear()
+    system.process_image(image, track=True, camera_id='cam1')
+    assert recognizer.calls[0] == 1
+
+    recognizer.calls.clear()
+    system.process_image(image, track=True, camera_id='unlimited')
+    assert sorted(recognizer.calls) == [1, 2, 3]
+
+
+if __name__ == "__main__":
+    import pytest
+
+    with pytest.MonkeyPatch.context() as patch:
+        test_priority_order(patch)
+    with pytest.MonkeyPatch.context() as patch:
+        test_budget_enforcement(patch)
+    with pytest.MonkeyPatch.context() as patch:
+        test_avg_cost_is_per_camera(patch)
+    test_overflow_policy()
+    with pytest.MonkeyPatch.context() as patch:
+        test_system_respects_budget(patch)
+    print("✅ 辨識排程器測試通過")
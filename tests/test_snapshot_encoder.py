@@ -0,0 +1,124 @@
+"""
+截圖編碼工作池測試
+確認各等級依最長邊縮放並存入截圖儲存區，以及排隊工作數達到 max_pending 時
+依 overflow 策略捨棄截圖或在呼叫端編碼，不再排入新的影像幀
+"""
+
+import threading
+
+import cv2
+import numpy as np
+
+from database.snapshot_encoder import SnapshotEncoder
+from database.snapshot_store import SnapshotStore
+from utils.frame_artifacts import FrameArtifacts
+
+
+def test_tiers_are_resized_and_stored(tmp_path):
+    """縮圖與中尺寸依 max_size 縮小，full 保留原尺寸（含 10% 邊距）"""
+    store = SnapshotStore(tmp_path)
+    encoder = SnapshotEncoder(store, {'tiers': {
+        'thumbnail': {'max_size': 50, 'quality': 60},
+        'medium': {'max_size': 100, 'quality': 80},
+        'full': {'max_size': 0, 'quality': 90},
+    }})
+    frame = np.random.default_rng(0).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+
+    refs = encoder.submit(FrameArtifacts(frame), [100, 100, 500, 300]).result(timeout=10)
+    encoder.shutdown()
+
+    sizes = {
+        name: cv2.imdecode(np.frombuffer(store.get(ref), np.uint8), cv2.IMREAD_COLOR).shape[:2]
+        for name, ref in refs.items()
+    }
+    assert sizes == {'thumbnail': (25, 50), 'medium': (50, 100), 'full': (240, 480)}
+    assert encoder.get_stats()['encoded'] == 1
+    assert encoder.primary == 'medium'
+
+
+def test_empty_crop_produces_no_tiers(tmp_path):
+    """截圖範圍為空時不寫入任何檔案"""
+    encoder = SnapshotEncoder(SnapshotStore(tmp_path))
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+    assert encoder.submit(FrameArtifacts(frame), [150, 150, 200, 200]).result(timeout=10) == {}
+    encoder.shutdown()
+
+
+class BlockingStore:
+    """工作執行緒寫入時等待放行的截圖儲存區替身（呼叫端執行緒直接寫入）"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.threads = []
+
+    def put(self, data):
+        name = threading.current_thread().name
+        self.threads.append(name)
+        if name.startswith('SnapshotEncoder'):
+            self.started.set()
+            self.release.wait(10)
+        return f"ref-{len(self.threads)}"
+
+
+def _fill(encoder, store, frame):
+    """排入一個工作並等待它佔住唯一的工作執行緒"""
+    job = encoder.submit(FrameArtifacts(frame), [10, 10, 60, 60])
+    assert store.started.wait(10)
+    return job
+
+
+def test_full_pool_drops_snapshots():
+    """overflow 為 drop (預設) 時，超過 max_pending 的截圖直接回傳空結果並計入 dropped"""
+    store = BlockingStore()
+    encoder = SnapshotEncoder(store, {'workers': 1, 'max_pending': 1,
+                                      'tiers': {'thumbnail': {'max_size': 32}}})
+    assert encoder.overflow == 'drop'
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+    queued = _fill(encoder, store, frame)
+
+    dropped = encoder.submit(FrameArtifacts(frame), [10, 10, 60, 60])
+    assert dropped.done() and dropped.result() == {}
+    stats = encoder.get_stats()
+    assert (stats['dropped'], stats['pending'], stats['max_pending']) == (1, 1, 1)
+
+    store.release.set()
+    assert queued.result(timeout=10) == {'thumbnail': 'ref-1'}
+    # 工作完成後釋放名額，新的截圖再次排入工作池
+    assert encoder.submit(FrameArtifacts(frame), [10, 10, 60, 60]).result(timeout=10)
+    encoder.shutdown()
+    stats = encoder.get_stats()
+    assert (stats['encoded'], stats['dropped'], stats['pending']) == (2, 1, 0)
+    assert all(name.startswith('SnapshotEncoder') for name in store.threads)
+
+
+def test_full_pool_encodes_inline():
+    """overflow 為 inline 時，超過 max_pending 的截圖在呼叫端編碼完成後回傳"""
+    store = BlockingStore()
+    encoder = SnapshotEncoder(store, {'workers': 1, 'max_pending': 1, 'overflow': 'inline',
+                                      'tiers': {'thumbnail': {'max_size': 32}}})
+    frame = np.zeros((100, 100, 3), dtype=np.uint8)
+    queued = _fill(encoder, store, frame)
+
+    inline = encoder.submit(FrameArtifacts(frame), [10, 10, 60, 60])
+    assert inline.done() and inline.result() == {'thumbnail': 'ref-2'}
+    assert store.threads[1] == threading.current_thread().name
+
+    store.release.set()
+    queued.result(timeout=10)
+    encoder.shutdown()
+    stats = encoder.get_stats()
+    assert (stats['encoded'], stats['inline'], stats['dropped']) == (2, 1, 0)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_tiers_are_resized_and_stored(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_empty_crop_produces_no_tiers(Path(tmp))
+    test_full_pool_drops_snapshots()
+    test_full_pool_encodes_inline()
+    print("✅ 截圖編碼工作池測試通過")
@@ -0,0 +1,46 @@
+"""
+截圖儲存區測試
+確認內容雜湊命名、分層目錄、重複內容只寫一次，以及拒絕不合法的雜湊
+"""
+
+import hashlib
+
+import pytest
+
+from database.snapshot_store import SnapshotStore
+
+
+def test_put_is_content_addressed_and_deduplicated(tmp_path):
+    """相同內容回傳相同雜湊且只寫入一次，檔案放在分層目錄中"""
+    store = SnapshotStore(tmp_path)
+    data = b'\xff\xd8 fake jpeg \xff\xd9'
+
+    ref = store.put(data)
+    assert ref == hashlib.sha256(data).hexdigest()
+    assert store.put(data) == ref
+    assert store.path_for(ref) == tmp_path / ref[:2] / ref[2:4] / f"{ref}.jpg"
+    assert store.get(ref) == data
+    assert store.get_stats() == {'writes': 1, 'dedup_hits': 1, 'bytes_written': len(data)}
+
+    # 不留下暫存檔
+    assert [p.name for p in store.path_for(ref).parent.iterdir()] == [f"{ref}.jpg"]
+
+
+def test_invalid_refs_are_rejected(tmp_path):
+    """只接受 64 字元小寫十六進位，避免路徑穿越"""
+    store = SnapshotStore(tmp_path)
+    assert store.get('../../etc/passwd') is None
+    assert not store.exists('a' * 63)
+    with pytest.raises(ValueError):
+        store.path_for('../' + 'a' * 61)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_put_is_content_addressed_and_deduplicated(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_invalid_refs_are_rejected(Path(tmp))
+    print("✅ 截圖儲存區測試通過")
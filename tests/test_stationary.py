@@ -0,0 +1,168 @@
+"""
+靜止物件抑制測試
+確認 IoU 對應、靜止判定與重新辨識間隔、記錄過期、同一位置換車時不沿用上一台的結果，
+以及系統沿用上次的車牌辨識結果
+"""
+
+import numpy as np
+
+import core.system as system_module
+from core.recognizer_base import DetailRecognizer
+from core.stationary import StationaryObjectRegistry, bbox_iou_matrix
+
+
+CAR = {'class': 'car', 'confidence': 0.9, 'bbox': [100, 100, 300, 200]}
+
+
+def test_iou_matrix():
+    """相同框 IoU 為 1、不重疊為 0、部分重疊依面積計算，空輸入回傳對應形狀"""
+    boxes = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]])
+    iou = bbox_iou_matrix(boxes, boxes)
+    assert np.allclose(np.diag(iou), 1.0)
+    assert np.isclose(iou[0, 1], 50 / 150)
+    assert iou[0, 2] == 0.0
+    assert bbox_iou_matrix(boxes, np.zeros((0, 4))).shape == (3, 0)
+
+
+def test_matching_and_stationary_threshold():
+    """同位置同類別對應到同一記錄；持續 min_stationary_time 後抑制，每 recheck_interval 重新辨識"""
+    registry = StationaryObjectRegistry(iou_threshold=0.9, min_stationary_time=10,
+                                        recheck_interval=60, expire_after=30, max_gap=30)
+    entry, = registry.match([CAR], now=0)
+    assert registry.should_suppress(entry, now=0) is False
+
+    moved = {**CAR, 'bbox': [130, 100, 330, 200]}
+    truck = {**CAR, 'class': 'truck'}
+    same, other, new_class = registry.match([dict(CAR), moved, truck], now=5)
+    assert same is entry
+    assert other is not entry and new_class is not entry
+    assert registry.should_suppress(same, now=5) is False  # 尚未達到靜止時間
+
+    registry.match([dict(CAR)], now=12)
+    assert registry.should_suppress(entry, now=12) is True
+    registry.match([dict(CAR)], now=40)
+    assert registry.should_suppress(entry, now=40) is True
+    registry.match([dict(CAR)], now=66)
+    assert registry.should_suppress(entry, now=66) is False  # 超過 recheck_interval 重新辨識
+    assert registry.should_suppress(entry, now=67) is True
+
+    stats = registry.get_stats()
+    assert stats['suppressed'] == 3 and stats['rechecked'] == 1
+
+
+def test_entries_expire():
+    """超過 expire_after 未出現的記錄移除，再出現時重新計算靜止時間"""
+    registry = StationaryObjectRegistry(min_stationary_time=10, expire_after=30)
+    entry, = registry.match([CAR], now=0)
+    registry.match([], now=20)
+    assert registry.get_stats()['tracked'] == 1
+
+    registry.match([], now=31)
+    assert registry.get_stats()['tracked'] == 0
+    again, = registry.match([dict(CAR)], now=32)
+    assert again is not entry
+    assert registry.should_suppress(again, now=35) is False
+
+
+def test_another_car_in_same_spot():
+    """車輛離開後另一台停進同一位置 (中斷超過 max_gap 或追蹤 ID 不同)，重新計算且不沿用車牌"""
+    registry = StationaryObjectRegistry(min_stationary_time=10, recheck_interval=60,
+                                        expire_after=30, max_gap=5)
+    for now in range(0, 16, 2):
+        entry, = registry.match([dict(CAR)], now=now)
+    entry.details = {'license_plate': {'plate_number': 'ABC-1234'}}
+    assert registry.should_suppress(entry, now=14) is True
+
+    # 第一台離開 20 秒 (尚未過期)，第二台停進同一格
+    second, = registry.match([dict(CAR)], now=34)
+    assert second.details is None and second.first_seen == 34
+    assert registry.should_suppress(second, now=34) is False
+
+    # 持續追蹤中：同一追蹤 ID 照常抑制，追蹤 ID 改變時立即重新計算
+    tracked = StationaryObjectRegistry(min_stationary_time=10, max_gap=5)
+    for now in range(0, 16, 2):
+        entry, = tracked.match([{**CAR, 'track_id': 7}], now=now)
+    entry.details = {'license_plate': {'plate_number': 'ABC-1234'}}
+    assert tracked.should_suppress(entry, now=14) is True
+    assert tracked.match([{**CAR, 'track_id': 7}], now=16)[0].details is not None
+
+    other, = tracked.match([{**CAR, 'track_id': 8}], now=18)
+    assert other.track_id == 8 and other.details is None
+    assert tracked.should_suppress(other, now=18) is False
+    assert registry.get_stats()['reset'] == 1 and tracked.get_stats()['reset'] == 1
+
+
+class FakeDetector:
+    """每幀回傳同一台停放車輛的偵測器替身"""
+
+    def __init__(self, **kwargs):
+        pass
+
+    def detect(self, image, conf_threshold=0.5, track=False):
+        return [dict(CAR)]
+
+
+class CountingPlateRecognizer(DetailRecognizer):
+    """計算辨識次數的車牌模組替身"""
+
+    calls = 0
+
+    @property
+    def name(self):
+        return 'license_plate'
+
+    @property
+    def target_classes(self):
+        return ['car']
+
+    def initialize(self):
+        pass
+
+    def recognize(self, image, detection):
+        CountingPlateRecognizer.calls += 1
+        return {'plate_number': 'ABC-1234', 'confidence': 0.9}
+
+
+def test_system_reuses_cached_plate(monkeypatch):
+    """靜止車輛沿用上次的車牌結果且不重新辨識，超過重新辨識間隔才再執行"""
+    monkeypatch.setattr(system_module, 'BaseDetector', FakeDetector)
+    clock = [1000.0]
+    monkeypatch.setattr('core.stationary.time.time', lambda: clock[0])
+
+    system = system_module.MultiModalRecognitionSystem({'performance': {
+        'stationary_suppression': {'enabled': True, 'min_stationary_time': 5,
+                                   'recheck_interval': 60, 'expire_after': 300,
+                                   'max_gap': 300}
+    }})
+    CountingPlateRecognizer.calls = 0
+    system.register_recognizer(CountingPlateRecognizer())
+    image = np.zeros((240, 320, 3), dtype=np.uint8)
+
+    first, = system.process_image(image, camera_id='cam1')
+    assert 'stationary' not in first
+    clock[0] += 10
+    second, = system.process_image(image, camera_id='cam1')
+    assert second['stationary'] is True
+    assert second['details']['license_plate']['plate_number'] == 'ABC-1234'
+    assert CountingPlateRecognizer.calls == 1
+
+    clock[0] += 60
+    third, = system.process_image(image, camera_id='cam1')
+    assert 'stationary' not in third
+    assert CountingPlateRecognizer.calls == 2
+
+    # 未指定攝影機時不抑制
+    system.process_image(image)
+    assert CountingPlateRecognizer.calls == 3
+
+
+if __name__ == "__main__":
+    import pytest
+
+    test_iou_matrix()
+    test_matching_and_stationary_threshold()
+    test_entries_expire()
+    test_another_car_in_same_spot()
+    with pytest.MonkeyPatch.context() as patch:
+        test_system_reuses_cached_plate(patch)
+    print("✅ 靜止物件抑制測試通過")
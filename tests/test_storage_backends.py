@@ -0,0 +1,284 @@
+"""
+儲存後端測試
+同一組測試分別在 SQLite 與 PostgreSQL 後端執行：批次寫入與分頁查詢、入侵截圖延後取得、
+車牌模糊搜尋與統計彙總。SQLite 使用暫存檔案；PostgreSQL 只在設定
+TEST_POSTGRES_DATABASE（專用測試資料庫，連線參數取自 PGHOST / PGPORT / PGUSER / PGPASSWORD）時執行。
+另以記錄 SQL 的連線替身確認 DatabaseHandler 使用共用的資料列準備與截圖處理後送出的參數
+"""
+
+import base64
+import os
+import sqlite3
+import tempfile
+import uuid
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from database import DatabaseHandler, SQLiteHandler, StorageBackend, create_storage
+from utils.frame_artifacts import FrameArtifacts
+
+
+def postgres_config():
+    """PostgreSQL 測試資料庫配置（未設定時回傳 None）"""
+    database = os.environ.get('TEST_POSTGRES_DATABASE')
+    if not database:
+        return None
+    return {
+        'type': 'postgresql',
+        'host': os.environ.get('PGHOST', 'localhost'),
+        'port': int(os.environ.get('PGPORT', 5432)),
+        'database': database,
+        'user': os.environ.get('PGUSER', 'postgres'),
+        'password': os.environ.get('PGPASSWORD', ''),
+        'plate_search': {'backend': 'memory'},
+        'summary': {'enabled': True, 'flush_interval': 3600},
+    }
+
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def storage(request, tmp_path):
+    """依參數建立儲存後端（每次測試使用不同的攝影機 ID，PostgreSQL 既有資料不影響結果）"""
+    if request.param == 'sqlite':
+        config = {'type': 'sqlite', 'sqlite': {'path': str(tmp_path / 'surveillance.db')}}
+    else:
+        config = postgres_config()
+        if config is None:
+            pytest.skip("未設定 TEST_POSTGRES_DATABASE")
+        import psycopg2
+        from database.init_db import create_tables
+        conn = psycopg2.connect(**{key: config[key] for key in ('host', 'port', 'database', 'user', 'password')})
+        create_tables(conn)
+        conn.cursor().execute(
+            (Path(__file__).parent.parent / 'database' / 'migrations'
+             / 'create_fence_intrusions_table.sql').read_text(encoding='utf-8'))
+        conn.commit()
+        conn.close()
+    backend = create_storage(config)
+    yield backend
+    backend.close()
+
+
+def make_results(count, start, plates=()):
+    """產生辨識結果（每秒一筆，前幾筆帶指定車牌）"""
+    results = []
+    for i in range(count):
+        details = {}
+        if i < len(plates):
+            details['license_plate'] = {'plate_number': plates[i], 'confidence': 0.9, 'is_valid': True}
+        results.append({
+            'timestamp': (start - timedelta(seconds=i)).isoformat(),
+            'base_detection': {'class': 'car' if details else 'person', 'confidence': 0.5,
+                               'bbox': [i, 0, i + 10, 10]},
+            'details': details
+        })
+    return results
+
+
+def test_batch_write_and_keyset_pages(storage):
+    """一批寫入多幀，依 (timestamp, id) 由新到舊分頁取回全部且不重複"""
+    camera_id = f"test-{uuid.uuid4().hex[:8]}"
+    start = datetime.now().astimezone()
+    ids = storage.save_detections_batch([
+        (camera_id, make_results(4, start), None),
+        (camera_id, make_results(3, start - timedelta(minutes=1)), None),
+    ])
+    assert ids is not None and len(ids) == 7
+
+    seen, cursor = [], None
+    while True:
+        page = storage.query_detections(camera_id=camera_id, cursor=cursor, limit=3,
+                                        columns=['object_class'])
+        seen.extend(page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+    assert sorted(item['id'] for item in seen) == sorted(ids)
+    timestamps = [item['timestamp'] for item in seen]
+    assert timestamps == sorted(timestamps, reverse=True)
+    assert set(seen[0]) == {'id', 'timestamp', 'object_class'}
+
+    assert len(storage.get_recent_detections(camera_id=camera_id, limit=5)) == 5
+
+
+def test_fence_intrusion_snapshot_is_fetched_separately(storage):
+    """入侵記錄列表只帶 snapshot_url，截圖內容由 get_fence_intrusion_snapshot 取得"""
+    fence_id = f"fence-{uuid.uuid4().hex[:8]}"
+    assert storage.save_fence_intrusion({
+        'fence_id': fence_id, 'fence_name': '測試圍籬', 'object_class': 'person',
+        'confidence': 0.8, 'bbox': [1, 2, 3, 4], 'camera_id': 'cam1', 'camera_name': '攝影機',
+        'snapshot_jpeg': b'\xff\xd8jpeg', 'timestamp': datetime.now().astimezone().isoformat()
+    })
+
+    items = storage.query_fence_intrusions(fence_id=fence_id)['items']
+    assert len(items) == 1
+    item = items[0]
+    assert item['bbox'] == [1, 2, 3, 4]
+    assert 'snapshot_base64' not in item
+    assert item['snapshot_url'] == f"/api/fence_intrusions/{item['id']}/snapshot"
+
+    snapshot = storage.get_fence_intrusion_snapshot(item['id'])
+    assert base64.b64decode(snapshot['snapshot_base64']) == b'\xff\xd8jpeg'
+    assert storage.get_fence_intrusion_snapshot(-1) is None
+    assert storage.get_recent_fence_intrusions(fence_id=fence_id)[0]['id'] == item['id']
+
+
+def test_plate_search_and_summary(storage):
+    """寫入的車牌可模糊搜尋，每小時彙總立即反映"""
+    camera_id = f"test-{uuid.uuid4().hex[:8]}"
+    digits = f"{uuid.uuid4().int % 10 ** 6:06d}"
+    plate = f"QA-{digits}"  # 搜尋鍵折疊為 0A...
+    now = datetime.now().astimezone()
+    storage.save_detections_batch([(camera_id, make_results(5, now, [plate, plate]), None)])
+
+    results = storage.search_plates(f"OA{digits}", max_distance=1)
+    assert results[0]['plate_number'] == plate
+    assert results[0]['distance'] == 0 and results[0]['count'] == 2
+
+    stats = storage.get_summary_stats(now - timedelta(hours=1), camera_id)
+    assert stats['total_detections'] == 5
+    assert stats['total_plates'] == 2
+    assert stats['by_class'] == {'person': 3, 'car': 2}
+
+
+class RecordingCursor:
+    """記錄 SQL 與參數的 psycopg2 游標替身（execute_values 以 mogrify 組合 VALUES）"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.statements = connection.statements
+        self._values = []
+        self._result = []
+
+    def mogrify(self, template, args):
+        self._values.append(tuple(args))
+        return b'(?)'
+
+    def execute(self, sql, params=None):
+        sql = sql.decode('utf-8') if isinstance(sql, bytes) else sql
+        values, self._values = self._values, []
+        self.statements.append((sql, values or params))
+        if 'INSERT INTO detections' in sql:
+            start = self.connection.next_id
+            self.connection.next_id += len(values)
+            self._result = [(start + i,) for i in range(len(values))]
+        elif 'INSERT INTO plate_records' in sql:
+            self._result = [(value[1], date.today()) for value in values]
+        elif 'INSERT INTO fence_intrusions' in sql:
+            self._result = [(77,)]
+
+    def fetchall(self):
+        return self._result
+
+    def fetchone(self):
+        return self._result[0]
+
+
+class RecordingConnection:
+    """記錄交易的 psycopg2 連線替身"""
+
+    encoding = 'UTF8'
+    closed = 0
+
+    def __init__(self):
+        self.statements = []
+        self.next_id = 1
+        self.commits = 0
+
+    def cursor(self):
+        return RecordingCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+
+class RecordingPool:
+    """只有一條連線的連線池替身"""
+
+    def __init__(self):
+        self.conn = RecordingConnection()
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn, close=False):
+        pass
+
+
+def test_postgres_handler_writes_shared_rows():
+    """DatabaseHandler 經 StorageBackend 準備資料列與截圖，以兩個 VALUES 語句在一個交易寫入"""
+    handler = DatabaseHandler({'enabled': False})
+    assert isinstance(handler, StorageBackend)
+    handler.config['enabled'] = True
+    handler.pool = RecordingPool()
+    conn = handler.pool.conn
+
+    artifacts = FrameArtifacts(np.full((120, 160, 3), 128, dtype=np.uint8))
+    now = datetime.now().astimezone()
+    ids = handler.save_detections_batch([
+        ('cam1', make_results(3, now, ['ABC-1234', 'ABC-1234']), artifacts),
+        ('cam1', [{**make_results(1, now)[0], 'stationary': True}], None),
+    ])
+    assert ids == [1, 2, 3]
+    assert conn.commits == 1
+
+    (detection_sql, detections), (plate_sql, plates) = conn.statements
+    assert 'INSERT INTO detections' in detection_sql
+    assert [row[0] for row in detections] == ['cam1'] * 3
+    assert detections[0][1] == datetime.fromisoformat(now.isoformat())
+    assert [row[2] for row in detections] == ['car', 'car', 'person']
+    assert 'ON CONFLICT (plate_number, first_seen_date)' in plate_sql
+    assert 'snapshot_base64' in plate_sql
+    assert len(plates) == 1
+    detection_id, plate_number, is_valid, _, snapshot, count = plates[0]
+    assert (detection_id, plate_number, is_valid, count) == (1, 'ABC-1234', True, 2)
+    assert base64.b64decode(snapshot)[:2] == b'\xff\xd8'
+
+    conn.statements.clear()
+    assert handler.save_fence_intrusion({
+        'fence_id': 'f1', 'fence_name': '圍籬', 'object_class': 'person', 'confidence': 0.8,
+        'bbox': [1, 2, 3, 4], 'snapshot_jpeg': b'\xff\xd8jpeg', 'timestamp': now.isoformat()
+    })
+    (intrusion_sql, params), = conn.statements
+    assert 'snapshot_base64' in intrusion_sql
+    assert params[4:8] == (1, 2, 3, 4)
+    assert base64.b64decode(params[10]) == b'\xff\xd8jpeg'
+
+
+def test_sqlite_uses_wal_and_reloads_plate_index():
+    """SQLite 以 WAL 模式開啟，重新開啟時由 plate_records 載入車牌索引"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = {'type': 'sqlite', 'sqlite': {'path': os.path.join(directory, 'db', 'test.db')}}
+        storage = create_storage(config)
+        assert isinstance(storage, SQLiteHandler)
+        storage.save_detections_batch([('cam1', make_results(1, datetime.now(), ['ABC-1234']), None)])
+        storage.close()
+
+        conn = sqlite3.connect(config['sqlite']['path'])
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        conn.close()
+
+        storage = create_storage(config)
+        assert storage.search_plates('A8C1234')[0]['plate_number'] == 'ABC-1234'
+        assert storage.get_write_stats()['transactions'] == 0
+        storage.close()
+
+    with pytest.raises(ValueError):
+        create_storage({'type': 'mysql'})
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        backend = create_storage({'type': 'sqlite', 'sqlite': {'path': os.path.join(directory, 'test.db')}})
+        test_batch_write_and_keyset_pages(backend)
+        test_fence_intrusion_snapshot_is_fetched_separately(backend)
+        test_plate_search_and_summary(backend)
+        backend.close()
+    test_postgres_handler_writes_shared_rows()
+    test_sqlite_uses_wal_and_reloads_plate_index()
+    print("✅ 儲存後端測試通過")
@@ -0,0 +1,137 @@
+"""
+統計彙總測試
+確認增量依 (攝影機, 小時, 類別) 累計、寫入失敗時保留、提交後的錯誤不放回增量，以及統計結果的合併
+"""
+
+from datetime import datetime
+
+from database.summary import SummaryAggregator, hour_bucket, summarize
+
+
+class FailingHandler:
+    """無法取得連線的資料庫替身"""
+
+    batch_page_size = 500
+
+    def get_connection(self):
+        raise ConnectionError("database down")
+
+    def return_connection(self, conn):
+        pass
+
+
+class SummaryCursor:
+    """execute_values 用的游標替身"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def mogrify(self, template, args):
+        return b'(?)'
+
+    def execute(self, sql, params=None):
+        pass
+
+
+class SummaryConnection:
+    """記錄提交次數的連線替身"""
+
+    encoding = 'UTF8'
+    closed = 0
+
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return SummaryCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class ReturnFailingHandler:
+    """提交後歸還連線失敗的資料庫替身"""
+
+    batch_page_size = 500
+
+    def __init__(self):
+        self.conn = SummaryConnection()
+
+    def get_connection(self):
+        return self.conn
+
+    def return_connection(self, conn):
+        raise RuntimeError("pool closed")
+
+
+def make_row(camera_id, timestamp, object_class, plate=None):
+    """prepare_detection_rows 格式的資料列"""
+    return {'camera_id': camera_id, 'timestamp': timestamp, 'object_class': object_class,
+            'confidence': 0.5, 'plate': plate}
+
+
+def test_deltas_accumulate_and_survive_failed_flush():
+    """同一小時同類別合併；寫入失敗時增量放回並合併後續資料"""
+    aggregator = SummaryAggregator(FailingHandler(), {})
+    aggregator.record_rows([
+        make_row('cam1', '2026-10-19T08:05:00', 'car', {'plate_number': 'ABC-1234', 'is_valid': True}),
+        make_row('cam1', '2026-10-19T08:59:59', 'car', {'plate_number': 'XX', 'is_valid': False}),
+        make_row('cam1', '2026-10-19T09:00:00', 'car'),
+        make_row('cam2', '2026-10-19T08:30:00', 'person'),
+    ])
+
+    assert aggregator.flush() == 0
+    aggregator.record_rows([make_row('cam1', '2026-10-19T08:10:00', 'car')])
+
+    deltas = aggregator.pending_deltas()
+    assert deltas[('cam1', datetime(2026, 10, 19, 8), 'car')] == [3, 1.5, 2, 1]
+    assert deltas[('cam1', datetime(2026, 10, 19, 9), 'car')] == [1, 0.5, 0, 0]
+    assert aggregator.get_stats()['failures'] == 1
+
+    # 帶時區的時間轉為本地整點
+    aware = datetime(2026, 10, 19, 8, 45).astimezone()
+    assert hour_bucket(aware.isoformat()) == datetime(2026, 10, 19, 8)
+
+
+def test_post_commit_error_does_not_restore_deltas():
+    """交易已提交後才失敗時不放回增量 (否則下次寫入會重複累加)，也不計為寫入失敗"""
+    handler = ReturnFailingHandler()
+    aggregator = SummaryAggregator(handler, {})
+    aggregator.record_rows([make_row('cam1', '2026-10-19T08:05:00', 'car'),
+                            make_row('cam2', '2026-10-19T08:05:00', 'car')])
+
+    assert aggregator.flush() == 2
+    assert handler.conn.commits == 1 and handler.conn.rollbacks == 0
+    assert aggregator.pending_deltas() == {}
+    stats = aggregator.get_stats()
+    assert (stats['failures'], stats['post_commit_errors'], stats['upserted']) == (0, 1, 2)
+    assert aggregator.flush() == 0  # 沒有殘留的增量
+
+
+def test_summarize_merges_rows():
+    """合併多列為總數、成功率與依類別、小時的分布"""
+    rows = [
+        ('cam1', datetime(2026, 10, 19, 8), 'car', 10, 8.0, 4, 3),
+        ('cam2', datetime(2026, 10, 19, 8), 'person', 20, 10.0, 0, 0),
+        ('cam1', datetime(2026, 10, 19, 9), 'car', 5, 4.0, 0, 0),
+    ]
+    stats = summarize(rows)
+    assert stats['total_detections'] == 35
+    assert stats['total_plates'] == 4
+    assert stats['success_rate'] == 0.75
+    assert stats['by_class'] == {'person': 20, 'car': 15}
+    assert stats['by_camera'] == {'cam1': 15, 'cam2': 20}
+    assert stats['by_hour'] == [{'hour': '2026-10-19T08:00:00', 'count': 30},
+                                {'hour': '2026-10-19T09:00:00', 'count': 5}]
+    assert summarize([])['success_rate'] == 0.0
+
+
+if __name__ == "__main__":
+    test_deltas_accumulate_and_survive_failed_flush()
+    test_post_commit_error_does_not_restore_deltas()
+    test_summarize_merges_rows()
+    print("✅ 統計彙總測試通過")
@@ -0,0 +1,62 @@
+"""
+絆線測試
+確認跨越方向、車道計數、類型篩選與停在線上時不重複計數
+"""
+
+from modules.tripwire import Tripwire, TripwireManager
+
+
+def _detection(track_id, x, y, obj_class='car'):
+    """以底部中心 (x, y) 建立偵測結果"""
+    return {'class': obj_class, 'confidence': 0.9,
+            'bbox': [x - 10, y - 30, x + 10, y], 'track_id': track_id}
+
+
+def _make_manager():
+    manager = TripwireManager()
+    # 水平線 (0,100)->(200,100): 右手邊為下方，由下往上為 'in'
+    manager.add_tripwire(Tripwire('entry', '入口', (0, 100), (200, 100),
+                                  lane='gate', target_classes=['car']))
+    manager.add_tripwire(Tripwire('exit', '出口', (300, 100), (500, 100), lane='gate'))
+    return manager
+
+
+def test_crossing_direction_and_lane_counts():
+    """跨越方向正確，計數依絆線與車道彙總"""
+    manager = _make_manager()
+    events = []
+    for y_up, y_down in ((150, 50), (120, 80), (90, 120)):
+        events += manager.update([_detection(1, 100, y_up), _detection(2, 400, y_down)], now=0.0)
+
+    assert [(e['tripwire_id'], e['direction'], e['track_id']) for e in events] == [
+        ('entry', 'in', 1), ('exit', 'out', 2)
+    ]
+    assert manager.get_counts()['entry']['in'] == 1
+    assert manager.get_lane_counts() == {'gate': {'in': 1, 'out': 1}}
+
+
+def test_no_double_count_on_line_and_class_filter():
+    """停在線上再離開只計一次；非目標類型不計數"""
+    manager = _make_manager()
+    for y in (150, 100, 100, 60):
+        manager.update([_detection(1, 100, y), _detection(2, 120, y, 'person')], now=0.0)
+
+    assert manager.get_counts()['entry'] == {'name': '入口', 'lane': 'gate', 'in': 1, 'out': 0}
+    assert manager.total_crossings == 1
+
+
+def test_stale_tracks_are_expired():
+    """消失超過 track_timeout 的追蹤位置會被清除，不會與新出現的位置連線"""
+    manager = _make_manager()
+    manager.update([_detection(1, 100, 150)], now=0.0)
+    manager.update([], now=10.0)
+    assert manager.get_stats()['tracked'] == 0
+
+    assert manager.update([_detection(1, 100, 50)], now=10.5) == []
+
+
+if __name__ == "__main__":
+    test_crossing_direction_and_lane_counts()
+    test_no_double_count_on_line_and_class_filter()
+    test_stale_tracks_are_expired()
+    print("✅ 絆線測試通過")
@@ -0,0 +1,139 @@
+"""
+電子圍籬批次判定測試
+確認向量化的 check_detections 與逐一 check_detection 結果一致
+"""
+
+import numpy as np
+
+from modules.virtual_fence import VirtualFence, VirtualFenceManager
+
+
+FRAME_SHAPE = (720, 1280, 3)
+
+
+def _make_fences():
+    return [
+        VirtualFence("f1", "圍籬 1", [(100, 100), (500, 100), (500, 400), (100, 400)],
+                     target_classes=["person"], min_confidence=0.5),
+        VirtualFence("f2", "圍籬 2", [(300, 200), (900, 150), (1000, 600), (250, 650)],
+                     target_classes=["car", "truck"], min_confidence=0.6),
+        VirtualFence("f3", "圍籬 3", [(0, 0), (1280, 0), (1280, 120), (0, 120)]),
+    ]
+
+
+def _make_sequence(frames: int = 20, objects: int = 40, seed: int = 7):
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform([0, 0], [1200, 650], size=(objects, 2))
+    classes = rng.choice(["person", "car", "truck", "dog"], size=objects)
+    sequence = []
+    for _ in range(frames):
+        pos += rng.normal(0, 40, size=pos.shape)
+        np.clip(pos, 0, [1200, 650], out=pos)
+        detections = []
+        for t in range(objects):
+            detection = {
+                'class': str(classes[t]),
+                'confidence': float(rng.uniform(0.3, 1.0)),
+                'bbox': [int(pos[t, 0]), int(pos[t, 1]), int(pos[t, 0]) + 50, int(pos[t, 1]) + 70],
+            }
+            if t % 5:  # 部分物件沒有追蹤 ID
+                detection['track_id'] = t
+            detections.append(detection)
+        sequence.append(detections)
+    return sequence
+
+
+def test_vectorized_matches_per_pair():
+    """向量化與逐一判定產生相同的事件與追蹤狀態"""
+    frame_size = (FRAME_SHAPE[1], FRAME_SHAPE[0])
+    reference = _make_fences()
+    manager = VirtualFenceManager()
+    for fence in _make_fences():
+        manager.add_fence(fence)
+
+    for detections in _make_sequence():
+        expected = []
+        for detection in detections:
+            for fence in reference:
+                event = fence.check_detection(detection, frame_size)
+                if event:
+                    expected.append((event['fence_id'], event.get('track_id'), tuple(event['bbox'])))
+
+        actual = [
+            (e['fence_id'], e.get('track_id'), tuple(e['bbox']))
+            for e in manager.check_detections(detections, FRAME_SHAPE)
+        ]
+        assert actual == expected
+
+    for fence in reference:
+        batched = manager.fences[fence.fence_id]
+        assert batched.tracked_objects.keys() == fence.tracked_objects.keys()
+        for track_id, state in fence.tracked_objects.items():
+            assert batched.tracked_objects[track_id].in_zone == state.in_zone
+            assert batched.tracked_objects[track_id].triggered == state.triggered
+
+
+def test_mask_lookup_matches_point_polygon_test():
+    """遮罩查表與 cv2.pointPolygonTest 一致（邊緣半像素內除外）"""
+    import cv2
+
+    fence = _make_fences()[1]
+    points = np.random.default_rng(3).integers(0, 1280, size=(5000, 2))
+    inside = fence.contains_points(points, (1280, 720))
+
+    for (x, y), hit in zip(points, inside):
+        distance = cv2.pointPolygonTest(fence.points, (int(x), int(y)), True)
+        if abs(distance) > 0.5:
+            assert hit == (distance > 0)
+
+
+
+def test_cached_overlay_matches_draw_on_frame():
+    """快取圖層的繪製結果與單一圍籬 draw_on_frame() 相同"""
+    fence = _make_fences()[0]
+    frame = np.random.default_rng(5).integers(0, 255, (720, 1280, 3), dtype=np.uint8)
+
+    expected = frame.copy()
+    fence.draw_on_frame(expected)
+
+    manager = VirtualFenceManager()
+    manager.add_fence(fence)
+    for _ in range(2):  # 第二次使用快取
+        actual = frame.copy()
+        manager.draw_all_fences(actual)
+        assert np.array_equal(actual, expected)
+
+
+
+def test_expiry_heap_removes_only_stale_objects():
+    """到期排程只清除超過 object_timeout 未出現的物件，並延後仍在更新的物件"""
+    fence = VirtualFence("zone", "區域", [(0, 0), (100, 0), (100, 100), (0, 100)])
+    fence.object_timeout = 2.0
+
+    for track_id in range(3):
+        detection = {'class': 'person', 'confidence': 0.9,
+                     'bbox': [10, 10, 50, 50], 'track_id': track_id}
+        fence.update_state(detection, True, current_time=100.0)
+
+    # 物件 0 持續出現，其他物件消失
+    detection = {'class': 'person', 'confidence': 0.9,
+                 'bbox': [10, 10, 50, 50], 'track_id': 0}
+    fence.update_state(detection, True, current_time=101.5)
+
+    fence.cleanup_old_objects(current_time=101.0)
+    assert len(fence.tracked_objects) == 3  # 尚未到期
+
+    fence.cleanup_old_objects(current_time=102.5)
+    assert list(fence.tracked_objects) == [0]
+    assert fence.memory_footprint()['scheduled'] == 1  # 物件 0 已依新時間重新排程
+
+    fence.cleanup_old_objects(current_time=104.0)
+    assert not fence.tracked_objects
+
+
+if __name__ == "__main__":
+    test_vectorized_matches_per_pair()
+    test_mask_lookup_matches_point_polygon_test()
+    test_cached_overlay_matches_draw_on_frame()
+    test_expiry_heap_removes_only_stale_objects()
+    print("✅ 電子圍籬批次判定測試通過")
@@ -0,0 +1,61 @@
+"""
+統計 API 測試
+確認 /api/stats 的 hours 參數：預設 24 小時、超出範圍時限制在 1 小時到 366 天、格式錯誤回傳 400
+"""
+
+from datetime import datetime, timedelta
+
+import web_server
+
+
+class FakeStorage:
+    """記錄查詢起始時間的儲存後端替身"""
+
+    summary = None
+    snapshot_encoder = None
+
+    def __init__(self):
+        self.since = []
+
+    def get_summary_stats(self, since, camera_id=None):
+        self.since.append(since)
+        return {'total_detections': 3}
+
+    def get_write_stats(self):
+        return {}
+
+    def get_pool_stats(self):
+        return {}
+
+
+def test_stats_hours_parameter(monkeypatch):
+    """hours 格式錯誤回傳 400，負數或過大的值限制在允許範圍內"""
+    storage = FakeStorage()
+    monkeypatch.setattr(web_server, 'db_handler', storage)
+    client = web_server.app.test_client()
+
+    response = client.get('/api/stats')
+    assert response.status_code == 200
+    assert response.get_json()['summary'] == {'hours': 24, 'total_detections': 3}
+
+    for value, expected in (('-5', 1), ('0', 1), ('100000000', 366 * 24), ('48', 48)):
+        response = client.get(f'/api/stats?hours={value}')
+        assert response.status_code == 200
+        assert response.get_json()['summary']['hours'] == expected
+        elapsed = datetime.now() - storage.since[-1]
+        assert timedelta(hours=expected) <= elapsed < timedelta(hours=expected, minutes=1)
+
+    queries = len(storage.since)
+    for value in ('abc', '1.5', ''):
+        response = client.get(f'/api/stats?hours={value}')
+        assert response.status_code == 400
+        assert response.get_json()['success'] is False
+    assert len(storage.since) == queries  # 參數錯誤時不查詢
+
+
+if __name__ == "__main__":
+    import pytest
+
+    with pytest.MonkeyPatch.context() as patch:
+        test_stats_hours_parameter(patch)
+    print("✅ 統計 API 測試通過")
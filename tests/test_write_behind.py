@@ -0,0 +1,282 @@
+"""
+Write-behind 寫入測試
+確認資料庫無法連線時資料落地暫存、恢復後依序重送，佇列滿時的背壓
+(逾時項目在背景執行緒準備與落地暫存)、資料錯誤的批次逐筆重寫只捨棄出錯的記錄，
+以及交易提交後的錯誤不落地暫存、不重送
+"""
+
+import json
+import threading
+
+import psycopg2
+
+from database.handler import DatabaseHandler
+from database.storage import PostCommitError
+from database.write_behind import WriteBehindWriter
+
+
+class FlakyDatabase:
+    """記錄寫入內容的資料庫替身，available 為 False 時模擬連線中斷"""
+
+    def __init__(self):
+        self.available = True
+        self.fail_after_commit = False
+        self.bad_classes = set()  # 含這些類別的交易拋出資料錯誤
+        self.rows = []
+        self.prepare_threads = []
+        self._handler = DatabaseHandler({'enabled': False})
+
+    def prepare_detection_rows(self, frames):
+        self.prepare_threads.append(threading.current_thread().name)
+        return self._handler.prepare_detection_rows(frames)
+
+    def write_detection_rows(self, rows):
+        if not self.available:
+            raise psycopg2.OperationalError("server closed the connection")
+        if any(row['object_class'] in self.bad_classes for row in rows):
+            raise psycopg2.DataError("invalid input syntax")
+        self.rows.extend(row['object_class'] for row in rows)
+        ids = list(range(len(rows)))
+        if self.fail_after_commit:
+            raise PostCommitError(ids, psycopg2.OperationalError("connection lost after commit"))
+        return ids
+
+    def write_fence_intrusion(self, data):
+        if not self.available:
+            raise psycopg2.OperationalError("server closed the connection")
+        self.rows.append(data['fence_id'])
+        return len(self.rows)
+
+
+def _frame(*classes):
+    return [('cam', [{'timestamp': '2026-01-01T00:00:00+08:00',
+                      'base_detection': {'class': c, 'confidence': 0.9, 'bbox': [0, 0, 10, 10]},
+                      'details': {}} for c in classes], None)]
+
+
+def test_spill_and_replay_in_order(tmp_path):
+    """連線中斷時落地暫存，恢復後先重送暫存再寫入新資料"""
+    db = FlakyDatabase()
+    writer = WriteBehindWriter(db, {'journal_path': str(tmp_path / 'spill.jsonl'),
+                                    'dead_letter_path': str(tmp_path / 'dead.jsonl'),
+                                    'retry_interval': 0})
+
+    db.available = False
+    writer.flush(writer._to_records([('detections', _frame('car', 'bus'))]))
+    writer.flush(writer._to_records([('intrusion', {'fence_id': 'gate'})]))
+    assert not writer.healthy
+    assert writer.get_stats()['spilled'] == 3
+    assert db.rows == []
+
+    # 仍無法連線：重送失敗，暫存內容保留
+    writer._replay_if_due()
+    assert writer.journal.pending()
+
+    db.available = True
+    writer._replay_if_due()
+    writer.flush(writer._to_records([('detections', _frame('truck'))]))
+
+    assert db.rows == ['car', 'bus', 'gate', 'truck']
+    assert writer.healthy
+    assert not writer.journal.pending()
+    assert writer.get_stats()['replayed'] == 3
+
+
+def test_full_queue_spills_after_backpressure(tmp_path):
+    """佇列已滿且背景執行緒未消費時，等待 block_timeout 後交給背景執行緒落地暫存"""
+    db = FlakyDatabase()
+    writer = WriteBehindWriter(db, {'journal_path': str(tmp_path / 'spill.jsonl'),
+                                    'dead_letter_path': str(tmp_path / 'dead.jsonl'),
+                                    'queue_size': 1, 'block_timeout': 0.01})
+    writer.submit_detections(_frame('car'))
+    writer.submit_detections(_frame('bus'))
+
+    stats = writer.get_stats()
+    assert stats['depth'] == 1
+    assert stats['overflow'] == 1 and stats['overflowed'] == 1
+    assert stats['spilled'] == 0
+    assert db.prepare_threads == []  # 呼叫端不準備資料列、不等待截圖
+
+    # 逾時項目先落地暫存並重送，之後才寫入佇列中的資料
+    writer.start()
+    writer.stop()
+    assert db.rows == ['bus', 'car']
+    assert set(db.prepare_threads) == {'WriteBehindWriter'}
+    assert writer.get_stats()['spilled'] == 1
+    assert not writer.journal.pending()
+
+
+def test_overflow_keeps_memory_bounded(tmp_path):
+    """溢出項目也達到 queue_size 時捨棄影像幀，偵測記錄仍會寫入"""
+    db = FlakyDatabase()
+    writer = WriteBehindWriter(db, {'journal_path': str(tmp_path / 'spill.jsonl'),
+                                    'dead_letter_path': str(tmp_path / 'dead.jsonl'),
+                                    'queue_size': 1, 'block_timeout': 0})
+    frame = object()  # 影像幀的編碼快取（被捨棄後不會被存取）
+    for object_class in ('car', 'bus', 'truck'):
+        writer.submit_detections([(camera_id, results, frame)
+                                  for camera_id, results, _ in _frame(object_class)])
+
+    overflow = list(writer._overflow)
+    assert overflow[0][1][0][2] is frame
+    assert overflow[1][1][0][2] is None
+    assert writer.get_stats()['frames_dropped'] == 1
+
+
+def test_post_commit_error_is_not_spilled(tmp_path):
+    """交易提交後才發生的錯誤 (即使是連線錯誤) 計入已寫入，不落地暫存也不重送"""
+    db = FlakyDatabase()
+    writer = WriteBehindWriter(db, {'journal_path': str(tmp_path / 'spill.jsonl'),
+                                    'dead_letter_path': str(tmp_path / 'dead.jsonl'),
+                                    'retry_interval': 0})
+
+    db.fail_after_commit = True
+    writer.flush(writer._to_records([('detections', _frame('car', 'bus'))]))
+    stats = writer.get_stats()
+    assert (stats['written'], stats['post_commit_errors']) == (2, 1)
+    assert (stats['failed'], stats['spilled']) == (0, 0)
+    assert writer.healthy and not writer.journal.pending()
+
+    db.fail_after_commit = False
+    writer._replay_if_due()
+    writer.flush(writer._to_records([('detections', _frame('truck'))]))
+    assert db.rows == ['car', 'bus', 'truck']
+
+
+def test_bad_row_only_loses_itself(tmp_path):
+    """批次因資料錯誤失敗時逐筆重寫，只有出錯的記錄移到無法寫入檔；重送暫存時亦同"""
+    db = FlakyDatabase()
+    writer = WriteBehindWriter(db, {'journal_path': str(tmp_path / 'spill.jsonl'),
+                                    'dead_letter_path': str(tmp_path / 'dead.jsonl'),
+                                    'retry_interval': 0})
+    db.bad_classes = {'???'}
+
+    writer.flush(writer._to_records([('detections', _frame('car', '???', 'bus'))]))
+    assert db.rows == ['car', 'bus']
+    stats = writer.get_stats()
+    assert (stats['written'], stats['failed'], stats['dead_lettered']) == (2, 1, 1)
+    assert writer.healthy and not writer.journal.pending()
+
+    dead = [json.loads(line) for line in (tmp_path / 'dead.jsonl').read_text().splitlines()]
+    assert [record['object_class'] for record in dead] == ['???']
+    assert 'invalid input syntax' in dead[0]['error']
+
+    # 落地暫存的批次重送時也只移出出錯的記錄
+    db.available = False
+    writer.flush(writer._to_records([('detections', _frame('truck', '???', 'van'))]))
+    db.available = True
+    writer._replay_if_due()
+    assert db.rows == ['car', 'bus', 'truck', 'van']
+    assert writer.get_stats()['replayed'] == 3
+    assert writer.get_stats()['dead_lettered'] == 2
+    assert not writer.journal.pending()
+
+
+def test_row_retry_spills_on_connection_loss(tmp_path):
+    """逐筆重寫途中連線中斷時，尚未寫入的記錄落地暫存"""
+    db = FlakyDatabase()
+    writer = WriteBehindWriter(db, {'journal_path': str(tmp_path / 'spill.jsonl'),
+                                    'dead_letter_path': str(tmp_path / 'dead.jsonl')})
+    db.bad_classes = {'???'}
+
+    def write_rows(rows, original=db.write_detection_rows):
+        if len(rows) == 1 and rows[0]['object_class'] == 'bus':
+            db.available = False
+        return original(rows)
+
+    db.write_detection_rows = write_rows
+    writer.flush(writer._to_records([('detections', _frame('car', '???', 'bus', 'van')),
+                                     ('intrusion', {'fence_id': 'gate'})]))
+    assert db.rows == ['car']
+    assert not writer.healthy
+    stats = writer.get_stats()
+    assert (stats['written'], stats['dead_lettered'], stats['spilled']) == (1, 1, 3)
+
+
+class CommitCursor:
+    """只支援 execute_values 插入偵測記錄的游標替身"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self._count = 0
+
+    def mogrify(self, template, args):
+        self._count += 1
+        return b'(?)'
+
+    def execute(self, sql, params=None):
+        pass
+
+    def fetchall(self):
+        count, self._count = self._count, 0
+        return [(i + 1,) for i in range(count)]
+
+
+class CommitConnection:
+    """記錄提交與回復的連線替身"""
+
+    encoding = 'UTF8'
+    closed = 0
+
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return CommitCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+class FailingSummary:
+    """提交後累計統計時失敗的彙總器替身"""
+
+    def record_rows(self, rows):
+        raise RuntimeError("summary unavailable")
+
+
+def test_handler_reports_post_commit_errors():
+    """DatabaseHandler 在提交後失敗時拋出 PostCommitError 並帶回 ID，同步寫入仍回傳 ID"""
+    handler = DatabaseHandler({'enabled': False})
+    handler.config['enabled'] = True
+    conn = CommitConnection()
+    handler.get_connection = lambda: conn
+    handler.return_connection = lambda connection: None
+    handler.summary = FailingSummary()
+
+    rows = handler.prepare_detection_rows(_frame('car', 'bus'))
+    try:
+        handler.write_detection_rows(rows)
+    except PostCommitError as e:
+        assert e.result == [1, 2]
+        assert isinstance(e.error, RuntimeError)
+    else:
+        raise AssertionError("應拋出 PostCommitError")
+    assert (conn.commits, conn.rollbacks) == (1, 0)
+
+    assert handler.save_detections_batch(_frame('truck')) == [1]
+    assert conn.commits == 2
+
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_spill_and_replay_in_order(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_full_queue_spills_after_backpressure(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_overflow_keeps_memory_bounded(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_post_commit_error_is_not_spilled(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_bad_row_only_loses_itself(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_row_retry_spills_on_connection_loss(Path(tmp))
+    test_handler_reports_post_commit_errors()
+    print("✅ Write-behind 寫入測試通過")
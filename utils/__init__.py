@@ -3,5 +3,8 @@
 from .config_manager import ConfigManager
 from .logger import setup_logger
 from .performance import PerformanceMonitor
+from .perceptual_cache import PerceptualHashCache
+from .frame_artifacts import ArtifactStats, FrameArtifacts
 
-__all__ = ['ConfigManager', 'setup_logger', 'PerformanceMonitor']
+__all__ = ['ConfigManager', 'setup_logger', 'PerformanceMonitor', 'PerceptualHashCache',
+           'FrameArtifacts', 'ArtifactStats']
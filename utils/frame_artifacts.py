@@ -0,0 +1,208 @@
+"""影像幀編碼快取 - 同一幀的 JPEG / Base64 / 縮圖 / 局部截圖只編碼一次"""
+
+import base64
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class FrameArtifacts:
+    """
+    單一影像幀的編碼結果快取
+
+    各種表示（完整 JPEG、縮小 JPEG、偵測框截圖）在第一次需要時才編碼，
+    之後同一幀的入侵事件、資料庫寫入與 WebSocket 推播共用同一份結果。
+
+    注意: 建立後影像內容不可再修改，否則快取內容會與影像不一致。
+    """
+
+    def __init__(self, frame: np.ndarray, quality: int = 85):
+        """
+        初始化快取
+
+        Args:
+            frame: 影像幀 (BGR)
+            quality: 預設 JPEG 品質
+        """
+        self.frame = frame
+        self.quality = quality
+
+        self._cache: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+
+        self.encodes = 0   # 實際執行 JPEG 編碼次數
+        self.requests = 0  # 取用次數（含快取命中）
+
+    def _get(self, key: Tuple, build, count: bool = True):
+        """取得快取值，不存在時建立（count 表示是否計入取用次數）"""
+        with self._lock:
+            if count:
+                self.requests += 1
+            value = self._cache.get(key)
+            if value is None:
+                value = build()
+                self._cache[key] = value
+            return value
+
+    def _encode(self, image: np.ndarray, quality: int) -> bytes:
+        """JPEG 編碼（需持有鎖）"""
+        self.encodes += 1
+        _, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return buffer.tobytes()
+
+    def jpeg(self, quality: int = None, max_width: int = None) -> bytes:
+        """
+        取得 JPEG 位元組
+
+        Args:
+            quality: JPEG 品質（預設使用建立時的品質）
+            max_width: 最大寬度，超過時等比例縮小（None 表示原尺寸）
+
+        Returns:
+            bytes: JPEG 資料
+        """
+        key = self._frame_key(quality, max_width)
+        _, quality, max_width = key
+
+        def build():
+            image = self.frame
+            if max_width is not None:
+                height, width = image.shape[:2]
+                size = (max_width, max(1, round(height * max_width / width)))
+                image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            return self._encode(image, quality)
+
+        return self._get(key, build)
+
+    def _frame_key(self, quality: Optional[int], max_width: Optional[int]) -> Tuple:
+        """完整影像表示的快取鍵（不需縮小時 max_width 視為 None）"""
+        if max_width is not None and self.frame.shape[1] <= max_width:
+            max_width = None
+        return ('jpeg', quality or self.quality, max_width)
+
+    def _crop_key(self, bbox: List[float], margin: float, quality: Optional[int]) -> Tuple:
+        """局部截圖的快取鍵"""
+        return ('crop',) + self.expand_bbox(bbox, self.frame.shape, margin) + (quality or self.quality,)
+
+    def base64(self, quality: int = None, max_width: int = None) -> str:
+        """
+        取得 Base64 編碼的 JPEG
+
+        Args:
+            quality: JPEG 品質
+            max_width: 最大寬度（None 表示原尺寸）
+
+        Returns:
+            str: Base64 字串
+        """
+        data = self.jpeg(quality, max_width)
+        return self._get(
+            ('base64',) + self._frame_key(quality, max_width),
+            lambda: base64.b64encode(data).decode('utf-8'),
+            count=False
+        )
+
+    @staticmethod
+    def expand_bbox(bbox: List[float], frame_shape: Tuple[int, ...],
+                    margin: float = 0.1) -> Tuple[int, int, int, int]:
+        """
+        依比例擴展邊界框並限制在影像範圍內
+
+        Args:
+            bbox: [x1, y1, x2, y2]
+            frame_shape: 影像形狀
+            margin: 每邊擴展的比例（相對於框的寬高）
+
+        Returns:
+            Tuple[int, int, int, int]: 擴展後的 (x1, y1, x2, y2)
+        """
+        x1, y1, x2, y2 = map(int, bbox)
+        h, w = frame_shape[:2]
+        margin_x = int((x2 - x1) * margin)
+        margin_y = int((y2 - y1) * margin)
+        return (max(0, x1 - margin_x), max(0, y1 - margin_y),
+                min(w, x2 + margin_x), min(h, y2 + margin_y))
+
+    def crop_jpeg(self, bbox: List[float], margin: float = 0.1,
+                  quality: int = None) -> Optional[bytes]:
+        """
+        取得偵測框局部截圖的 JPEG
+
+        Args:
+            bbox: [x1, y1, x2, y2]
+            margin: 每邊擴展的比例
+            quality: JPEG 品質
+
+        Returns:
+            bytes: JPEG 資料，截圖範圍為空時回傳 None
+        """
+        key = self._crop_key(bbox, margin, quality)
+        _, x1, y1, x2, y2, quality = key
+        if x2 <= x1 or y2 <= y1:
+            return None
+        return self._get(key, lambda: self._encode(self.frame[y1:y2, x1:x2], quality))
+
+    def crop_base64(self, bbox: List[float], margin: float = 0.1,
+                    quality: int = None) -> Optional[str]:
+        """
+        取得偵測框局部截圖的 Base64 編碼 JPEG
+
+        Args:
+            bbox: [x1, y1, x2, y2]
+            margin: 每邊擴展的比例
+            quality: JPEG 品質
+
+        Returns:
+            str: Base64 字串，截圖範圍為空時回傳 None
+        """
+        data = self.crop_jpeg(bbox, margin, quality)
+        if data is None:
+            return None
+        return self._get(
+            ('base64',) + self._crop_key(bbox, margin, quality),
+            lambda: base64.b64encode(data).decode('utf-8'),
+            count=False
+        )
+
+    def get_stats(self) -> Dict[str, int]:
+        """取得本幀的編碼統計"""
+        return {
+            'encodes': self.encodes,
+            'requests': self.requests,
+            'cached': len(self._cache)
+        }
+
+
+class ArtifactStats:
+    """累計多個影像幀的編碼統計"""
+
+    def __init__(self):
+        self.frames = 0
+        self.encodes = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def record(self, artifacts: FrameArtifacts):
+        """
+        累計一幀的編碼統計
+
+        Args:
+            artifacts: 已用完的 FrameArtifacts
+        """
+        with self._lock:
+            self.frames += 1
+            self.encodes += artifacts.encodes
+            self.requests += artifacts.requests
+
+    def get_stats(self) -> Dict:
+        """取得累計統計"""
+        with self._lock:
+            return {
+                'frames': self.frames,
+                'encodes': self.encodes,
+                'requests': self.requests,
+                'encodes_per_frame': round(self.encodes / self.frames, 2) if self.frames else 0.0,
+                'saved_encodes': self.requests - self.encodes
+            }
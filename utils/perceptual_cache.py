@@ -0,0 +1,167 @@
+"""感知雜湊快取 - 近似影像共用辨識結果"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def dhash(image: np.ndarray, hash_size: int = 16) -> int:
+    """
+    計算影像的差異雜湊 (dHash)
+
+    將影像縮小為 (hash_size+1) x hash_size 的灰階圖,
+    比較水平相鄰像素的亮度差,得到 hash_size*hash_size 位元的雜湊值。
+
+    Args:
+        image: 輸入影像 (BGR 或灰階)
+        hash_size: 雜湊邊長 (16 = 256 位元；8 = 64 位元的雜湊無法區分車牌字元)
+
+    Returns:
+        int: 雜湊值
+    """
+    if image.ndim == 3:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = image
+
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    diff = small[:, 1:] > small[:, :-1]
+
+    value = 0
+    for bit in np.packbits(diff.ravel()):
+        value = (value << 8) | int(bit)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """計算兩個雜湊值的漢明距離"""
+    return bin(a ^ b).count('1')
+
+
+class PerceptualHashCache:
+    """以感知雜湊為鍵的 LRU 快取 (支援容忍距離)"""
+
+    def __init__(self, max_size: int = 100, tolerance: int = 0,
+                 aspect_tolerance: float = 0.1, hash_size: int = 16):
+        """
+        初始化快取
+
+        Args:
+            max_size: 最多保留筆數
+            tolerance: 視為相同影像的最大漢明距離
+            aspect_tolerance: 視為相同影像的最大長寬比差異 (比例)
+            hash_size: dHash 邊長 (雜湊位元數為其平方)
+        """
+        self.max_size = max(1, int(max_size))
+        self.tolerance = tolerance
+        self.aspect_tolerance = aspect_tolerance
+        self.hash_size = hash_size
+
+        # 結構: {hash: (aspect_ratio, value)}
+        self._entries: "OrderedDict[int, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, image: np.ndarray) -> Tuple[int, float]:
+        """
+        計算影像的快取鍵
+
+        Args:
+            image: 輸入影像
+
+        Returns:
+            Tuple[int, float]: (dHash, 長寬比)
+        """
+        h, w = image.shape[:2]
+        return dhash(image, self.hash_size), (w / h if h else 0.0)
+
+    def _find(self, image_hash: int, aspect: float) -> Optional[int]:
+        """尋找符合容忍距離的項目 (需持有鎖)"""
+        entry = self._entries.get(image_hash)
+        if entry is not None and self._aspect_matches(entry[0], aspect):
+            return image_hash
+
+        if self.tolerance <= 0:
+            return None
+
+        best_key = None
+        best_distance = self.tolerance + 1
+        for key, (entry_aspect, _) in self._entries.items():
+            distance = hamming_distance(key, image_hash)
+            if distance < best_distance and self._aspect_matches(entry_aspect, aspect):
+                best_key = key
+                best_distance = distance
+        return best_key
+
+    def _aspect_matches(self, a: float, b: float) -> bool:
+        """長寬比是否在容忍範圍內"""
+        if a == 0 or b == 0:
+            return a == b
+        return abs(a - b) / max(a, b) <= self.aspect_tolerance
+
+    def get(self, key: Tuple[int, float]) -> Tuple[bool, Any]:
+        """
+        查詢快取
+
+        Args:
+            key: make_key() 回傳的快取鍵
+
+        Returns:
+            Tuple[bool, Any]: (是否命中, 快取值)
+        """
+        image_hash, aspect = key
+        with self._lock:
+            found = self._find(image_hash, aspect)
+            if found is None:
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(found)
+            self.hits += 1
+            return True, self._entries[found][1]
+
+    def put(self, key: Tuple[int, float], value: Any):
+        """
+        寫入快取 (超過容量時淘汰最久未使用的項目)
+
+        Args:
+            key: make_key() 回傳的快取鍵
+            value: 快取值
+        """
+        image_hash, aspect = key
+        with self._lock:
+            self._entries[image_hash] = (aspect, value)
+            self._entries.move_to_end(image_hash)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """清空快取與統計"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_ratio(self) -> float:
+        """命中率"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get_stats(self) -> Dict:
+        """取得快取統計"""
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hit_ratio, 3)
+        }
@@ -2,16 +2,16 @@
 
 import os
 import sys
+import base64
 import cv2
 import json
-import base64
 import time
 import threading
 import yaml
 from pathlib import Path
-from flask import Flask, render_template, Response, jsonify, request
+from flask import Flask, render_template, Response, jsonify, request, send_file, abort, redirect
 from flask_socketio import SocketIO, emit
-from datetime import datetime
+from datetime import datetime, timedelta
 from queue import Queue, Empty
 
 # 加入專案路徑
@@ -20,9 +20,13 @@ sys.path.insert(0, str(Path(__file__).parent))
 from utils.config_manager import ConfigManager
 from utils.logger import setup_logger
 from core.system import MultiModalRecognitionSystem
+from core.result_bus import ResultBus
 from modules.license_plate import LicensePlateRecognizer
-from modules.virtual_fence import VirtualFenceManager
-from database.handler import DatabaseHandler
+from modules.virtual_fence import VirtualFenceManager, normalize_points
+from modules.tripwire import TripwireManager
+from utils.frame_artifacts import ArtifactStats, FrameArtifacts
+from database import create_storage
+from database.snapshot_store import SnapshotStore
 
 # 初始化 Flask
 app = Flask(__name__)
@@ -37,16 +41,21 @@ socketio = SocketIO(app,
 frame_queue = Queue(maxsize=2)
 detection_queue = Queue(maxsize=100)
 latest_frame = None
+latest_artifacts = None  # latest_frame 的編碼快取（串流與 /api/current_frame 共用）
+artifact_stats = ArtifactStats()  # 每幀影像編碼次數統計
 system = None
 config = None
 logger = None
 db_handler = None  # 資料庫處理器
-fence_manager = None  # 電子圍籬管理器
+fence_managers = {}  # 電子圍籬管理器 {攝影機 ID: VirtualFenceManager}
+tripwire_managers = {}  # 絆線管理器 {攝影機 ID: TripwireManager}
+active_camera_id = None  # 目前串流的攝影機 ID
+result_bus = None  # 結果匯流排（資料庫寫入、WebSocket 推播、圍籬警報各自的執行緒）
 
 
 def init_system():
     """初始化辨識系統"""
-    global system, config, logger, db_handler, fence_manager
+    global system, config, logger, db_handler, fence_managers, tripwire_managers, result_bus
     
     # 載入配置
     config = ConfigManager('config/config.yaml')
@@ -57,7 +66,7 @@ def init_system():
     db_config = config.get('database', {})
     if db_config.get('enabled', True):
         try:
-            db_handler = DatabaseHandler(db_config, logger)
+            db_handler = create_storage(db_config, logger)
             logger.info("✓ 資料庫連接成功")
         except Exception as e:
             logger.error(f"資料庫連接失敗: {e}")
@@ -67,39 +76,92 @@ def init_system():
         db_handler = None
         logger.info("資料庫功能已停用")
     
+    # 初始化結果匯流排：辨識執行緒只發布，各輸出端在自己的執行緒消費
+    result_bus = ResultBus(config.get('result_bus', {}), logger)
+    if db_handler:
+        # 資料庫寫入不可捨棄結果：佇列滿時阻塞發布端，而不是沿用匯流排預設的 drop_oldest
+        result_bus.subscribe('database', on_database_message,
+                             topics=['detections', 'fence_intrusion'],
+                             queue_size=500, policy='block', block_timeout=5.0, batch_size=50)
+    result_bus.subscribe('websocket', on_websocket_message,
+                         topics=['detections', 'fence_intrusion', 'line_crossing'])
+    result_bus.subscribe('alerts', on_alert_message, topics=['fence_alert'])
+    result_bus.start()
+    
     # 初始化電子圍籬
+    # 入侵事件回調只發布到匯流排，警報在 alerts 輸出端處理
+    def on_intrusion(event):
+        result_bus.publish('fence_alert', event)
+    
+    # 每個攝影機一個管理器（停用時不載入圍籬，之後可熱重載啟用）
+    fence_managers = {}
+    for cam in config.get_enabled_cameras():
+        manager = VirtualFenceManager(logger, camera_id=cam['id'])
+        manager.register_intrusion_callback(on_intrusion)
+        fence_managers[cam['id']] = manager
+    
     fence_config = config.get('virtual_fences', {})
     if fence_config.get('enabled', False):
-        fence_manager = VirtualFenceManager(logger)
-        fence_manager.load_fences_from_config(fence_config)
-        
-        # 註冊入侵事件回調
-        def on_intrusion(event):
-            logger.warning(f"🚨 電子圍籬警報: {event['fence_name']} - {event['object_class']}")
-            # 透過 WebSocket 發送警報到前端
-            socketio.emit('fence_intrusion', event, namespace='/detections')
-        
-        fence_manager.register_intrusion_callback(on_intrusion)
+        for manager in fence_managers.values():
+            manager.load_fences_from_config(fence_config)
         logger.info("✓ 電子圍籬功能已啟用")
     else:
-        fence_manager = None
         logger.info("電子圍籬功能已停用")
     
+    # 初始化絆線（方向性跨線計數）
+    tripwire_config = config.get('tripwires', {})
+    tripwire_managers = {}
+    if tripwire_config.get('enabled', False):
+        def on_crossing(event):
+            result_bus.publish('line_crossing', event)
+        
+        for cam in config.get_enabled_cameras():
+            manager = TripwireManager(
+                logger, camera_id=cam['id'],
+                track_timeout=tripwire_config.get('track_timeout', 5.0)
+            )
+            manager.load_from_config(tripwire_config)
+            manager.register_crossing_callback(on_crossing)
+            tripwire_managers[cam['id']] = manager
+        logger.info("✓ 絆線計數功能已啟用")
+    
     # 初始化系統
     system = MultiModalRecognitionSystem(config.config, logger)
     
     # 註冊車牌辨識模組
     plate_config = config.get_module_config('license_plate')
     if plate_config.get('enabled', True):
-        plate_recognizer = LicensePlateRecognizer(plate_config, logger)
+        plate_recognizer = LicensePlateRecognizer(
+            plate_config, logger, config.get_performance_config()
+        )
         system.register_recognizer(plate_recognizer)
     
     logger.info("✓ 系統初始化完成")
 
 
+def apply_fence_config(fence_config: dict) -> dict:
+    """
+    將圍籬配置套用到執行中的系統（不需重新啟動）
+    
+    Args:
+        fence_config: virtual_fences 配置區塊
+        
+    Returns:
+        dict: {攝影機 ID: 重載統計}
+    """
+    config.config['virtual_fences'] = fence_config
+    if not fence_config.get('enabled', False):
+        fence_config = {**fence_config, 'fences': []}
+    
+    return {
+        camera_id: manager.reload_fences(fence_config)
+        for camera_id, manager in fence_managers.items()
+    }
+
+
 def process_camera():
     """處理攝影機串流"""
-    global latest_frame
+    global latest_frame, latest_artifacts, active_camera_id
     
     cameras = config.get_enabled_cameras()
     if not cameras:
@@ -109,6 +171,9 @@ def process_camera():
     cam = cameras[0]  # 使用第一個攝影機
     rtsp_url = cam['rtsp_url']
     camera_id = cam['id']
+    active_camera_id = camera_id
+    fence_manager = fence_managers.get(camera_id)
+    tripwire_manager = tripwire_managers.get(camera_id)
     
     logger.info(f"連接攝影機: {rtsp_url}")
     cap = cv2.VideoCapture(rtsp_url)
@@ -124,6 +189,9 @@ def process_camera():
     process_interval = cam.get('process_interval', 2.0)
     last_process_time = time.time()
     
+    # 此攝影機使用的辨識模組（依 cameras[].modules）
+    recognizers = system.resolve_recognizers(cam)
+    
     while True:
         ret, frame = cap.read()
         if not ret:
@@ -139,8 +207,16 @@ def process_camera():
         if current_time - last_process_time >= process_interval:
             logger.debug(f"處理第 {frame_count} 幀...")
             
+            # 依目前解析度編譯正規化圍籬（解析度未變更時不做任何事）
+            if fence_manager:
+                fence_manager.set_frame_size((frame.shape[1], frame.shape[0]))
+            
             # 執行辨識（使用追蹤模式以支援停留時間功能）
-            results = system.process_image(frame, conf_threshold, track=True)
+            results = system.process_image(
+                frame, conf_threshold, track=True, camera_id=camera_id,
+                zone_checker=fence_manager.contains_detection if fence_manager else None,
+                recognizers=recognizers
+            )
             logger.info(f"偵測到 {len(results)} 個物件")
             
             # 繪製框選結果
@@ -150,51 +226,50 @@ def process_camera():
             if fence_manager and results:
                 # 提取基本偵測資訊
                 detections = [r['base_detection'] for r in results]
-                intrusions = fence_manager.check_detections(detections)
+                intrusions = fence_manager.check_detections(detections, frame.shape)
                 
                 if intrusions:
                     logger.warning(f"🚨 偵測到 {len(intrusions)} 個電子圍籬入侵事件")
                     
-                    # 儲存入侵事件（包含截圖）
-                    for intrusion in intrusions:
-                        # 擷取當前影像並轉成 base64
-                        _, buffer = cv2.imencode('.jpg', annotated_frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-                        snapshot_base64 = base64.b64encode(buffer).decode('utf-8')
-                        
-                        # 準備儲存資料
-                        intrusion_data = {
-                            'fence_id': intrusion['fence_id'],
-                            'fence_name': intrusion['fence_name'],
-                            'object_class': intrusion['object_class'],
-                            'confidence': intrusion['confidence'],
-                            'bbox': intrusion['bbox'],
-                            'camera_id': camera_id,
-                            'camera_name': cam.get('name', '未命名'),
-                            'snapshot_base64': snapshot_base64,
-                            'timestamp': intrusion['timestamp']
-                        }
-                        
-                        # 儲存到資料庫
-                        if db_handler:
-                            db_handler.save_fence_intrusion(intrusion_data)
-                        
-                        # 同時發送到前端（帶圖片）
-                        socketio.emit('fence_intrusion', {
-                            **intrusion,
-                            'camera_name': cam.get('name', '未命名'),
-                            'snapshot_base64': snapshot_base64
-                        }, namespace='/detections')
+                    # 同一幀的截圖只編碼一次，所有入侵事件與輸出端共用
+                    snapshot = FrameArtifacts(annotated_frame, quality=85)
+                    result_bus.publish('fence_intrusion', {
+                        'camera_id': camera_id,
+                        'camera_name': cam.get('name', '未命名'),
+                        'intrusions': intrusions,
+                        'snapshot_jpeg': snapshot.jpeg(),  # 資料庫輸出端存入截圖儲存區
+                        'snapshot_base64': snapshot.base64()  # 即時推播
+                    })
+                    artifact_stats.record(snapshot)
+            
+            # 絆線跨越計數（事件由回調發送到前端）
+            if tripwire_manager:
+                crossings = tripwire_manager.update(
+                    [r['base_detection'] for r in results], frame.shape
+                )
+                if crossings:
+                    logger.info(f"偵測到 {len(crossings)} 個跨線事件")
             
             # 繪製電子圍籬（會自動顯示停留時間）
             if fence_manager:
                 fence_manager.draw_all_fences(annotated_frame)
+            if tripwire_manager:
+                tripwire_manager.draw_all(annotated_frame)
             
             latest_frame = annotated_frame
+            latest_artifacts = FrameArtifacts(annotated_frame, quality=85)
             
-            # 發送辨識結果到前端（傳遞原始影像用於截取車輛）
+            # 發布辨識結果（附原始影像的編碼快取，資料庫輸出端用於截取車輛）
             if results:
-                logger.info(f"發送 {len(results)} 個偵測結果到前端")
-                send_detection_results(camera_id, results, frame)
+                logger.info(f"發布 {len(results)} 個偵測結果")
+                frame_artifacts = FrameArtifacts(frame, quality=85)
+                result_bus.publish('detections', {
+                    'camera_id': camera_id,
+                    'results': results,
+                    'artifacts': frame_artifacts
+                })
+                if not db_handler:
+                    artifact_stats.record(frame_artifacts)
             else:
                 logger.warning("沒有偵測到任何物件")
             
@@ -205,11 +280,16 @@ def process_camera():
                 pass
             else:
                 latest_frame = frame
+                latest_artifacts = FrameArtifacts(frame, quality=85)
         
         # 放入隊列供串流使用
         if not frame_queue.full():
             try:
-                frame_queue.put(latest_frame if latest_frame is not None else frame, block=False)
+                # 未重新辨識時放入同一份快取，串流不會重複編碼同一幀
+                frame_queue.put(
+                    latest_artifacts if latest_artifacts is not None else FrameArtifacts(frame),
+                    block=False
+                )
             except:
                 pass
 
@@ -247,18 +327,67 @@ def draw_detections(frame, results):
     return frame
 
 
-def send_detection_results(camera_id, results, frame=None):
-    """發送辨識結果到前端 - 顯示所有物件偵測"""
-    # 先寫入資料庫（與 main.py 邏輯一致）
-    # 傳遞原始影像幀以便截取車輛局部畫面
-    if db_handler and results:
-        try:
-            db_handler.save_detection(camera_id, results, frame)
-            logger.debug(f"已寫入 {len(results)} 筆資料到資料庫")
-        except Exception as e:
-            logger.error(f"寫入資料庫失敗: {e}")
+def on_database_message(messages):
+    """資料庫輸出端：批次寫入偵測結果，逐筆寫入圍籬入侵事件"""
+    # 佇列中累積的多幀偵測結果合併為一次批次寫入
+    # （傳遞原始影像幀的編碼快取以便截取車輛局部畫面）
+    frames = [
+        (m.payload['camera_id'], m.payload['results'], m.payload['artifacts'])
+        for m in messages if m.topic == 'detections'
+    ]
+    if frames:
+        db_handler.save_detections_batch(frames)
+        for _, _, artifacts in frames:
+            artifact_stats.record(artifacts)
+        logger.debug(f"已批次寫入 {len(frames)} 幀偵測結果到資料庫")
     
-    # 再透過 WebSocket 即時發送到前端
+    for message in messages:
+        if message.topic != 'fence_intrusion':
+            continue
+        payload = message.payload
+        for intrusion in payload['intrusions']:
+            db_handler.save_fence_intrusion({
+                'fence_id': intrusion['fence_id'],
+                'fence_name': intrusion['fence_name'],
+                'object_class': intrusion['object_class'],
+                'confidence': intrusion['confidence'],
+                'bbox': intrusion['bbox'],
+                'camera_id': payload['camera_id'],
+                'camera_name': payload['camera_name'],
+                'snapshot_jpeg': payload['snapshot_jpeg'],
+                'snapshot_base64': payload['snapshot_base64'],
+                'timestamp': intrusion['timestamp']
+            })
+
+
+def on_websocket_message(message):
+    """WebSocket 輸出端：推播偵測結果、入侵事件（帶截圖）與跨線事件"""
+    payload = message.payload
+    
+    if message.topic == 'detections':
+        send_detection_results(payload['camera_id'], payload['results'])
+    
+    elif message.topic == 'fence_intrusion':
+        for intrusion in payload['intrusions']:
+            socketio.emit('fence_intrusion', {
+                **intrusion,
+                'camera_name': payload['camera_name'],
+                'snapshot_base64': payload['snapshot_base64']
+            }, namespace='/detections')
+    
+    elif message.topic == 'line_crossing':
+        socketio.emit('line_crossing', payload, namespace='/detections')
+
+
+def on_alert_message(message):
+    """圍籬警報輸出端：記錄並即時發送入侵警報"""
+    event = message.payload
+    logger.warning(f"🚨 電子圍籬警報: {event['fence_name']} - {event['object_class']}")
+    socketio.emit('fence_intrusion', event, namespace='/detections')
+
+
+def send_detection_results(camera_id, results):
+    """發送辨識結果到前端 - 顯示所有物件偵測"""
     for result in results:
         detection = result['base_detection']
         timestamp = result['timestamp']
@@ -290,14 +419,12 @@ def generate_frames():
     """生成影像串流"""
     while True:
         try:
-            frame = frame_queue.get(timeout=1)
+            artifacts = frame_queue.get(timeout=1)
             
-            # 編碼為 JPEG
-            ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            if ret:
-                frame_bytes = buffer.tobytes()
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+            # 編碼為 JPEG（同一幀只編碼一次）
+            frame_bytes = artifacts.jpeg()
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
         except Empty:
             continue
         except Exception as e:
@@ -338,66 +465,190 @@ def video_feed():
 
 @app.route('/api/stats')
 def get_stats():
-    """取得統計資料"""
-    # TODO: 從資料庫查詢統計
+    """取得統計資料（偵測數與車牌數由每小時彙總表查詢，hours 指定範圍，預設 24 小時，最多 366 天）"""
+    try:
+        hours = max(1, min(int(request.args.get('hours', 24)), 366 * 24))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    camera_id = request.args.get('camera_id', None)
+    summary = None
+    if db_handler:
+        summary = db_handler.get_summary_stats(datetime.now() - timedelta(hours=hours), camera_id)
+    summary = summary or {}
+    
     return jsonify({
-        'total_detections': 0,
-        'total_plates': 0,
-        'success_rate': 0.0
+        'total_detections': summary.get('total_detections', 0),
+        'total_plates': summary.get('total_plates', 0),
+        'success_rate': summary.get('success_rate', 0.0),
+        'summary': {'hours': hours, **summary},
+        'summary_aggregator': db_handler.summary.get_stats() if db_handler and db_handler.summary else {},
+        'stationary_suppression': system.get_stationary_stats() if system else {},
+        'recognition_budget': system.scheduler.get_stats() if system else {},
+        'tripwires': {
+            camera_id: manager.get_stats() for camera_id, manager in tripwire_managers.items()
+        },
+        'frame_encoding': artifact_stats.get_stats(),
+        'result_bus': result_bus.get_stats() if result_bus else {},
+        'database_writer': db_handler.get_write_stats() if db_handler else {},
+        'database_pool': db_handler.get_pool_stats() if db_handler else {},
+        'snapshot_encoder': (db_handler.snapshot_encoder.get_stats()
+                             if db_handler and db_handler.snapshot_encoder else {})
     })
 
 
+def parse_history_args():
+    """
+    解析歷史記錄查詢參數
+    
+    Returns:
+        Dict: limit、cursor、start、end（ISO 時間）與 columns（以逗號分隔的 fields）
+    
+    Raises:
+        ValueError: 參數格式不正確
+    """
+    fields = request.args.get('fields')
+    start = request.args.get('start')
+    end = request.args.get('end')
+    return {
+        'limit': max(1, min(int(request.args.get('limit', 50)), 500)),
+        'cursor': request.args.get('cursor') or None,
+        'start': datetime.fromisoformat(start) if start else None,
+        'end': datetime.fromisoformat(end) if end else None,
+        'columns': [name.strip() for name in fields.split(',') if name.strip()] if fields else None
+    }
+
+
+def history_response(method: str, **filters):
+    """執行 db_handler 的分頁查詢並回傳 JSON（參數錯誤 400、資料庫未啟用 503）"""
+    if not db_handler:
+        return jsonify({
+            'success': False,
+            'error': '資料庫未啟用'
+        }), 503
+    
+    try:
+        page = getattr(db_handler, method)(**filters, **parse_history_args())
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"查詢歷史記錄失敗: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+    
+    return jsonify({
+        'success': True,
+        'data': page['items'],
+        'count': len(page['items']),
+        'next_cursor': page['next_cursor']
+    })
+
+
+@app.route('/api/detections')
+def get_detections():
+    """取得偵測記錄（keyset 分頁，以 next_cursor 取得下一頁）"""
+    return history_response(
+        'query_detections',
+        camera_id=request.args.get('camera_id'),
+        object_class=request.args.get('object_class')
+    )
+
+
 @app.route('/api/fence_intrusions')
 def get_fence_intrusions():
-    """取得圍籬入侵記錄"""
-    limit = int(request.args.get('limit', 50))
-    fence_id = request.args.get('fence_id', None)
+    """取得圍籬入侵記錄（keyset 分頁，截圖以 snapshot_url 另外取得）"""
+    return history_response(
+        'query_fence_intrusions',
+        fence_id=request.args.get('fence_id'),
+        camera_id=request.args.get('camera_id')
+    )
+
+
+@app.route('/api/fence_intrusions/<int:intrusion_id>/snapshot')
+def get_fence_intrusion_snapshot(intrusion_id):
+    """入侵截圖（已存入截圖儲存區的轉到 /snapshots/<ref>，舊資料由 Base64 解碼）"""
+    snapshot = db_handler.get_fence_intrusion_snapshot(intrusion_id) if db_handler else None
+    if not snapshot:
+        abort(404)
     
-    if db_handler:
-        try:
-            intrusions = db_handler.get_recent_fence_intrusions(fence_id, limit)
-            return jsonify({
-                'success': True,
-                'data': intrusions,
-                'count': len(intrusions)
-            })
-        except Exception as e:
-            logger.error(f"查詢圍籬入侵記錄失敗: {e}")
-            return jsonify({
-                'success': False,
-                'error': str(e)
-            }), 500
-    else:
+    store = db_handler.snapshot_store
+    if snapshot['snapshot_ref'] and store and store.exists(snapshot['snapshot_ref']):
+        return redirect(SnapshotStore.url_for(snapshot['snapshot_ref']), code=301)
+    if not snapshot['snapshot_base64']:
+        abort(404)
+    
+    response = Response(base64.b64decode(snapshot['snapshot_base64']), mimetype='image/jpeg')
+    # 入侵記錄的截圖寫入後不再改變
+    response.headers['Cache-Control'] = 'private, max-age=86400'
+    return response
+
+
+@app.route('/api/plates/search')
+def search_plates():
+    """車牌模糊搜尋（q: 車牌，max_distance: 編輯距離上限 0-3，start/end: ISO 時間）"""
+    if not db_handler:
         return jsonify({
             'success': False,
             'error': '資料庫未啟用'
         }), 503
+    
+    query = request.args.get('q', '').strip()
+    try:
+        max_distance = max(0, min(int(request.args.get('max_distance', 1)), 3))
+        limit = max(1, min(int(request.args.get('limit', 50)), 500))
+        start = request.args.get('start')
+        end = request.args.get('end')
+        time_range = (datetime.fromisoformat(start) if start else None,
+                      datetime.fromisoformat(end) if end else None)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    if not query:
+        return jsonify({'success': False, 'error': '請指定車牌 (q)'}), 400
+    
+    started = time.perf_counter()
+    results = db_handler.search_plates(query, max_distance, time_range, limit)
+    return jsonify({
+        'success': True,
+        'query': query,
+        'data': results,
+        'count': len(results),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+    })
+
+
+@app.route('/snapshots/<ref>')
+def get_snapshot(ref):
+    """截圖檔案（內容雜湊命名，內容永不改變，可長期快取）"""
+    store = db_handler.snapshot_store if db_handler else None
+    if store is None or not store.exists(ref):
+        abort(404)
+    
+    response = send_file(store.path_for(ref), mimetype='image/jpeg',
+                         etag=ref, conditional=True, max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 
 @app.route('/api/current_frame')
 def get_current_frame():
     """取得當前影像幀（用於圍籬設定）"""
-    global latest_frame
-    
-    if latest_frame is None:
+    if latest_artifacts is None:
         return jsonify({
             'success': False,
             'error': '尚未取得影像'
         }), 503
     
     try:
-        # 轉換為 JPEG 並編碼為 base64
-        _, buffer = cv2.imencode('.jpg', latest_frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
-        frame_base64 = base64.b64encode(buffer).decode('utf-8')
+        # 轉換為 JPEG 並編碼為 base64（同一幀的多次請求共用編碼結果）
+        frame_base64 = latest_artifacts.base64(quality=90)
         
         # 取得影像尺寸
-        height, width = latest_frame.shape[:2]
+        height, width = latest_artifacts.frame.shape[:2]
         
         return jsonify({
             'success': True,
             'frame': frame_base64,
             'width': width,
-            'height': height
+            'height': height,
+            'camera_id': active_camera_id
         })
     except Exception as e:
         logger.error(f"取得當前影像失敗: {e}")
@@ -428,15 +679,23 @@ def save_fence_config():
         if 'fences' not in config_dict['virtual_fences']:
             config_dict['virtual_fences']['fences'] = []
         
-        # 建立新圍籬
+        # 建立新圍籬（座標轉為正規化座標，與攝影機解析度無關）
+        points = fence_data['points']
+        frame_size = fence_data.get('frame_size')
+        if frame_size:
+            points = normalize_points(points, frame_size)
+        
         new_fence = {
             'id': fence_data['id'],
             'name': fence_data['name'],
-            'points': fence_data['points'],
+            'points': points,
             'target_classes': fence_data['target_classes'],
             'min_confidence': fence_data['min_confidence'],
             'enabled': True
         }
+        camera_id = fence_data.get('camera_id') or active_camera_id
+        if camera_id:
+            new_fence['camera_ids'] = [camera_id]
         
         # 檢查是否已存在
         existing_index = None
@@ -456,9 +715,13 @@ def save_fence_config():
         with open(config_path, 'w', encoding='utf-8') as f:
             yaml.dump(config_dict, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
         
+        # 直接套用到執行中的圍籬管理器
+        reloaded = apply_fence_config(config_dict['virtual_fences'])
+        
         return jsonify({
             'success': True,
-            'message': '配置已儲存，請重新啟動伺服器以套用'
+            'message': '配置已儲存並已套用',
+            'reloaded': reloaded
         })
     
     except Exception as e:
@@ -469,6 +732,27 @@ def save_fence_config():
         }), 500
 
 
+@app.route('/api/reload_fences', methods=['POST'])
+def reload_fences():
+    """重新讀取配置檔中的圍籬並套用（供外部工具修改配置後通知）"""
+    try:
+        with open(Path('config/config.yaml'), 'r', encoding='utf-8') as f:
+            config_dict = yaml.safe_load(f) or {}
+        
+        reloaded = apply_fence_config(config_dict.get('virtual_fences', {}))
+        return jsonify({
+            'success': True,
+            'reloaded': reloaded
+        })
+    
+    except Exception as e:
+        logger.error(f"重新載入圍籬配置失敗: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @socketio.on('connect', namespace='/detections')
 def handle_connect():
     """客戶端連接"""